@@ -52,6 +52,9 @@ class AgentJinjaTemplater(object):
              'haproxy_cmd': CONF.haproxy_amphora.haproxy_cmd,
              'heartbeat_interval': CONF.health_manager.heartbeat_interval,
              'heartbeat_key': CONF.health_manager.heartbeat_key,
+             'compact_heartbeats': CONF.health_manager.compact_heartbeats,
+             'heartbeat_full_state_interval':
+                 CONF.health_manager.heartbeat_full_state_interval,
              'use_upstart': CONF.haproxy_amphora.use_upstart,
              'respawn_count': CONF.haproxy_amphora.respawn_count,
              'respawn_interval': CONF.haproxy_amphora.respawn_interval,
@@ -83,14 +83,29 @@ class KeepalivedLvs(lvs_listener_base.LvsListenerApiServerBase):
             NEED_CHECK = False
 
         conf_file = util.keepalived_lvs_cfg_path(listener_id)
+        config = b''
+        b = stream.read(BUFFER)
+        while b:
+            config += b
+            b = stream.read(BUFFER)
+
+        # Skip the update when keepalived is already running this
+        # configuration
+        if (util.is_config_applied(conf_file, config) and
+                self._check_lvs_listener_status(listener_id) ==
+                consts.ACTIVE):
+            LOG.debug('The configuration of keepalivedlvs listener %s is '
+                      'unchanged, skipping the update.', listener_id)
+            res = webob.Response(
+                json={'message': 'OK', 'reload_required': False}, status=200)
+            res.headers['ETag'] = stream.get_md5()
+            return res
+
         flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
         # mode 00644
         mode = stat.S_IRUSR | stat.S_IWUSR | stat.S_IRGRP | stat.S_IROTH
         with os.fdopen(os.open(conf_file, flags, mode), 'wb') as f:
-            b = stream.read(BUFFER)
-            while b:
-                f.write(b)
-                b = stream.read(BUFFER)
+            f.write(config)
 
         init_system = util.get_os_init_system()
 
@@ -216,6 +231,10 @@ class KeepalivedLvs(lvs_listener_base.LvsListenerApiServerBase):
             if consts.OFFLINE == self._check_lvs_listener_status(listener_id):
                 action = consts.AMP_ACTION_START
 
+        # The configuration that the service loads
+        conf_file = util.keepalived_lvs_cfg_path(listener_id)
+        config_md5 = util.get_config_md5(conf_file)
+
         cmd = ("/usr/sbin/service "
                "octavia-keepalivedlvs-{listener_id} "
                "{action}".format(listener_id=listener_id, action=action))
@@ -230,6 +249,11 @@ class KeepalivedLvs(lvs_listener_base.LvsListenerApiServerBase):
                          .format(action, listener_id)),
                 details=e.output), status=500)
 
+        if action == consts.AMP_ACTION_STOP:
+            util.clear_config_applied(conf_file)
+        else:
+            util.set_config_applied(conf_file, config_md5)
+
         return webob.Response(
             json=dict(message='OK',
                       details='keepalivedlvs listener {listener_id} '
@@ -330,5 +354,6 @@ class KeepalivedLvs(lvs_listener_base.LvsListenerApiServerBase):
             os.remove(init_path)
         if os.path.exists(util.keepalived_lvs_cfg_path(listener_id)):
             os.remove(util.keepalived_lvs_cfg_path(listener_id))
+        util.clear_config_applied(util.keepalived_lvs_cfg_path(listener_id))
 
         return webob.Response(json={'message': 'OK'})
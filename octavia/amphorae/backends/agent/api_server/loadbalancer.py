@@ -122,6 +122,17 @@ class Loadbalancer(object):
         new_config = haproxy_compatibility.process_cfg_for_version_compat(
             new_config)
 
+        # Skip the update when HAProxy is already running this configuration
+        if (util.is_config_applied(util.config_path(lb_id),
+                                   new_config.encode('utf-8')) and
+                self._check_haproxy_status(lb_id) == consts.ACTIVE):
+            LOG.debug('The configuration of haproxy-%s is unchanged, '
+                      'skipping the update.', lb_id)
+            res = webob.Response(
+                json={'message': 'OK', 'reload_required': False}, status=202)
+            res.headers['ETag'] = stream.get_md5()
+            return res
+
         with os.fdopen(os.open(name, flags, mode), 'w') as file:
             file.write(new_config)
 
@@ -224,6 +235,74 @@ class Loadbalancer(object):
 
         return res
 
+    def apply_haproxy_config(self, amphora_id, lb_id):
+        """Upload the haproxy config and apply it without a reload
+
+        The configuration is stored like upload_haproxy_config does, so
+        HAProxy uses it when it is restarted or reloaded. When HAProxy is
+        running the stored configuration and the only changes are server
+        weights or admin states, they are applied through the runtime API.
+
+        :param amphora_id: The id of the amphora to update
+        :param lb_id: The id of the loadbalancer
+        :returns: A response with reload_required set to True if HAProxy has
+                  to be reloaded to apply the configuration.
+        """
+        old_config = None
+        if os.path.exists(util.config_path(lb_id)):
+            with open(util.config_path(lb_id), 'r', encoding='utf-8') as file:
+                old_config = file.read()
+            # The changes are only computed from the configuration HAProxy
+            # is running, a configuration that failed to load needs a reload
+            if not util.is_config_applied(util.config_path(lb_id),
+                                          old_config.encode('utf-8')):
+                old_config = None
+
+        res = self.upload_haproxy_config(amphora_id, lb_id)
+        if (res.status_code != 202 or
+                not res.json.get('reload_required', True)):
+            return res
+
+        reload_required = True
+        if (old_config is not None and
+                self._check_haproxy_status(lb_id) == consts.ACTIVE):
+            with open(util.config_path(lb_id), 'r', encoding='utf-8') as file:
+                new_config = file.read()
+            changes = util.get_server_runtime_changes(old_config, new_config)
+            # An unchanged configuration may still refer to new certificate
+            # files, HAProxy only loads them when it is reloaded
+            if changes:
+                reload_required = not self._apply_server_changes(
+                    lb_id, changes)
+            if not reload_required:
+                util.set_config_applied(
+                    util.config_path(lb_id),
+                    md5(new_config.encode('utf-8'),
+                        usedforsecurity=False).hexdigest())  # nosec
+
+        response = webob.Response(
+            json={'message': 'OK', 'reload_required': reload_required},
+            status=202)
+        response.headers['ETag'] = res.headers['ETag']
+        return response
+
+    def _apply_server_changes(self, lb_id, changes):
+        lb_query = haproxy_query.HAProxyQuery(
+            util.haproxy_admin_sock_path(lb_id))
+        try:
+            for backend, server, setting, value in changes:
+                lb_query.set_server(backend, server, setting, value)
+        except Exception as e:
+            # The stored configuration is applied by the reload
+            LOG.warning('Failed to update haproxy-%(lb_id)s through the '
+                        'runtime API, it needs a reload: %(err)s',
+                        {'lb_id': lb_id, 'err': e})
+            return False
+        LOG.debug('Applied %(count)d server changes to haproxy-%(lb_id)s '
+                  'through the runtime API.',
+                  {'count': len(changes), 'lb_id': lb_id})
+        return True
+
     def start_stop_lb(self, lb_id, action):
         action = action.lower()
         if action not in [consts.AMP_ACTION_START,
@@ -257,6 +336,9 @@ class Loadbalancer(object):
                     # failure!
                     LOG.warning('Failed to save haproxy-%s state!', lb_id)
 
+        # The configuration that the service loads
+        config_md5 = util.get_config_md5(util.config_path(lb_id))
+
         cmd = ("/usr/sbin/service haproxy-{lb_id} {action}".format(
             lb_id=lb_id, action=action))
 
@@ -272,6 +354,11 @@ class Loadbalancer(object):
                     message="Error {0}ing haproxy".format(action),
                     details=e.output), status=500)
 
+        if action == consts.AMP_ACTION_STOP:
+            util.clear_config_applied(util.config_path(lb_id))
+        else:
+            util.set_config_applied(util.config_path(lb_id), config_md5)
+
         # If we are not in active/standby we need to send an IP
         # advertisement (GARP or NA). Keepalived handles this for
         # active/standby load balancers.
@@ -319,6 +406,10 @@ class Loadbalancer(object):
             os.remove(stats_socket)
         except Exception:
             pass
+        try:
+            os.remove(util.haproxy_admin_sock_path(lb_id))
+        except Exception:
+            pass
 
         # Since this script should be deleted at LB delete time
         # we can check for this path to see if VRRP is enabled
@@ -397,6 +488,9 @@ class Loadbalancer(object):
         if not os.path.exists(self._cert_dir(lb_id)):
             os.makedirs(self._cert_dir(lb_id))
 
+        # HAProxy loads the certificates when it is started or reloaded
+        util.clear_config_applied(util.config_path(lb_id))
+
         stream = Wrapped(flask.request.stream)
         file = self._cert_file_path(lb_id, filename)
         flags = os.O_WRONLY | os.O_CREAT
@@ -437,6 +531,73 @@ class Loadbalancer(object):
             os.remove(self._cert_file_path(lb_id, filename))
         return webob.Response(json=dict(message='OK'))
 
+    def sync_certificates(self, lb_id):
+        """Compares the certificates of a load balancer with a manifest
+
+        The manifest holds the md5sums of all of the certificates of the
+        load balancer, keyed by filename. The certificates that are not in
+        the manifest are deleted.
+
+        :returns: The filenames of the manifest that are missing or stale
+        """
+        manifest = flask.request.get_json(silent=True) or {}
+        manifest = manifest.get('certificates')
+        if not isinstance(manifest, dict):
+            return webob.Response(json=dict(
+                message='Invalid request',
+                details='A certificates manifest is required'), status=400)
+        for filename in manifest:
+            self._check_ssl_filename_format(filename)
+
+        stale = set(manifest)
+        cert_dir = self._cert_dir(lb_id)
+        try:
+            filenames = os.listdir(cert_dir)
+        except FileNotFoundError:
+            filenames = []
+        for filename in filenames:
+            cert_path = os.path.join(cert_dir, filename)
+            if not os.path.isfile(cert_path):
+                continue
+            if filename not in manifest:
+                LOG.debug('Deleting certificate %s of load balancer %s.',
+                          filename, lb_id)
+                os.remove(cert_path)
+                continue
+            with open(cert_path, 'rb') as crt_file:
+                md5sum = md5(crt_file.read(),
+                             usedforsecurity=False).hexdigest()  # nosec
+            if md5sum == manifest[filename]:
+                stale.discard(filename)
+
+        return webob.Response(json=dict(stale=sorted(stale)))
+
+    def upload_certificates(self, lb_id):
+        """Stores the certificates of a multipart/form-data request
+
+        Every part of the request is a certificate, named by its filename.
+        """
+        certificates = flask.request.files
+        for filename in certificates:
+            self._check_ssl_filename_format(filename)
+        if not certificates:
+            return webob.Response(json=dict(message='OK'))
+
+        os.makedirs(self._cert_dir(lb_id), exist_ok=True)
+
+        # HAProxy loads the certificates when it is started or reloaded
+        util.clear_config_applied(util.config_path(lb_id))
+
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+        # mode 00600
+        mode = stat.S_IRUSR | stat.S_IWUSR
+        for filename, certificate in certificates.items():
+            file = self._cert_file_path(lb_id, filename)
+            with os.fdopen(os.open(file, flags, mode), 'wb') as crt_file:
+                shutil.copyfileobj(certificate.stream, crt_file)
+
+        return webob.Response(json=dict(message='OK'))
+
     def _get_listeners_on_lb(self, lb_id):
         if os.path.exists(util.pid_path(lb_id)):
             if os.path.exists(
@@ -72,6 +72,11 @@ class Server(object):
                               '/loadbalancer/<amphora_id>/<lb_id>/haproxy',
                               view_func=self.upload_haproxy_config,
                               methods=['PUT'])
+        self.app.add_url_rule(rule=PATH_PREFIX +
+                              '/loadbalancer/<amphora_id>/<lb_id>/haproxy'
+                              '/runtime',
+                              view_func=self.apply_haproxy_config,
+                              methods=['PUT'])
         # TODO(gthiemonge) rename 'udp_listener' endpoint to 'lvs_listener'
         # when api_version is bumped
         self.app.add_url_rule(rule=PATH_PREFIX +
@@ -108,6 +113,14 @@ class Server(object):
         self.app.add_url_rule(rule=PATH_PREFIX + '/listeners',
                               view_func=self.get_all_listeners_status,
                               methods=['GET'])
+        self.app.add_url_rule(rule=PATH_PREFIX + '/loadbalancer/<lb_id>'
+                              '/certificates',
+                              view_func=self.upload_certificates,
+                              methods=['PUT'])
+        self.app.add_url_rule(rule=PATH_PREFIX + '/loadbalancer/<lb_id>'
+                              '/certificates/manifest',
+                              view_func=self.sync_certificates,
+                              methods=['POST'])
         self.app.add_url_rule(rule=PATH_PREFIX + '/loadbalancer/<lb_id>'
                               '/certificates/<filename>',
                               view_func=self.upload_certificate,
@@ -141,6 +154,9 @@ class Server(object):
     def upload_haproxy_config(self, amphora_id, lb_id):
         return self._loadbalancer.upload_haproxy_config(amphora_id, lb_id)
 
+    def apply_haproxy_config(self, amphora_id, lb_id):
+        return self._loadbalancer.apply_haproxy_config(amphora_id, lb_id)
+
     def upload_lvs_listener_config(self, amphora_id, listener_id):
         return self._lvs_listener.upload_lvs_listener_config(listener_id)
 
@@ -176,6 +192,12 @@ class Server(object):
         return self._loadbalancer.get_all_listeners_status(
             other_listeners=lvs_listeners)
 
+    def upload_certificates(self, lb_id):
+        return self._loadbalancer.upload_certificates(lb_id)
+
+    def sync_certificates(self, lb_id):
+        return self._loadbalancer.sync_certificates(lb_id)
+
     def upload_certificate(self, lb_id, filename):
         return self._loadbalancer.upload_certificate(lb_id, filename)
 
@@ -21,6 +21,7 @@ import subprocess
 import jinja2
 from oslo_config import cfg
 from oslo_log import log as logging
+from oslo_utils.secretutils import md5
 
 from octavia.amphorae.backends.utils import ip_advertisement
 from octavia.amphorae.backends.utils import network_utils
@@ -133,6 +134,70 @@ def haproxy_sock_path(lb_id):
     return os.path.join(CONF.haproxy_amphora.base_path, lb_id + '.sock')
 
 
+def haproxy_admin_sock_path(lb_id):
+    return os.path.join(CONF.haproxy_amphora.base_path, lb_id + '-admin.sock')
+
+
+def applied_config_md5_path(config_file):
+    return config_file + '.applied-md5'
+
+
+def _read_md5(path):
+    try:
+        with open(path, 'rb') as f:
+            return md5(f.read(), usedforsecurity=False).hexdigest()  # nosec
+    except OSError:
+        return None
+
+
+def is_config_applied(config_file, config):
+    """Checks if a configuration is already in use
+
+    :param config_file: The path of the configuration file
+    :param config: The configuration, as bytes
+    :returns: True if config_file contains config and the service was started
+              or reloaded with this content since it was last changed.
+    """
+    try:
+        with open(applied_config_md5_path(config_file), 'r',
+                  encoding='utf-8') as f:
+            applied_md5 = f.read().strip()
+    except OSError:
+        return False
+    md5sum = md5(config, usedforsecurity=False).hexdigest()  # nosec
+    return md5sum == applied_md5 and md5sum == _read_md5(config_file)
+
+
+def get_config_md5(config_file):
+    """Returns the md5sum of a configuration file, None if it is missing"""
+    return _read_md5(config_file)
+
+
+def set_config_applied(config_file, md5sum):
+    """Records the md5sum of the configuration the service is running"""
+    if md5sum is None:
+        return
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+    # mode 00644
+    mode = stat.S_IRUSR | stat.S_IWUSR | stat.S_IRGRP | stat.S_IROTH
+    try:
+        with os.fdopen(os.open(applied_config_md5_path(config_file),
+                               flags, mode), 'w') as f:
+            f.write(md5sum)
+    except OSError as e:
+        # The next upload of the same configuration is applied again
+        LOG.warning('Failed to record the applied configuration of %s: %s',
+                    config_file, e)
+
+
+def clear_config_applied(config_file):
+    """Forces the next upload of the configuration to be applied"""
+    try:
+        os.remove(applied_config_md5_path(config_file))
+    except FileNotFoundError:
+        pass
+
+
 def haproxy_check_script_path():
     return os.path.join(keepalived_check_scripts_dir(),
                         'haproxy_check_script.sh')
@@ -368,6 +433,66 @@ def vrrp_check_script_update(lb_id, action):
         text_file.write(cmd)
 
 
+def _parse_server_line(line):
+    """Split an HAProxy server line into its runtime settings and the rest.
+
+    :returns: (name, weight, enabled, other options), or None if the line is
+              not a server line with a weight.
+    """
+    tokens = line.split()
+    if len(tokens) < 2 or tokens[0] != 'server' or 'weight' not in tokens:
+        return None
+    weight_index = tokens.index('weight') + 1
+    if weight_index >= len(tokens):
+        return None
+    weight = tokens[weight_index]
+    options = [token for index, token in enumerate(tokens)
+               if index != weight_index and token != 'disabled']
+    return tokens[1], weight, 'disabled' not in tokens, options
+
+
+def get_server_runtime_changes(old_config, new_config):
+    """Get the HAProxy runtime API changes between two configurations.
+
+    Only the weight and the admin state of the existing servers can be
+    changed through the runtime API.
+
+    :param old_config: The configuration HAProxy is running with.
+    :param new_config: The new configuration.
+    :returns: A list of (backend, server, setting, value) tuples for the
+              "set server" command, or None if anything else changed.
+    """
+    old_lines = old_config.splitlines()
+    new_lines = new_config.splitlines()
+    if len(old_lines) != len(new_lines):
+        return None
+
+    changes = []
+    backend = None
+    for old_line, new_line in zip(old_lines, new_lines):
+        if old_line and not old_line[0].isspace():
+            # A new section starts
+            section = old_line.split()
+            backend = (section[1] if section[0] == 'backend' and
+                       len(section) > 1 else None)
+        if old_line == new_line:
+            continue
+        old_server = _parse_server_line(old_line)
+        new_server = _parse_server_line(new_line)
+        if backend is None or old_server is None or new_server is None:
+            return None
+        old_name, old_weight, old_enabled, old_options = old_server
+        name, weight, enabled, options = new_server
+        if old_name != name or old_options != options:
+            return None
+        if weight != old_weight:
+            changes.append((backend, name, 'weight', weight))
+        if enabled != old_enabled:
+            changes.append((backend, name, 'state',
+                            'ready' if enabled else 'maint'))
+    return changes
+
+
 def get_haproxy_vip_addresses(lb_id):
     """Get the VIP addresses for a load balancer.
 
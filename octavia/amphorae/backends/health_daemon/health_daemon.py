@@ -26,6 +26,7 @@ import simplejson
 
 from octavia.amphorae.backends.agent.api_server import util
 from octavia.amphorae.backends.health_daemon import health_sender
+from octavia.amphorae.backends.health_daemon import status_message
 from octavia.amphorae.backends.utils import haproxy_query
 from octavia.amphorae.backends.utils import keepalivedlvs_query
 
@@ -41,6 +42,8 @@ SEQ = 0
 # ver 1 - Adds UDP listener status when no pool or members are present
 # ver 2 - Switch to all listeners in a single combined haproxy config
 # ver 3 - Switch stats reporting to deltas
+# ver 4 - Compact binary encoding of the ver 3 message, sent when
+#         [health_manager] compact_heartbeats is enabled
 
 MSG_VER = 3
 
@@ -50,6 +53,10 @@ DELTA_METRICS = ('bin', 'bout', 'ereq', 'stot')
 COUNTERS = None
 COUNTERS_FILE = None
 
+# Pool statuses last sent in full, and when, for the pools deltas
+FULL_POOLS = None
+FULL_POOLS_TIME = None
+
 
 def get_counters_file():
     global COUNTERS_FILE
@@ -185,6 +192,46 @@ def calculate_stats_deltas(listener_id, row):
     return delta_values
 
 
+def _get_pools_structure(pools):
+    return {pool_id: set(pool['members']) for pool_id, pool in pools.items()}
+
+
+def set_pools_delta(msg):
+    """Replaces the pools of a message with their changes, if possible
+
+    Adds the digest of the pool statuses to the message. The complete pool
+    statuses are sent every [health_manager] heartbeat_full_state_interval
+    seconds, or when pools or members are added or removed. In between, the
+    message only contains the pools with a status change since the last
+    complete pool statuses sent, with only the changed members, and is
+    flagged as a delta.
+    """
+    global FULL_POOLS
+    global FULL_POOLS_TIME
+    pools = msg['pools']
+    msg['digest'] = status_message.get_pools_digest(pools)
+    now = time.monotonic()
+    if (FULL_POOLS is None or
+            now - FULL_POOLS_TIME >=
+            CONF.health_manager.heartbeat_full_state_interval or
+            _get_pools_structure(pools) != _get_pools_structure(FULL_POOLS)):
+        FULL_POOLS = pools
+        FULL_POOLS_TIME = now
+        return
+
+    pools_delta = {}
+    for pool_id, pool in pools.items():
+        full_pool = FULL_POOLS[pool_id]
+        members_delta = {
+            member_id: status for member_id, status in pool['members'].items()
+            if full_pool['members'][member_id] != status}
+        if members_delta or pool['status'] != full_pool['status']:
+            pools_delta[pool_id] = {'status': pool['status'],
+                                    'members': members_delta}
+    msg['pools'] = pools_delta
+    msg['delta'] = True
+
+
 def build_stats_message():
     """Build a stats message based on retrieved listener statistics.
 
@@ -215,11 +262,22 @@ def build_stats_message():
          },
          "ver": 3
         }
+
+    The message is version 4 when [health_manager] compact_heartbeats is
+    enabled. It has the same content, but is sent with the compact binary
+    encoding.
+
+    When [health_manager] heartbeat_full_state_interval is set, the message
+    also has a "digest" of the pool statuses, and "pools" may only hold the
+    changes since the last complete pool statuses sent, see
+    set_pools_delta.
     """
     global SEQ
     msg = {'id': CONF.amphora_agent.amphora_id,
            'seq': SEQ, 'listeners': {}, 'pools': {},
            'ver': MSG_VER}
+    if CONF.health_manager.compact_heartbeats:
+        msg['ver'] = status_message.COMPACT_MSG_VER
     SEQ += 1
     stat_sock_files = list_sock_stat_files()
     # TODO(rm_work) There should only be one of these in the new config system
@@ -269,4 +327,6 @@ def build_stats_message():
                     }
                 msg['listeners'][listener_id] = lvs_listener_dict
     persist_counters()
+    if CONF.health_manager.heartbeat_full_state_interval:
+        set_pools_delta(msg)
     return msg
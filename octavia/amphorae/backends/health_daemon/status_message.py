@@ -15,6 +15,7 @@
 import binascii
 import hashlib
 import hmac
+import uuid
 import zlib
 
 from oslo_log import log as logging
@@ -22,6 +23,7 @@ from oslo_serialization import jsonutils
 from oslo_utils import secretutils
 
 from octavia.common import exceptions
+from octavia.i18n import _
 
 LOG = logging.getLogger(__name__)
 
@@ -29,6 +31,26 @@ hash_algo = hashlib.sha256
 hash_len = 32
 hex_hash_len = 64
 
+# Heartbeat message version using the compact binary encoding
+COMPACT_MSG_VER = 4
+# First byte of a compact payload. A zlib stream always starts with a byte
+# that has 8 (deflate) in its lower four bits, so this cannot be mistaken for
+# the beginning of a JSON/zlib payload.
+COMPACT_MAGIC = 0x04
+# Statuses encoded as a single byte in compact payloads, any other status is
+# encoded as a length prefixed string. The index of a status is part of the
+# message format: only append new statuses to this tuple.
+COMPACT_STATUSES = (None, 'OPEN', 'FULL', 'UP', 'DOWN', 'DRAIN', 'MAINT',
+                    'no check', 'STOP', 'DOWN_UNAVAILABLE')
+_COMPACT_STATUS_CODES = {status: code for code, status in
+                         enumerate(COMPACT_STATUSES) if status is not None}
+_COMPACT_STATS = ('tx', 'rx', 'conns', 'totconns', 'ereq')
+# Flags of a compact payload
+_COMPACT_FLAG_DIGEST = 0x01
+_COMPACT_FLAG_DELTA = 0x02
+# Length, in bytes, of the pools digest
+POOLS_DIGEST_LEN = 8
+
 
 def to_hex(byte_array):
     return binascii.hexlify(byte_array).decode()
@@ -41,13 +63,185 @@ def encode_obj(obj):
 
 
 def decode_obj(binary_array):
+    if binary_array[:1] == bytes((COMPACT_MAGIC,)):
+        return decode_compact_obj(binary_array)
     json_str = zlib.decompress(binary_array).decode('utf-8')
     obj = jsonutils.loads(json_str)
     return obj
 
 
+def _encode_varint(value, buf):
+    value = int(value)
+    if value < 0:
+        raise ValueError(_('Negative values cannot be encoded: %s') % value)
+    while value > 0x7f:
+        buf.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buf.append(value)
+
+
+def _decode_varint(binary_array, pos):
+    value = 0
+    shift = 0
+    while True:
+        byte = binary_array[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+
+def _encode_uuid(value, buf):
+    # Only the canonical form can be rebuilt identically by the decoder
+    encoded = uuid.UUID(value)
+    if str(encoded) != value:
+        raise ValueError(_('%s is not a canonical UUID') % value)
+    buf.extend(encoded.bytes)
+
+
+def _decode_uuid(binary_array, pos):
+    return str(uuid.UUID(bytes=bytes(binary_array[pos:pos + 16]))), pos + 16
+
+
+def _encode_status(status, buf):
+    code = _COMPACT_STATUS_CODES.get(status)
+    if code is not None:
+        buf.append(code)
+    else:
+        encoded = status.encode('utf-8')
+        buf.append(0)
+        _encode_varint(len(encoded), buf)
+        buf.extend(encoded)
+
+
+def _decode_status(binary_array, pos):
+    code = binary_array[pos]
+    pos += 1
+    if code:
+        return COMPACT_STATUSES[code], pos
+    length, pos = _decode_varint(binary_array, pos)
+    return bytes(binary_array[pos:pos + length]).decode('utf-8'), pos + length
+
+
+def encode_compact_obj(obj):
+    """Encode a heartbeat message with the compact binary encoding.
+
+    The layout is the COMPACT_MAGIC byte, then the amphora id, the sequence
+    number, a flags byte and the pools digest if there is one, then the
+    listeners and the pools, each of them preceded by their count. UUIDs are
+    stored as 16 bytes, integers as unsigned LEB128 varints and statuses as
+    an index in COMPACT_STATUSES.
+    Pools are keyed either by "<pool_id>:<listener_id>" or "<pool_id>", so
+    their keys are stored as a count of UUIDs followed by the UUIDs.
+
+    :raises ValueError: The message cannot be encoded, for instance because
+                        an id is not a UUID.
+    """
+    buf = bytearray((COMPACT_MAGIC,))
+    _encode_uuid(obj['id'], buf)
+    _encode_varint(obj['seq'], buf)
+    flags = 0
+    if 'digest' in obj:
+        flags |= _COMPACT_FLAG_DIGEST
+    if obj.get('delta'):
+        flags |= _COMPACT_FLAG_DELTA
+    buf.append(flags)
+    if 'digest' in obj:
+        digest = bytes.fromhex(obj['digest'])
+        if len(digest) != POOLS_DIGEST_LEN:
+            raise ValueError(_('Invalid pools digest: %s') % obj['digest'])
+        buf.extend(digest)
+    listeners = obj.get('listeners', {})
+    _encode_varint(len(listeners), buf)
+    for listener_id, listener in listeners.items():
+        _encode_uuid(listener_id, buf)
+        _encode_status(listener['status'], buf)
+        for stat in _COMPACT_STATS:
+            _encode_varint(listener['stats'][stat], buf)
+    pools = obj.get('pools', {})
+    _encode_varint(len(pools), buf)
+    for pool_key, pool in pools.items():
+        key_ids = pool_key.split(':')
+        _encode_varint(len(key_ids), buf)
+        for key_id in key_ids:
+            _encode_uuid(key_id, buf)
+        _encode_status(pool['status'], buf)
+        members = pool['members']
+        _encode_varint(len(members), buf)
+        for member_id, member_status in members.items():
+            _encode_uuid(member_id, buf)
+            _encode_status(member_status, buf)
+    return bytes(buf)
+
+
+def decode_compact_obj(binary_array):
+    pos = 1
+    amphora_id, pos = _decode_uuid(binary_array, pos)
+    seq, pos = _decode_varint(binary_array, pos)
+    obj = {'id': amphora_id, 'seq': seq, 'listeners': {}, 'pools': {},
+           'ver': COMPACT_MSG_VER}
+    flags = binary_array[pos]
+    pos += 1
+    if flags & _COMPACT_FLAG_DIGEST:
+        obj['digest'] = bytes(
+            binary_array[pos:pos + POOLS_DIGEST_LEN]).hex()
+        pos += POOLS_DIGEST_LEN
+    if flags & _COMPACT_FLAG_DELTA:
+        obj['delta'] = True
+    count, pos = _decode_varint(binary_array, pos)
+    for i in range(count):
+        listener_id, pos = _decode_uuid(binary_array, pos)
+        status, pos = _decode_status(binary_array, pos)
+        stats = {}
+        for stat in _COMPACT_STATS:
+            stats[stat], pos = _decode_varint(binary_array, pos)
+        obj['listeners'][listener_id] = {'status': status, 'stats': stats}
+    count, pos = _decode_varint(binary_array, pos)
+    for i in range(count):
+        id_count, pos = _decode_varint(binary_array, pos)
+        key_ids = []
+        for j in range(id_count):
+            key_id, pos = _decode_uuid(binary_array, pos)
+            key_ids.append(key_id)
+        status, pos = _decode_status(binary_array, pos)
+        members = {}
+        member_count, pos = _decode_varint(binary_array, pos)
+        for j in range(member_count):
+            member_id, pos = _decode_uuid(binary_array, pos)
+            members[member_id], pos = _decode_status(binary_array, pos)
+        obj['pools'][':'.join(key_ids)] = {'status': status,
+                                           'members': members}
+    if pos != len(binary_array):
+        raise ValueError(_('Unexpected trailing data in compact heartbeat'))
+    return obj
+
+
+def get_pools_digest(pools):
+    """Returns a digest of the pool and member statuses of a heartbeat
+
+    :param pools: The complete "pools" of a heartbeat message.
+    :returns: The digest, as a hex string.
+    """
+    pools_json = jsonutils.dumps(pools, sort_keys=True).encode('utf-8')
+    return hash_algo(pools_json).hexdigest()[:POOLS_DIGEST_LEN * 2]
+
+
 def wrap_envelope(obj, key, hex=True):
-    payload = encode_obj(obj)
+    """Wrap a message and its HMAC.
+
+    Messages with the COMPACT_MSG_VER version use the compact binary
+    encoding. If they cannot be encoded this way, they are sent as version 3
+    messages with the JSON encoding, which carries the same content.
+    """
+    if obj.get('ver') == COMPACT_MSG_VER:
+        try:
+            payload = encode_compact_obj(obj)
+        except (KeyError, TypeError, ValueError) as e:
+            LOG.debug('Falling back to the JSON heartbeat encoding: %s', e)
+            payload = encode_obj(dict(obj, ver=COMPACT_MSG_VER - 1))
+    else:
+        payload = encode_obj(obj)
     hmc = get_hmac(payload, key, hex=hex)
     envelope = payload + hmc
     return envelope
@@ -148,6 +148,26 @@ class HAProxyQuery(object):
                     line['status'])
         return final_results
 
+    def set_server(self, backend, server, setting, value):
+        """Change a server setting with the 'set server' command.
+
+        This requires a stats socket with the admin level.
+
+        :param backend: Name of the backend of the server.
+        :param server: Name of the server.
+        :param setting: The setting to change, for example 'weight' or
+                        'state'.
+        :param value: The new value of the setting.
+        :raises Exception: if HAProxy rejects the command.
+        """
+        query = 'set server {backend}/{server} {setting} {value}'.format(
+            backend=backend, server=server, setting=setting, value=value)
+        result = self._query(query)
+        # HAProxy does not answer anything when the command succeeds
+        if result:
+            raise Exception(
+                _("HAProxy '{0}' query failed: {1}").format(query, result))
+
     def save_state(self, state_file_path):
         """Save haproxy connection state to a file.
 
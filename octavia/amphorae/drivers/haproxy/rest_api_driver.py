@@ -12,10 +12,12 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+from concurrent import futures
 import functools
 import hashlib
 import os
 import ssl
+import threading
 import time
 import warnings
 
@@ -30,6 +32,7 @@ from octavia.amphorae.driver_exceptions import exceptions as driver_except
 from octavia.amphorae.drivers import driver_base
 from octavia.amphorae.drivers.haproxy import exceptions as exc
 from octavia.amphorae.drivers.keepalived import vrrp_rest_driver
+from octavia.certificates.manager import cached
 from octavia.common.config import cfg
 from octavia.common import constants as consts
 import octavia.common.jinja.haproxy.combined_listeners.jinja_cfg as jinja_combo
@@ -60,11 +63,12 @@ class HaproxyAmphoraLoadBalancerDriver(
             '0.5': AmphoraAPIClient0_5(),
             '1.0': AmphoraAPIClient1_0(),
         }
-        self.cert_manager = stevedore_driver.DriverManager(
-            namespace='octavia.cert_manager',
-            name=CONF.certificates.cert_manager,
-            invoke_on_load=True,
-        ).driver
+        self.cert_manager = cached.CachedCertManager(
+            stevedore_driver.DriverManager(
+                namespace='octavia.cert_manager',
+                name=CONF.certificates.cert_manager,
+                invoke_on_load=True,
+            ).driver)
 
         self.jinja_combo = jinja_combo.JinjaTemplater(
             base_amp_path=CONF.haproxy_amphora.base_path,
@@ -115,7 +119,7 @@ class HaproxyAmphoraLoadBalancerDriver(
         return list(map(int, amphora.api_version.split('.')))
 
     def update_amphora_listeners(self, loadbalancer, amphora,
-                                 timeout_dict=None):
+                                 timeout_dict=None, cert_cache=None):
         """Update the amphora with a new configuration.
 
         :param loadbalancer: The load balancer to update
@@ -126,6 +130,9 @@ class HaproxyAmphoraLoadBalancerDriver(
                              amphora. May contain: req_conn_timeout,
                              req_read_timeout, conn_max_retries,
                              conn_retry_interval
+        :param cert_cache: The certificate cache of the operation, a new one
+                           is used if None
+        :type cert_cache: CertificateCache
         :returns: None
 
         Updates the configuration of the listeners on a single amphora.
@@ -136,6 +143,8 @@ class HaproxyAmphoraLoadBalancerDriver(
             return
         if amphora is None or amphora.status == consts.DELETED:
             return
+        if cert_cache is None:
+            cert_cache = CertificateCache()
 
         # Check which HAProxy version is on the amp
         haproxy_versions = self._get_haproxy_versions(
@@ -154,6 +163,10 @@ class HaproxyAmphoraLoadBalancerDriver(
 
         has_tcp = False
         certs = {}
+        # The certificates of the combined configuration are synchronized
+        # all at once, the manifests are kept per listener in case the
+        # synchronization fails.
+        listener_manifests = {}
         listeners_to_update = []
         for listener in loadbalancer.listeners:
             LOG.debug("%s updating listener %s on amphora %s",
@@ -161,35 +174,44 @@ class HaproxyAmphoraLoadBalancerDriver(
             if listener.protocol in consts.LVS_PROTOCOLS:
                 # Generate Keepalived LVS configuration from listener object
                 config = self.lvs_jinja.build_config(listener=listener)
-                self.clients[amphora.api_version].upload_udp_config(
-                    amphora, listener.id, config, timeout_dict=timeout_dict)
-                self.clients[amphora.api_version].reload_listener(
-                    amphora, listener.id, timeout_dict=timeout_dict)
+                if self.clients[amphora.api_version].upload_udp_config(
+                        amphora, listener.id, config,
+                        timeout_dict=timeout_dict):
+                    self.clients[amphora.api_version].reload_listener(
+                        amphora, listener.id, timeout_dict=timeout_dict)
             else:
                 has_tcp = True
                 if split_config:
                     obj_id = listener.id
                 else:
                     obj_id = loadbalancer.id
+                cert_manifest = None if split_config else {}
 
                 try:
                     certs.update({
                         listener.tls_certificate_id:
                         self._process_tls_certificates(
-                            listener, amphora, obj_id)['tls_cert']})
+                            listener, amphora, obj_id,
+                            cert_cache=cert_cache,
+                            cert_manifest=cert_manifest)['tls_cert']})
                     certs.update({listener.client_ca_tls_certificate_id:
                                   self._process_secret(
                                       listener,
                                       listener.client_ca_tls_certificate_id,
-                                      amphora, obj_id)})
+                                      amphora, obj_id,
+                                      cert_cache=cert_cache,
+                                      cert_manifest=cert_manifest)})
                     certs.update({listener.client_crl_container_id:
                                   self._process_secret(
                                       listener,
                                       listener.client_crl_container_id,
-                                      amphora, obj_id)})
+                                      amphora, obj_id,
+                                      cert_cache=cert_cache,
+                                      cert_manifest=cert_manifest)})
 
                     certs.update(self._process_listener_pool_certs(
-                        listener, amphora, obj_id))
+                        listener, amphora, obj_id, cert_cache=cert_cache,
+                        cert_manifest=cert_manifest))
 
                     if split_config:
                         config = self.jinja_split.build_config(
@@ -199,21 +221,26 @@ class HaproxyAmphoraLoadBalancerDriver(
                                 listener.client_ca_tls_certificate_id],
                             client_crl=certs[listener.client_crl_container_id],
                             pool_tls_certs=certs)
-                        self.clients[amphora.api_version].upload_config(
-                            amphora, listener.id, config,
-                            timeout_dict=timeout_dict)
-                        self.clients[amphora.api_version].reload_listener(
-                            amphora, listener.id, timeout_dict=timeout_dict)
+                        if self.clients[amphora.api_version].upload_config(
+                                amphora, listener.id, config,
+                                timeout_dict=timeout_dict):
+                            self.clients[amphora.api_version].reload_listener(
+                                amphora, listener.id,
+                                timeout_dict=timeout_dict)
                     else:
                         listeners_to_update.append(listener)
+                        listener_manifests[listener.id] = cert_manifest
                 except Exception as e:
                     LOG.exception('Unable to update listener %s due to '
                                   '"%s". Skipping this listener.',
                                   listener.id, str(e))
-                    listener_repo = repo.ListenerRepository()
-                    listener_repo.update(db_apis.get_session(), listener.id,
-                                         provisioning_status=consts.ERROR,
-                                         operating_status=consts.ERROR)
+                    self._set_listener_error(listener)
+
+        if listeners_to_update:
+            listeners_to_update = self._sync_listener_certs(
+                amphora, loadbalancer.id, listeners_to_update,
+                listener_manifests, cert_cache=cert_cache,
+                timeout_dict=timeout_dict)
 
         if has_tcp and not split_config:
             if listeners_to_update:
@@ -222,11 +249,10 @@ class HaproxyAmphoraLoadBalancerDriver(
                     host_amphora=amphora, listeners=listeners_to_update,
                     tls_certs=certs,
                     haproxy_versions=haproxy_versions)
-                self.clients[amphora.api_version].upload_config(
-                    amphora, loadbalancer.id, config,
-                    timeout_dict=timeout_dict)
-                self.clients[amphora.api_version].reload_listener(
-                    amphora, loadbalancer.id, timeout_dict=timeout_dict)
+                if self._apply_config(amphora, loadbalancer.id, config,
+                                      timeout_dict=timeout_dict):
+                    self.clients[amphora.api_version].reload_listener(
+                        amphora, loadbalancer.id, timeout_dict=timeout_dict)
             else:
                 # If we aren't updating any listeners, make sure there are
                 # no listeners hanging around. For example if this update
@@ -234,6 +260,72 @@ class HaproxyAmphoraLoadBalancerDriver(
                 self.clients[amphora.api_version].delete_listener(
                     amphora, loadbalancer.id)
 
+    @staticmethod
+    def _set_listener_error(listener):
+        listener_repo = repo.ListenerRepository()
+        listener_repo.update(db_apis.get_session(), listener.id,
+                             provisioning_status=consts.ERROR,
+                             operating_status=consts.ERROR)
+
+    def _sync_listener_certs(self, amphora, obj_id, listeners,
+                             listener_manifests, cert_cache=None,
+                             timeout_dict=None):
+        """Synchronizes the certificates of a combined configuration
+
+        If the synchronization fails, the certificates are uploaded one
+        listener at a time and the listeners whose certificates cannot be
+        uploaded are set to ERROR, like the other listener failures.
+
+        :returns: The listeners whose certificates are on the amphora.
+        """
+        cert_manifest = {}
+        for listener in listeners:
+            cert_manifest.update(listener_manifests[listener.id])
+        try:
+            # An empty manifest deletes the certificates of the listeners
+            # that were removed or no longer use TLS
+            self._sync_certs(amphora, obj_id, cert_manifest,
+                             cert_cache=cert_cache,
+                             timeout_dict=timeout_dict)
+            return listeners
+        except Exception as e:
+            LOG.warning('Unable to synchronize the certificates of amphora '
+                        '%s due to "%s". Uploading them for each listener.',
+                        amphora.id, str(e))
+
+        synced_listeners = []
+        for listener in listeners:
+            try:
+                for name, (pem, md5sum) in listener_manifests[
+                        listener.id].items():
+                    self._upload_cert(amphora, obj_id, pem, md5sum, name,
+                                      cert_cache=cert_cache)
+            except Exception as e:
+                LOG.exception('Unable to update listener %s due to '
+                              '"%s". Skipping this listener.',
+                              listener.id, str(e))
+                self._set_listener_error(listener)
+            else:
+                synced_listeners.append(listener)
+        return synced_listeners
+
+    def _apply_config(self, amphora, loadbalancer_id, config,
+                      timeout_dict=None):
+        """Uploads a combined HAProxy configuration to an amphora.
+
+        :returns: True if HAProxy has to be reloaded to apply it.
+        """
+        client = self.clients[amphora.api_version]
+        if CONF.haproxy_amphora.runtime_api_updates:
+            try:
+                return client.apply_config(amphora, loadbalancer_id, config,
+                                           timeout_dict=timeout_dict)
+            except exc.NotFound:
+                LOG.debug('Amphora %s does not support runtime API updates, '
+                          'reloading HAProxy.', amphora.id)
+        return client.upload_config(amphora, loadbalancer_id, config,
+                                    timeout_dict=timeout_dict)
+
     def _udp_update(self, listener, vip):
         LOG.debug("Amphora %s keepalivedlvs, updating "
                   "listener %s, vip %s",
@@ -245,15 +337,57 @@ class HaproxyAmphoraLoadBalancerDriver(
                 # Generate Keepalived LVS configuration from listener object
                 self._populate_amphora_api_version(amp)
                 config = self.lvs_jinja.build_config(listener=listener)
-                self.clients[amp.api_version].upload_udp_config(
-                    amp, listener.id, config)
-                self.clients[amp.api_version].reload_listener(
-                    amp, listener.id)
+                if self.clients[amp.api_version].upload_udp_config(
+                        amp, listener.id, config):
+                    self.clients[amp.api_version].reload_listener(
+                        amp, listener.id)
+
+    def _run_on_amphorae(self, func, amphorae):
+        """Runs a function for each amphora that is not DELETED
+
+        Up to [haproxy_amphora] amphora_update_concurrency amphorae are
+        handled concurrently. If the function fails for any of them, the
+        exception of the first amphora that failed, in the order of the
+        amphorae, is raised once all of them were handled.
+
+        :param func: The function to run, it is passed the amphora.
+        :param amphorae: The amphorae to run the function for.
+        :returns: None
+        """
+        amphorae = [amp for amp in amphorae if amp.status != consts.DELETED]
+        max_workers = min(len(amphorae),
+                          CONF.haproxy_amphora.amphora_update_concurrency)
+        if max_workers <= 1:
+            for amp in amphorae:
+                func(amp)
+            return
+
+        context = oslo_context.get_current()
+
+        def run(amp):
+            # Keep the request context of the caller in the logs
+            if context:
+                context.update_store()
+            func(amp)
+
+        with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = [(amp, executor.submit(run, amp)) for amp in amphorae]
+        errors = [(amp, result.exception()) for amp, result in results
+                  if result.exception() is not None]
+        if not errors:
+            return
+        for amp, error in errors[1:]:
+            LOG.error('Amphora %s also failed to update: %s', amp.id,
+                      str(error))
+        raise errors[0][1]
 
     def update(self, loadbalancer):
-        for amphora in loadbalancer.amphorae:
-            if amphora.status != consts.DELETED:
-                self.update_amphora_listeners(loadbalancer, amphora)
+        # The certificates are shared by all the amphorae of the load
+        # balancer, retrieve them only once.
+        self._run_on_amphorae(
+            functools.partial(self.update_amphora_listeners, loadbalancer,
+                              cert_cache=CertificateCache()),
+            loadbalancer.amphorae)
 
     def upload_cert_amp(self, amp, pem):
         LOG.debug("Amphora %s updating cert in REST driver "
@@ -270,33 +404,34 @@ class HaproxyAmphoraLoadBalancerDriver(
 
         timeout_dict = args[0]
 
-        for amp in amphorae:
-            if amp.status != consts.DELETED:
-                api_version = self._populate_amphora_api_version(
-                    amp, timeout_dict=timeout_dict)
-                # Check which config style to use
-                if api_version[0] == 0 and api_version[1] <= 5:
-                    # 0.5 or earlier
-                    LOG.warning(
-                        'Amphora %s for loadbalancer %s needs upgrade to '
-                        'single process mode.', amp.id, loadbalancer.id)
-                    for listener in loadbalancer.listeners:
+        def apply_amphora(amp):
+            api_version = self._populate_amphora_api_version(
+                amp, timeout_dict=timeout_dict)
+            # Check which config style to use
+            if api_version[0] == 0 and api_version[1] <= 5:
+                # 0.5 or earlier
+                LOG.warning(
+                    'Amphora %s for loadbalancer %s needs upgrade to '
+                    'single process mode.', amp.id, loadbalancer.id)
+                for listener in loadbalancer.listeners:
+                    getattr(self.clients[amp.api_version], func_name)(
+                        amp, listener.id, *args)
+            else:
+                LOG.debug(
+                    'Amphora %s for loadbalancer %s is already in single '
+                    'process mode.', amp.id, loadbalancer.id)
+                has_tcp = False
+                for listener in loadbalancer.listeners:
+                    if listener.protocol in consts.LVS_PROTOCOLS:
                         getattr(self.clients[amp.api_version], func_name)(
                             amp, listener.id, *args)
-                else:
-                    LOG.debug(
-                        'Amphora %s for loadbalancer %s is already in single '
-                        'process mode.', amp.id, loadbalancer.id)
-                    has_tcp = False
-                    for listener in loadbalancer.listeners:
-                        if listener.protocol in consts.LVS_PROTOCOLS:
-                            getattr(self.clients[amp.api_version], func_name)(
-                                amp, listener.id, *args)
-                        else:
-                            has_tcp = True
-                    if has_tcp:
-                        getattr(self.clients[amp.api_version], func_name)(
-                            amp, loadbalancer.id, *args)
+                    else:
+                        has_tcp = True
+                if has_tcp:
+                    getattr(self.clients[amp.api_version], func_name)(
+                        amp, loadbalancer.id, *args)
+
+        self._run_on_amphorae(apply_amphora, amphorae)
 
     def reload(self, loadbalancer, amphora=None, timeout_dict=None):
         self._apply('reload_listener', loadbalancer, amphora, timeout_dict)
@@ -453,7 +588,8 @@ class HaproxyAmphoraLoadBalancerDriver(
                         'skipping post_network_plug',
                         {'mac': port.mac_address})
 
-    def _process_tls_certificates(self, listener, amphora=None, obj_id=None):
+    def _process_tls_certificates(self, listener, amphora=None, obj_id=None,
+                                  cert_cache=None, cert_manifest=None):
         """Processes TLS data from the listener.
 
         Converts and uploads PEM data to the Amphora API
@@ -465,8 +601,12 @@ class HaproxyAmphoraLoadBalancerDriver(
         certs = []
         cert_filename_list = []
 
-        data = cert_parser.load_certificates_data(
-            self.cert_manager, listener)
+        if cert_cache:
+            data = cert_cache.get_certificates_data(self.cert_manager,
+                                                    listener)
+        else:
+            data = cert_parser.load_certificates_data(
+                self.cert_manager, listener)
         if data['tls_cert'] is not None:
             tls_cert = data['tls_cert']
             # Note, the first cert is the TLS default cert
@@ -477,13 +617,17 @@ class HaproxyAmphoraLoadBalancerDriver(
 
         if amphora and obj_id:
             for cert in certs:
-                pem = cert_parser.build_pem(cert)
-                md5sum = md5(pem, usedforsecurity=False).hexdigest()  # nosec
+                if cert_cache:
+                    pem, md5sum = cert_cache.get_pem(cert)
+                else:
+                    pem, md5sum = CertificateCache.build_pem(cert)
                 name = '{id}.pem'.format(id=cert.id)
                 cert_filename_list.append(
                     os.path.join(
                         CONF.haproxy_amphora.base_cert_dir, obj_id, name))
-                self._upload_cert(amphora, obj_id, pem, md5sum, name)
+                self._upload_cert(amphora, obj_id, pem, md5sum, name,
+                                  cert_cache=cert_cache,
+                                  cert_manifest=cert_manifest)
 
             if certs:
                 # Build and upload the crt-list file for haproxy
@@ -492,32 +636,34 @@ class HaproxyAmphoraLoadBalancerDriver(
                 md5sum = md5(crt_list,
                              usedforsecurity=False).hexdigest()  # nosec
                 name = '{id}.pem'.format(id=listener.id)
-                self._upload_cert(amphora, obj_id, crt_list, md5sum, name)
+                self._upload_cert(amphora, obj_id, crt_list, md5sum, name,
+                                  cert_cache=cert_cache,
+                                  cert_manifest=cert_manifest)
         return {'tls_cert': tls_cert, 'sni_certs': sni_certs}
 
-    def _process_secret(self, listener, secret_ref, amphora=None, obj_id=None):
+    def _process_secret(self, listener, secret_ref, amphora=None, obj_id=None,
+                        cert_cache=None, cert_manifest=None):
         """Get the secret from the cert manager and upload it to the amp.
 
         :returns: The filename of the secret in the amp.
         """
         if not secret_ref:
             return None
-        context = oslo_context.RequestContext(project_id=listener.project_id)
-        secret = self.cert_manager.get_secret(context, secret_ref)
-        try:
-            secret = secret.encode('utf-8')
-        except AttributeError:
-            pass
-        md5sum = md5(secret, usedforsecurity=False).hexdigest()  # nosec
-        id = hashlib.sha1(secret).hexdigest()  # nosec
-        name = '{id}.pem'.format(id=id)
+        if cert_cache:
+            secret, md5sum, name = cert_cache.get_secret(
+                self.cert_manager, listener, secret_ref)
+        else:
+            secret, md5sum, name = CertificateCache.load_secret(
+                self.cert_manager, listener, secret_ref)
 
         if amphora and obj_id:
             self._upload_cert(
-                amphora, obj_id, pem=secret, md5sum=md5sum, name=name)
+                amphora, obj_id, pem=secret, md5sum=md5sum, name=name,
+                cert_cache=cert_cache, cert_manifest=cert_manifest)
         return name
 
-    def _process_listener_pool_certs(self, listener, amphora, obj_id):
+    def _process_listener_pool_certs(self, listener, amphora, obj_id,
+                                     cert_cache=None, cert_manifest=None):
         #     {'POOL-ID': {
         #         'client_cert': client_full_filename,
         #         'ca_cert': ca_cert_full_filename,
@@ -526,57 +672,109 @@ class HaproxyAmphoraLoadBalancerDriver(
         for pool in listener.pools:
             if pool.id not in pool_certs_dict:
                 pool_certs_dict[pool.id] = self._process_pool_certs(
-                    listener, pool, amphora, obj_id)
+                    listener, pool, amphora, obj_id, cert_cache=cert_cache,
+                    cert_manifest=cert_manifest)
         for l7policy in listener.l7policies:
             if (l7policy.redirect_pool and
                     l7policy.redirect_pool.id not in pool_certs_dict):
                 pool_certs_dict[l7policy.redirect_pool.id] = (
                     self._process_pool_certs(listener, l7policy.redirect_pool,
-                                             amphora, obj_id))
+                                             amphora, obj_id,
+                                             cert_cache=cert_cache,
+                                             cert_manifest=cert_manifest))
         return pool_certs_dict
 
-    def _process_pool_certs(self, listener, pool, amphora, obj_id):
+    def _process_pool_certs(self, listener, pool, amphora, obj_id,
+                            cert_cache=None, cert_manifest=None):
         pool_cert_dict = {}
 
         # Handle the client cert(s) and key
         if pool.tls_certificate_id:
-            data = cert_parser.load_certificates_data(self.cert_manager, pool)
-            tls_cert = data['tls_cert']
-            pem = cert_parser.build_pem(tls_cert)
-            try:
-                pem = pem.encode('utf-8')
-            except AttributeError:
-                pass
-            md5sum = md5(pem, usedforsecurity=False).hexdigest()  # nosec
+            if cert_cache:
+                data = cert_cache.get_certificates_data(self.cert_manager,
+                                                        pool)
+                tls_cert = data['tls_cert']
+                pem, md5sum = cert_cache.get_pem(tls_cert)
+            else:
+                data = cert_parser.load_certificates_data(self.cert_manager,
+                                                          pool)
+                tls_cert = data['tls_cert']
+                pem, md5sum = CertificateCache.build_pem(tls_cert)
             name = '{id}.pem'.format(id=tls_cert.id)
             if amphora and obj_id:
                 self._upload_cert(amphora, obj_id, pem=pem,
-                                  md5sum=md5sum, name=name)
+                                  md5sum=md5sum, name=name,
+                                  cert_cache=cert_cache,
+                                  cert_manifest=cert_manifest)
             pool_cert_dict['client_cert'] = os.path.join(
                 CONF.haproxy_amphora.base_cert_dir, obj_id, name)
         if pool.ca_tls_certificate_id:
             name = self._process_secret(listener, pool.ca_tls_certificate_id,
-                                        amphora, obj_id)
+                                        amphora, obj_id,
+                                        cert_cache=cert_cache,
+                                        cert_manifest=cert_manifest)
             pool_cert_dict['ca_cert'] = os.path.join(
                 CONF.haproxy_amphora.base_cert_dir, obj_id, name)
         if pool.crl_container_id:
             name = self._process_secret(listener, pool.crl_container_id,
-                                        amphora, obj_id)
+                                        amphora, obj_id,
+                                        cert_cache=cert_cache,
+                                        cert_manifest=cert_manifest)
             pool_cert_dict['crl'] = os.path.join(
                 CONF.haproxy_amphora.base_cert_dir, obj_id, name)
 
         return pool_cert_dict
 
-    def _upload_cert(self, amp, listener_id, pem, md5sum, name):
+    def _upload_cert(self, amp, listener_id, pem, md5sum, name,
+                     cert_cache=None, cert_manifest=None):
+        if cert_manifest is not None:
+            # Synchronized with the other certificates of the manifest
+            cert_manifest[name] = (pem, md5sum)
+            return
+        if cert_cache and cert_cache.is_uploaded(amp, listener_id, name,
+                                                 md5sum):
+            return
         try:
             if self.clients[amp.api_version].get_cert_md5sum(
                     amp, listener_id, name, ignore=(404,)) == md5sum:
+                if cert_cache:
+                    cert_cache.set_uploaded(amp, listener_id, name, md5sum)
                 return
         except exc.NotFound:
             pass
 
         self.clients[amp.api_version].upload_cert_pem(
             amp, listener_id, name, pem)
+        if cert_cache:
+            cert_cache.set_uploaded(amp, listener_id, name, md5sum)
+
+    def _sync_certs(self, amp, obj_id, cert_manifest, cert_cache=None,
+                    timeout_dict=None):
+        """Uploads the certificates of a manifest in at most two requests
+
+        The certificates of obj_id that are not in the manifest are deleted
+        from the amphora. Older amphora agents get the certificates one by
+        one.
+        """
+        # The files that are not in the manifest may still be on the amphora
+        if cert_manifest and cert_cache and all(
+                cert_cache.is_uploaded(amp, obj_id, name, md5sum)
+                for name, (pem, md5sum) in cert_manifest.items()):
+            return
+        try:
+            self.clients[amp.api_version].sync_cert_pems(
+                amp, obj_id, cert_manifest, timeout_dict=timeout_dict)
+        except exc.NotFound:
+            LOG.debug('Amphora %s does not support certificate '
+                      'synchronization, uploading the certificates one by '
+                      'one.', amp.id)
+            for name, (pem, md5sum) in cert_manifest.items():
+                self._upload_cert(amp, obj_id, pem, md5sum, name,
+                                  cert_cache=cert_cache)
+            return
+        if cert_cache:
+            for name, (pem, md5sum) in cert_manifest.items():
+                cert_cache.set_uploaded(amp, obj_id, name, md5sum)
 
     def update_amphora_agent_config(self, amphora, agent_config,
                                     timeout_dict=None):
@@ -627,8 +825,99 @@ class HaproxyAmphoraLoadBalancerDriver(
             return None
 
 
+class CertificateCache(object):
+    """Caches the certificates used during a single driver operation
+
+    The certificates and secrets are retrieved from the certificate manager
+    and converted to PEM files once per container, and the files that are
+    known to be up to date on an amphora are not checked again. A cache is
+    shared by the threads that update the amphorae of a load balancer, it
+    must not be kept after the operation as the certificates may change.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._certs = {}
+        self._pems = {}
+        self._secrets = {}
+        self._uploaded = set()
+
+    @staticmethod
+    def build_pem(tls_cert):
+        """Returns the PEM file and its md5sum for a certificate."""
+        pem = cert_parser.build_pem(tls_cert)
+        try:
+            pem = pem.encode('utf-8')
+        except AttributeError:
+            pass
+        return pem, md5(pem, usedforsecurity=False).hexdigest()  # nosec
+
+    @staticmethod
+    def load_secret(cert_manager, listener, secret_ref):
+        """Returns a secret, its md5sum and its filename on the amphora."""
+        context = oslo_context.RequestContext(project_id=listener.project_id)
+        secret = cert_manager.get_secret(context, secret_ref)
+        try:
+            secret = secret.encode('utf-8')
+        except AttributeError:
+            pass
+        md5sum = md5(secret, usedforsecurity=False).hexdigest()  # nosec
+        id = hashlib.sha1(secret).hexdigest()  # nosec
+        return secret, md5sum, '{id}.pem'.format(id=id)
+
+    def get_certificates_data(self, cert_manager, obj):
+        """Cached version of cert_parser.load_certificates_data"""
+        sni_containers = getattr(obj, 'sni_containers', None) or []
+        key = (obj.tls_certificate_id,
+               tuple(sni.tls_container_id for sni in sni_containers))
+        # The lock is held while retrieving the certificates so that the
+        # threads do not retrieve the same certificates concurrently.
+        with self._lock:
+            if key not in self._certs:
+                self._certs[key] = cert_parser.load_certificates_data(
+                    cert_manager, obj)
+            return self._certs[key]
+
+    def get_pem(self, tls_cert):
+        """Cached version of build_pem"""
+        with self._lock:
+            if tls_cert.id not in self._pems:
+                self._pems[tls_cert.id] = self.build_pem(tls_cert)
+            return self._pems[tls_cert.id]
+
+    def get_secret(self, cert_manager, listener, secret_ref):
+        """Cached version of load_secret"""
+        with self._lock:
+            if secret_ref not in self._secrets:
+                self._secrets[secret_ref] = self.load_secret(
+                    cert_manager, listener, secret_ref)
+            return self._secrets[secret_ref]
+
+    def is_uploaded(self, amp, obj_id, name, md5sum):
+        with self._lock:
+            return (amp.id, obj_id, name, md5sum) in self._uploaded
+
+    def set_uploaded(self, amp, obj_id, name, md5sum):
+        with self._lock:
+            self._uploaded.add((amp.id, obj_id, name, md5sum))
+
+
 # Check a custom hostname
 class CustomHostNameCheckingAdapter(requests.adapters.HTTPAdapter):
+    def __init__(self, *args, **kwargs):
+        # The amphorae of a load balancer may be updated concurrently, so
+        # the expected hostname is tracked per thread.
+        self._local = threading.local()
+        super().__init__(*args, **kwargs)
+
+    @property
+    def uuid(self):
+        return getattr(self._local, 'uuid', None)
+
+    @uuid.setter
+    def uuid(self, value):
+        self._local.uuid = value
+
     def cert_verify(self, conn, url, verify, cert):
         conn.assert_hostname = self.uuid
         return super().cert_verify(conn, url, verify, cert)
@@ -654,6 +943,18 @@ class AmphoraAPIClientBase(object):
         self.ssl_adapter = CustomHostNameCheckingAdapter()
         self.session.mount('https://', self.ssl_adapter)
 
+    @staticmethod
+    def _reload_required(response):
+        """Checks if the configuration uploaded with response must be loaded
+
+        The amphora agent skips the configurations that are already in use,
+        older amphora agents do not report it.
+        """
+        try:
+            return response.json().get('reload_required', True)
+        except ValueError:
+            return True
+
     def _base_url(self, ip, api_version=None):
         if utils.is_ipv6_lla(ip):
             ip = '[{ip}%{interface}]'.format(
@@ -778,12 +1079,17 @@ class AmphoraAPIClient0_5(AmphoraAPIClientBase):
                                              consts.AMP_ACTION_RELOAD)
 
     def upload_config(self, amp, listener_id, config, timeout_dict=None):
+        """Uploads a configuration.
+
+        :returns: True if the listener has to be reloaded to apply it.
+        """
         r = self.put(
             amp,
             'listeners/{amphora_id}/{listener_id}/haproxy'.format(
                 amphora_id=amp.id, listener_id=listener_id), timeout_dict,
             data=config)
-        return exc.check_exception(r)
+        exc.check_exception(r)
+        return self._reload_required(r)
 
     def _action(self, action, amp, listener_id, timeout_dict=None):
         r = self.put(amp, 'listeners/{listener_id}/{action}'.format(
@@ -866,12 +1172,17 @@ class AmphoraAPIClient0_5(AmphoraAPIClientBase):
         return exc.check_exception(r, log_error=log_error).json()
 
     def upload_udp_config(self, amp, listener_id, config, timeout_dict=None):
+        """Uploads a keepalived LVS configuration.
+
+        :returns: True if the listener has to be reloaded to apply it.
+        """
         r = self.put(
             amp,
             'listeners/{amphora_id}/{listener_id}/udp_listener'.format(
                 amphora_id=amp.id, listener_id=listener_id), timeout_dict,
             data=config)
-        return exc.check_exception(r)
+        exc.check_exception(r)
+        return self._reload_required(r)
 
     def update_agent_config(self, amp, agent_config, timeout_dict=None):
         r = self.put(amp, 'config', timeout_dict, data=agent_config)
@@ -895,12 +1206,35 @@ class AmphoraAPIClient1_0(AmphoraAPIClientBase):
                                              consts.AMP_ACTION_RELOAD)
 
     def upload_config(self, amp, loadbalancer_id, config, timeout_dict=None):
+        """Uploads a combined HAProxy configuration.
+
+        :returns: True if HAProxy has to be reloaded to apply it.
+        """
         r = self.put(
             amp,
             'loadbalancer/{amphora_id}/{loadbalancer_id}/haproxy'.format(
                 amphora_id=amp.id, loadbalancer_id=loadbalancer_id),
             timeout_dict, data=config)
-        return exc.check_exception(r)
+        exc.check_exception(r)
+        return self._reload_required(r)
+
+    def apply_config(self, amp, loadbalancer_id, config, timeout_dict=None):
+        """Uploads the config and applies it through the runtime API.
+
+        :returns: True if HAProxy still has to be reloaded to apply the
+                  configuration.
+        :raises NotFound: if the amphora agent does not support it.
+        """
+        # Older amphora agents do not have this endpoint, their 404 is not
+        # retried
+        r = self.put(
+            amp,
+            'loadbalancer/{amphora_id}/{loadbalancer_id}/haproxy/'
+            'runtime'.format(amphora_id=amp.id,
+                             loadbalancer_id=loadbalancer_id),
+            timeout_dict, retry_404=False, data=config)
+        exc.check_exception(r)
+        return self._reload_required(r)
 
     def get_listener_status(self, amp, listener_id):
         r = self.get(
@@ -925,6 +1259,43 @@ class AmphoraAPIClient1_0(AmphoraAPIClientBase):
             data=pem_file)
         return exc.check_exception(r)
 
+    def sync_cert_pems(self, amp, loadbalancer_id, certs,
+                       timeout_dict=None):
+        """Synchronizes the certificates of a load balancer on an amphora
+
+        Sends the md5sums of all of the certificates of the load balancer,
+        then uploads the certificates that are missing or stale on the
+        amphora in a single request. The amphora deletes the certificates
+        that are not in the manifest.
+
+        :param certs: The (pem, md5sum) of the certificates, keyed by
+                      filename
+        :returns: The filenames of the uploaded certificates.
+        :raises NotFound: if the amphora agent does not support it.
+        """
+        manifest = {name: md5sum for name, (pem, md5sum) in certs.items()}
+        # Older amphora agents do not have this endpoint, their 404 is not
+        # retried. The manifest path matches their certificates/<filename>
+        # route though, which does not allow POST.
+        r = self.post(
+            amp,
+            'loadbalancer/{loadbalancer_id}/certificates/manifest'.format(
+                loadbalancer_id=loadbalancer_id),
+            timeout_dict, retry_404=False, json={'certificates': manifest})
+        if r.status_code == 405:
+            raise exc.NotFound()
+        exc.check_exception(r)
+        stale = r.json().get('stale', [])
+        if stale:
+            r = self.put(
+                amp,
+                'loadbalancer/{loadbalancer_id}/certificates'.format(
+                    loadbalancer_id=loadbalancer_id),
+                timeout_dict,
+                files={name: (name, certs[name][0]) for name in stale})
+            exc.check_exception(r)
+        return stale
+
     def get_cert_md5sum(self, amp, loadbalancer_id, pem_filename,
                         ignore=tuple()):
         r = self.get(
@@ -998,12 +1369,17 @@ class AmphoraAPIClient1_0(AmphoraAPIClientBase):
 
     # The function is used for all LVS-supported protocol listener (UDP, SCTP)
     def upload_udp_config(self, amp, listener_id, config, timeout_dict=None):
+        """Uploads a keepalived LVS configuration.
+
+        :returns: True if the listener has to be reloaded to apply it.
+        """
         r = self.put(
             amp,
             'listeners/{amphora_id}/{listener_id}/udp_listener'.format(
                 amphora_id=amp.id, listener_id=listener_id), timeout_dict,
             data=config)
-        return exc.check_exception(r)
+        exc.check_exception(r)
+        return self._reload_required(r)
 
     def update_agent_config(self, amp, agent_config, timeout_dict=None):
         r = self.put(amp, 'config', timeout_dict, data=agent_config)
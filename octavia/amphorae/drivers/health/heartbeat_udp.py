@@ -21,6 +21,7 @@ import timeit
 from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_utils import excutils
+import selectors
 import sqlalchemy
 from stevedore import driver as stevedore_driver
 
@@ -59,6 +60,15 @@ class UDPStatusGetter(object):
             max_workers=CONF.health_manager.stats_update_threads)
         self.health_updater = UpdateHealthDb()
 
+        # Heartbeats waiting to be processed as a batch, keyed by amphora ID
+        self.health_batch = {}
+        self.health_batch_start = None
+
+        # The last complete pool statuses received from each amphora sending
+        # pools deltas, keyed by amphora ID, with when they last reported.
+        self.full_pools = {}
+        self.full_pools_next_purge = 0
+
     def update(self, key, ip, port):
         """Update the running config for the udp socket server
 
@@ -74,7 +84,17 @@ class UDPStatusGetter(object):
             if self.sock is not None:
                 self.sock.close()
             self.sock = socket.socket(ai_family, socket.SOCK_DGRAM)
-            self.sock.settimeout(1)
+            if CONF.health_manager.health_update_batch_size > 0:
+                # Wake up often enough to process a pending batch on time
+                self.sock.settimeout(
+                    min(1, CONF.health_manager.health_update_batch_window))
+            else:
+                self.sock.settimeout(1)
+            if CONF.health_manager.reuse_port:
+                # Let the kernel load balance the heartbeats between the
+                # health manager processes listening on this port.
+                self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT,
+                                     1)
             self.sock.bind(self.sockaddr)
             if cfg.CONF.health_manager.sock_rlimit > 0:
                 rlimit = cfg.CONF.health_manager.sock_rlimit
@@ -116,10 +136,164 @@ class UDPStatusGetter(object):
             LOG.warning('Health Manager experienced an exception processing a '
                         'heartbeat packet. Ignoring this packet. '
                         'Exception: %s', str(e))
+        else:
+            self._process_heartbeat(obj, srcaddr)
+
+        self._check_health_batch()
+
+    def _process_heartbeat(self, obj, srcaddr):
+        if 'digest' in obj:
+            self._merge_pools_delta(obj)
+        if CONF.health_manager.health_update_batch_size > 0:
+            self._add_to_health_batch(obj, srcaddr)
         else:
             self.health_executor.submit(self.health_updater.update_health,
                                         obj, srcaddr)
-            self.stats_executor.submit(update_stats, obj)
+        self.stats_executor.submit(update_stats, obj)
+
+    def _merge_pools_delta(self, obj):
+        """Rebuilds the complete pool statuses of a heartbeat
+
+        Amphorae with a [health_manager] heartbeat_full_state_interval only
+        send the pool and member statuses that changed since the last
+        complete pool statuses they sent. Those changes are applied to the
+        last complete pool statuses received from the amphora. If these are
+        missing, or a heartbeat was lost, the result will not match the
+        digest of the heartbeat and UpdateHealthDb ignores it.
+        """
+        now = time.time()
+        if now >= self.full_pools_next_purge:
+            # Forget the amphorae that stopped reporting
+            timeout = CONF.health_manager.heartbeat_timeout
+            self.full_pools = {
+                amp_id: entry for amp_id, entry in self.full_pools.items()
+                if now - entry[1] < timeout}
+            self.full_pools_next_purge = now + timeout
+
+        if not obj.get('delta'):
+            self.full_pools[obj['id']] = (obj['pools'], now)
+            return
+
+        entry = self.full_pools.get(obj['id'])
+        if entry is None:
+            return
+        full_pools = entry[0]
+        self.full_pools[obj['id']] = (full_pools, now)
+        pools = {}
+        for pool_id, pool in full_pools.items():
+            pool_delta = obj['pools'].get(pool_id)
+            if pool_delta:
+                members = dict(pool['members'])
+                members.update(pool_delta['members'])
+                pool = {'status': pool_delta['status'], 'members': members}
+            pools[pool_id] = pool
+        obj['pools'] = pools
+        del obj['delta']
+
+    def _check_health_batch(self):
+        if self.health_batch and (
+                len(self.health_batch) >=
+                CONF.health_manager.health_update_batch_size or
+                time.time() - self.health_batch_start >=
+                CONF.health_manager.health_update_batch_window):
+            self.flush_health_batch()
+
+    def _add_to_health_batch(self, obj, srcaddr):
+        """Adds a heartbeat to the pending health update batch
+
+        Heartbeats from the same amphora are coalesced, only the most recent
+        one is kept.
+        """
+        if not self.health_batch:
+            self.health_batch_start = time.time()
+        pending = self.health_batch.get(obj['id'])
+        if pending and obj.get('seq', 0) < pending[0].get('seq', 0):
+            # This heartbeat was reordered on the network, it is older than
+            # the one we already have.
+            return
+        self.health_batch[obj['id']] = (obj, srcaddr)
+
+    def flush_health_batch(self):
+        """Submits the pending heartbeats for a batched health update"""
+        if not self.health_batch:
+            return
+        health_batch = list(self.health_batch.values())
+        self.health_batch = {}
+        self.health_batch_start = None
+        self.health_executor.submit(self.health_updater.update_health_batch,
+                                    health_batch)
+
+
+class EventLoopUDPStatusGetter(UDPStatusGetter):
+    """Gathers heartbeats with a non-blocking socket
+
+    Instead of one blocking receive per heartbeat, this waits for the socket
+    to become readable and then drains all of the pending heartbeats, up to
+    [health_manager] heartbeat_receive_batch_size, before verifying and
+    decoding them.
+    """
+    def __init__(self):
+        self.selector = selectors.DefaultSelector()
+        super().__init__()
+
+    def update(self, key, ip, port):
+        if self.sock is not None:
+            self.selector.unregister(self.sock)
+        super().update(key, ip, port)
+        self.sock.setblocking(False)
+        self.selector.register(self.sock, selectors.EVENT_READ)
+
+    def dorecv(self, *args, **kw):
+        """Receives the heartbeats pending on the socket.
+
+        :return: Returns a list of the unwrapped payloads and addrs that sent
+                 the heartbeats.
+        """
+        packets = []
+        for _ in range(CONF.health_manager.heartbeat_receive_batch_size):
+            try:
+                packets.append(self.sock.recvfrom(UDP_MAX_SIZE))
+            except BlockingIOError:
+                break
+        LOG.debug('Received %s packets', len(packets))
+
+        recv_time = time.time()
+        heartbeats = []
+        for data, srcaddr in packets:
+            try:
+                obj = status_message.unwrap_envelope(data, self.key)
+            except Exception as e:
+                LOG.warning('Health Manager experienced an exception '
+                            'processing a heartbeat message from %s. '
+                            'Ignoring this packet. Exception: %s',
+                            srcaddr, str(e))
+                continue
+            obj['recv_time'] = recv_time
+            heartbeats.append((obj, srcaddr[0]))
+        return heartbeats
+
+    def check(self):
+        timeout = 1
+        if CONF.health_manager.health_update_batch_size > 0:
+            # Wake up often enough to process a pending batch on time
+            timeout = min(timeout,
+                          CONF.health_manager.health_update_batch_window)
+        try:
+            if self.selector.select(timeout):
+                for obj, srcaddr in self.dorecv():
+                    self._process_heartbeat(obj, srcaddr)
+        except Exception as e:
+            LOG.warning('Health Manager experienced an exception processing '
+                        'heartbeat packets. Exception: %s', str(e))
+
+        self._check_health_batch()
+
+
+def get_status_getter():
+    """Returns the heartbeat receiver selected in the configuration"""
+    if CONF.health_manager.heartbeat_receiver == 'event_loop':
+        return EventLoopUDPStatusGetter()
+    return UDPStatusGetter()
 
 
 def update_stats(health_message):
@@ -211,6 +385,98 @@ def update_stats(health_message):
     stats_base.update_stats_via_driver(listener_stats, deltas=deltas)
 
 
+class OperatingStatusCache(object):
+    """Remembers the statuses last reported by each amphora
+
+    The health updates run in a pool of processes, so each process has its
+    own cache. The heartbeats of an amphora may be handled by any of them,
+    so an entry is only trusted for the heartbeat that follows the one it
+    was stored or matched for, another process may have updated the
+    database in between otherwise. An entry is also only trusted for
+    [health_manager] operating_status_cache_ttl seconds, after which the
+    load balancer is read from the database again.
+    """
+    def __init__(self):
+        self._entries = {}
+        self._next_purge = 0
+
+    @staticmethod
+    def get_signature(health):
+        """Returns the statuses reported in a heartbeat, without the stats
+
+        :param health: The health message received from the amphora.
+        :returns: A hashable representation of the reported statuses.
+        """
+        def pools_signature(pools):
+            return tuple(sorted(
+                (pool_id, pool.get('status'),
+                 tuple(sorted(pool.get('members', {}).items())))
+                for pool_id, pool in pools.items()))
+
+        return (health.get('ver'),
+                tuple(sorted(
+                    (listener_id, listener.get('status'),
+                     pools_signature(listener.get('pools', {})))
+                    for listener_id, listener in
+                    health.get('listeners', {}).items())),
+                pools_signature(health.get('pools', {})))
+
+    def match(self, amphora_id, signature, seq):
+        """Checks if an amphora still reports the statuses in the cache
+
+        :param amphora_id: The ID of the amphora.
+        :param signature: The signature of the heartbeat, as returned by
+                          get_signature.
+        :param seq: The sequence number of the heartbeat.
+        :returns: True if the signature matches an unexpired cache entry
+                  of the previous heartbeat of the amphora.
+        """
+        entry = self._entries.get(amphora_id)
+        if entry is None or seq is None:
+            return False
+        cached_signature, cached_seq, expiration = entry
+        if expiration <= time.monotonic():
+            del self._entries[amphora_id]
+            return False
+        if cached_signature != signature or cached_seq != seq - 1:
+            return False
+        self._entries[amphora_id] = (cached_signature, seq, expiration)
+        return True
+
+    def set(self, amphora_id, signature, seq):
+        """Caches the statuses reported by an amphora
+
+        :param amphora_id: The ID of the amphora.
+        :param signature: The signature of the heartbeat, as returned by
+                          get_signature.
+        :param seq: The sequence number of the heartbeat.
+        :returns: None
+        """
+        now = time.monotonic()
+        ttl = CONF.health_manager.operating_status_cache_ttl
+        if now >= self._next_purge:
+            # Drop the entries of amphorae that stopped reporting
+            self._entries = {
+                amp_id: entry for amp_id, entry in self._entries.items()
+                if entry[2] > now}
+            self._next_purge = now + ttl
+        self._entries[amphora_id] = (signature, seq, now + ttl)
+
+    def invalidate(self, amphora_id):
+        """Removes an amphora from the cache
+
+        :param amphora_id: The ID of the amphora.
+        :returns: None
+        """
+        self._entries.pop(amphora_id, None)
+
+
+# The UpdateHealthDb instance is pickled for each health update submitted to
+# the process pool, so the cache must live at the module level to survive
+# between updates.
+STATUS_CACHE = OperatingStatusCache()
+
+
 class UpdateHealthDb:
     def __init__(self):
         super().__init__()
@@ -246,6 +512,96 @@ class UpdateHealthDb:
         LOG.debug('Health Update finished in: %s seconds',
                   timeit.default_timer() - start_time)
 
+    def update_health_batch(self, health_batch):
+        """Updates the amphora health for a batch of heartbeats
+
+        :param health_batch: A list of (health message, source address)
+                             tuples, with at most one health message per
+                             amphora.
+        :returns: None
+        """
+        # The executor will eat any exceptions from the update_health code
+        # so we need to wrap it and log the unhandled exception
+        start_time = timeit.default_timer()
+        try:
+            self._update_health_batch(health_batch)
+        except Exception as e:
+            LOG.exception('Health update for amphorae %(amps)s encountered '
+                          'error %(err)s. Skipping health update.',
+                          {'amps': ', '.join(health['id'] for health, _ in
+                                             health_batch),
+                           'err': str(e)})
+        LOG.debug('Health Update of %s amphorae finished in: %s seconds',
+                  len(health_batch), timeit.default_timer() - start_time)
+
+    def _update_health_batch(self, health_batch):
+        healthy_amphora_ids = []
+        signatures = {}
+        if CONF.health_manager.operating_status_cache_ttl:
+            changed_health_batch = []
+            for health, srcaddr in health_batch:
+                signature = STATUS_CACHE.get_signature(health)
+                if STATUS_CACHE.match(health['id'], signature,
+                                      health.get('seq')):
+                    # Nothing changed since the previous heartbeat, the
+                    # operating statuses in the DB are already up to date.
+                    if not self._is_stale(health):
+                        healthy_amphora_ids.append(health['id'])
+                    continue
+                STATUS_CACHE.invalidate(health['id'])
+                signatures[health['id']] = signature
+                changed_health_batch.append((health, srcaddr))
+            health_batch = changed_health_batch
+
+        session = db_api.get_session()
+
+        db_lbs = {}
+        if health_batch:
+            db_lbs = self.amphora_repo.get_lbs_for_health_update(
+                session, [health['id'] for health, _ in health_batch])
+
+        updates = []
+        for health, srcaddr in health_batch:
+            db_lb = db_lbs.get(health['id'])
+            try:
+                update_amphora_health = self._check_health(
+                    session, health, srcaddr, db_lb)
+            except Exception as e:
+                LOG.exception('Health update for amphora %(amp)s encountered '
+                              'error %(err)s. Skipping health update.',
+                              {'amp': health['id'], 'err': str(e)})
+                continue
+            if update_amphora_health is None:
+                continue
+            if update_amphora_health:
+                healthy_amphora_ids.append(health['id'])
+            updates.append((health, db_lb, update_amphora_health))
+
+        if healthy_amphora_ids:
+            lock_session = db_api.get_session(autocommit=False)
+
+            # if the input amphorae are healthy, we update their db info
+            try:
+                self.amphora_health_repo.replace_batch(
+                    lock_session, healthy_amphora_ids,
+                    last_update=(datetime.datetime.utcnow()))
+                lock_session.commit()
+            except Exception:
+                with excutils.save_and_reraise_exception():
+                    lock_session.rollback()
+
+        for health, db_lb, update_amphora_health in updates:
+            try:
+                self._update_operating_statuses(session, health, db_lb)
+            except Exception as e:
+                LOG.exception('Status update for amphora %(amp)s encountered '
+                              'error %(err)s. Skipping status update.',
+                              {'amp': health['id'], 'err': str(e)})
+                continue
+            if health['id'] in signatures:
+                self._cache_statuses(health, signatures[health['id']], db_lb,
+                                     update_amphora_health)
+
     # Health heartbeat message pre-versioning with UDP listeners
     # need to adjust the expected listener count
     # This is for backward compatibility with Rocky pre-versioning
@@ -328,11 +684,98 @@ class UpdateHealthDb:
             }
 
         """
+        signature = None
+        if CONF.health_manager.operating_status_cache_ttl:
+            signature = STATUS_CACHE.get_signature(health)
+            if STATUS_CACHE.match(health['id'], signature,
+                                  health.get('seq')):
+                # Nothing changed since the previous heartbeat, the operating
+                # statuses in the DB are already up to date.
+                if not self._is_stale(health):
+                    self._replace_amphora_health(health['id'])
+                return
+            STATUS_CACHE.invalidate(health['id'])
+
         session = db_api.get_session()
 
         # We need to see if all of the listeners are reporting in
         db_lb = self.amphora_repo.get_lb_for_health_update(session,
                                                            health['id'])
+
+        update_amphora_health = self._check_health(session, health, srcaddr,
+                                                   db_lb)
+        if update_amphora_health is None:
+            return
+
+        if update_amphora_health:
+            self._replace_amphora_health(health['id'])
+
+        self._update_operating_statuses(session, health, db_lb)
+
+        if signature is not None:
+            self._cache_statuses(health, signature, db_lb,
+                                 update_amphora_health)
+
+    def _replace_amphora_health(self, amphora_id):
+        lock_session = db_api.get_session(autocommit=False)
+
+        # if the input amphora is healthy, we update its db info
+        try:
+            self.amphora_health_repo.replace(
+                lock_session, amphora_id,
+                last_update=(datetime.datetime.utcnow()))
+            lock_session.commit()
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                lock_session.rollback()
+
+    @staticmethod
+    def _pools_digest_matches(health):
+        # Heartbeats without a digest always carry the complete statuses
+        digest = health.get('digest')
+        return (digest is None or
+                digest == status_message.get_pools_digest(health['pools']))
+
+    def _cache_statuses(self, health, signature, db_lb,
+                        update_amphora_health):
+        # Only cache the statuses of healthy amphorae of load balancers
+        # that are not being modified, so any transition is picked up by
+        # the next heartbeat.
+        if (update_amphora_health and db_lb and
+                'PENDING' not in db_lb[constants.PROVISIONING_STATUS] and
+                self._pools_digest_matches(health)):
+            STATUS_CACHE.set(health['id'], signature, health.get('seq'))
+
+    @staticmethod
+    def _is_stale(health):
+        # if we're running too far behind, warn and bail
+        proc_delay = time.time() - health['recv_time']
+        hb_interval = CONF.health_manager.heartbeat_interval
+        # TODO(johnsom) We need to set a warning threshold here, and
+        #               escalate to critical when it reaches the
+        #               heartbeat_interval
+        if proc_delay >= hb_interval:
+            LOG.warning('Amphora %(id)s health message was processed too '
+                        'slowly: %(delay)ss! The system may be overloaded '
+                        'or otherwise malfunctioning. This heartbeat has '
+                        'been ignored and no update was made to the '
+                        'amphora health entry. THIS IS NOT GOOD.',
+                        {'id': health['id'], 'delay': proc_delay})
+            return True
+        return False
+
+    def _check_health(self, session, health, srcaddr, db_lb):
+        """Checks if a heartbeat can be used to update the amphora health
+
+        :param session: A Sql Alchemy database session.
+        :param health: The health message received from the amphora.
+        :param srcaddr: The IP address the health message was received from.
+        :param db_lb: The load balancer details from the database, as
+                      returned by get_lb_for_health_update.
+        :returns: True if the amphora health entry should be updated, False
+                  if it should not, None if the heartbeat must be ignored
+                  altogether.
+        """
         ignore_listener_count = False
 
         if db_lb:
@@ -371,7 +814,7 @@ class UpdateHealthDb:
                             'deleted (the compute_id is unknown). An '
                             'operator must manually delete it from the '
                             'compute service.', health['id'], srcaddr)
-                return
+                return None
             # delete the amp right there
             try:
                 compute = stevedore_driver.DriverManager(
@@ -380,7 +823,7 @@ class UpdateHealthDb:
                     invoke_on_load=True
                 ).driver
                 compute.delete(amp.compute_id)
-                return
+                return None
             except Exception as e:
                 LOG.info("Error deleting amp %s with IP %s Error: %s",
                          health['id'], srcaddr, str(e))
@@ -391,43 +834,30 @@ class UpdateHealthDb:
         # Do not update amphora health if the reporting listener count
         # does not match the expected listener count
         if len(listeners) == expected_listener_count or ignore_listener_count:
-
-            lock_session = db_api.get_session(autocommit=False)
-
-            # if we're running too far behind, warn and bail
-            proc_delay = time.time() - health['recv_time']
-            hb_interval = CONF.health_manager.heartbeat_interval
-            # TODO(johnsom) We need to set a warning threshold here, and
-            #               escalate to critical when it reaches the
-            #               heartbeat_interval
-            if proc_delay >= hb_interval:
-                LOG.warning('Amphora %(id)s health message was processed too '
-                            'slowly: %(delay)ss! The system may be overloaded '
-                            'or otherwise malfunctioning. This heartbeat has '
-                            'been ignored and no update was made to the '
-                            'amphora health entry. THIS IS NOT GOOD.',
-                            {'id': health['id'], 'delay': proc_delay})
-                return
-
-            # if the input amphora is healthy, we update its db info
-            try:
-                self.amphora_health_repo.replace(
-                    lock_session, health['id'],
-                    last_update=(datetime.datetime.utcnow()))
-                lock_session.commit()
-            except Exception:
-                with excutils.save_and_reraise_exception():
-                    lock_session.rollback()
-        else:
-            LOG.warning('Amphora %(id)s health message reports %(found)i '
-                        'listeners when %(expected)i expected',
-                        {'id': health['id'], 'found': len(listeners),
-                         'expected': expected_listener_count})
-
+            if self._is_stale(health):
+                return None
+            return True
+
+        LOG.warning('Amphora %(id)s health message reports %(found)i '
+                    'listeners when %(expected)i expected',
+                    {'id': health['id'], 'found': len(listeners),
+                     'expected': expected_listener_count})
+        return False
+
+    def _update_operating_statuses(self, session, health, db_lb):
+        """Updates the operating statuses of the objects of a load balancer
+
+        :param session: A Sql Alchemy database session.
+        :param health: The health message received from the amphora.
+        :param db_lb: The load balancer details from the database, as
+                      returned by get_lb_for_health_update.
+        :returns: None
+        """
         # Don't try to update status for bogus or old spares pool amphora
         if not db_lb:
             return
 
+        listeners = health['listeners']
         processed_pools = []
         potential_offline_pools = {}
 
@@ -439,6 +869,15 @@ class UpdateHealthDb:
 
         health_msg_version = health.get('ver', 0)
 
+        # The pool statuses of a heartbeat that only carried the changes
+        # since a complete heartbeat that was not received cannot be trusted,
+        # update the listeners only until the next complete heartbeat.
+        pools_complete = self._pools_digest_matches(health)
+        if not pools_complete:
+            LOG.debug('The pool statuses reported by amphora %s do not '
+                      'match their digest, only updating the listener '
+                      'statuses.', health['id'])
+
         for listener_id in db_lb.get(constants.LISTENERS, {}):
             db_listener = db_lb[constants.LISTENERS][listener_id]
             db_op_status = db_listener[constants.OPERATING_STATUS]
@@ -500,7 +939,7 @@ class UpdateHealthDb:
                         session, db_pool_id, db_pool_dict, pools,
                         lb_status, processed_pools, potential_offline_pools)
 
-        if health_msg_version >= 2:
+        if health_msg_version >= 2 and pools_complete:
             raw_pools = health['pools']
 
             # normalize the pool IDs. Single process listener pools
@@ -531,9 +970,11 @@ class UpdateHealthDb:
             except sqlalchemy.orm.exc.NoResultFound:
                 LOG.error("Pool %s is not in DB", pool_id)
 
-        # Update the load balancer status last
+        # Update the load balancer status last, it also depends on the
+        # pool statuses.
         try:
-            if lb_status != db_lb['operating_status']:
+            if (pools_complete and
+                    lb_status != db_lb['operating_status']):
                 self._update_status(
                     session, self.loadbalancer_repo,
                     constants.LOADBALANCER, db_lb['id'], lb_status,
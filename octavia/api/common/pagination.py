@@ -12,10 +12,15 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import base64
 import copy
+import datetime
 import itertools
 
 from oslo_log import log as logging
+from oslo_serialization import jsonutils
+from oslo_utils import timeutils
+from oslo_utils import uuidutils
 from pecan import request
 import sqlalchemy
 from sqlalchemy.orm import aliased
@@ -59,6 +64,9 @@ class PaginationHelper(object):
         self.params = params
         self.filters = None
         self.page_reverse = params.get('page_reverse', 'False')
+        # The model attribute names of the sort keys, when the markers hold
+        # their values instead of an ID (keyset pagination)
+        self._keyset_keys = None
 
     @staticmethod
     def _parse_limit(params):
@@ -114,6 +122,86 @@ class PaginationHelper(object):
     def _parse_marker(self, session, model):
         return session.query(model).filter_by(id=self.marker).one_or_none()
 
+    @staticmethod
+    def _is_indexed(table, column_name):
+        """Checks if a column is the leading column of an index of a table.
+
+        The primary key and the unique constraints are considered as well.
+        """
+        indexes = [table.primary_key] + list(table.indexes) + [
+            constraint for constraint in table.constraints
+            if isinstance(constraint, sqlalchemy.UniqueConstraint)]
+        return any(index.columns and list(index.columns)[0].name ==
+                   column_name for index in indexes)
+
+    def _get_keyset_keys(self, model):
+        """Returns the model attribute names of the sort keys for keysets.
+
+        Keyset markers hold the sort key values of an item, so the items that
+        follow it are selected without looking up the marker item. They are
+        only used when the sort keys are columns of the model table that
+        include its ID, and when the leading sort key is indexed, so that a
+        page costs the same no matter how deep it is.
+
+        :returns: The attribute names, or None if the markers are IDs.
+        """
+        if not (CONF.api_settings.pagination_keyset_markers and
+                CONF.api_settings.allow_sorting and self.sort_keys):
+            return None
+        keys = [model.__v2_wsme__.translate_key_to_data_model(sort_key)
+                for sort_key, _ in self.sort_keys]
+        table = model.__table__
+        if ('id' not in keys or
+                any(key not in table.columns for key in keys) or
+                not self._is_indexed(table, keys[0])):
+            LOG.debug('The sort keys %s cannot be used for keyset '
+                      'pagination of %s, using ID markers.', keys,
+                      table.name)
+            return None
+        return keys
+
+    def _encode_keyset_marker(self, model_obj):
+        values = []
+        for key in self._keyset_keys:
+            value = getattr(model_obj, key)
+            if isinstance(value, datetime.datetime):
+                value = value.isoformat()
+            values.append(value)
+        marker = jsonutils.dump_as_bytes(
+            {'keys': self._keyset_keys, 'values': values})
+        return base64.urlsafe_b64encode(marker).decode().rstrip('=')
+
+    def _decode_keyset_marker(self, model):
+        """Returns the sort key values held by a keyset marker."""
+        try:
+            marker = jsonutils.loads(base64.urlsafe_b64decode(
+                self.marker + '=' * (-len(self.marker) % 4)))
+            keys = marker['keys']
+            values = marker['values']
+        except Exception as e:
+            raise exceptions.InvalidMarker(key=self.marker) from e
+        # The marker must have been generated for the same sort keys
+        if keys != self._keyset_keys or len(values) != len(keys):
+            raise exceptions.InvalidMarker(key=self.marker)
+        marker_values = []
+        for key, value in zip(keys, values):
+            column_type = model.__table__.columns[key].type
+            try:
+                if value is None:
+                    value = self._get_default_column_value(column_type)
+                elif isinstance(column_type, sqlalchemy.DateTime):
+                    value = timeutils.normalize_time(
+                        timeutils.parse_isotime(value))
+            except (KeyError, ValueError) as e:
+                raise exceptions.InvalidMarker(key=self.marker) from e
+            marker_values.append(value)
+        return marker_values
+
+    def _get_link_marker(self, model_obj):
+        if self._keyset_keys:
+            return self._encode_keyset_marker(model_obj)
+        return model_obj.get('id')
+
     @staticmethod
     def _get_default_column_value(column_type):
         """Return the default value of the columns from DB table
@@ -133,6 +221,22 @@ class PaginationHelper(object):
 
         return type_schema[column_type.__visit_name__]
 
+    @staticmethod
+    def _get_marker_attr(model_attr, keyset):
+        """Returns the expression compared with a marker value.
+
+        NULL values are compared as the default value of the column type.
+        With keyset markers, the columns that are NOT NULL, or whose default
+        value is NULL anyway, are compared as is so that their indexes can
+        be used.
+        """
+        column = model_attr.property.columns[0]
+        default = PaginationHelper._get_default_column_value(column.type)
+        if keyset and (default is None or not column.nullable):
+            return model_attr
+        return sa_sql.expression.case(
+            [(model_attr.isnot(None), model_attr), ], else_=default)
+
     @staticmethod
     def _validate_sort_dir(sort_dir):
         sort_dir = sort_dir.lower()
@@ -157,7 +261,8 @@ class PaginationHelper(object):
                     self.params.get('sort_key')))
             next_attr = copy.copy(prev_attr)
             if self.marker:
-                prev_attr.append("marker={}".format(model_list[0].get('id')))
+                prev_attr.append("marker={}".format(
+                    self._get_link_marker(model_list[0])))
                 prev_attr.append("page_reverse=True")
                 prev_link = {
                     "rel": "previous",
@@ -170,7 +275,8 @@ class PaginationHelper(object):
             # We safely know if we have a full page, but it might include the
             # last element or it might not, it is unclear
             if len(model_list) >= self.limit:
-                next_attr.append("marker={}".format(model_list[-1].get('id')))
+                next_attr.append("marker={}".format(
+                    self._get_link_marker(model_list[-1])))
                 next_link = {
                     "rel": "next",
                     "href": "{url}?{params}".format(
@@ -241,6 +347,9 @@ class PaginationHelper(object):
         Typically, the id of the last row is used as the client-facing
         pagination marker, then the actual marker object must be fetched from
         the db and passed in to us as marker.
+        With [api_settings] pagination_keyset_markers, when the leading sort
+        key is indexed, the links hold the sort key values of the last row
+        instead (keyset pagination), so no marker object is fetched.
         :param query: the query object to which we should add
         paging/sorting/filtering
         :param model: the ORM model class
@@ -339,7 +448,14 @@ class PaginationHelper(object):
         # Add pagination
         if CONF.api_settings.allow_pagination:
             default = ''  # Default to an empty string if NULL
-            if self.marker is not None:
+            self._keyset_keys = self._get_keyset_keys(model)
+            if (self.marker is not None and self._keyset_keys and
+                    not uuidutils.is_uuid_like(self.marker)):
+                # The marker holds the sort key values, no lookup needed
+                marker_values = self._decode_keyset_marker(model)
+                marker_keys = self._keyset_keys
+                keyset = True
+            elif self.marker is not None:
                 marker_object = self._parse_marker(query.session, model)
                 if not marker_object:
                     raise exceptions.InvalidMarker(key=self.marker)
@@ -349,26 +465,21 @@ class PaginationHelper(object):
                     if v is None:
                         v = default
                     marker_values.append(v)
+                marker_keys = [sort_key for sort_key, _ in self.sort_keys]
+                keyset = False
 
+            if self.marker is not None:
                 # Build up an array of sort criteria as in the docstring
                 criteria_list = []
                 for i in range(len(self.sort_keys)):
                     crit_attrs = []
                     for j in range(i):
-                        model_attr = getattr(model, self.sort_keys[j][0])
-                        default = PaginationHelper._get_default_column_value(
-                            model_attr.property.columns[0].type)
-                        attr = sa_sql.expression.case(
-                            [(model_attr.isnot(None),
-                              model_attr), ], else_=default)
+                        attr = self._get_marker_attr(
+                            getattr(model, marker_keys[j]), keyset)
                         crit_attrs.append((attr == marker_values[j]))
 
-                    model_attr = getattr(model, self.sort_keys[i][0])
-                    default = PaginationHelper._get_default_column_value(
-                        model_attr.property.columns[0].type)
-                    attr = sa_sql.expression.case(
-                        [(model_attr.isnot(None),
-                          model_attr), ], else_=default)
+                    attr = self._get_marker_attr(
+                        getattr(model, marker_keys[i]), keyset)
                     this_sort_dir = self.sort_keys[i][1]
                     if this_sort_dir == constants.DESC:
                         if self.page_reverse == "True":
@@ -388,6 +499,18 @@ class PaginationHelper(object):
                     criteria_list.append(criteria)
 
                 f = sa_sql.or_(*criteria_list)
+                first_attr = getattr(model, marker_keys[0])
+                if (keyset and
+                        self._get_marker_attr(first_attr, keyset) is
+                        first_attr):
+                    # The OR of the criteria does not bound the leading sort
+                    # key by itself, add its bound so that the database
+                    # scans a range of its index.
+                    if ((self.sort_keys[0][1] == constants.ASC) !=
+                            (self.page_reverse == "True")):
+                        f = sa_sql.and_(first_attr >= marker_values[0], f)
+                    else:
+                        f = sa_sql.and_(first_attr <= marker_values[0], f)
                 query = query.filter(f)
 
             if self.limit is not None:
@@ -13,8 +13,11 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import contextlib
 import errno
 import os
+import queue
+import socket
 import socketserver
 import threading
 
@@ -24,97 +27,121 @@ from oslo_serialization import jsonutils
 
 from octavia.api.drivers.driver_agent import driver_get
 from octavia.api.drivers.driver_agent import driver_updater
+from octavia.common import constants
+from octavia.i18n import _
 
 
 CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
 
 
-def _recv(recv_socket):
-    size_str = b''
-    char = recv_socket.recv(1)
-    while char != b'\n':
-        size_str += char
-        char = recv_socket.recv(1)
+# The payload size header is a decimal number followed by a newline
+MAX_HEADER_SIZE = 32
+
+
+def _recv(recv_file):
+    """Read one length-prefixed JSON message.
+
+    :param recv_file: A buffered binary file object wrapping the socket, so
+                      the size header is not read one byte at a time.
+    :returns: The decoded message, or None if the peer closed the connection
+              instead of sending another message.
+    """
+    size_str = recv_file.readline(MAX_HEADER_SIZE)
+    if not size_str:
+        return None
+    if not size_str.endswith(b'\n'):
+        raise ValueError(_('Invalid message size header: {!r}').format(
+            size_str))
     payload_size = int(size_str)
-    mv_buffer = memoryview(bytearray(payload_size))
-    next_offset = 0
-    while payload_size - next_offset > 0:
-        recv_size = recv_socket.recv_into(mv_buffer[next_offset:],
-                                          payload_size - next_offset)
-        next_offset += recv_size
-    return jsonutils.loads(mv_buffer.tobytes())
+    payload = recv_file.read(payload_size)
+    if len(payload) != payload_size:
+        raise EOFError(_('Connection closed after {} of {} payload '
+                         'bytes.').format(len(payload), payload_size))
+    return jsonutils.loads(payload)
 
 
-class StatusRequestHandler(socketserver.BaseRequestHandler):
+class _DriverUpdaterPool(object):
+    """Reuses DriverUpdater objects, and their sessions, across requests."""
 
-    def handle(self):
-        # Get the update data
-        try:
-            status = _recv(self.request)
-        except Exception:
-            LOG.exception("Error while receiving data.")
-            return
-
-        # Process the update
-        updater = driver_updater.DriverUpdater()
-        response = updater.update_loadbalancer_status(status)
-
-        # Send the response
-        json_data = jsonutils.dump_as_bytes(response)
-        len_str = '{}\n'.format(len(json_data)).encode('utf-8')
+    def __init__(self):
+        self._updaters = queue.LifoQueue()
+
+    @contextlib.contextmanager
+    def get(self):
         try:
-            self.request.send(len_str)
-            self.request.sendall(json_data)
-        except Exception:
-            LOG.exception("Error while sending data.")
+            updater = self._updaters.get_nowait()
+        except queue.Empty:
+            updater = driver_updater.DriverUpdater()
+        # An updater that failed is dropped instead of returned to the pool
+        yield updater
+        # Do not serve the next request from this request's identity map
+        updater.db_session.expunge_all()
+        self._updaters.put(updater)
 
 
-class StatsRequestHandler(socketserver.BaseRequestHandler):
+class _FramedRequestHandler(socketserver.StreamRequestHandler):
+    """Serves length-prefixed JSON requests until the peer disconnects.
 
-    def handle(self):
-        # Get the update data
-        try:
-            stats = _recv(self.request)
-        except Exception:
-            LOG.exception("Error while receiving data.")
-            return
-
-        # Process the update
-        updater = driver_updater.DriverUpdater()
-        response = updater.update_listener_statistics(stats)
-
-        # Send the response
-        json_data = jsonutils.dump_as_bytes(response)
-        len_str = '{}\n'.format(len(json_data)).encode('utf-8')
-        try:
-            self.request.send(len_str)
-            self.request.sendall(json_data)
-        except Exception:
-            LOG.exception("Error while sending data.")
+    Each request and response is the decimal payload size and a newline,
+    followed by the JSON payload. A provider driver can send any number of
+    requests over one connection, one at a time. Clients that close the
+    connection after the first response are served the same way.
+    """
 
+    def setup(self):
+        self.timeout = CONF.driver_agent.connection_idle_timeout or None
+        super().setup()
 
-class GetRequestHandler(socketserver.BaseRequestHandler):
+    def _process(self, data):
+        raise NotImplementedError()
 
     def handle(self):
-        # Get the data request
-        try:
-            get_data = _recv(self.request)
-        except Exception:
-            LOG.exception("Error while receiving data.")
-            return
+        while True:
+            # Get the request data
+            try:
+                data = _recv(self.rfile)
+            except socket.timeout:
+                LOG.debug("Closing idle driver connection.")
+                return
+            except Exception:
+                LOG.exception("Error while receiving data.")
+                return
+            if data is None:
+                return
 
-        # Process the get
-        response = driver_get.process_get(get_data)
+            # Process the request
+            with self.server.request_slots:
+                response = self._process(data)
+
+            # Send the response
+            json_data = jsonutils.dump_as_bytes(response)
+            len_str = '{}\n'.format(len(json_data)).encode('utf-8')
+            try:
+                self.request.sendall(len_str + json_data)
+            except Exception:
+                LOG.exception("Error while sending data.")
+                return
 
-        # Send the response
-        json_data = jsonutils.dump_as_bytes(response)
-        len_str = '{}\n'.format(len(json_data)).encode('utf-8')
-        try:
-            self.request.send(len_str)
-            self.request.sendall(json_data)
-        except Exception:
-            LOG.exception("Error while sending data.")
+
+class StatusRequestHandler(_FramedRequestHandler):
+
+    def _process(self, data):
+        with self.server.updater_pool.get() as updater:
+            return updater.update_loadbalancer_status(data)
+
+
+class StatsRequestHandler(_FramedRequestHandler):
+
+    def _process(self, data):
+        with self.server.updater_pool.get() as updater:
+            return updater.update_listener_statistics(data)
+
+
+class GetRequestHandler(_FramedRequestHandler):
+
+    def _process(self, data):
+        return driver_get.process_get(data)
 
 
 class ForkingUDSServer(socketserver.ForkingMixIn,
@@ -122,6 +149,25 @@ class ForkingUDSServer(socketserver.ForkingMixIn,
     pass
 
 
+class ThreadingUDSServer(socketserver.ThreadingMixIn,
+                         socketserver.UnixStreamServer):
+    # Idle persistent connections must not delay the shutdown
+    daemon_threads = True
+    block_on_close = False
+
+
+def _create_server(socket_path, handler_class, max_workers):
+    if CONF.driver_agent.server_mode == constants.DRIVER_AGENT_THREADING:
+        server = ThreadingUDSServer(socket_path, handler_class)
+    else:
+        server = ForkingUDSServer(socket_path, handler_class)
+        server.max_children = max_workers
+    # With forking, every child process gets its own copy of these
+    server.request_slots = threading.BoundedSemaphore(max_workers)
+    server.updater_pool = _DriverUpdaterPool()
+    return server
+
+
 def _cleanup_socket_file(filename):
     # Remove the socket file if it already exists
     try:
@@ -134,10 +180,10 @@ def _cleanup_socket_file(filename):
 def status_listener(exit_event):
     _cleanup_socket_file(CONF.driver_agent.status_socket_path)
 
-    with ForkingUDSServer(CONF.driver_agent.status_socket_path,
-                          StatusRequestHandler) as server:
+    with _create_server(CONF.driver_agent.status_socket_path,
+                        StatusRequestHandler,
+                        CONF.driver_agent.status_max_processes) as server:
         server.timeout = CONF.driver_agent.status_request_timeout
-        server.max_children = CONF.driver_agent.status_max_processes
 
         threading.Thread(target=server.serve_forever).start()
 
@@ -152,10 +198,10 @@ def status_listener(exit_event):
 def stats_listener(exit_event):
     _cleanup_socket_file(CONF.driver_agent.stats_socket_path)
 
-    with ForkingUDSServer(CONF.driver_agent.stats_socket_path,
-                          StatsRequestHandler) as server:
+    with _create_server(CONF.driver_agent.stats_socket_path,
+                        StatsRequestHandler,
+                        CONF.driver_agent.stats_max_processes) as server:
         server.timeout = CONF.driver_agent.stats_request_timeout
-        server.max_children = CONF.driver_agent.stats_max_processes
 
         threading.Thread(target=server.serve_forever).start()
 
@@ -170,10 +216,10 @@ def stats_listener(exit_event):
 def get_listener(exit_event):
     _cleanup_socket_file(CONF.driver_agent.get_socket_path)
 
-    with ForkingUDSServer(CONF.driver_agent.get_socket_path,
-                          GetRequestHandler) as server:
+    with _create_server(CONF.driver_agent.get_socket_path,
+                        GetRequestHandler,
+                        CONF.driver_agent.get_max_processes) as server:
         server.timeout = CONF.driver_agent.get_request_timeout
-        server.max_children = CONF.driver_agent.get_max_processes
 
         threading.Thread(target=server.serve_forever).start()
 
@@ -12,6 +12,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import time
 
 from octavia_lib.api.drivers import exceptions as driver_exceptions
@@ -21,6 +22,7 @@ from oslo_utils import excutils
 
 from octavia.common import constants as consts
 from octavia.common import data_models
+from octavia.common import exceptions
 from octavia.common import utils
 from octavia.db import api as db_apis
 from octavia.db import repositories as repo
@@ -31,6 +33,11 @@ LOG = logging.getLogger(__name__)
 
 class DriverUpdater(object):
 
+    # The status updates of these objects fail for unknown IDs, like their
+    # repository update() does
+    _REQUIRED_STATUS_OBJECTS = (lib_consts.LISTENERS, consts.L7POLICIES,
+                                consts.L7RULES)
+
     def __init__(self, **kwargs):
         self.repos = repo.Repositories()
         self.loadbalancer_repo = repo.LoadBalancerRepository()
@@ -55,73 +62,167 @@ class DriverUpdater(object):
             network_driver = utils.get_network_driver()
             network_driver.deallocate_vip(vip)
 
-    def _decrement_quota(self, repo, object_name, record_id):
-        lock_session = db_apis.get_session(autocommit=False)
-        db_object = repo.get(lock_session, id=record_id)
-        if db_object is None:
-            lock_session.rollback()
-            msg = ('{} with ID of {} is not present in the '
-                   'database, it might have already been deleted. '
-                   'Skipping quota update.'.format(
-                       object_name, record_id))
-            raise driver_exceptions.NotFound(msg)
-        try:
-            if db_object.provisioning_status == consts.DELETED:
+    def _get_status_repos(self):
+        # Children are listed before their parents, so they are deleted
+        # first. Load balancers are only marked DELETED, never deleted.
+        return ((consts.MEMBERS, self.member_repo, True),
+                (consts.HEALTHMONITORS, self.health_mon_repo, True),
+                (consts.POOLS, self.pool_repo, True),
+                (consts.L7RULES, self.l7rule_repo, True),
+                (consts.L7POLICIES, self.l7policy_repo, True),
+                (lib_consts.LISTENERS, self.listener_repo, True),
+                (consts.LOADBALANCERS, self.loadbalancer_repo, False))
+
+    @staticmethod
+    def _group_status_records(object_name, records):
+        """Groups the records of one object type by their new statuses.
+
+        :returns: The IDs of the records to be DELETED, and a dict of the
+                  record IDs keyed by their (provisioning_status,
+                  operating_status) pair.
+        """
+        deleted_ids = []
+        status_groups = collections.defaultdict(list)
+        for record in records:
+            record_id = record.get('id')
+            if record_id is None:
+                raise driver_exceptions.UpdateStatusError(
+                    fault_string='Status record {} has no ID.'.format(
+                        record),
+                    status_object_id=None, status_object=object_name)
+            prov_status = record.get(consts.PROVISIONING_STATUS) or None
+            op_status = record.get(consts.OPERATING_STATUS) or None
+            if prov_status == consts.DELETED:
+                deleted_ids.append(record_id)
+            if prov_status or op_status:
+                status_groups[(prov_status, op_status)].append(record_id)
+        return deleted_ids, status_groups
+
+    def _get_quota_decrements(self, session, repo, object_name, record_ids,
+                              quota_decrements):
+        """Counts the quota to release for the records being DELETED.
+
+        :returns: The IDs of the records that were not found. They might
+                  have already been deleted and are skipped.
+        """
+        model = repo.model_class
+        found_ids = set()
+        for record_id, project_id, prov_status in session.query(
+                model.id, model.project_id, model.provisioning_status).filter(
+                    model.id.in_(record_ids)):
+            found_ids.add(record_id)
+            if prov_status == consts.DELETED:
                 LOG.info('%(name)s with ID of %(id)s is already in the '
                          'DELETED state. Skipping quota update.',
                          {'name': object_name, 'id': record_id})
-                lock_session.rollback()
-                return
-            self.repos.decrement_quota(lock_session,
-                                       repo.model_class.__data_model__,
-                                       db_object.project_id)
+                continue
+            quota_decrements[(project_id, object_name,
+                              model.__data_model__)] += 1
+        missing_ids = set(record_ids) - found_ids
+        for record_id in missing_ids:
+            LOG.info('%(name)s with ID of %(id)s is not present in the '
+                     'database, it might have already been deleted. '
+                     'Skipping quota update.',
+                     {'name': object_name, 'id': record_id})
+        return missing_ids
+
+    @staticmethod
+    def _get_missing_ids(session, obj_repo, record_ids):
+        model = obj_repo.model_class
+        found_ids = {record_id for record_id, in session.query(
+            model.id).filter(model.id.in_(record_ids))}
+        return set(record_ids) - found_ids
+
+    def _apply_status_updates(self, updates):
+        """Applies all of the status changes of a payload in a transaction.
+
+        The quota of the DELETED records is released with one locked update
+        per project and resource type, DELETED child objects are deleted and
+        the other status changes are made with one UPDATE per table and
+        status pair.
+
+        :param updates: A list of (object_name, obj_repo, delete_record,
+                        deleted_ids, status_groups) tuples.
+        """
+        lock_session = db_apis.get_session(autocommit=False)
+        try:
+            quota_decrements = collections.Counter()
+            changes = []
+            for (object_name, obj_repo, delete_record, deleted_ids,
+                 status_groups) in updates:
+                missing_ids = set()
+                if deleted_ids:
+                    try:
+                        missing_ids = self._get_quota_decrements(
+                            lock_session, obj_repo, object_name, deleted_ids,
+                            quota_decrements)
+                    except Exception as e:
+                        raise driver_exceptions.UpdateStatusError(
+                            fault_string=str(e), status_object_id=None,
+                            status_object=object_name)
+                delete_ids = []
+                if delete_record:
+                    delete_ids = [record_id for record_id in deleted_ids
+                                  if record_id not in missing_ids]
+                # Deleted and missing DELETED records are not updated
+                skipped_ids = missing_ids.union(delete_ids)
+                update_groups = {}
+                for statuses, record_ids in status_groups.items():
+                    record_ids = [record_id for record_id in record_ids
+                                  if record_id not in skipped_ids]
+                    if record_ids:
+                        update_groups[statuses] = record_ids
+                changes.append((object_name, obj_repo, delete_ids,
+                                update_groups))
+
+            # Sort to lock the quota records in a consistent order
+            for (project_id, object_name, data_model), quantity in sorted(
+                    quota_decrements.items(), key=lambda item: item[0][:2]):
+                try:
+                    self.repos.decrement_quota(lock_session, data_model,
+                                               project_id, quantity=quantity)
+                except Exception as e:
+                    LOG.error('Failed to decrement %(name)s quota for '
+                              'project: %(proj)s the project may have '
+                              'excess quota in use.',
+                              {'proj': project_id, 'name': object_name})
+                    raise driver_exceptions.UpdateStatusError(
+                        fault_string=str(e), status_object_id=None,
+                        status_object=object_name)
+
+            for object_name, obj_repo, delete_ids, update_groups in changes:
+                record_id = None
+                try:
+                    for record_id in delete_ids:
+                        obj_repo.delete(lock_session, id=record_id)
+                    record_id = None
+                    for (prov_status, op_status), record_ids in (
+                            update_groups.items()):
+                        record_kwargs = {}
+                        if prov_status:
+                            record_kwargs[consts.PROVISIONING_STATUS] = (
+                                prov_status)
+                        if op_status:
+                            record_kwargs[consts.OPERATING_STATUS] = op_status
+                        updated = obj_repo.update_batch(
+                            lock_session, record_ids, **record_kwargs)
+                        if (object_name in self._REQUIRED_STATUS_OBJECTS and
+                                updated != len(set(record_ids))):
+                            record_id = ', '.join(sorted(
+                                self._get_missing_ids(
+                                    lock_session, obj_repo, record_ids)))
+                            data_model = obj_repo.model_class.__data_model__
+                            raise exceptions.NotFound(
+                                resource=data_model._name(), id=record_id)
+                except Exception as e:
+                    raise driver_exceptions.UpdateStatusError(
+                        fault_string=str(e), status_object_id=record_id,
+                        status_object=object_name)
             lock_session.commit()
         except Exception:
             with excutils.save_and_reraise_exception():
-                LOG.error('Failed to decrement %(name)s quota for '
-                          'project: %(proj)s the project may have excess '
-                          'quota in use.', {'proj': db_object.project_id,
-                                            'name': object_name})
                 lock_session.rollback()
 
-    def _process_status_update(self, repo, object_name, record,
-                               delete_record=False):
-        # Zero it out so that if the ID is missing from a record we do not
-        # report the last LB as the failed record in the exception
-        record_id = None
-        try:
-            record_id = record['id']
-            record_kwargs = {}
-            prov_status = record.get(consts.PROVISIONING_STATUS, None)
-            if prov_status:
-                if prov_status == consts.DELETED:
-                    if object_name == consts.LOADBALANCERS:
-                        self._check_for_lb_vip_deallocate(repo, record_id)
-
-                    try:
-                        self._decrement_quota(repo, object_name, record_id)
-                    except driver_exceptions.NotFound:
-                        # prov_status is DELETED and the object no longer
-                        # exists in the DB, ignore the update.
-                        return
-
-                    if delete_record and object_name != consts.LOADBALANCERS:
-                        repo.delete(self.db_session, id=record_id)
-                        return
-
-                record_kwargs[consts.PROVISIONING_STATUS] = prov_status
-            op_status = record.get(consts.OPERATING_STATUS, None)
-            if op_status:
-                record_kwargs[consts.OPERATING_STATUS] = op_status
-            if prov_status or op_status:
-                repo.update(self.db_session, record_id, **record_kwargs)
-        except Exception as e:
-            # We need to raise a failure here to notify the driver it is
-            # sending bad status data.
-            raise driver_exceptions.UpdateStatusError(
-                fault_string=str(e), status_object_id=record_id,
-                status_object=object_name)
-
     def update_loadbalancer_status(self, status):
         """Update load balancer status.
 
@@ -136,43 +237,30 @@ class DriverUpdater(object):
         :returns: None
         """
         try:
-            members = status.pop(consts.MEMBERS, [])
-            for member in members:
-                self._process_status_update(self.member_repo, consts.MEMBERS,
-                                            member, delete_record=True)
-
-            health_mons = status.pop(consts.HEALTHMONITORS, [])
-            for health_mon in health_mons:
-                self._process_status_update(
-                    self.health_mon_repo, consts.HEALTHMONITORS, health_mon,
-                    delete_record=True)
-
-            pools = status.pop(consts.POOLS, [])
-            for pool in pools:
-                self._process_status_update(self.pool_repo, consts.POOLS,
-                                            pool, delete_record=True)
-
-            l7rules = status.pop(consts.L7RULES, [])
-            for l7rule in l7rules:
-                self._process_status_update(self.l7rule_repo, consts.L7RULES,
-                                            l7rule, delete_record=True)
-
-            l7policies = status.pop(consts.L7POLICIES, [])
-            for l7policy in l7policies:
-                self._process_status_update(
-                    self.l7policy_repo, consts.L7POLICIES, l7policy,
-                    delete_record=True)
-
-            listeners = status.pop(lib_consts.LISTENERS, [])
-            for listener in listeners:
-                self._process_status_update(
-                    self.listener_repo, lib_consts.LISTENERS, listener,
-                    delete_record=True)
-
-            lbs = status.pop(consts.LOADBALANCERS, [])
-            for lb in lbs:
-                self._process_status_update(self.loadbalancer_repo,
-                                            consts.LOADBALANCERS, lb)
+            updates = []
+            for (object_name, obj_repo,
+                 delete_record) in self._get_status_repos():
+                records = status.pop(object_name, [])
+                if not records:
+                    continue
+                deleted_ids, status_groups = self._group_status_records(
+                    object_name, records)
+                updates.append((object_name, obj_repo, delete_record,
+                                deleted_ids, status_groups))
+
+            for object_name, obj_repo, _, deleted_ids, _ in updates:
+                if object_name != consts.LOADBALANCERS:
+                    continue
+                for record_id in deleted_ids:
+                    try:
+                        self._check_for_lb_vip_deallocate(obj_repo, record_id)
+                    except Exception as e:
+                        raise driver_exceptions.UpdateStatusError(
+                            fault_string=str(e), status_object_id=record_id,
+                            status_object=object_name)
+
+            if updates:
+                self._apply_status_updates(updates)
         except driver_exceptions.UpdateStatusError as e:
             return {lib_consts.STATUS_CODE: lib_consts.DRVR_STATUS_CODE_FAILED,
                     lib_consts.FAULT_STRING: e.fault_string,
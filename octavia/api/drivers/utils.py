@@ -22,6 +22,7 @@ from oslo_log import log as logging
 from oslo_utils import excutils
 from stevedore import driver as stevedore_driver
 
+from octavia.certificates.manager import cached
 from octavia.common import constants
 from octavia.common import data_models
 from octavia.common import exceptions
@@ -246,11 +247,12 @@ def listener_dict_to_provider_dict(listener_dict, for_delete=False):
                 raise exceptions.ValidationException(
                     detail=_('Invalid SNI container on listener'))
         listener_obj.sni_containers = SNI_objs
-        cert_manager = stevedore_driver.DriverManager(
-            namespace='octavia.cert_manager',
-            name=CONF.certificates.cert_manager,
-            invoke_on_load=True,
-        ).driver
+        cert_manager = cached.CachedCertManager(
+            stevedore_driver.DriverManager(
+                namespace='octavia.cert_manager',
+                name=CONF.certificates.cert_manager,
+                invoke_on_load=True,
+            ).driver)
         try:
             cert_dict = cert_parser.load_certificates_data(cert_manager,
                                                            listener_obj)
@@ -375,11 +377,12 @@ def pool_dict_to_provider_dict(pool_dict, for_delete=False):
     pool_obj = data_models.Pool(**pool_dict)
     if (pool_obj.tls_certificate_id or pool_obj.ca_tls_certificate_id or
             pool_obj.crl_container_id):
-        cert_manager = stevedore_driver.DriverManager(
-            namespace='octavia.cert_manager',
-            name=CONF.certificates.cert_manager,
-            invoke_on_load=True,
-        ).driver
+        cert_manager = cached.CachedCertManager(
+            stevedore_driver.DriverManager(
+                namespace='octavia.cert_manager',
+                name=CONF.certificates.cert_manager,
+                invoke_on_load=True,
+            ).driver)
         try:
             cert_dict = cert_parser.load_certificates_data(cert_manager,
                                                            pool_obj)
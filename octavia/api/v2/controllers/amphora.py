@@ -73,6 +73,7 @@ class AmphoraController(base.BaseController):
 
         db_amp, links = self.repositories.amphora.get_all_API_list(
             context.session, show_deleted=False,
+            fields=self._get_query_fields(fields),
             pagination_helper=pcontext.get(constants.PAGINATION_HELPER))
         result = self._convert_db_to_type(
             db_amp, [amp_types.AmphoraResponse])
@@ -261,6 +261,18 @@ class BaseController(pecan_rest.RestController):
                         setattr(obj, member, wtypes.Unset)
         return object_list
 
+    @staticmethod
+    def _get_query_fields(fields):
+        """Returns the fields to load from the database for a list call.
+
+        :param fields: The fields requested by the API call.
+        :returns: The requested fields, or None for all of them when field
+                  selection is not allowed.
+        """
+        if CONF.api_settings.allow_field_selection:
+            return fields
+        return None
+
     @staticmethod
     def _get_attrs(obj):
         attrs = [attr for attr in dir(obj) if not callable(
@@ -72,6 +72,7 @@ class HealthMonitorController(base.BaseController):
 
         db_hm, links = self.repositories.health_monitor.get_all_API_list(
             context.session, show_deleted=False,
+            fields=self._get_query_fields(fields),
             pagination_helper=pcontext.get(consts.PAGINATION_HELPER),
             **query_filter)
         result = self._convert_db_to_type(
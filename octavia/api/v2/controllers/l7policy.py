@@ -74,6 +74,7 @@ class L7PolicyController(base.BaseController):
 
         db_l7policies, links = self.repositories.l7policy.get_all_API_list(
             context.session, show_deleted=False,
+            fields=self._get_query_fields(fields),
             pagination_helper=pcontext.get(constants.PAGINATION_HELPER),
             **query_filter)
         result = self._convert_db_to_type(
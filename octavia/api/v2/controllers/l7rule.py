@@ -73,7 +73,9 @@ class L7RuleController(base.BaseController):
                                    constants.RBAC_GET_ALL)
 
         db_l7rules, links = self.repositories.l7rule.get_all_API_list(
-            context.session, show_deleted=False, l7policy_id=self.l7policy_id,
+            context.session, show_deleted=False,
+            fields=self._get_query_fields(fields),
+            l7policy_id=self.l7policy_id,
             pagination_helper=pcontext.get(constants.PAGINATION_HELPER))
         result = self._convert_db_to_type(
             db_l7rules, [l7rule_types.L7RuleResponse])
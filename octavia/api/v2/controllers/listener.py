@@ -13,12 +13,15 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import datetime
+
 from octavia_lib.api.drivers import data_models as driver_dm
 from octavia_lib.common import constants as lib_consts
 from oslo_config import cfg
 from oslo_db import exception as odb_exceptions
 from oslo_log import log as logging
 from oslo_utils import excutils
+from oslo_utils import timeutils
 from pecan import expose as pecan_expose
 from pecan import request as pecan_request
 from wsme import types as wtypes
@@ -29,6 +32,7 @@ from octavia.api.drivers import utils as driver_utils
 from octavia.api.v2.controllers import base
 from octavia.api.v2.controllers import l7policy
 from octavia.api.v2.types import listener as listener_types
+from octavia.certificates.manager import cached
 from octavia.common import constants
 from octavia.common import data_models
 from octavia.common import exceptions
@@ -82,6 +86,7 @@ class ListenersController(base.BaseController):
 
         db_listeners, links = self.repositories.listener.get_all_API_list(
             context.session, show_deleted=False,
+            fields=self._get_query_fields(fields),
             pagination_helper=pcontext.get(constants.PAGINATION_HELPER),
             **query_filter)
         result = self._convert_db_to_type(
@@ -548,6 +553,15 @@ class ListenersController(base.BaseController):
             # Validate ALPN protocol list
             validate.check_alpn_protocols(listener.alpn_protocols)
 
+    @staticmethod
+    def _get_cert_refs(db_listener):
+        refs = [db_listener.tls_certificate_id,
+                db_listener.client_ca_tls_certificate_id,
+                db_listener.client_crl_container_id]
+        refs.extend(sni.tls_container_id
+                    for sni in db_listener.sni_containers)
+        return refs
+
     def _set_default_on_none(self, listener):
         """Reset settings to their default values if None/null was passed in
 
@@ -613,6 +627,16 @@ class ListenersController(base.BaseController):
         # Load the driver early as it also provides validation
         driver = driver_factory.get_driver(provider)
 
+        # The certificates of the previous and the new references are
+        # retrieved again from the cert manager
+        cert_refs = [listener.default_tls_container_ref,
+                     listener.client_ca_tls_container_ref,
+                     listener.client_crl_container_ref]
+        if (listener.sni_container_refs is not wtypes.Unset or
+                any(ref is not wtypes.Unset for ref in cert_refs)):
+            cert_refs.extend(listener.sni_container_refs or [])
+            cached.invalidate(cert_refs + self._get_cert_refs(db_listener))
+
         with db_api.get_lock_session() as lock_session:
             self._test_lb_and_listener_statuses(lock_session,
                                                 load_balancer_id, id=id)
@@ -679,14 +703,20 @@ class ListenersController(base.BaseController):
             driver_utils.call_provider(driver.name, driver.listener_delete,
                                        provider_listener)
 
+        cached.invalidate(self._get_cert_refs(db_listener))
+
     @pecan_expose()
     def _lookup(self, id, *remainder):
         """Overridden pecan _lookup method for custom routing.
 
-        Currently it checks if this was a stats request and routes
-        the request to the StatsController.
+        Currently it checks if this was a stats or stats history request
+        and routes the request to the StatisticsController or the
+        StatisticsHistoryController.
         """
         if id and remainder and remainder[0] == 'stats':
+            if len(remainder) > 1 and remainder[1] == 'history':
+                return (StatisticsHistoryController(listener_id=id),
+                        remainder[2:])
             return StatisticsController(listener_id=id), remainder[1:]
         return None
 
@@ -718,3 +748,54 @@ class StatisticsController(base.BaseController, stats.StatsMixin):
         result = self._convert_db_to_type(
             listener_stats, listener_types.ListenerStatisticsResponse)
         return listener_types.StatisticsRootResponse(stats=result)
+
+
+class StatisticsHistoryController(base.BaseController, stats.StatsMixin):
+    RBAC_TYPE = constants.RBAC_LISTENER
+
+    def __init__(self, listener_id):
+        super().__init__()
+        self.id = listener_id
+
+    @wsme_pecan.wsexpose(listener_types.StatisticsHistoryRootResponse, int,
+                         datetime.datetime, datetime.datetime,
+                         status_code=200)
+    def get(self, resolution=constants.STATS_HISTORY_RESOLUTION_MINUTE,
+            start=None, end=None):
+        """Gets the statistics history of a listener over a time window.
+
+        The time window defaults to the 60 most recent intervals of the
+        resolution.
+        """
+        context = pecan_request.context.get('octavia_context')
+        db_listener = self._get_db_listener(context.session, self.id,
+                                            show_deleted=False)
+        if not db_listener:
+            LOG.info("Listener %s not found.", self.id)
+            raise exceptions.NotFound(
+                resource=data_models.Listener._name(),
+                id=self.id)
+
+        self._auth_validate_action(context, db_listener.project_id,
+                                   constants.RBAC_GET_STATS)
+
+        if resolution not in constants.STATS_HISTORY_RESOLUTIONS:
+            raise exceptions.InvalidOption(value=resolution,
+                                           option='resolution')
+        end = timeutils.normalize_time(end) if end else timeutils.utcnow()
+        if start:
+            start = timeutils.normalize_time(start)
+        else:
+            start = end - datetime.timedelta(seconds=resolution * 60)
+        if start > end:
+            raise exceptions.ValidationException(
+                detail=_("The start of the time window must not be later "
+                         "than its end."))
+
+        history = self.get_listener_stats_history(
+            context.session, self.id, resolution, start, end)
+
+        result = self._convert_db_to_type(
+            history, [listener_types.ListenerStatisticsHistoryResponse])
+        return listener_types.StatisticsHistoryRootResponse(
+            stats_history=result)
@@ -88,6 +88,7 @@ class LoadBalancersController(base.BaseController):
         load_balancers, links = (
             self.repositories.load_balancer.get_all_API_list(
                 context.session, show_deleted=False,
+                fields=self._get_query_fields(fields),
                 pagination_helper=pcontext.get(constants.PAGINATION_HELPER),
                 **query_filter))
         result = self._convert_db_to_type(
@@ -78,6 +78,7 @@ class MemberController(base.BaseController):
 
         db_members, links = self.repositories.member.get_all_API_list(
             context.session, show_deleted=False,
+            fields=self._get_query_fields(fields),
             pool_id=self.pool_id,
             pagination_helper=pcontext.get(constants.PAGINATION_HELPER))
         result = self._convert_db_to_type(
@@ -130,6 +131,18 @@ class MemberController(base.BaseController):
             raise exceptions.InvalidOption(value='', option='') from e
         return None
 
+    def _validate_create_members(self, lock_session, member_dicts):
+        """Validate creating members on pool in bulk."""
+        if not member_dicts:
+            return []
+        # The duplicates were already checked against the existing members
+        # and within the batch, while the load balancer is locked
+        try:
+            return self.repositories.member.create_members(lock_session,
+                                                           member_dicts)
+        except odb_exceptions.DBError as e:
+            raise exceptions.InvalidOption(value='', option='') from e
+
     def _validate_pool_id(self, member_id, db_member_pool_id):
         if db_member_pool_id != self.pool_id:
             raise exceptions.NotFound(resource='Member', id=member_id)
@@ -337,12 +350,12 @@ class MembersController(MemberController):
             self._auth_validate_action(context, project_id,
                                        constants.RBAC_DELETE)
 
-        # Validate member subnets
-        for member in members:
-            if member.subnet_id and not validate.subnet_exists(
-                    member.subnet_id, context=context):
-                raise exceptions.NotFound(resource='Subnet',
-                                          id=member.subnet_id)
+        # Validate member subnets, once per subnet
+        subnet_ids = {member.subnet_id for member in members
+                      if member.subnet_id}
+        for subnet_id in sorted(subnet_ids):
+            if not validate.subnet_exists(subnet_id, context=context):
+                raise exceptions.NotFound(resource='Subnet', id=subnet_id)
 
         # Load the driver early as it also provides validation
         driver = driver_factory.get_driver(provider)
@@ -357,10 +370,15 @@ class MembersController(MemberController):
 
             # Find members that are brand new or updated
             new_members = []
+            new_member_keys = set()
             updated_members = []
             for m in members:
                 if (m.address, m.protocol_port) not in old_member_uniques:
                     validate.ip_not_reserved(m.address)
+                    if (m.address, m.protocol_port) in new_member_keys:
+                        raise exceptions.DuplicateMemberEntry(
+                            ip_address=m.address, port=m.protocol_port)
+                    new_member_keys.add((m.address, m.protocol_port))
                     new_members.append(m)
                 else:
                     m.id = old_member_uniques[(m.address, m.protocol_port)]
@@ -390,40 +408,43 @@ class MembersController(MemberController):
 
             provider_members = []
             # Create new members
+            new_member_dicts = []
             for m in new_members:
                 m = m.to_dict(render_unsets=False)
                 m['project_id'] = db_pool.project_id
-                created_member = self._graph_create(lock_session, m)
-                provider_member = driver_utils.db_member_to_provider_member(
-                    created_member)
-                provider_members.append(provider_member)
+                new_member_dicts.append(db_prepare.create_member(
+                    m, self.pool_id, bool(db_pool.health_monitor)))
+            created_members = self._validate_create_members(
+                lock_session, new_member_dicts)
+            provider_members.extend(
+                driver_utils.db_member_to_provider_member(created_member)
+                for created_member in created_members)
             # Update old members
+            updated_member_dicts = []
             for m in updated_members:
                 m.provisioning_status = constants.PENDING_UPDATE
                 m.project_id = db_pool.project_id
-                db_member_dict = m.to_dict(render_unsets=False)
-                db_member_dict.pop('id')
-                self.repositories.member.update(
-                    lock_session, m.id, **db_member_dict)
+                updated_member_dicts.append(m.to_dict(render_unsets=False))
 
                 m.pool_id = self.pool_id
                 provider_members.append(
                     driver_utils.db_member_to_provider_member(m))
+            if updated_member_dicts:
+                self.repositories.member.update_members(
+                    lock_session, updated_member_dicts)
             # Delete old members
-            for m in deleted_members:
-                if additive_only:
-                    # Members are appended to the dict and their status remains
-                    # unchanged, because they are logically "untouched".
-                    db_member_dict = m.to_dict(render_unsets=False)
-                    db_member_dict.pop('id')
+            if additive_only:
+                # Members are appended to the dict and their status remains
+                # unchanged, because they are logically "untouched".
+                for m in deleted_members:
                     m.pool_id = self.pool_id
                     provider_members.append(
                         driver_utils.db_member_to_provider_member(m))
-                else:
-                    # Members are changed to PENDING_DELETE and not passed.
-                    self.repositories.member.update(
-                        lock_session, m.id,
-                        provisioning_status=constants.PENDING_DELETE)
+            else:
+                # Members are changed to PENDING_DELETE and not passed.
+                self.repositories.member.update_provisioning_status(
+                    lock_session, [m.id for m in deleted_members],
+                    constants.PENDING_DELETE)
 
             # Dispatch to the driver
             LOG.info("Sending Pool %s batch member update to provider %s",
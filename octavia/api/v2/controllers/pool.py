@@ -30,6 +30,7 @@ from octavia.api.v2.controllers import base
 from octavia.api.v2.controllers import health_monitor
 from octavia.api.v2.controllers import member
 from octavia.api.v2.types import pool as pool_types
+from octavia.certificates.manager import cached
 from octavia.common import constants
 from octavia.common import data_models
 from octavia.common import exceptions
@@ -75,6 +76,7 @@ class PoolsController(base.BaseController):
 
         db_pools, links = self.repositories.pool.get_all_API_list(
             context.session, show_deleted=False,
+            fields=self._get_query_fields(fields),
             pagination_helper=pcontext.get(constants.PAGINATION_HELPER),
             **query_filter)
         result = self._convert_db_to_type(db_pools, [pool_types.PoolResponse])
@@ -355,6 +357,11 @@ class PoolsController(base.BaseController):
         db_pool.members = new_members
         return db_pool
 
+    @staticmethod
+    def _get_cert_refs(db_pool):
+        return [db_pool.tls_certificate_id, db_pool.ca_tls_certificate_id,
+                db_pool.crl_container_id]
+
     def _validate_pool_PUT(self, pool, db_pool):
 
         if db_pool.protocol in (constants.PROTOCOL_UDP,
@@ -458,6 +465,13 @@ class PoolsController(base.BaseController):
         # Load the driver early as it also provides validation
         driver = driver_factory.get_driver(provider)
 
+        # The certificates of the previous and the new references are
+        # retrieved again from the cert manager
+        cert_refs = [pool.tls_container_ref, pool.ca_tls_container_ref,
+                     pool.crl_container_ref]
+        if any(ref is not wtypes.Unset for ref in cert_refs):
+            cached.invalidate(cert_refs + self._get_cert_refs(db_pool))
+
         with db_api.get_lock_session() as lock_session:
             self._test_lb_and_listener_statuses(
                 context.session, lb_id=db_pool.load_balancer_id,
@@ -526,6 +540,8 @@ class PoolsController(base.BaseController):
             driver_utils.call_provider(driver.name, driver.pool_delete,
                                        provider_pool)
 
+        cached.invalidate(self._get_cert_refs(db_pool))
+
     @pecan_expose()
     def _lookup(self, pool_id, *remainder):
         """Overridden pecan _lookup method for custom routing.
@@ -286,3 +286,30 @@ class ListenerStatisticsResponse(BaseListenerType):
 
 class StatisticsRootResponse(types.BaseType):
     stats = wtypes.wsattr(ListenerStatisticsResponse)
+
+
+class ListenerStatisticsHistoryResponse(types.BaseType):
+    """Defines which attributes are to show on stats history response."""
+    timestamp = wtypes.wsattr(wtypes.datetime.datetime)
+    bytes_in = wtypes.wsattr(wtypes.IntegerType())
+    bytes_out = wtypes.wsattr(wtypes.IntegerType())
+    active_connections = wtypes.wsattr(wtypes.IntegerType())
+    total_connections = wtypes.wsattr(wtypes.IntegerType())
+    request_errors = wtypes.wsattr(wtypes.IntegerType())
+    bytes_in_rate = wtypes.wsattr(float)
+    bytes_out_rate = wtypes.wsattr(float)
+    connection_rate = wtypes.wsattr(float)
+    request_error_rate = wtypes.wsattr(float)
+
+    @classmethod
+    def from_data_model(cls, data_model, children=False):
+        return cls(timestamp=data_model.timestamp,
+                   bytes_in_rate=data_model.bytes_in_rate,
+                   bytes_out_rate=data_model.bytes_out_rate,
+                   connection_rate=data_model.connection_rate,
+                   request_error_rate=data_model.request_error_rate,
+                   **data_model.get_stats())
+
+
+class StatisticsHistoryRootResponse(types.BaseType):
+    stats_history = wtypes.wsattr([ListenerStatisticsHistoryResponse])
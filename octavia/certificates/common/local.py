@@ -68,6 +68,13 @@ certgen_opts = [
                default=30 * 24 * 60 * 60,
                help="The validity time for the Amphora Certificates "
                     "(in seconds)."),
+    cfg.IntOpt('private_key_pool_size',
+               default=0, min=0,
+               help="The number of Amphora private keys the local "
+                    "certificate generator generates in advance, in a "
+                    "background thread. Only the signing of the "
+                    "certificates is then left on the critical path of the "
+                    "Amphora builds and failovers. 0 disables the pool."),
 ]
 
 certmgr_opts = [
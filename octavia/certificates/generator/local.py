@@ -13,6 +13,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 import datetime
+import os
+import queue
+import threading
 import uuid
 
 from cryptography import exceptions as crypto_exceptions
@@ -32,10 +35,80 @@ LOG = logging.getLogger(__name__)
 
 CONF = cfg.CONF
 
+DEFAULT_BIT_LENGTH = 2048
+
+_KEY_POOL = None
+_KEY_POOL_LOCK = threading.Lock()
+
+
+def _new_private_key(bit_length):
+    return rsa.generate_private_key(
+        public_exponent=65537,
+        key_size=bit_length,
+        backend=backends.default_backend()
+    )
+
+
+class PrivateKeyPool(object):
+    """Keeps RSA private keys generated in advance by a background thread.
+
+    The thread generates a new key whenever one is taken from the pool, so
+    that generating the keys is not on the critical path of the amphora
+    builds and failovers.
+    """
+
+    def __init__(self, size, bit_length=DEFAULT_BIT_LENGTH):
+        self.bit_length = bit_length
+        # The thread does not survive a fork, the pool has to be recreated
+        self.pid = os.getpid()
+        self._keys = queue.Queue(maxsize=size)
+        self._thread = threading.Thread(target=self._refill, daemon=True)
+        self._thread.start()
+
+    def _refill(self):
+        try:
+            while True:
+                # Blocks while the pool is full
+                self._keys.put(_new_private_key(self.bit_length))
+        except Exception:
+            LOG.exception("Failed to generate a private key, the private "
+                          "keys will be generated on demand.")
+
+    def get(self):
+        """Takes a private key from the pool
+
+        :returns: An RSA private key, None if the pool is empty
+        """
+        try:
+            return self._keys.get_nowait()
+        except queue.Empty:
+            return None
+
+
+def get_key_pool():
+    """Gets the private key pool of the process
+
+    :returns: The PrivateKeyPool, None if [certificates]
+              private_key_pool_size is 0
+    """
+    global _KEY_POOL
+    size = CONF.certificates.private_key_pool_size
+    if not size:
+        return None
+    with _KEY_POOL_LOCK:
+        if _KEY_POOL is None or _KEY_POOL.pid != os.getpid():
+            _KEY_POOL = PrivateKeyPool(size)
+        return _KEY_POOL
+
 
 class LocalCertGenerator(cert_gen.CertGenerator):
     """Cert Generator Interface that signs certs locally."""
 
+    def __init__(self):
+        super().__init__()
+        # Start filling the private key pool before the first request
+        get_key_pool()
+
     @classmethod
     def _new_serial(cls):
         return int(uuid.uuid4())
@@ -169,12 +242,17 @@ class LocalCertGenerator(cert_gen.CertGenerator):
             raise exceptions.CertificateGenerationException(msg=e)
 
     @classmethod
-    def _generate_private_key(cls, bit_length=2048, passphrase=None):
-        pk = rsa.generate_private_key(
-            public_exponent=65537,
-            key_size=bit_length,
-            backend=backends.default_backend()
-        )
+    def _generate_private_key(cls, bit_length=DEFAULT_BIT_LENGTH,
+                              passphrase=None):
+        pk = None
+        key_pool = get_key_pool()
+        if key_pool and key_pool.bit_length == bit_length:
+            pk = key_pool.get()
+            if pk is None:
+                LOG.debug("The private key pool is empty, generating a "
+                          "private key.")
+        if pk is None:
+            pk = _new_private_key(bit_length)
         if passphrase:
             encryption = serialization.BestAvailableEncryption(passphrase)
         else:
@@ -227,7 +305,8 @@ class LocalCertGenerator(cert_gen.CertGenerator):
         return signed_csr.public_bytes(serialization.Encoding.PEM)
 
     @classmethod
-    def generate_cert_key_pair(cls, cn, validity, bit_length=2048,
+    def generate_cert_key_pair(cls, cn, validity,
+                               bit_length=DEFAULT_BIT_LENGTH,
                                passphrase=None, **kwargs):
         pk = cls._generate_private_key(bit_length, passphrase)
         csr = cls._generate_csr(cn, pk, passphrase)
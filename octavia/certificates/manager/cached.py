@@ -0,0 +1,163 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Cert manager wrapper caching the certificates and secrets in memory
+"""
+import collections
+import threading
+import time
+
+from oslo_config import cfg
+from oslo_log import log as logging
+
+from octavia.certificates.common import local
+from octavia.certificates.manager import cert_mgr
+
+CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+
+CERT = 'cert'
+SECRET = 'secret'
+
+
+class _CertCache(object):
+    """A least recently used cache whose entries expire
+
+    The cache is shared by all of the cert managers of the process. The
+    entries are keyed by (kind, project_id, ref).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        # Incremented on every invalidation, so that the values loaded
+        # concurrently with an invalidation are not stored.
+        self._generation = 0
+
+    def get(self, key, load):
+        ttl = CONF.certificates.cert_cache_ttl
+        if not ttl:
+            return load()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expiration, value = entry
+                if expiration > time.monotonic():
+                    self._entries.move_to_end(key)
+                    return value
+                del self._entries[key]
+            generation = self._generation
+
+        # The certificate manager is not called with the lock held, the
+        # other certificates are still served while it is loading.
+        value = load()
+
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (time.monotonic() + ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > CONF.certificates.cert_cache_size:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, refs):
+        refs = set(refs)
+        with self._lock:
+            self._generation += 1
+            for key in [key for key in self._entries if key[2] in refs]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+_CACHE = _CertCache()
+
+
+def invalidate(refs):
+    """Removes certificates and secrets from the cache of the process
+
+    :param refs: The references of the certificates and secrets, for all of
+                 the projects. None values are ignored.
+    """
+    refs = [ref for ref in refs if ref]
+    if refs:
+        LOG.debug('Invalidating the cached certificates %s.', refs)
+        _CACHE.invalidate(refs)
+
+
+def clear():
+    """Removes all of the certificates and secrets from the cache"""
+    _CACHE.clear()
+
+
+class CachedCertManager(cert_mgr.CertManager):
+    """Caches the certificates and secrets of another cert manager
+
+    The certificates read with check_only and the secrets are kept in
+    memory for [certificates] cert_cache_ttl seconds, up to
+    [certificates] cert_cache_size of them. The certificates are stored
+    already parsed. The cache must be invalidated when the references
+    used by a listener or a pool are changed.
+    """
+
+    def __init__(self, cert_manager):
+        super().__init__()
+        self.cert_manager = cert_manager
+
+    def store_cert(self, context, certificate, private_key, intermediates=None,
+                   private_key_passphrase=None, expiration=None, name=None):
+        return self.cert_manager.store_cert(
+            context, certificate, private_key, intermediates=intermediates,
+            private_key_passphrase=private_key_passphrase,
+            expiration=expiration, name=name)
+
+    def get_cert(self, context, cert_ref, resource_ref=None, check_only=False,
+                 service_name=None):
+        if not check_only:
+            # Registers a consumer of the certificate
+            return self.cert_manager.get_cert(
+                context, cert_ref, resource_ref=resource_ref,
+                check_only=check_only, service_name=service_name)
+
+        def _load():
+            cert = self.cert_manager.get_cert(
+                context, cert_ref, resource_ref=resource_ref,
+                check_only=True, service_name=service_name)
+            # Some certificates are only retrieved when they are accessed
+            return local.LocalCert(
+                certificate=cert.get_certificate(),
+                private_key=cert.get_private_key(),
+                intermediates=cert.get_intermediates(),
+                private_key_passphrase=cert.get_private_key_passphrase())
+
+        return _CACHE.get((CERT, context.project_id, cert_ref), _load)
+
+    def delete_cert(self, context, cert_ref, resource_ref, service_name=None):
+        invalidate([cert_ref])
+        return self.cert_manager.delete_cert(
+            context, cert_ref, resource_ref, service_name=service_name)
+
+    def set_acls(self, context, cert_ref):
+        return self.cert_manager.set_acls(context, cert_ref)
+
+    def unset_acls(self, context, cert_ref):
+        return self.cert_manager.unset_acls(context, cert_ref)
+
+    def get_secret(self, context, secret_ref):
+        return _CACHE.get(
+            (SECRET, context.project_id, secret_ref),
+            lambda: self.cert_manager.get_secret(context, secret_ref))
@@ -42,13 +42,14 @@ def _mutate_config(*args, **kwargs):
 def hm_listener(exit_event):
     signal.signal(signal.SIGINT, signal.SIG_IGN)
     signal.signal(signal.SIGHUP, _mutate_config)
-    udp_getter = heartbeat_udp.UDPStatusGetter()
+    udp_getter = heartbeat_udp.get_status_getter()
     while not exit_event.is_set():
         try:
             udp_getter.check()
         except Exception as e:
             LOG.error('Health Manager listener experienced unknown error: %s',
                       str(e))
+    udp_getter.flush_health_batch()
     LOG.info('Waiting for executor to shutdown...')
     udp_getter.health_executor.shutdown()
     udp_getter.stats_executor.shutdown()
@@ -49,6 +49,7 @@ def db_cleanup():
         try:
             db_cleanup.delete_old_amphorae()
             db_cleanup.cleanup_load_balancers()
+            db_cleanup.cleanup_statistics_history()
         except Exception as e:
             LOG.debug('db_cleanup caught the following exception and '
                       'is restarting: %s', str(e))
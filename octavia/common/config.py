@@ -72,6 +72,13 @@ api_opts = [
                help=_("The maximum number of items returned in a single "
                       "response. The string 'infinite' or a negative "
                       "integer value means 'no limit'")),
+    cfg.BoolOpt('pagination_keyset_markers', default=False,
+                help=_("Use the sort key values of the last item of a "
+                       "page, instead of its ID, as the marker of the "
+                       "pagination links when the leading sort key is "
+                       "indexed. The next page is then selected without "
+                       "looking up the marker item. Markers that are IDs "
+                       "are still accepted.")),
     cfg.StrOpt('api_base_uri',
                help=_("Base URI for the API for use in pagination links. "
                       "This will be autodetected from the request if not "
@@ -276,6 +283,11 @@ networking_opts = [
                        "this True may allow users to access resources on "
                        "subnets they do not normally have access to via "
                        "neutron RBAC policies.")),
+    cfg.IntOpt('security_group_rule_concurrency', default=10, min=1,
+               help=_('The maximum number of security group rules deleted '
+                      'concurrently when the security group of a load '
+                      'balancer is updated. The missing rules are created '
+                      'with a single bulk request.')),
 ]
 
 health_manager_opts = [
@@ -307,6 +319,42 @@ health_manager_opts = [
                help=_('Sleep time between health checks in seconds.')),
     cfg.IntOpt('sock_rlimit', default=0,
                help=_(' sets the value of the heartbeat recv buffer')),
+    cfg.StrOpt('heartbeat_receiver', default='blocking',
+               choices=constants.SUPPORTED_HEARTBEAT_RECEIVERS,
+               help=_('How the health manager receives heartbeats. '
+                      '"blocking" receives and decodes one heartbeat at a '
+                      'time. "event_loop" waits for the heartbeat socket to '
+                      'be readable, then drains and decodes all of the '
+                      'pending heartbeats at once.')),
+    cfg.IntOpt('heartbeat_receive_batch_size', default=1000, min=1,
+               help=_('Maximum number of heartbeats read from the socket '
+                      'per wakeup by the event_loop heartbeat receiver.')),
+    cfg.BoolOpt('reuse_port', default=False,
+                help=_('Set SO_REUSEPORT on the heartbeat socket, so '
+                       'several health manager processes on the same host '
+                       'can listen on bind_ip and bind_port. The kernel then '
+                       'load balances the heartbeats across them.')),
+    cfg.IntOpt('health_update_batch_size', default=0, min=0,
+               help=_('Maximum number of amphora heartbeats to collect '
+                      'before updating the amphora health in a single '
+                      'batch. Heartbeats received from the same amphora '
+                      'within a batch are coalesced, only the latest one is '
+                      'processed. 0 disables batching and each heartbeat is '
+                      'processed individually.')),
+    cfg.FloatOpt('health_update_batch_window', default=0.1, min=0.001,
+                 help=_('Maximum time, in seconds, to collect amphora '
+                        'heartbeats for a batch before it is processed. '
+                        'Only used when health_update_batch_size is greater '
+                        'than 0.')),
+    cfg.IntOpt('operating_status_cache_ttl', default=0, min=0,
+               help=_('Time, in seconds, the health manager remembers the '
+                      'statuses last reported by an amphora. While they '
+                      'are remembered, heartbeats reporting the same '
+                      'statuses only refresh the amphora health, without '
+                      'reading the load balancer from the database. Changes '
+                      'made to the load balancer outside of the heartbeats '
+                      'may take up to this long to be reflected in the '
+                      'operating statuses. 0 disables the cache.')),
 
     # Used by the health manager on the amphora
     cfg.ListOpt('controller_ip_port_list',
@@ -319,6 +367,18 @@ health_manager_opts = [
                default=10,
                mutable=True,
                help=_('Sleep time between sending heartbeats.')),
+    cfg.BoolOpt('compact_heartbeats', default=False,
+                help=_('Send heartbeats using the compact binary message '
+                       'format (version 4) instead of compressed JSON. Only '
+                       'enable this once all of the health managers support '
+                       'it.')),
+    cfg.IntOpt('heartbeat_full_state_interval', default=0, min=0,
+               help=_('Interval, in seconds, between heartbeats that carry '
+                      'the complete pool and member statuses. In between, '
+                      'heartbeats only carry the statuses that changed, '
+                      'along with a digest of all of the statuses. 0 sends '
+                      'the complete statuses in every heartbeat. Only set '
+                      'this once all of the health managers support it.')),
 
     # Used for updating health
     cfg.StrOpt('health_update_driver', default='health_db',
@@ -407,6 +467,16 @@ haproxy_amphora_opts = [
     cfg.FloatOpt('rest_request_read_timeout', default=60,
                  help=_("The time in seconds to wait for a REST API "
                         "response.")),
+    cfg.IntOpt('amphora_update_concurrency', default=2, min=1,
+               help=_('Maximum number of amphorae of a load balancer that '
+                      'are updated concurrently when its configuration '
+                      'changes. 1 updates them one after the other.')),
+    cfg.BoolOpt('runtime_api_updates', default=False,
+                help=_('Apply configuration changes that only change the '
+                       'weight or the admin state of members through the '
+                       'HAProxy runtime API, without reloading HAProxy. '
+                       'Other changes, and amphorae that do not support '
+                       'it, still reload HAProxy.')),
     cfg.IntOpt('timeout_client_data',
                default=constants.DEFAULT_TIMEOUT_CLIENT_DATA,
                help=_('Frontend client inactivity timeout.')),
@@ -509,6 +579,14 @@ controller_worker_opts = [
                 deprecated_group='health_manager',
                 deprecated_since='Victoria',
                 help=_('List of drivers for updating amphora statistics.')),
+    cfg.ListOpt('stats_aggregator_drivers', default=['stats_db'],
+                help=_('List of drivers the stats_aggregator statistics '
+                       'driver passes the aggregated amphora statistics '
+                       'to.')),
+    cfg.IntOpt('stats_aggregator_flush_interval', default=60, min=1,
+               help=_('Interval, in seconds, at which the stats_aggregator '
+                      'statistics driver passes the amphora statistics it '
+                      'aggregated on to the stats_aggregator_drivers.')),
     cfg.StrOpt('loadbalancer_topology',
                default=constants.TOPOLOGY_SINGLE,
                choices=constants.SUPPORTED_LB_TOPOLOGIES,
@@ -617,6 +695,18 @@ certificate_opts = [
     cfg.BoolOpt('insecure',
                 default=False,
                 help=_('Disable certificate validation on SSL connections ')),
+    cfg.IntOpt('cert_cache_ttl',
+               default=0, min=0,
+               help=_('The number of seconds the certificates and secrets '
+                      'retrieved from the cert manager are kept in memory by '
+                      'the processes that configure the load balancers. The '
+                      'cached certificates are invalidated when their '
+                      'references are changed through the API. 0 disables '
+                      'the cache.')),
+    cfg.IntOpt('cert_cache_size',
+               default=1000, min=1,
+               help=_('The maximum number of certificates and secrets kept '
+                      'in memory by a process when cert_cache_ttl is set.')),
 ]
 
 house_keeping_opts = [
@@ -639,7 +729,19 @@ house_keeping_opts = [
     cfg.IntOpt('cert_rotate_threads',
                default=10,
                help=_('Number of threads performing amphora certificate'
-                      ' rotation'))
+                      ' rotation')),
+    cfg.IntOpt('stats_history_minute_retention',
+               default=86400, min=60,
+               help=_('Retention in seconds of the per minute listener '
+                      'statistics history.')),
+    cfg.IntOpt('stats_history_hour_retention',
+               default=2592000, min=3600,
+               help=_('Retention in seconds of the per hour listener '
+                      'statistics history.')),
+    cfg.IntOpt('stats_history_day_retention',
+               default=31536000, min=86400,
+               help=_('Retention in seconds of the per day listener '
+                      'statistics history.')),
 ]
 
 keepalived_vrrp_opts = [
@@ -840,6 +942,22 @@ driver_agent_opts = [
                default=50,
                help=_('Maximum number of concurrent processes to use '
                       'servicing get requests.')),
+    cfg.StrOpt('server_mode', default=constants.DRIVER_AGENT_FORKING,
+               choices=constants.SUPPORTED_DRIVER_AGENT_SERVER_MODES,
+               help=_('How the driver listeners serve connections. '
+                      '"forking" handles every connection in a new process, '
+                      'isolating the requests from each other. "threading" '
+                      'handles every connection in a thread of the listener '
+                      'process, reusing the database sessions across '
+                      'requests. In "threading" mode, the *_max_processes '
+                      'options limit the number of requests processed '
+                      'concurrently.')),
+    cfg.IntOpt('connection_idle_timeout',
+               default=60, min=0,
+               help=_('Time, in seconds, a connection to a driver listener '
+                      'may stay idle between two requests before it is '
+                      'closed. 0 keeps idle connections open until the '
+                      'provider driver closes them.')),
     cfg.FloatOpt('max_process_warning_percent',
                  default=0.75, min=0.01, max=0.99,
                  help=_('Percentage of max_processes (both status and stats) '
@@ -207,6 +207,14 @@ DOMAIN_NAME = 'domain_name'
 UPDATE_STATS = 'UPDATE_STATS'
 UPDATE_HEALTH = 'UPDATE_HEALTH'
 
+# Resolutions of the listener statistics history, in seconds
+STATS_HISTORY_RESOLUTION_MINUTE = 60
+STATS_HISTORY_RESOLUTION_HOUR = 3600
+STATS_HISTORY_RESOLUTION_DAY = 86400
+STATS_HISTORY_RESOLUTIONS = (STATS_HISTORY_RESOLUTION_MINUTE,
+                             STATS_HISTORY_RESOLUTION_HOUR,
+                             STATS_HISTORY_RESOLUTION_DAY)
+
 VALID_LISTENER_POOL_PROTOCOL_MAP = {
     PROTOCOL_TCP: [PROTOCOL_HTTP, PROTOCOL_HTTPS,
                    PROTOCOL_PROXY, lib_consts.PROTOCOL_PROXYV2, PROTOCOL_TCP],
@@ -298,6 +306,15 @@ DOMAIN_NAME_REGEX = (
 # TaskFlow
 SUPPORTED_TASKFLOW_ENGINE_TYPES = ['serial', 'parallel']
 
+# Health manager heartbeat receivers
+SUPPORTED_HEARTBEAT_RECEIVERS = ['blocking', 'event_loop']
+
+# Driver agent listener server modes
+DRIVER_AGENT_FORKING = 'forking'
+DRIVER_AGENT_THREADING = 'threading'
+SUPPORTED_DRIVER_AGENT_SERVER_MODES = [DRIVER_AGENT_FORKING,
+                                       DRIVER_AGENT_THREADING]
+
 # Task/Flow constants
 ACTIVE_CONNECTIONS = 'active_connections'
 ADD_NICS = 'add_nics'
@@ -321,9 +338,12 @@ BYTES_IN = 'bytes_in'
 BYTES_OUT = 'bytes_out'
 CACHED_ZONE = 'cached_zone'
 CA_TLS_CERTIFICATE_ID = 'ca_tls_certificate_id'
+CA_TLS_CONTAINER_REF = 'ca_tls_container_ref'
 CIDR = 'cidr'
 CLIENT_CA_TLS_CERTIFICATE_ID = 'client_ca_tls_certificate_id'
+CLIENT_CA_TLS_CONTAINER_REF = 'client_ca_tls_container_ref'
 CLIENT_CRL_CONTAINER_ID = 'client_crl_container_id'
+CLIENT_CRL_CONTAINER_REF = 'client_crl_container_ref'
 COMPUTE_ID = 'compute_id'
 COMPUTE_OBJ = 'compute_obj'
 COMPUTE_ZONE = 'compute_zone'
@@ -331,7 +351,9 @@ CONN_MAX_RETRIES = 'conn_max_retries'
 CONN_RETRY_INTERVAL = 'conn_retry_interval'
 CREATED_AT = 'created_at'
 CRL_CONTAINER_ID = 'crl_container_id'
+CRL_CONTAINER_REF = 'crl_container_ref'
 DEFAULT_TLS_CONTAINER_DATA = 'default_tls_container_data'
+DEFAULT_TLS_CONTAINER_REF = 'default_tls_container_ref'
 DELETE_NICS = 'delete_nics'
 DELTA = 'delta'
 DELTAS = 'deltas'
@@ -411,6 +433,7 @@ SECURITY_GROUP_RULES = 'security_group_rules'
 SERVER_GROUP_ID = 'server_group_id'
 SERVER_PEM = 'server_pem'
 SNI_CONTAINER_DATA = 'sni_container_data'
+SNI_CONTAINER_REFS = 'sni_container_refs'
 SNI_CONTAINERS = 'sni_containers'
 SOFT_ANTI_AFFINITY = 'soft-anti-affinity'
 STATUS = 'status'
@@ -422,6 +445,7 @@ TENANT_ID = 'tenant_id'
 TIMEOUT_DICT = 'timeout_dict'
 TLS_CERTIFICATE_ID = 'tls_certificate_id'
 TLS_CONTAINER_ID = 'tls_container_id'
+TLS_CONTAINER_REF = 'tls_container_ref'
 TOPOLOGY = 'topology'
 TOTAL_CONNECTIONS = 'total_connections'
 UPDATED_AT = 'updated_at'
@@ -226,6 +226,47 @@ class ListenerStatistics(BaseDataModel):
         return self
 
 
+class ListenerStatisticsHistory(BaseDataModel):
+
+    def __init__(self, listener_id=None, resolution=None, timestamp=None,
+                 bytes_in=0, bytes_out=0, active_connections=0,
+                 total_connections=0, request_errors=0):
+        self.listener_id = listener_id
+        self.resolution = resolution
+        self.timestamp = timestamp
+        self.bytes_in = bytes_in
+        self.bytes_out = bytes_out
+        self.active_connections = active_connections
+        self.total_connections = total_connections
+        self.request_errors = request_errors
+
+    def get_stats(self):
+        stats = {
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'active_connections': self.active_connections,
+            'total_connections': self.total_connections,
+            'request_errors': self.request_errors,
+        }
+        return stats
+
+    @property
+    def bytes_in_rate(self):
+        return self.bytes_in / self.resolution
+
+    @property
+    def bytes_out_rate(self):
+        return self.bytes_out / self.resolution
+
+    @property
+    def connection_rate(self):
+        return self.total_connections / self.resolution
+
+    @property
+    def request_error_rate(self):
+        return self.request_errors / self.resolution
+
+
 class LoadBalancerStatistics(BaseDataModel):
 
     def __init__(self, bytes_in=0, bytes_out=0, active_connections=0,
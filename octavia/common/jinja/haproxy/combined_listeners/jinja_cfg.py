@@ -165,6 +165,9 @@ class JinjaTemplater(object):
         if not socket_path:
             socket_path = '%s/%s.sock' % (self.base_amp_path,
                                           listeners[0].load_balancer.id)
+        # Only the amphora agent uses the admin socket, for runtime updates
+        admin_socket_path = '%s/%s-admin.sock' % (
+            self.base_amp_path, listeners[0].load_balancer.id)
         state_file_path = '%s/%s/servers-state' % (
             self.base_amp_path,
             listeners[0].load_balancer.id)
@@ -178,6 +181,7 @@ class JinjaTemplater(object):
         return self._get_template().render(
             {'loadbalancer': loadbalancer,
              'stats_sock': socket_path,
+             'stats_admin_sock': admin_socket_path,
              'log_http': self.log_http,
              'log_server': self.log_server,
              'state_file': state_file_path,
@@ -14,7 +14,6 @@
 
 from oslo_log import log as logging
 
-from octavia.common import constants
 from octavia.common import data_models
 from octavia.db import repositories as repo
 
@@ -26,43 +25,40 @@ class StatsMixin(object):
     def __init__(self):
         super().__init__()
         self.listener_stats_repo = repo.ListenerStatisticsRepository()
-        self.repo_amphora = repo.AmphoraRepository()
-        self.repo_loadbalancer = repo.LoadBalancerRepository()
+        self.listener_stats_history_repo = (
+            repo.ListenerStatisticsHistoryRepository())
 
     def get_listener_stats(self, session, listener_id):
         """Gets the listener statistics data_models object."""
-        db_ls, _ = self.listener_stats_repo.get_all(
-            session, listener_id=listener_id)
-        if not db_ls:
+        statistics = self.listener_stats_repo.get_listeners_stats(
+            session, [listener_id]).get(listener_id)
+        if statistics is None:
             LOG.warning("Listener Statistics for Listener %s was not found",
                         listener_id)
+            statistics = data_models.ListenerStatistics(
+                listener_id=listener_id)
+        return statistics
 
-        statistics = data_models.ListenerStatistics(listener_id=listener_id)
+    def get_loadbalancer_stats(self, session, loadbalancer_id):
+        return self.get_loadbalancers_stats(session, [loadbalancer_id])[
+            loadbalancer_id]
 
-        for db_l in db_ls:
-            statistics += db_l
+    def get_loadbalancers_stats(self, session, loadbalancer_ids):
+        """Gets the statistics of several load balancers at once.
 
-            amp = self.repo_amphora.get(session, id=db_l.amphora_id)
-            # Amphora ID and Listener ID will be the same in the case that the
-            # stats are coming from a provider driver other than the `amphora`
-            # driver. In that case and when the current amphora is ALLOCATED
-            # are the only times we should include the *active* connections,
-            # because non-active amphora will have incorrect counts.
-            if (amp and amp.status == constants.AMPHORA_ALLOCATED) or (
-                    db_l.amphora_id == db_l.listener_id):
-                statistics.active_connections += db_l.active_connections
-        return statistics
+        :returns: A dictionary of LoadBalancerStatistics data_models objects,
+                  keyed by load balancer id.
+        """
+        return self.listener_stats_repo.get_loadbalancers_stats(
+            session, loadbalancer_ids)
 
-    def get_loadbalancer_stats(self, session, loadbalancer_id):
-        statistics = data_models.LoadBalancerStatistics()
-        lb_db = self.repo_loadbalancer.get(session, id=loadbalancer_id)
+    def get_listener_stats_history(self, session, listener_id, resolution,
+                                   start, end):
+        """Gets the statistics history of a listener over a time window.
 
-        for listener in lb_db.listeners:
-            data = self.get_listener_stats(session, listener.id)
-            statistics.bytes_in += data.bytes_in
-            statistics.bytes_out += data.bytes_out
-            statistics.request_errors += data.request_errors
-            statistics.active_connections += data.active_connections
-            statistics.total_connections += data.total_connections
-            statistics.listeners.append(data)
-        return statistics
+        :returns: A list of ListenerStatisticsHistory data_models objects,
+                  one per interval of the resolution starting within the
+                  time window.
+        """
+        return self.listener_stats_history_repo.get_history(
+            session, listener_id, resolution, start, end)
@@ -34,6 +34,8 @@ class DatabaseCleanup(object):
         self.amp_repo = repo.AmphoraRepository()
         self.amp_health_repo = repo.AmphoraHealthRepository()
         self.lb_repo = repo.LoadBalancerRepository()
+        self.listener_stats_history_repo = (
+            repo.ListenerStatisticsHistoryRepository())
 
     def delete_old_amphorae(self):
         """Checks the DB for old amphora and deletes them based on its age."""
@@ -74,6 +76,29 @@ class DatabaseCleanup(object):
             self.lb_repo.delete(session, id=lb_id)
             LOG.info('Deleted load balancer id : %s', lb_id)
 
+    def cleanup_statistics_history(self):
+        """Deletes the listener statistics history past its retention."""
+        retentions = {
+            constants.STATS_HISTORY_RESOLUTION_MINUTE:
+                CONF.house_keeping.stats_history_minute_retention,
+            constants.STATS_HISTORY_RESOLUTION_HOUR:
+                CONF.house_keeping.stats_history_hour_retention,
+            constants.STATS_HISTORY_RESOLUTION_DAY:
+                CONF.house_keeping.stats_history_day_retention,
+        }
+        now = datetime.datetime.utcnow()
+
+        session = db_api.get_session()
+        for resolution, retention in retentions.items():
+            count = self.listener_stats_history_repo.delete_expired(
+                session, resolution,
+                now - datetime.timedelta(seconds=retention))
+            if count:
+                LOG.info('Purged %(count)d expired listener statistics '
+                         'history records with a resolution of '
+                         '%(resolution)d seconds',
+                         {'count': count, 'resolution': resolution})
+
 
 class CertRotation(object):
     def __init__(self):
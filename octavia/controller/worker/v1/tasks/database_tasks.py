@@ -932,10 +932,10 @@ class MarkLBActiveInDB(BaseDatabaseTask):
         """
 
         if self.mark_subobjects:
-            LOG.debug("Marking all listeners of loadbalancer %s ACTIVE",
+            LOG.debug("Marking all sub-objects of loadbalancer %s ACTIVE",
                       loadbalancer.id)
-            for listener in loadbalancer.listeners:
-                self._mark_listener_status(listener, constants.ACTIVE)
+            self.loadbalancer_repo.set_children_provisioning_status(
+                db_apis.get_session(), loadbalancer.id, constants.ACTIVE)
 
         LOG.info("Mark ACTIVE in DB for load balancer id: %s",
                  loadbalancer.id)
@@ -943,62 +943,6 @@ class MarkLBActiveInDB(BaseDatabaseTask):
                                       loadbalancer.id,
                                       provisioning_status=constants.ACTIVE)
 
-    def _mark_listener_status(self, listener, status):
-        self.listener_repo.update(db_apis.get_session(),
-                                  listener.id,
-                                  provisioning_status=status)
-        LOG.debug("Marking all l7policies of listener %s %s",
-                  listener.id, status)
-        for l7policy in listener.l7policies:
-            self._mark_l7policy_status(l7policy, status)
-
-        if listener.default_pool:
-            LOG.debug("Marking default pool of listener %s %s",
-                      listener.id, status)
-            self._mark_pool_status(listener.default_pool, status)
-
-    def _mark_l7policy_status(self, l7policy, status):
-        self.l7policy_repo.update(
-            db_apis.get_session(), l7policy.id,
-            provisioning_status=status)
-
-        LOG.debug("Marking all l7rules of l7policy %s %s",
-                  l7policy.id, status)
-        for l7rule in l7policy.l7rules:
-            self._mark_l7rule_status(l7rule, status)
-
-        if l7policy.redirect_pool:
-            LOG.debug("Marking redirect pool of l7policy %s %s",
-                      l7policy.id, status)
-            self._mark_pool_status(l7policy.redirect_pool, status)
-
-    def _mark_l7rule_status(self, l7rule, status):
-        self.l7rule_repo.update(
-            db_apis.get_session(), l7rule.id,
-            provisioning_status=status)
-
-    def _mark_pool_status(self, pool, status):
-        self.pool_repo.update(
-            db_apis.get_session(), pool.id,
-            provisioning_status=status)
-        if pool.health_monitor:
-            LOG.debug("Marking health monitor of pool %s %s", pool.id, status)
-            self._mark_hm_status(pool.health_monitor, status)
-
-        LOG.debug("Marking all members of pool %s %s", pool.id, status)
-        for member in pool.members:
-            self._mark_member_status(member, status)
-
-    def _mark_hm_status(self, hm, status):
-        self.health_mon_repo.update(
-            db_apis.get_session(), hm.id,
-            provisioning_status=status)
-
-    def _mark_member_status(self, member, status):
-        self.member_repo.update(
-            db_apis.get_session(), member.id,
-            provisioning_status=status)
-
     def revert(self, loadbalancer, *args, **kwargs):
         """Mark the load balancer as broken and ready to be cleaned up.
 
@@ -1010,14 +954,15 @@ class MarkLBActiveInDB(BaseDatabaseTask):
         """
 
         if self.mark_subobjects:
-            LOG.debug("Marking all listeners of loadbalancer %s ERROR",
+            LOG.debug("Marking all sub-objects of loadbalancer %s ERROR",
                       loadbalancer.id)
-            for listener in loadbalancer.listeners:
-                try:
-                    self._mark_listener_status(listener, constants.ERROR)
-                except Exception:
-                    LOG.warning("Error updating listener %s provisioning "
-                                "status", listener.id)
+            try:
+                self.loadbalancer_repo.set_children_provisioning_status(
+                    db_apis.get_session(), loadbalancer.id, constants.ERROR)
+            except Exception:
+                LOG.warning("Error updating the provisioning status of the "
+                            "sub-objects of load balancer %s",
+                            loadbalancer.id)
 
 
 class UpdateLBServerGroupInDB(BaseDatabaseTask):
@@ -24,6 +24,7 @@ import tenacity
 
 from octavia.amphorae.driver_exceptions import exceptions as driver_exc
 from octavia.api.drivers import utils as provider_utils
+from octavia.certificates.manager import cached
 from octavia.common import base_taskflow
 from octavia.common import constants
 from octavia.common import exceptions
@@ -278,6 +279,7 @@ class ControllerWorker(object):
         :returns: None
         :raises ListenerNotFound: The referenced listener was not found
         """
+        cached.invalidate(self._get_listener_cert_refs(listener))
         store = {constants.LISTENER: listener,
                  constants.LOADBALANCER_ID:
                      listener[constants.LOADBALANCER_ID],
@@ -286,6 +288,14 @@ class ControllerWorker(object):
             flow_utils.get_delete_listener_flow,
             store=store)
 
+    @staticmethod
+    def _get_listener_cert_refs(listener):
+        refs = [listener.get(constants.DEFAULT_TLS_CONTAINER_REF),
+                listener.get(constants.CLIENT_CA_TLS_CONTAINER_REF),
+                listener.get(constants.CLIENT_CRL_CONTAINER_REF)]
+        refs.extend(listener.get(constants.SNI_CONTAINER_REFS) or [])
+        return refs
+
     def update_listener(self, listener, listener_updates):
         """Updates a listener.
 
@@ -305,6 +315,16 @@ class ControllerWorker(object):
                         constants.PENDING_UPDATE)
             db_lb = e.last_attempt.result()
 
+        # The certificates of the previous and the new references are
+        # retrieved again from the cert manager
+        cert_keys = (constants.DEFAULT_TLS_CONTAINER_REF,
+                     constants.SNI_CONTAINER_REFS,
+                     constants.CLIENT_CA_TLS_CONTAINER_REF,
+                     constants.CLIENT_CRL_CONTAINER_REF)
+        if any(key in listener_updates for key in cert_keys):
+            cached.invalidate(self._get_listener_cert_refs(listener_updates) +
+                              self._get_listener_cert_refs(listener))
+
         store = {constants.LISTENER: listener,
                  constants.UPDATE_DICT: listener_updates,
                  constants.LOADBALANCER_ID: db_lb.id,
@@ -655,6 +675,7 @@ class ControllerWorker(object):
         """
         db_pool = self._pool_repo.get(db_apis.get_session(),
                                       id=pool[constants.POOL_ID])
+        cached.invalidate(self._get_pool_cert_refs(pool))
 
         load_balancer = db_pool.load_balancer
         provider_lb = provider_utils.db_loadbalancer_to_provider_loadbalancer(
@@ -670,6 +691,12 @@ class ControllerWorker(object):
             flow_utils.get_delete_pool_flow,
             store=store)
 
+    @staticmethod
+    def _get_pool_cert_refs(pool):
+        return [pool.get(constants.TLS_CONTAINER_REF),
+                pool.get(constants.CA_TLS_CONTAINER_REF),
+                pool.get(constants.CRL_CONTAINER_REF)]
+
     def update_pool(self, origin_pool, pool_updates):
         """Updates a node pool.
 
@@ -689,6 +716,15 @@ class ControllerWorker(object):
                         constants.PENDING_UPDATE)
             db_pool = e.last_attempt.result()
 
+        # The certificates of the previous and the new references are
+        # retrieved again from the cert manager
+        cert_keys = (constants.TLS_CERTIFICATE_ID,
+                     constants.CA_TLS_CERTIFICATE_ID,
+                     constants.CRL_CONTAINER_ID)
+        if any(key in pool_updates for key in cert_keys):
+            cached.invalidate([pool_updates.get(key) for key in cert_keys] +
+                              self._get_pool_cert_refs(origin_pool))
+
         load_balancer = db_pool.load_balancer
         provider_lb = provider_utils.db_loadbalancer_to_provider_loadbalancer(
             load_balancer).to_dict(recurse=True)
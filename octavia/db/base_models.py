@@ -17,6 +17,7 @@ from oslo_utils import strutils
 from oslo_utils import uuidutils
 import sqlalchemy as sa
 from sqlalchemy.ext import declarative
+from sqlalchemy import orm
 from sqlalchemy.orm import collections
 
 
@@ -38,6 +39,9 @@ class OctaviaBase(models.ModelBase):
             return obj.__class__.__name__ + obj.pool_id
         if obj.__class__.__name__ in ['ListenerStatistics']:
             return obj.__class__.__name__ + obj.listener_id + obj.amphora_id
+        if obj.__class__.__name__ in ['ListenerStatisticsHistory']:
+            return (obj.__class__.__name__ + obj.listener_id +
+                    str(obj.resolution) + obj.timestamp.isoformat())
         if obj.__class__.__name__ in ['ListenerCidr']:
             return obj.__class__.__name__ + obj.listener_id + obj.cidr
         if obj.__class__.__name__ in ['VRRPGroup', 'Vip']:
@@ -53,6 +57,28 @@ class OctaviaBase(models.ModelBase):
             return obj.__class__.__name__ + obj.name
         raise NotImplementedError
 
+    @classmethod
+    def _get_data_model_attr_names(cls):
+        """Returns the names of the attributes that may reference models.
+
+        These are the public relationships and properties of the class. The
+        list is computed once per class, instead of inspecting every
+        attribute of every object converted to a data model.
+        """
+        attr_names = cls.__dict__.get('_data_model_attr_names')
+        if attr_names is None:
+            # The backrefs are only added when the mappers are configured
+            orm.configure_mappers()
+            attr_names = {rel.key for rel in sa.inspect(cls).relationships}
+            for klass in cls.__mro__:
+                attr_names.update(
+                    name for name, value in vars(klass).items()
+                    if isinstance(value, property))
+            attr_names = sorted(attr_name for attr_name in attr_names
+                                if not attr_name.startswith('_'))
+            cls._data_model_attr_names = attr_names
+        return attr_names
+
     def to_data_model(self, _graph_nodes=None):
         """Converts to a data model graph.
 
@@ -70,10 +96,13 @@ class OctaviaBase(models.ModelBase):
             raise NotImplementedError
         dm_kwargs = {}
         for column in self.__table__.columns:
-            dm_kwargs[column.name] = getattr(self, column.name)
+            value = getattr(self, column.name)
+            # Do not share the list columns with the model
+            if isinstance(value, list):
+                value = value[:]
+            dm_kwargs[column.name] = value
 
-        attr_names = [attr_name for attr_name in dir(self)
-                      if not attr_name.startswith('_')]
+        attr_names = self._get_data_model_attr_names()
         # Appending early, as any unique ID should be defined already and
         # the rest of this object will get filled out more fully later on,
         # and we need to add ourselves to the _graph_nodes before we
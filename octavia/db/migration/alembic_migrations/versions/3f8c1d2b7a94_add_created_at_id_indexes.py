@@ -0,0 +1,34 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Add created_at, id indexes for the API pagination
+
+Revision ID: 3f8c1d2b7a94
+Revises: 6ac558d7fc21
+Create Date: 2026-10-18 20:12:31.507214
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '3f8c1d2b7a94'
+down_revision = '6ac558d7fc21'
+
+TABLES = ('load_balancer', 'listener', 'pool', 'member', 'health_monitor',
+          'l7policy', 'l7rule', 'amphora')
+
+
+def upgrade():
+    for table in TABLES:
+        op.create_index('idx_{}_created_at_id'.format(table), table,
+                        ['created_at', 'id'])
@@ -0,0 +1,46 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Listener statistics history table
+
+Revision ID: a5f2c8e91d37
+Revises: 3f8c1d2b7a94
+Create Date: 2026-10-18 22:04:17.382615
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'a5f2c8e91d37'
+down_revision = '3f8c1d2b7a94'
+
+
+def upgrade():
+    op.create_table(
+        u'listener_statistics_history',
+        sa.Column(u'listener_id', sa.String(36), primary_key=True,
+                  nullable=False),
+        sa.Column(u'resolution', sa.Integer(), primary_key=True,
+                  nullable=False),
+        sa.Column(u'timestamp', sa.DateTime(), primary_key=True,
+                  nullable=False),
+        sa.Column(u'bytes_in', sa.BigInteger(), nullable=False),
+        sa.Column(u'bytes_out', sa.BigInteger(), nullable=False),
+        sa.Column(u'active_connections', sa.Integer(), nullable=False),
+        sa.Column(u'total_connections', sa.BigInteger(), nullable=False),
+        sa.Column(u'request_errors', sa.BigInteger(), nullable=False)
+    )
+    op.create_index(
+        u'idx_listener_statistics_history_resolution_timestamp',
+        u'listener_statistics_history', [u'resolution', u'timestamp'])
@@ -190,6 +190,31 @@ class ListenerStatistics(base_models.BASE):
         return self
 
 
+class ListenerStatisticsHistory(base_models.BASE):
+
+    __data_model__ = data_models.ListenerStatisticsHistory
+
+    __tablename__ = "listener_statistics_history"
+
+    __table_args__ = (
+        sa.Index('idx_listener_statistics_history_resolution_timestamp',
+                 'resolution', 'timestamp'),
+    )
+
+    listener_id = sa.Column(
+        sa.String(36),
+        primary_key=True,
+        nullable=False)
+    resolution = sa.Column(sa.Integer, primary_key=True, nullable=False)
+    timestamp = sa.Column(sa.DateTime, primary_key=True, nullable=False)
+    bytes_in = sa.Column(sa.BigInteger, nullable=False)
+    bytes_out = sa.Column(sa.BigInteger, nullable=False)
+    # The highest count of active connections reported during the interval
+    active_connections = sa.Column(sa.Integer, nullable=False)
+    total_connections = sa.Column(sa.BigInteger, nullable=False)
+    request_errors = sa.Column(sa.BigInteger, nullable=False)
+
+
 class Member(base_models.BASE, base_models.IdMixin, base_models.ProjectMixin,
              models.TimestampMixin, base_models.NameMixin,
              base_models.TagMixin):
@@ -203,6 +228,7 @@ class Member(base_models.BASE, base_models.IdMixin, base_models.ProjectMixin,
     __table_args__ = (
         sa.UniqueConstraint('pool_id', 'ip_address', 'protocol_port',
                             name='uq_member_pool_id_address_protocol_port'),
+        sa.Index('idx_member_created_at_id', 'created_at', 'id'),
     )
 
     pool_id = sa.Column(
@@ -251,6 +277,7 @@ class HealthMonitor(base_models.BASE, base_models.IdMixin,
     __table_args__ = (
         sa.UniqueConstraint('pool_id',
                             name='uq_health_monitor_pool'),
+        sa.Index('idx_health_monitor_created_at_id', 'created_at', 'id'),
     )
 
     type = sa.Column(
@@ -303,6 +330,10 @@ class Pool(base_models.BASE, base_models.IdMixin, base_models.ProjectMixin,
 
     __v2_wsme__ = pool.PoolResponse
 
+    __table_args__ = (
+        sa.Index('idx_pool_created_at_id', 'created_at', 'id'),
+    )
+
     description = sa.Column(sa.String(255), nullable=True)
     protocol = sa.Column(
         sa.String(16),
@@ -383,6 +414,10 @@ class LoadBalancer(base_models.BASE, base_models.IdMixin,
 
     __v2_wsme__ = load_balancer.LoadBalancerResponse
 
+    __table_args__ = (
+        sa.Index('idx_load_balancer_created_at_id', 'created_at', 'id'),
+    )
+
     description = sa.Column(sa.String(255), nullable=True)
     provisioning_status = sa.Column(
         sa.String(16),
@@ -483,6 +518,7 @@ class Listener(base_models.BASE, base_models.IdMixin,
         sa.UniqueConstraint(
             'load_balancer_id', 'protocol', 'protocol_port',
             name='uq_listener_load_balancer_id_protocol_port'),
+        sa.Index('idx_listener_created_at_id', 'created_at', 'id'),
     )
 
     description = sa.Column(sa.String(255), nullable=True)
@@ -599,6 +635,10 @@ class Amphora(base_models.BASE, base_models.IdMixin, models.TimestampMixin):
 
     __v2_wsme__ = amphora.AmphoraResponse
 
+    __table_args__ = (
+        sa.Index('idx_amphora_created_at_id', 'created_at', 'id'),
+    )
+
     load_balancer_id = sa.Column(
         sa.String(36), sa.ForeignKey("load_balancer.id",
                                      name="fk_amphora_load_balancer_id"),
@@ -652,6 +692,10 @@ class L7Rule(base_models.BASE, base_models.IdMixin, base_models.ProjectMixin,
 
     __v2_wsme__ = l7rule.L7RuleResponse
 
+    __table_args__ = (
+        sa.Index('idx_l7rule_created_at_id', 'created_at', 'id'),
+    )
+
     l7policy_id = sa.Column(
         sa.String(36),
         sa.ForeignKey("l7policy.id", name="fk_l7rule_l7policy_id"),
@@ -703,6 +747,10 @@ class L7Policy(base_models.BASE, base_models.IdMixin, base_models.ProjectMixin,
 
     __v2_wsme__ = l7policy.L7PolicyResponse
 
+    __table_args__ = (
+        sa.Index('idx_l7policy_created_at_id', 'created_at', 'id'),
+    )
+
     description = sa.Column(sa.String(255), nullable=True)
     listener_id = sa.Column(
         sa.String(36),
@@ -27,15 +27,24 @@ from oslo_log import log as logging
 from oslo_serialization import jsonutils
 from oslo_utils import excutils
 from oslo_utils import uuidutils
+from sqlalchemy import bindparam
+from sqlalchemy import case
+from sqlalchemy.dialects import mysql
+from sqlalchemy.dialects import postgresql
+from sqlalchemy import or_
+from sqlalchemy.orm import joinedload
 from sqlalchemy.orm import noload
+from sqlalchemy.orm import selectinload
 from sqlalchemy.orm import subqueryload
 from sqlalchemy.sql.expression import false
 from sqlalchemy.sql import func
+from sqlalchemy import text
 
 from octavia.common import constants as consts
 from octavia.common import data_models
 from octavia.common import exceptions
 from octavia.common import validate
+from octavia.db import base_models
 from octavia.db import models
 
 CONF = cfg.CONF
@@ -97,6 +106,24 @@ class BaseRepository(object):
         for id in ids:
             self.delete(session, id=id)
 
+    def update_batch(self, session, ids, **model_kwargs):
+        """Updates the same attributes of entities with one UPDATE.
+
+        Unlike update(), this does not handle tags or any attribute a
+        repository validates in its update(). Missing IDs are ignored.
+
+        :param session: A Sql Alchemy database session.
+        :param ids: IDs of the entities to update.
+        :param model_kwargs: Entity attributes that should be updated.
+        :returns: The number of entities found.
+        """
+        if not ids:
+            return 0
+        with session.begin(subtransactions=True):
+            return session.query(self.model_class).filter(
+                self.model_class.id.in_(ids)).update(
+                    model_kwargs, synchronize_session=False)
+
     def update(self, session, id, **model_kwargs):
         """Updates an entity in the database.
 
@@ -112,15 +139,18 @@ class BaseRepository(object):
             session.query(self.model_class).filter_by(
                 id=id).update(model_kwargs)
 
-    def get(self, session, **filters):
+    def get(self, session, query_options=None, **filters):
         """Retrieves an entity from the database.
 
         :param session: A Sql Alchemy database session.
+        :param query_options: Optional query options to apply.
         :param filters: Filters to decide which entity should be retrieved.
         :returns: octavia.common.data_model
         """
         deleted = filters.pop('show_deleted', True)
         model = session.query(self.model_class).filter_by(**filters)
+        if query_options:
+            model = model.options(*query_options)
 
         if not deleted:
             if hasattr(self.model_class, 'status'):
@@ -171,6 +201,24 @@ class BaseRepository(object):
         data_model_list = [model.to_data_model() for model in model_list]
         return data_model_list, links
 
+    @staticmethod
+    def _get_API_list_query_options(relationship_options, fields=None):
+        """Selects the relationships to load for an API list call.
+
+        :param relationship_options: Pairs of a query option loading a
+                                     relationship and of the API fields that
+                                     need it, or None if the API response
+                                     always needs it.
+        :param fields: The API fields requested, or None for all of them.
+        :returns: The query options loading the relationships needed for the
+                  requested fields, and no-loading (blanking) the others.
+        """
+        query_options = tuple(
+            option for option, api_fields in relationship_options
+            if fields is None or api_fields is None or
+            not set(api_fields).isdisjoint(fields))
+        return query_options + (noload('*'),)
+
     def exists(self, session, id):
         """Determines whether an entity exists in the database by its id.
 
@@ -831,7 +879,55 @@ class Repositories(object):
 class LoadBalancerRepository(BaseRepository):
     model_class = models.LoadBalancer
 
-    def get_all_API_list(self, session, pagination_helper=None, **filters):
+    @staticmethod
+    def _get_graph_query_options():
+        """Returns the query options that eager-load a load balancer graph.
+
+        Every level of the graph is loaded with its own SELECT ... IN query
+        (or joined to its parent for the one-to-one relationships), so the
+        number of queries does not depend on the number of listeners, pools
+        or members of the load balancer. The many-to-one relationships back
+        to already loaded objects are resolved from the session identity map
+        without queries.
+        """
+        lb = models.LoadBalancer
+        listener = selectinload(lb.listeners)
+        pool = selectinload(lb.pools)
+        return (
+            joinedload(lb.vip),
+            # vrrp_group is a backref, only defined once the mappers are
+            # configured
+            joinedload('vrrp_group'),
+            selectinload(lb.amphorae),
+            listener.selectinload(models.Listener.sni_containers),
+            listener.selectinload(models.Listener.allowed_cidrs),
+            listener.selectinload(models.Listener.l7policies).selectinload(
+                models.L7Policy.l7rules),
+            pool.selectinload(models.Pool.members),
+            pool.joinedload(models.Pool.health_monitor),
+            pool.joinedload(models.Pool.session_persistence),
+            pool.selectinload(models.Pool._default_listeners),
+            pool.selectinload(models.Pool.l7policies))
+
+    def get(self, session, query_options=None, **filters):
+        """Retrieves a load balancer graph from the database.
+
+        Unless query options are passed, the load balancer graph is eager
+        loaded in a fixed number of queries, instead of lazy loading every
+        relationship while it is converted to a data model. Use
+        tools/benchmark_lb_graph_load.py to compare both.
+
+        :param session: A Sql Alchemy database session.
+        :param query_options: Optional query options to apply.
+        :param filters: Filters to decide which entity should be retrieved.
+        :returns: octavia.common.data_model
+        """
+        if query_options is None:
+            query_options = self._get_graph_query_options()
+        return super().get(session, query_options=query_options, **filters)
+
+    def get_all_API_list(self, session, pagination_helper=None,
+                         fields=None, **filters):
         """Get a list of load balancers for the API list call.
 
         This get_all returns a data set that is only one level deep
@@ -840,19 +936,23 @@ class LoadBalancerRepository(BaseRepository):
 
         :param session: A Sql Alchemy database session.
         :param pagination_helper: Helper to apply pagination and sorting.
+        :param fields: The API fields requested, or None for all of them.
+                       The relationships only needed by other fields are
+                       not loaded.
         :param filters: Filters to decide which entities should be retrieved.
         :returns: [octavia.common.data_model]
         """
 
         # sub-query load the tables we need
         # no-load (blank) the tables we don't need
-        query_options = (
-            subqueryload(models.LoadBalancer.vip),
-            subqueryload(models.LoadBalancer.amphorae),
-            subqueryload(models.LoadBalancer.pools),
-            subqueryload(models.LoadBalancer.listeners),
-            subqueryload(models.LoadBalancer._tags),
-            noload('*'))
+        query_options = self._get_API_list_query_options((
+            (subqueryload(models.LoadBalancer.vip),
+             ('vip_address', 'vip_port_id', 'vip_subnet_id',
+              'vip_network_id', 'vip_qos_policy_id')),
+            (subqueryload(models.LoadBalancer.amphorae), ()),
+            (subqueryload(models.LoadBalancer.pools), ('pools',)),
+            (subqueryload(models.LoadBalancer.listeners), ('listeners',)),
+            (subqueryload(models.LoadBalancer._tags), ('tags',))), fields)
 
         return super().get_all(
             session, pagination_helper=pagination_helper,
@@ -917,6 +1017,56 @@ class LoadBalancerRepository(BaseRepository):
             session.add(lb)
             return True
 
+    def set_children_provisioning_status(self, session, id, status):
+        """Sets the provisioning status of the children of a load balancer.
+
+        This sets the provisioning status of the listeners of the load
+        balancer, of their L7 policies and L7 rules, of their default pools
+        and L7 policy redirect pools, and of the health monitors and members
+        of these pools. Pools that are not used by a listener are left
+        unchanged. One UPDATE statement is issued per table instead of one
+        per object. The status of the load balancer itself is not changed.
+
+        :param session: A Sql Alchemy database session.
+        :param id: id of Load Balancer
+        :param status: The provisioning status to set.
+        :returns: None
+        """
+        values = {'provisioning_status': status}
+        with session.begin(subtransactions=True):
+            listener_ids = session.query(models.Listener.id).filter_by(
+                load_balancer_id=id).subquery()
+            l7policies = session.query(
+                models.L7Policy.id, models.L7Policy.redirect_pool_id).filter(
+                models.L7Policy.listener_id.in_(listener_ids)).all()
+            l7policy_ids = [l7policy_id for l7policy_id, _ in l7policies]
+            pool_ids = {pool_id for _, pool_id in l7policies if pool_id}
+            pool_ids.update(
+                pool_id for (pool_id,) in session.query(
+                    models.Listener.default_pool_id).filter_by(
+                    load_balancer_id=id) if pool_id)
+
+            session.query(models.Listener).filter_by(
+                load_balancer_id=id).update(values,
+                                            synchronize_session=False)
+            if l7policy_ids:
+                session.query(models.L7Policy).filter(
+                    models.L7Policy.id.in_(l7policy_ids)).update(
+                    values, synchronize_session=False)
+                session.query(models.L7Rule).filter(
+                    models.L7Rule.l7policy_id.in_(l7policy_ids)).update(
+                    values, synchronize_session=False)
+            if pool_ids:
+                session.query(models.Pool).filter(
+                    models.Pool.id.in_(pool_ids)).update(
+                    values, synchronize_session=False)
+                session.query(models.HealthMonitor).filter(
+                    models.HealthMonitor.pool_id.in_(pool_ids)).update(
+                    values, synchronize_session=False)
+                session.query(models.Member).filter(
+                    models.Member.pool_id.in_(pool_ids)).update(
+                    values, synchronize_session=False)
+
 
 class VipRepository(BaseRepository):
     model_class = models.Vip
@@ -931,7 +1081,8 @@ class VipRepository(BaseRepository):
 class HealthMonitorRepository(BaseRepository):
     model_class = models.HealthMonitor
 
-    def get_all_API_list(self, session, pagination_helper=None, **filters):
+    def get_all_API_list(self, session, pagination_helper=None,
+                         fields=None, **filters):
         """Get a list of health monitors for the API list call.
 
         This get_all returns a data set that is only one level deep
@@ -940,16 +1091,18 @@ class HealthMonitorRepository(BaseRepository):
 
         :param session: A Sql Alchemy database session.
         :param pagination_helper: Helper to apply pagination and sorting.
+        :param fields: The API fields requested, or None for all of them.
+                       The relationships only needed by other fields are
+                       not loaded.
         :param filters: Filters to decide which entities should be retrieved.
         :returns: [octavia.common.data_model]
         """
 
         # sub-query load the tables we need
         # no-load (blank) the tables we don't need
-        query_options = (
-            subqueryload(models.HealthMonitor.pool),
-            subqueryload(models.HealthMonitor._tags),
-            noload('*'))
+        query_options = self._get_API_list_query_options((
+            (subqueryload(models.HealthMonitor.pool), None),
+            (subqueryload(models.HealthMonitor._tags), ('tags',))), fields)
 
         return super().get_all(
             session, pagination_helper=pagination_helper,
@@ -993,7 +1146,8 @@ class ListenerCidrRepository(BaseRepository):
 class PoolRepository(BaseRepository):
     model_class = models.Pool
 
-    def get_all_API_list(self, session, pagination_helper=None, **filters):
+    def get_all_API_list(self, session, pagination_helper=None,
+                         fields=None, **filters):
         """Get a list of pools for the API list call.
 
         This get_all returns a data set that is only one level deep
@@ -1002,25 +1156,29 @@ class PoolRepository(BaseRepository):
 
         :param session: A Sql Alchemy database session.
         :param pagination_helper: Helper to apply pagination and sorting.
+        :param fields: The API fields requested, or None for all of them.
+                       The relationships only needed by other fields are
+                       not loaded.
         :param filters: Filters to decide which entities should be retrieved.
         :returns: [octavia.common.data_model]
         """
 
         # sub-query load the tables we need
         # no-load (blank) the tables we don't need
-        query_options = (
-            subqueryload(models.Pool._default_listeners),
-            subqueryload(models.Pool.health_monitor),
-            subqueryload(models.Pool.l7policies),
-            (subqueryload(models.Pool.l7policies).
-             subqueryload(models.L7Policy.l7rules)),
-            (subqueryload(models.Pool.l7policies).
-             subqueryload(models.L7Policy.listener)),
-            subqueryload(models.Pool.load_balancer),
-            subqueryload(models.Pool.members),
-            subqueryload(models.Pool.session_persistence),
-            subqueryload(models.Pool._tags),
-            noload('*'))
+        query_options = self._get_API_list_query_options((
+            (subqueryload(models.Pool._default_listeners), ('listeners',)),
+            (subqueryload(models.Pool.health_monitor),
+             ('healthmonitor_id',)),
+            (subqueryload(models.Pool.l7policies), ('listeners',)),
+            ((subqueryload(models.Pool.l7policies).
+              subqueryload(models.L7Policy.l7rules)), ('listeners',)),
+            ((subqueryload(models.Pool.l7policies).
+              subqueryload(models.L7Policy.listener)), ('listeners',)),
+            (subqueryload(models.Pool.load_balancer), ('loadbalancers',)),
+            (subqueryload(models.Pool.members), ('members',)),
+            (subqueryload(models.Pool.session_persistence),
+             ('session_persistence',)),
+            (subqueryload(models.Pool._tags), ('tags',))), fields)
 
         return super().get_all(
             session, pagination_helper=pagination_helper,
@@ -1040,7 +1198,8 @@ class PoolRepository(BaseRepository):
 class MemberRepository(BaseRepository):
     model_class = models.Member
 
-    def get_all_API_list(self, session, pagination_helper=None, **filters):
+    def get_all_API_list(self, session, pagination_helper=None,
+                         fields=None, **filters):
         """Get a list of members for the API list call.
 
         This get_all returns a data set that is only one level deep
@@ -1049,16 +1208,18 @@ class MemberRepository(BaseRepository):
 
         :param session: A Sql Alchemy database session.
         :param pagination_helper: Helper to apply pagination and sorting.
+        :param fields: The API fields requested, or None for all of them.
+                       The relationships only needed by other fields are
+                       not loaded.
         :param filters: Filters to decide which entities should be retrieved.
         :returns: [octavia.common.data_model]
         """
 
         # sub-query load the tables we need
         # no-load (blank) the tables we don't need
-        query_options = (
-            subqueryload(models.Member.pool),
-            subqueryload(models.Member._tags),
-            noload('*'))
+        query_options = self._get_API_list_query_options((
+            (subqueryload(models.Member.pool), ()),
+            (subqueryload(models.Member._tags), ('tags',))), fields)
 
         return super().get_all(
             session, pagination_helper=pagination_helper,
@@ -1068,6 +1229,82 @@ class MemberRepository(BaseRepository):
         """Batch deletes members from a pool."""
         self.delete_batch(session, member_ids)
 
+    @staticmethod
+    def _get_tag_mappings(member_id, tags):
+        return [{'resource_id': member_id, 'tag': tag} for tag in tags or []]
+
+    def create_members(self, session, members):
+        """Creates members with one multi-row INSERT per table.
+
+        :param session: A Sql Alchemy database session.
+        :param members: The attributes of each member to create, as accepted
+                        by create(). An ID is generated for the members
+                        without one.
+        :returns: [octavia.common.data_model] in the order of members
+        """
+        member_mappings = []
+        tag_mappings = []
+        for member in members:
+            member = dict(member)
+            if not member.get('id'):
+                member['id'] = uuidutils.generate_uuid()
+            tag_mappings.extend(self._get_tag_mappings(
+                member['id'], member.pop('tags', None)))
+            member_mappings.append(member)
+        member_ids = [member['id'] for member in member_mappings]
+
+        with session.begin(subtransactions=True):
+            session.bulk_insert_mappings(self.model_class, member_mappings)
+            if tag_mappings:
+                session.bulk_insert_mappings(base_models.Tags, tag_mappings)
+
+        # Read the members back for the values set by the column defaults,
+        # without their pool graph
+        db_members = session.query(self.model_class).filter(
+            self.model_class.id.in_(member_ids)).options(
+                subqueryload(models.Member._tags), noload('*'))
+        db_members = {db_member.id: db_member for db_member in db_members}
+        return [db_members[member_id].to_data_model()
+                for member_id in member_ids]
+
+    def update_members(self, session, members):
+        """Updates members with one multi-row UPDATE per set of attributes.
+
+        :param session: A Sql Alchemy database session.
+        :param members: The ID and the attributes to update of each member.
+                        The tags of a member are replaced when they are
+                        passed.
+        """
+        member_mappings = []
+        tag_mappings = []
+        tagged_member_ids = []
+        for member in members:
+            member = dict(member)
+            tags = member.pop('tags', None)
+            if tags is not None:
+                tagged_member_ids.append(member['id'])
+                tag_mappings.extend(self._get_tag_mappings(member['id'],
+                                                           tags))
+            member_mappings.append(member)
+
+        with session.begin(subtransactions=True):
+            session.bulk_update_mappings(self.model_class, member_mappings)
+            if tagged_member_ids:
+                session.query(base_models.Tags).filter(
+                    base_models.Tags.resource_id.in_(tagged_member_ids)
+                ).delete(synchronize_session=False)
+            if tag_mappings:
+                session.bulk_insert_mappings(base_models.Tags, tag_mappings)
+
+    def update_provisioning_status(self, session, member_ids, status):
+        """Sets the provisioning status of members with one UPDATE.
+
+        :param session: A Sql Alchemy database session.
+        :param member_ids: IDs of the members to update.
+        :param status: The new provisioning status.
+        """
+        self.update_batch(session, member_ids, provisioning_status=status)
+
     def update_pool_members(self, session, pool_id, **model_kwargs):
         """Updates all of the members of a pool.
 
@@ -1084,7 +1321,8 @@ class MemberRepository(BaseRepository):
 class ListenerRepository(BaseRepository):
     model_class = models.Listener
 
-    def get_all_API_list(self, session, pagination_helper=None, **filters):
+    def get_all_API_list(self, session, pagination_helper=None,
+                         fields=None, **filters):
         """Get a list of listeners for the API list call.
 
         This get_all returns a data set that is only one level deep
@@ -1093,19 +1331,23 @@ class ListenerRepository(BaseRepository):
 
         :param session: A Sql Alchemy database session.
         :param pagination_helper: Helper to apply pagination and sorting.
+        :param fields: The API fields requested, or None for all of them.
+                       The relationships only needed by other fields are
+                       not loaded.
         :param filters: Filters to decide which entities should be retrieved.
         :returns: [octavia.common.data_model]
         """
 
         # sub-query load the tables we need
         # no-load (blank) the tables we don't need
-        query_options = (
-            subqueryload(models.Listener.l7policies),
-            subqueryload(models.Listener.load_balancer),
-            subqueryload(models.Listener.sni_containers),
-            subqueryload(models.Listener._tags),
-            subqueryload(models.Listener.allowed_cidrs),
-            noload('*'))
+        query_options = self._get_API_list_query_options((
+            (subqueryload(models.Listener.l7policies), ('l7policies',)),
+            (subqueryload(models.Listener.load_balancer), None),
+            (subqueryload(models.Listener.sni_containers),
+             ('sni_container_refs',)),
+            (subqueryload(models.Listener._tags), ('tags',)),
+            (subqueryload(models.Listener.allowed_cidrs),
+             ('allowed_cidrs',))), fields)
 
         return super().get_all(
             session, pagination_helper=pagination_helper,
@@ -1217,6 +1459,11 @@ class ListenerRepository(BaseRepository):
 
 class ListenerStatisticsRepository(BaseRepository):
     model_class = models.ListenerStatistics
+    # The statistics that are reported as deltas, active_connections is
+    # always an absolute value.
+    delta_fields = ('bytes_in', 'bytes_out', 'total_connections',
+                    'request_errors')
+    stats_fields = delta_fields + ('active_connections',)
 
     def replace(self, session, stats_obj):
         """Create or override a listener's statistics (insert/update)
@@ -1270,6 +1517,235 @@ class ListenerStatisticsRepository(BaseRepository):
             else:
                 self.create(session, **delta_stats.db_fields())
 
+    def replace_batch(self, session, stats_objs):
+        """Create or override the statistics of several listeners
+
+        All of the statistics are stored with a single statement on MySQL
+        and PostgreSQL.
+
+        :param session: A Sql Alchemy database session
+        :param stats_objs: Listener statistics objects to store
+        :type stats_objs: list of
+                          octavia.common.data_models.ListenerStatistics
+        """
+        self._upsert_batch(session, stats_objs, increment=False)
+
+    def increment_batch(self, session, delta_stats):
+        """Updates the statistics of several listeners with the passed deltas
+
+        All of the deltas are applied with a single statement on MySQL and
+        PostgreSQL. Deltas for the same listener and amphora are summed.
+
+        :param session: A Sql Alchemy database session
+        :param delta_stats: Listener statistics deltas to add
+        :type delta_stats: list of
+                           octavia.common.data_models.ListenerStatistics
+        """
+        self._upsert_batch(session, delta_stats, increment=True)
+
+    def _upsert_batch(self, session, stats_objs, increment):
+        rows = {}
+        for stats_obj in stats_objs:
+            if not stats_obj.amphora_id:
+                # amphora_id can't be null, so clone the listener_id
+                stats_obj.amphora_id = stats_obj.listener_id
+            key = (stats_obj.listener_id, stats_obj.amphora_id)
+            row = rows.get(key)
+            if row is None or not increment:
+                rows[key] = stats_obj.db_fields()
+            else:
+                for field in self.delta_fields:
+                    row[field] += getattr(stats_obj, field)
+                row['active_connections'] = stats_obj.active_connections
+        if not rows:
+            return
+        # Sort to lock the rows in a consistent order, the health managers
+        # could deadlock otherwise
+        rows = dict(sorted(rows.items()))
+
+        table = self.model_class.__table__
+        dialect = session.get_bind().dialect.name
+        with session.begin(subtransactions=True):
+            if dialect == 'mysql':
+                stmt = mysql.insert(table).values(list(rows.values()))
+                session.execute(stmt.on_duplicate_key_update(
+                    **self._get_upsert_values(table, stmt.inserted,
+                                              increment)))
+            elif dialect == 'postgresql':
+                stmt = postgresql.insert(table).values(list(rows.values()))
+                session.execute(stmt.on_conflict_do_update(
+                    index_elements=[table.c.listener_id, table.c.amphora_id],
+                    set_=self._get_upsert_values(table, stmt.excluded,
+                                                 increment)))
+            else:
+                # No upsert available, update the existing rows in bulk then
+                # insert the others.
+                existing_stats = session.query(
+                    self.model_class).with_for_update().filter(
+                    self.model_class.listener_id.in_(
+                        {listener_id for listener_id, _ in rows})).order_by(
+                    self.model_class.listener_id,
+                    self.model_class.amphora_id).all()
+                updates = []
+                for db_stats in existing_stats:
+                    row = rows.pop(
+                        (db_stats.listener_id, db_stats.amphora_id), None)
+                    if row is None:
+                        continue
+                    if increment:
+                        for field in self.delta_fields:
+                            row[field] += getattr(db_stats, field)
+                    updates.append(row)
+                session.bulk_update_mappings(self.model_class, updates)
+                session.bulk_insert_mappings(self.model_class,
+                                             list(rows.values()))
+
+    def _get_upsert_values(self, table, new_values, increment):
+        if not increment:
+            return {field: new_values[field] for field in self.stats_fields}
+        values = {field: table.c[field] + new_values[field]
+                  for field in self.delta_fields}
+        values['active_connections'] = new_values['active_connections']
+        return values
+
+    def get_deltas(self, session, stats_objs):
+        """Gets the increase of the counters reported as absolute values
+
+        The stored statistics are locked, so the caller must replace them
+        in the same transaction. A counter lower than the stored one was
+        reset, by a restart of the amphora for example, so its whole value
+        is the increase. The counters of a listener and amphora that have no
+        statistics yet are also counted from zero.
+
+        :param session: A Sql Alchemy database session
+        :param stats_objs: Listener statistics objects with absolute values
+        :type stats_objs: list of
+                          octavia.common.data_models.ListenerStatistics
+        :returns: A list of octavia.common.data_models.ListenerStatistics
+                  holding the increase of the counters, in the order of
+                  stats_objs
+        """
+        if not stats_objs:
+            return []
+        for stats_obj in stats_objs:
+            if not stats_obj.amphora_id:
+                # amphora_id can't be null, so clone the listener_id
+                stats_obj.amphora_id = stats_obj.listener_id
+        with session.begin(subtransactions=True):
+            previous_stats = {
+                (db_stats.listener_id, db_stats.amphora_id): db_stats
+                for db_stats in session.query(
+                    self.model_class).with_for_update().filter(
+                    self.model_class.listener_id.in_(
+                        {stats_obj.listener_id
+                         for stats_obj in stats_objs}))}
+        deltas = []
+        for stats_obj in stats_objs:
+            key = (stats_obj.listener_id, stats_obj.amphora_id)
+            previous = previous_stats.get(key)
+            delta = data_models.ListenerStatistics(
+                listener_id=stats_obj.listener_id,
+                amphora_id=stats_obj.amphora_id,
+                active_connections=stats_obj.active_connections)
+            for field in self.delta_fields:
+                value = getattr(stats_obj, field)
+                if previous is not None and value >= getattr(previous,
+                                                             field):
+                    value -= getattr(previous, field)
+                setattr(delta, field, value)
+            deltas.append(delta)
+            # The same listener and amphora may be reported several times
+            previous_stats[key] = stats_obj
+        return deltas
+
+    def _get_aggregated_stats_columns(self):
+        stats = self.model_class
+        # Amphora ID and Listener ID are the same when the statistics come
+        # from a provider driver other than the `amphora` driver. Only then
+        # and for the ALLOCATED amphorae are the *active* connections
+        # counted, because non-active amphorae report incorrect counts.
+        active_connections = case(
+            [(or_(models.Amphora.status == consts.AMPHORA_ALLOCATED,
+                  stats.amphora_id == stats.listener_id),
+              stats.active_connections)],
+            else_=0)
+        columns = [func.coalesce(func.sum(getattr(stats, field)), 0).label(
+            field) for field in self.delta_fields]
+        columns.append(func.coalesce(func.sum(active_connections), 0).label(
+            'active_connections'))
+        return columns
+
+    def _row_to_stats(self, row):
+        # SUM() returns decimals on some databases
+        return data_models.ListenerStatistics(
+            listener_id=row.listener_id,
+            **{field: int(getattr(row, field))
+               for field in self.stats_fields})
+
+    def get_listeners_stats(self, session, listener_ids):
+        """Gets the statistics of listeners, summed over their amphorae
+
+        The statistics of all of the listeners are computed by the database
+        with a single grouped query.
+
+        :param session: A Sql Alchemy database session
+        :param listener_ids: The UUIDs of the listeners
+        :returns: A dictionary of the
+                  octavia.common.data_models.ListenerStatistics of the
+                  listeners that have statistics, keyed by listener id
+        """
+        if not listener_ids:
+            return {}
+        stats = self.model_class
+        query = session.query(
+            stats.listener_id, *self._get_aggregated_stats_columns()
+        ).outerjoin(
+            models.Amphora, models.Amphora.id == stats.amphora_id
+        ).filter(
+            stats.listener_id.in_(listener_ids)
+        ).group_by(stats.listener_id)
+        return {row.listener_id: self._row_to_stats(row) for row in query}
+
+    def get_loadbalancers_stats(self, session, load_balancer_ids):
+        """Gets the statistics of load balancers and of their listeners
+
+        The statistics of all of the load balancers are computed by the
+        database with a single grouped query.
+
+        :param session: A Sql Alchemy database session
+        :param load_balancer_ids: The UUIDs of the load balancers
+        :returns: A dictionary of
+                  octavia.common.data_models.LoadBalancerStatistics, keyed
+                  by load balancer id. The load balancers without listeners
+                  have zeroed statistics.
+        """
+        result = {lb_id: data_models.LoadBalancerStatistics()
+                  for lb_id in load_balancer_ids}
+        if not result:
+            return result
+        stats = self.model_class
+        query = session.query(
+            models.Listener.load_balancer_id,
+            models.Listener.id.label('listener_id'),
+            *self._get_aggregated_stats_columns()
+        ).outerjoin(
+            stats, stats.listener_id == models.Listener.id
+        ).outerjoin(
+            models.Amphora, models.Amphora.id == stats.amphora_id
+        ).filter(
+            models.Listener.load_balancer_id.in_(load_balancer_ids)
+        ).group_by(models.Listener.load_balancer_id, models.Listener.id)
+        for row in query:
+            listener_stats = self._row_to_stats(row)
+            lb_stats = result[row.load_balancer_id]
+            lb_stats.bytes_in += listener_stats.bytes_in
+            lb_stats.bytes_out += listener_stats.bytes_out
+            lb_stats.request_errors += listener_stats.request_errors
+            lb_stats.active_connections += listener_stats.active_connections
+            lb_stats.total_connections += listener_stats.total_connections
+            lb_stats.listeners.append(listener_stats)
+        return result
+
     def update(self, session, listener_id, **model_kwargs):
         """Updates a listener's statistics, overriding with the passed values.
 
@@ -1284,10 +1760,140 @@ class ListenerStatisticsRepository(BaseRepository):
                 listener_id=listener_id).update(model_kwargs)
 
 
+class ListenerStatisticsHistoryRepository(BaseRepository):
+    model_class = models.ListenerStatisticsHistory
+    delta_fields = ListenerStatisticsRepository.delta_fields
+
+    @staticmethod
+    def get_interval_start(timestamp, resolution):
+        """Gets the start of the interval of a resolution holding timestamp
+
+        :param timestamp: A naive UTC datetime
+        :param resolution: The length of the intervals in seconds
+        :returns: The naive UTC datetime starting the interval
+        """
+        seconds = int(timestamp.replace(
+            tzinfo=datetime.timezone.utc).timestamp())
+        return datetime.datetime.utcfromtimestamp(
+            seconds - seconds % resolution)
+
+    def add_batch(self, session, delta_stats, timestamp):
+        """Adds statistics to the history of their listeners
+
+        The counter deltas are added to the interval holding timestamp, for
+        every resolution of the history. The active connections of the
+        interval are the highest count added to it. All of the statistics
+        are stored with a single statement on MySQL and PostgreSQL.
+
+        :param session: A Sql Alchemy database session
+        :param delta_stats: Listener statistics holding the counter deltas
+                            and the current active connections of a
+                            listener, at most one per listener
+        :type delta_stats: list of
+                           octavia.common.data_models.ListenerStatistics
+        :param timestamp: The naive UTC datetime of the statistics
+        """
+        rows = {}
+        for resolution in consts.STATS_HISTORY_RESOLUTIONS:
+            interval_start = self.get_interval_start(timestamp, resolution)
+            for stats_obj in delta_stats:
+                row = stats_obj.get_stats()
+                row.update(listener_id=stats_obj.listener_id,
+                           resolution=resolution, timestamp=interval_start)
+                rows[(stats_obj.listener_id, resolution,
+                      interval_start)] = row
+        if not rows:
+            return
+        # Sort to lock the rows in a consistent order, the health managers
+        # could deadlock otherwise
+        rows = dict(sorted(rows.items()))
+
+        table = self.model_class.__table__
+        dialect = session.get_bind().dialect.name
+        with session.begin(subtransactions=True):
+            if dialect == 'mysql':
+                stmt = mysql.insert(table).values(list(rows.values()))
+                session.execute(stmt.on_duplicate_key_update(
+                    **self._get_upsert_values(table, stmt.inserted)))
+            elif dialect == 'postgresql':
+                stmt = postgresql.insert(table).values(list(rows.values()))
+                session.execute(stmt.on_conflict_do_update(
+                    index_elements=[table.c.listener_id, table.c.resolution,
+                                    table.c.timestamp],
+                    set_=self._get_upsert_values(table, stmt.excluded)))
+            else:
+                # No upsert available, update the existing rows in bulk then
+                # insert the others.
+                existing_rows = session.query(
+                    self.model_class).with_for_update().filter(
+                    self.model_class.listener_id.in_(
+                        {stats_obj.listener_id for stats_obj in delta_stats}),
+                    self.model_class.timestamp.in_(
+                        {key[2] for key in rows})).all()
+                updates = []
+                for db_row in existing_rows:
+                    row = rows.pop((db_row.listener_id, db_row.resolution,
+                                    db_row.timestamp), None)
+                    if row is None:
+                        continue
+                    for field in self.delta_fields:
+                        row[field] += getattr(db_row, field)
+                    row['active_connections'] = max(
+                        row['active_connections'], db_row.active_connections)
+                    updates.append(row)
+                session.bulk_update_mappings(self.model_class, updates)
+                session.bulk_insert_mappings(self.model_class,
+                                             list(rows.values()))
+
+    def _get_upsert_values(self, table, new_values):
+        values = {field: table.c[field] + new_values[field]
+                  for field in self.delta_fields}
+        values['active_connections'] = func.greatest(
+            table.c.active_connections, new_values['active_connections'])
+        return values
+
+    def get_history(self, session, listener_id, resolution, start, end):
+        """Gets the statistics history of a listener
+
+        :param session: A Sql Alchemy database session
+        :param listener_id: The UUID of the listener
+        :param resolution: The length of the intervals in seconds
+        :param start: The naive UTC datetime starting the time window
+        :param end: The naive UTC datetime ending the time window
+        :returns: A list of
+                  octavia.common.data_models.ListenerStatisticsHistory of
+                  the intervals starting within the time window, sorted by
+                  time
+        """
+        query = session.query(self.model_class).filter(
+            self.model_class.listener_id == listener_id,
+            self.model_class.resolution == resolution,
+            self.model_class.timestamp >= start,
+            self.model_class.timestamp <= end
+        ).order_by(self.model_class.timestamp)
+        return [model.to_data_model() for model in query]
+
+    def delete_expired(self, session, resolution, expiry):
+        """Deletes the statistics history of intervals older than expiry
+
+        :param session: A Sql Alchemy database session
+        :param resolution: The length of the intervals in seconds
+        :param expiry: The naive UTC datetime before which the intervals
+                       are deleted
+        :returns: The number of deleted intervals
+        """
+        with session.begin(subtransactions=True):
+            return session.query(self.model_class).filter(
+                self.model_class.resolution == resolution,
+                self.model_class.timestamp < expiry
+            ).delete(synchronize_session=False)
+
+
 class AmphoraRepository(BaseRepository):
     model_class = models.Amphora
 
-    def get_all_API_list(self, session, pagination_helper=None, **filters):
+    def get_all_API_list(self, session, pagination_helper=None,
+                         fields=None, **filters):
         """Get a list of amphorae for the API list call.
 
         This get_all returns a data set that is only one level deep
@@ -1296,15 +1902,17 @@ class AmphoraRepository(BaseRepository):
 
         :param session: A Sql Alchemy database session.
         :param pagination_helper: Helper to apply pagination and sorting.
+        :param fields: The API fields requested, or None for all of them.
+                       The relationships only needed by other fields are
+                       not loaded.
         :param filters: Filters to decide which entities should be retrieved.
         :returns: [octavia.common.data_model]
         """
 
         # sub-query load the tables we need
         # no-load (blank) the tables we don't need
-        query_options = (
-            subqueryload(models.Amphora.load_balancer),
-            noload('*'))
+        query_options = self._get_API_list_query_options(
+            ((subqueryload(models.Amphora.load_balancer), ()),), fields)
 
         return super().get_all(
             session, pagination_helper=pagination_helper,
@@ -1423,7 +2031,9 @@ class AmphoraRepository(BaseRepository):
         as it can impact the scalability of the health manager.
         All changes should be analyzed using SQL "EXPLAIN" to
         make sure only indexes are being used.
-        Changes should also be evaluated using the stressHM tool.
+        Changes should also be evaluated using the stressHM tool and
+        tools/stress_health_update_query.py, which compares this query with
+        get_lbs_for_health_update.
 
         Note: The returned object is flat and not a graph representation
               of the load balancer as it is not needed. This is on
@@ -1456,38 +2066,97 @@ class AmphoraRepository(BaseRepository):
             {'amp_id': amphora_id, 'deleted': consts.DELETED}).fetchall()
 
         lb = {}
-        listeners = {}
-        pools = {}
         for row in rows:
-            if not lb:
-                lb['id'] = row['id']
-                lb['enabled'] = row['enabled'] == 1
-                lb['provisioning_status'] = row['lb_prov_status']
-                lb['operating_status'] = row['lb_op_status']
-            if row['list_id'] and row['list_id'] not in listeners:
-                listener = {'operating_status': row['list_op_status'],
-                            'protocol': row['list_protocol'],
-                            'enabled': row['list_enabled']}
-                listeners[row['list_id']] = listener
-            if row['pool_id']:
-                if row['pool_id'] in pools and row['member_id']:
-                    member = {'operating_status': row['mem_op_status']}
-                    pools[row['pool_id']]['members'][row['member_id']] = member
-                else:
-                    pool = {'operating_status': row['pool_op_status'],
-                            'members': {}}
-                    if row['member_id']:
-                        member = {'operating_status': row['mem_op_status']}
-                        pool['members'][row['member_id']] = member
-                    pools[row['pool_id']] = pool
-
-        if listeners:
-            lb['listeners'] = listeners
-        if pools:
-            lb['pools'] = pools
+            self._add_row_to_lb_for_health_update(lb, row)
 
         return lb
 
+    def get_lbs_for_health_update(self, session, amphora_ids):
+        """Bulk version of get_lb_for_health_update.
+
+        This runs the same explicit query as get_lb_for_health_update, but
+        for a set of amphorae, and builds all of the flat load balancer
+        dictionaries in a single pass over the result rows. Callers serving
+        many heartbeats, like the batched health updates, amortize the JOIN
+        and the row conversion over the whole set.
+
+        The same cautions as for get_lb_for_health_update apply to any
+        changes made to this query, and both queries must return the same
+        details. Use tools/stress_health_update_query.py to compare them.
+
+        :param session: A Sql Alchemy database session.
+        :param amphora_ids: The amphora IDs to lookup the load balancers for.
+        :returns: A dictionary, keyed by amphora ID, of dictionaries
+                  containing the required load balancer details. Amphorae
+                  without a load balancer are not included.
+        """
+        if not amphora_ids:
+            return {}
+
+        query = text(
+            "SELECT amphora.id AS amp_id, load_balancer.id, "
+            "load_balancer.enabled, "
+            "load_balancer.provisioning_status AS lb_prov_status, "
+            "load_balancer.operating_status AS lb_op_status, "
+            "listener.id AS list_id, "
+            "listener.operating_status AS list_op_status, "
+            "listener.enabled AS list_enabled, "
+            "listener.protocol AS list_protocol, "
+            "pool.id AS pool_id, "
+            "pool.operating_status AS pool_op_status, "
+            "member.id AS member_id, "
+            "member.operating_status AS mem_op_status from "
+            "amphora JOIN load_balancer ON "
+            "amphora.load_balancer_id = load_balancer.id LEFT JOIN "
+            "listener ON load_balancer.id = listener.load_balancer_id "
+            "LEFT JOIN pool ON load_balancer.id = pool.load_balancer_id "
+            "LEFT JOIN member ON pool.id = member.pool_id WHERE "
+            "amphora.id IN :amp_ids AND amphora.status != :deleted AND "
+            "load_balancer.provisioning_status != :deleted;").bindparams(
+                bindparam('amp_ids', expanding=True))
+        rows = session.execute(
+            query, {'amp_ids': list(amphora_ids),
+                    'deleted': consts.DELETED}).fetchall()
+
+        lbs = {}
+        for row in rows:
+            self._add_row_to_lb_for_health_update(
+                lbs.setdefault(row['amp_id'], {}), row)
+
+        return lbs
+
+    @staticmethod
+    def _add_row_to_lb_for_health_update(lb, row):
+        """Merges a health update query row into a flat load balancer dict.
+
+        :param lb: The load balancer dictionary being built, empty for the
+                   first row.
+        :param row: A row returned by the health update query.
+        :returns: None
+        """
+        if not lb:
+            lb['id'] = row['id']
+            lb['enabled'] = row['enabled'] == 1
+            lb['provisioning_status'] = row['lb_prov_status']
+            lb['operating_status'] = row['lb_op_status']
+        if row['list_id']:
+            listeners = lb.setdefault('listeners', {})
+            if row['list_id'] not in listeners:
+                listeners[row['list_id']] = {
+                    'operating_status': row['list_op_status'],
+                    'protocol': row['list_protocol'],
+                    'enabled': row['list_enabled']}
+        if row['pool_id']:
+            pools = lb.setdefault('pools', {})
+            pool = pools.get(row['pool_id'])
+            if pool is None:
+                pool = {'operating_status': row['pool_op_status'],
+                        'members': {}}
+                pools[row['pool_id']] = pool
+            if row['member_id']:
+                pool['members'][row['member_id']] = {
+                    'operating_status': row['mem_op_status']}
+
     def test_and_set_status_for_delete(self, lock_session, id):
         """Tests and sets an amphora status.
 
@@ -1615,6 +2284,34 @@ class AmphoraHealthRepository(BaseRepository):
                 model_kwargs['amphora_id'] = amphora_id
                 self.create(session, **model_kwargs)
 
+    def replace_batch(self, session, amphora_ids, **model_kwargs):
+        """replace or insert a set of amphorae into database.
+
+        All of the amphorae get the same values. Existing rows are updated
+        with a single UPDATE statement, missing rows are bulk inserted.
+
+        :param session: A Sql Alchemy database session.
+        :param amphora_ids: The amphora IDs to replace or insert.
+        :param model_kwargs: The values to set on each amphora health entry.
+        :returns: None
+        """
+        amphora_ids = set(amphora_ids)
+        if not amphora_ids:
+            return
+        with session.begin(subtransactions=True):
+            existing_ids = {
+                row[0] for row in session.query(
+                    self.model_class.amphora_id).filter(
+                    self.model_class.amphora_id.in_(amphora_ids))}
+            if existing_ids:
+                session.query(self.model_class).filter(
+                    self.model_class.amphora_id.in_(existing_ids)).update(
+                    model_kwargs, synchronize_session=False)
+            new_entries = [dict(model_kwargs, amphora_id=amphora_id)
+                           for amphora_id in amphora_ids - existing_ids]
+            if new_entries:
+                session.bulk_insert_mappings(self.model_class, new_entries)
+
     def check_amphora_health_expired(self, session, amphora_id, exp_age=None):
         """check if a specific amphora is expired in the amphora_health table
 
@@ -1687,7 +2384,8 @@ class VRRPGroupRepository(BaseRepository):
 class L7RuleRepository(BaseRepository):
     model_class = models.L7Rule
 
-    def get_all_API_list(self, session, pagination_helper=None, **filters):
+    def get_all_API_list(self, session, pagination_helper=None,
+                         fields=None, **filters):
         """Get a list of L7 Rules for the API list call.
 
         This get_all returns a data set that is only one level deep
@@ -1696,16 +2394,18 @@ class L7RuleRepository(BaseRepository):
 
         :param session: A Sql Alchemy database session.
         :param pagination_helper: Helper to apply pagination and sorting.
+        :param fields: The API fields requested, or None for all of them.
+                       The relationships only needed by other fields are
+                       not loaded.
         :param filters: Filters to decide which entities should be retrieved.
         :returns: [octavia.common.data_model]
         """
 
         # sub-query load the tables we need
         # no-load (blank) the tables we don't need
-        query_options = (
-            subqueryload(models.L7Rule.l7policy),
-            subqueryload(models.L7Rule._tags),
-            noload('*'))
+        query_options = self._get_API_list_query_options((
+            (subqueryload(models.L7Rule.l7policy), ()),
+            (subqueryload(models.L7Rule._tags), ('tags',))), fields)
 
         return super().get_all(
             session, pagination_helper=pagination_helper,
@@ -1795,17 +2495,17 @@ class L7PolicyRepository(BaseRepository):
         data_model_list = [model.to_data_model() for model in model_list]
         return data_model_list, links
 
-    def get_all_API_list(self, session, pagination_helper=None, **filters):
+    def get_all_API_list(self, session, pagination_helper=None,
+                         fields=None, **filters):
         deleted = filters.pop('show_deleted', True)
         query = session.query(self.model_class).filter_by(
             **filters)
 
-        query = query.options(
-            subqueryload(models.L7Policy.l7rules),
-            subqueryload(models.L7Policy.listener),
-            subqueryload(models.L7Policy.redirect_pool),
-            subqueryload(models.L7Policy._tags),
-            noload('*'))
+        query = query.options(*self._get_API_list_query_options((
+            (subqueryload(models.L7Policy.l7rules), ('rules',)),
+            (subqueryload(models.L7Policy.listener), ()),
+            (subqueryload(models.L7Policy.redirect_pool), ()),
+            (subqueryload(models.L7Policy._tags), ('tags',))), fields))
 
         if not deleted:
             query = query.filter(
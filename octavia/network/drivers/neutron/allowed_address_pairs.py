@@ -202,6 +202,7 @@ class AllowedAddressPairsDriver(neutron_base.BaseNeutronDriver):
 
         add_ports = set(updated_ports) - set(old_ports)
         del_ports = set(old_ports) - set(updated_ports)
+        del_rule_ids = []
         for rule in rules.get('security_group_rules', []):
             if (rule.get('protocol', '') and
                     rule.get('protocol', '').upper() in
@@ -209,20 +210,16 @@ class AllowedAddressPairsDriver(neutron_base.BaseNeutronDriver):
                      lib_consts.PROTOCOL_SCTP] and
                     (rule.get('port_range_max'), rule.get('protocol'),
                      rule.get('remote_ip_prefix')) in del_ports):
-                rule_id = rule.get(constants.ID)
-                try:
-                    self.neutron_client.delete_security_group_rule(rule_id)
-                except neutron_client_exceptions.NotFound:
-                    LOG.info("Security group rule %s not found, will assume "
-                             "it is already deleted.", rule_id)
+                del_rule_ids.append(rule.get(constants.ID))
+        self._delete_security_group_rules(del_rule_ids)
 
         ethertype = self._get_ethertype_for_ip(load_balancer.vip.ip_address)
-        for port_protocol in add_ports:
-            self._create_security_group_rule(sec_grp_id, port_protocol[1],
-                                             port_min=port_protocol[0],
-                                             port_max=port_protocol[0],
-                                             ethertype=ethertype,
-                                             cidr=port_protocol[2])
+        self._create_security_group_rules([
+            self._build_security_group_rule(
+                sec_grp_id, protocol, port_min=port, port_max=port,
+                ethertype=ethertype, cidr=cidr)
+            for port, protocol, cidr in sorted(
+                add_ports, key=lambda p: (p[0] or 0, p[1], p[2] or ''))])
 
         # Currently we are using the VIP network for VRRP
         # so we need to open up the protocols for it
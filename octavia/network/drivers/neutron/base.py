@@ -12,8 +12,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from concurrent import futures
+
 from neutronclient.common import exceptions as neutron_client_exceptions
 from oslo_config import cfg
+from oslo_context import context as oslo_context
 from oslo_log import log as logging
 
 from octavia.common import clients
@@ -141,24 +144,87 @@ class BaseNeutronDriver(base.AbstractNetworkDriver):
         sec_grp = self.neutron_client.create_security_group(new_sec_grp)
         return sec_grp['security_group']
 
+    @staticmethod
+    def _build_security_group_rule(sec_grp_id, protocol, direction='ingress',
+                                   port_min=None, port_max=None,
+                                   ethertype='IPv6', cidr=None):
+        return {
+            'security_group_id': sec_grp_id,
+            'direction': direction,
+            'protocol': protocol,
+            'port_range_min': port_min,
+            'port_range_max': port_max,
+            'ethertype': ethertype,
+            'remote_ip_prefix': cidr,
+        }
+
     def _create_security_group_rule(self, sec_grp_id, protocol,
                                     direction='ingress', port_min=None,
                                     port_max=None, ethertype='IPv6',
                                     cidr=None):
         rule = {
-            'security_group_rule': {
-                'security_group_id': sec_grp_id,
-                'direction': direction,
-                'protocol': protocol,
-                'port_range_min': port_min,
-                'port_range_max': port_max,
-                'ethertype': ethertype,
-                'remote_ip_prefix': cidr,
-            }
+            'security_group_rule': self._build_security_group_rule(
+                sec_grp_id, protocol, direction=direction, port_min=port_min,
+                port_max=port_max, ethertype=ethertype, cidr=cidr)
         }
 
         self.neutron_client.create_security_group_rule(rule)
 
+    def _create_security_group_rules(self, rules):
+        """Creates security group rules with a single bulk request
+
+        :param rules: The rules to create, as built by
+                      _build_security_group_rule.
+        """
+        if not rules:
+            return
+        self.neutron_client.create_security_group_rule(
+            {'security_group_rules': rules})
+
+    def _delete_security_group_rules(self, rule_ids):
+        """Deletes security group rules concurrently
+
+        Up to [networking] security_group_rule_concurrency rules are deleted
+        concurrently. The rules that are already deleted are ignored. If the
+        deletion of any rule fails, the first error is raised once all the
+        deletions are done.
+
+        :param rule_ids: The ids of the rules to delete.
+        """
+        def delete(rule_id):
+            try:
+                self.neutron_client.delete_security_group_rule(rule_id)
+            except neutron_client_exceptions.NotFound:
+                LOG.info("Security group rule %s not found, will assume "
+                         "it is already deleted.", rule_id)
+
+        max_workers = min(len(rule_ids),
+                          CONF.networking.security_group_rule_concurrency)
+        if max_workers <= 1:
+            for rule_id in rule_ids:
+                delete(rule_id)
+            return
+
+        context = oslo_context.get_current()
+
+        def run(rule_id):
+            # Keep the request context of the caller in the logs
+            if context:
+                context.update_store()
+            delete(rule_id)
+
+        with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = [(rule_id, executor.submit(run, rule_id))
+                       for rule_id in rule_ids]
+        errors = [(rule_id, result.exception()) for rule_id, result in results
+                  if result.exception() is not None]
+        if not errors:
+            return
+        for rule_id, error in errors[1:]:
+            LOG.error('Failed to delete security group rule %s: %s',
+                      rule_id, str(error))
+        raise errors[0][1]
+
     def apply_qos_on_port(self, qos_id, port_id):
         body = {
             'port':
@@ -0,0 +1,104 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import copy
+from multiprocessing import util as mp_util
+import threading
+
+from oslo_config import cfg
+from oslo_log import log as logging
+from stevedore import named as stevedore_named
+
+from octavia.statistics import stats_base
+
+CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+
+AGGREGATOR_DRIVER = 'stats_aggregator'
+
+
+class StatsAggregator(stats_base.StatsDriverMixin):
+    """Buffers the listener stats and periodically passes them on
+
+    The stats deltas are summed in memory per listener and amphora, and the
+    latest absolute stats are kept, until they are flushed to the
+    [controller_worker] stats_aggregator_drivers every
+    [controller_worker] stats_aggregator_flush_interval seconds.
+
+    The stats drivers are loaded in each process updating stats, so each
+    of these processes aggregates its own stats.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.handlers = stevedore_named.NamedExtensionManager(
+            namespace='octavia.statistics.drivers',
+            names=[name for name in
+                   CONF.controller_worker.stats_aggregator_drivers
+                   if name != AGGREGATOR_DRIVER],
+            invoke_on_load=True,
+            propagate_map_exceptions=False
+        )
+        self.lock = threading.Lock()
+        self.deltas = {}
+        self.absolutes = {}
+        self.flush_thread = None
+        self.exit_event = threading.Event()
+        # The health manager updates stats in a pool of processes, which do
+        # not run the atexit handlers, but do run the multiprocessing
+        # finalizers when they exit.
+        mp_util.Finalize(self, self.stop, exitpriority=10)
+
+    def update_stats(self, listener_stats, deltas=False):
+        with self.lock:
+            if self.flush_thread is None:
+                self.flush_thread = threading.Thread(
+                    target=self._flush_periodically, daemon=True)
+                self.flush_thread.start()
+
+            buffered_stats = self.deltas if deltas else self.absolutes
+            for stats_object in listener_stats:
+                key = (stats_object.listener_id, stats_object.amphora_id)
+                buffered = buffered_stats.get(key)
+                if buffered is None or not deltas:
+                    buffered_stats[key] = copy.copy(stats_object)
+                else:
+                    buffered += stats_object
+                    buffered.active_connections = (
+                        stats_object.active_connections)
+                    buffered.received_time = stats_object.received_time
+
+    def _flush_periodically(self):
+        interval = CONF.controller_worker.stats_aggregator_flush_interval
+        while not self.exit_event.wait(interval):
+            self.flush()
+
+    def flush(self):
+        """Passes the buffered stats on to the aggregated stats drivers"""
+        with self.lock:
+            deltas = list(self.deltas.values())
+            absolutes = list(self.absolutes.values())
+            self.deltas = {}
+            self.absolutes = {}
+
+        if absolutes:
+            LOG.debug("Flushing the stats of %s listeners", len(absolutes))
+            self.handlers.map_method('update_stats', absolutes, deltas=False)
+        if deltas:
+            LOG.debug("Flushing the stats deltas of %s listeners",
+                      len(deltas))
+            self.handlers.map_method('update_stats', deltas, deltas=True)
+
+    def stop(self):
+        """Stops the periodic flush and flushes the buffered stats"""
+        self.exit_event.set()
+        self.flush()
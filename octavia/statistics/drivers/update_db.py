@@ -30,14 +30,20 @@ class StatsUpdateDb(stats_base.StatsDriverMixin):
         self.listener_stats_repo = repo.ListenerStatisticsRepository()
 
     def update_stats(self, listener_stats, deltas=False):
-        """This function is to update the db with listener stats"""
+        """This function is to update the db with listener stats
+
+        All of the listener stats are written to the db in a single batch.
+        """
         session = db_api.get_session()
+        self._update_stats(session, listener_stats, deltas)
+
+    def _update_stats(self, session, listener_stats, deltas):
         for stats_object in listener_stats:
             LOG.debug("Updating listener stats in db for listener `%s` / "
                       "amphora `%s`: %s",
                       stats_object.listener_id, stats_object.amphora_id,
                       stats_object.get_stats())
-            if deltas:
-                self.listener_stats_repo.increment(session, stats_object)
-            else:
-                self.listener_stats_repo.replace(session, stats_object)
+        if deltas:
+            self.listener_stats_repo.increment_batch(session, listener_stats)
+        else:
+            self.listener_stats_repo.replace_batch(session, listener_stats)
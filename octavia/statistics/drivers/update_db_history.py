@@ -0,0 +1,67 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import datetime
+
+from oslo_log import log as logging
+
+from octavia.common import data_models
+from octavia.db import api as db_api
+from octavia.db import repositories as repo
+from octavia.statistics.drivers import update_db
+
+LOG = logging.getLogger(__name__)
+
+
+class StatsUpdateDbHistory(update_db.StatsUpdateDb):
+
+    def __init__(self):
+        super().__init__()
+        self.listener_stats_history_repo = (
+            repo.ListenerStatisticsHistoryRepository())
+
+    def update_stats(self, listener_stats, deltas=False):
+        """Update the db with listener stats and record their history
+
+        The listener stats are written to the db like the stats_db driver
+        does. In the same transaction, the increase of the counters of
+        every listener and its current active connections are added to the
+        per minute, hour and day intervals of the listener stats history.
+        """
+        if not listener_stats:
+            return
+        timestamp = datetime.datetime.utcnow()
+        session = db_api.get_session()
+        with session.begin(subtransactions=True):
+            if deltas:
+                listener_deltas = listener_stats
+            else:
+                listener_deltas = self.listener_stats_repo.get_deltas(
+                    session, listener_stats)
+            self._update_stats(session, listener_stats, deltas)
+
+            history = {}
+            for delta in listener_deltas:
+                history.setdefault(
+                    delta.listener_id, data_models.ListenerStatistics(
+                        listener_id=delta.listener_id))
+                history[delta.listener_id] += delta
+            listeners_stats = self.listener_stats_repo.get_listeners_stats(
+                session, list(history))
+            for listener_id, listener_history in history.items():
+                if listener_id in listeners_stats:
+                    listener_history.active_connections = listeners_stats[
+                        listener_id].active_connections
+            LOG.debug("Adding the stats of listeners %s to their history",
+                      list(history))
+            self.listener_stats_history_repo.add_batch(
+                session, list(history.values()), timestamp)
@@ -12,6 +12,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import io
 import os
 import random
 import socket
@@ -934,6 +935,73 @@ class TestServerTestCase(base.TestCase):
             handle.write.assert_called_once_with(octavia_utils.b('TestTest'))
             mock_makedir.assert_called_once_with('/var/lib/octavia/certs/123')
 
+    def test_ubuntu_sync_certificates(self):
+        self._test_sync_certificates(consts.UBUNTU)
+
+    def test_centos_sync_certificates(self):
+        self._test_sync_certificates(consts.CENTOS)
+
+    def _test_sync_certificates(self, distro):
+        self.assertIn(distro, [consts.UBUNTU, consts.CENTOS])
+        if distro == consts.UBUNTU:
+            app = self.ubuntu_app
+        elif distro == consts.CENTOS:
+            app = self.centos_app
+        base_dir = self.useFixture(fixtures.TempDir()).path
+        self.conf.config(group='haproxy_amphora', base_path=base_dir,
+                         base_cert_dir=os.path.join(base_dir, 'certs'))
+        cert_dir = os.path.join(base_dir, 'certs', '123')
+        url = '/' + api_server.VERSION + '/loadbalancer/123/certificates'
+
+        def _md5(content):
+            return md5(content, usedforsecurity=False).hexdigest()
+
+        # No certificates on the amphora yet
+        manifest = {'certificates': {'a.pem': _md5(b'A'), 'b.pem': _md5(b'B')}}
+        rv = app.post(url + '/manifest', json=manifest)
+        self.assertEqual(200, rv.status_code)
+        self.assertEqual({'stale': ['a.pem', 'b.pem']},
+                         jsonutils.loads(rv.data.decode('utf-8')))
+
+        rv = app.put(url, data={'a.pem': (io.BytesIO(b'A'), 'a.pem'),
+                                'b.pem': (io.BytesIO(b'B'), 'b.pem')},
+                     content_type='multipart/form-data')
+        self.assertEqual(200, rv.status_code)
+        self.assertEqual(OK, jsonutils.loads(rv.data.decode('utf-8')))
+        with open(os.path.join(cert_dir, 'a.pem'), 'rb') as f:
+            self.assertEqual(b'A', f.read())
+        self.assertEqual(
+            stat.S_IRUSR | stat.S_IWUSR,
+            stat.S_IMODE(os.stat(os.path.join(cert_dir, 'b.pem')).st_mode))
+
+        # b.pem changed and c.pem is new, a.pem is not used anymore
+        manifest = {'certificates': {'b.pem': _md5(b'B2'),
+                                     'c.pem': _md5(b'C')}}
+        rv = app.post(url + '/manifest', json=manifest)
+        self.assertEqual(200, rv.status_code)
+        self.assertEqual({'stale': ['b.pem', 'c.pem']},
+                         jsonutils.loads(rv.data.decode('utf-8')))
+        self.assertFalse(os.path.exists(os.path.join(cert_dir, 'a.pem')))
+
+        rv = app.put(url, data={'b.pem': (io.BytesIO(b'B2'), 'b.pem'),
+                                'c.pem': (io.BytesIO(b'C'), 'c.pem')},
+                     content_type='multipart/form-data')
+        self.assertEqual(200, rv.status_code)
+        rv = app.post(url + '/manifest', json=manifest)
+        self.assertEqual({'stale': []},
+                         jsonutils.loads(rv.data.decode('utf-8')))
+
+        # Invalid manifests and filenames
+        rv = app.post(url + '/manifest', json={'certificates': ['b.pem']})
+        self.assertEqual(400, rv.status_code)
+        rv = app.post(url + '/manifest',
+                      json={'certificates': {'test.bla': _md5(b'C')}})
+        self.assertEqual(400, rv.status_code)
+        rv = app.put(url, data={'test.bla': (io.BytesIO(b'C'), 'test.bla')},
+                     content_type='multipart/form-data')
+        self.assertEqual(400, rv.status_code)
+        self.assertFalse(os.path.exists(os.path.join(cert_dir, 'test.bla')))
+
     def test_ubuntu_upload_server_certificate(self):
         self._test_upload_server_certificate(consts.UBUNTU)
 
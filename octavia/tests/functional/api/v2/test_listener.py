@@ -14,6 +14,7 @@
 #    under the License.
 
 import copy
+import datetime
 import random
 from unittest import mock
 
@@ -27,6 +28,7 @@ import octavia.common.context
 from octavia.common import data_models
 from octavia.common import exceptions
 from octavia.db import api as db_api
+from octavia.db import repositories
 from octavia.tests.common import constants as c_const
 from octavia.tests.common import sample_certs
 from octavia.tests.functional.api.v2 import base
@@ -2901,6 +2903,88 @@ class TestListener(base.BaseAPITest):
         self.get(self.LISTENER_PATH.format(
             listener_id=li.get('id') + "/stats"), status=404)
 
+    def _getStatsHistory(self, listener_id, status=200, **params):
+        res = self.get(self.LISTENER_PATH.format(
+            listener_id=listener_id + "/stats/history"), params=params,
+            status=status)
+        return res.json
+
+    def test_statistics_history(self):
+        lb = self.create_load_balancer(
+            uuidutils.generate_uuid()).get('loadbalancer')
+        self.set_lb_status(lb['id'])
+        li = self.create_listener(
+            constants.PROTOCOL_HTTP, 80, lb.get('id')).get('listener')
+        history_repo = repositories.ListenerStatisticsHistoryRepository()
+        now = datetime.datetime.utcnow()
+        history_repo.add_batch(
+            db_api.get_session(), [data_models.ListenerStatistics(
+                listener_id=li['id'], bytes_in=6000, bytes_out=12000,
+                active_connections=5, total_connections=120,
+                request_errors=60)], now)
+
+        response = self._getStatsHistory(li['id']).get('stats_history')
+        self.assertEqual(1, len(response))
+        bucket = response[0]
+        self.assertEqual(
+            history_repo.get_interval_start(now, 60).isoformat(),
+            bucket['timestamp'])
+        self.assertEqual(6000, bucket['bytes_in'])
+        self.assertEqual(12000, bucket['bytes_out'])
+        self.assertEqual(5, bucket['active_connections'])
+        self.assertEqual(120, bucket['total_connections'])
+        self.assertEqual(60, bucket['request_errors'])
+        self.assertEqual(100.0, bucket['bytes_in_rate'])
+        self.assertEqual(200.0, bucket['bytes_out_rate'])
+        self.assertEqual(2.0, bucket['connection_rate'])
+        self.assertEqual(1.0, bucket['request_error_rate'])
+
+        response = self._getStatsHistory(
+            li['id'], resolution=86400).get('stats_history')
+        self.assertEqual(1, len(response))
+        self.assertEqual(6000 / 86400, response[0]['bytes_in_rate'])
+
+        end = history_repo.get_interval_start(now, 60) - datetime.timedelta(
+            seconds=1)
+        response = self._getStatsHistory(
+            li['id'], end=end.isoformat()).get('stats_history')
+        self.assertEqual([], response)
+
+    def test_statistics_history_invalid_window(self):
+        lb = self.create_load_balancer(
+            uuidutils.generate_uuid()).get('loadbalancer')
+        self.set_lb_status(lb['id'])
+        li = self.create_listener(
+            constants.PROTOCOL_HTTP, 80, lb.get('id')).get('listener')
+        self._getStatsHistory(li['id'], status=400, resolution=30)
+        self._getStatsHistory(li['id'], status=400,
+                              start='2020-01-02T00:00:00',
+                              end='2020-01-01T00:00:00')
+
+    def test_statistics_history_not_authorized(self):
+        lb = self.create_load_balancer(
+            uuidutils.generate_uuid()).get('loadbalancer')
+        self.set_lb_status(lb['id'])
+        li = self.create_listener(
+            constants.PROTOCOL_HTTP, 80, lb.get('id')).get('listener')
+        self.conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        auth_strategy = self.conf.conf.api_settings.get('auth_strategy')
+        self.conf.config(group='api_settings', auth_strategy=constants.TESTING)
+        with mock.patch.object(octavia.common.context.Context, 'project_id',
+                               uuidutils.generate_uuid()):
+            res = self._getStatsHistory(li['id'], status=403)
+        self.conf.config(group='api_settings', auth_strategy=auth_strategy)
+        self.assertEqual(self.NOT_AUTHORIZED_BODY, res)
+
+    def test_statistics_history_get_deleted(self):
+        lb = self.create_load_balancer(
+            uuidutils.generate_uuid()).get('loadbalancer')
+        self.set_lb_status(lb['id'])
+        li = self.create_listener(
+            constants.PROTOCOL_HTTP, 80, lb.get('id')).get('listener')
+        self.set_lb_status(lb['id'], status=constants.DELETED)
+        self._getStatsHistory(li['id'], status=404)
+
     @mock.patch('octavia.common.tls_utils.cert_parser.load_certificates_data')
     def test_listener_pool_protocol_map_post(self, mock_cert_data):
         cert = data_models.TLSContainer(certificate='cert')
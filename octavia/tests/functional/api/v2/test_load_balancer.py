@@ -1464,6 +1464,27 @@ class TestLoadBalancer(base.BaseAPITest):
             self.assertIn(u'project_id', lb)
             self.assertNotIn(u'description', lb)
 
+    def test_get_all_fields_filter_related_objects(self):
+        self.create_load_balancer(uuidutils.generate_uuid(),
+                                  name='lb1',
+                                  project_id=self.project_id,
+                                  vip_address='10.0.0.1',
+                                  tags=['test_tag'])
+
+        lbs = self.get(self.LBS_PATH, params={
+            'fields': ['id', 'vip_address', 'tags']}).json
+        self.assertEqual(1, len(lbs['loadbalancers']))
+        lb = lbs['loadbalancers'][0]
+        self.assertEqual('10.0.0.1', lb['vip_address'])
+        self.assertEqual(['test_tag'], lb['tags'])
+        self.assertNotIn(u'listeners', lb)
+
+        lbs = self.get(self.LBS_PATH, params={
+            'fields': ['id', 'listeners']}).json
+        lb = lbs['loadbalancers'][0]
+        self.assertEqual([], lb['listeners'])
+        self.assertNotIn(u'vip_address', lb)
+
     def test_get_one_fields_filter(self):
         lb1 = self.create_load_balancer(
             uuidutils.generate_uuid(),
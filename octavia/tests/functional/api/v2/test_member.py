@@ -336,6 +336,31 @@ class TestMember(base.BaseAPITest):
         self.assertCountEqual(['previous', 'next'],
                               [link['rel'] for link in links])
 
+    def test_get_all_limited_keyset_markers(self):
+        self.conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        self.conf.config(group='api_settings',
+                         pagination_keyset_markers=True)
+        for address in ('192.0.2.1', '192.0.2.2', '192.0.2.3'):
+            self.create_member(self.pool_id, address, 80)
+            self.set_lb_status(self.lb_id)
+        all_ids = [member['id'] for member in self.get(
+            self.members_path).json[self.root_tag_list]]
+
+        # Walk the pages with the markers of the 'next' links
+        page_ids = []
+        params = {'limit': 1}
+        while True:
+            page = self.get(self.members_path, params=params).json
+            page_ids.extend(
+                member['id'] for member in page[self.root_tag_list])
+            next_links = [link for link in page[self.root_tag_links]
+                          if link['rel'] == 'next']
+            if not next_links:
+                break
+            params['marker'] = next_links[0]['href'].split('marker=')[1]
+            self.assertNotIn(params['marker'], all_ids)
+        self.assertEqual(all_ids, page_ids)
+
     def test_get_all_fields_filter(self):
         self.create_member(self.pool_id, '192.0.2.1', 80, name='member1')
         self.set_lb_status(self.lb_id)
@@ -747,6 +772,40 @@ class TestMember(base.BaseAPITest):
             err_msg = 'Subnet ' + subnet_id + ' not found.'
             self.assertEqual(response.get('faultstring'), err_msg)
 
+    @mock.patch('octavia.api.drivers.driver_factory.get_driver')
+    @mock.patch('octavia.api.drivers.utils.call_provider')
+    @mock.patch('octavia.common.validate.subnet_exists', return_value=True)
+    def test_create_batch_members_shared_subnet(self, mock_subnet_exists,
+                                                mock_provider,
+                                                mock_get_driver):
+        mock_driver = mock.MagicMock()
+        mock_driver.name = 'noop_driver'
+        mock_get_driver.return_value = mock_driver
+        subnet_id = uuidutils.generate_uuid()
+
+        req_dict = [{'address': '192.0.2.{}'.format(i), 'protocol_port': 80,
+                     'subnet_id': subnet_id} for i in range(1, 6)]
+        body = {self.root_tag_list: req_dict}
+        path = self.MEMBERS_PATH.format(pool_id=self.pool_id)
+        self.put(path, body, status=202)
+
+        mock_subnet_exists.assert_called_once_with(subnet_id,
+                                                   context=mock.ANY)
+        returned_members = self.get(path).json.get(self.root_tag_list)
+        self.assertEqual(5, len(returned_members))
+        provider_members = mock_provider.call_args[0][3]
+        self.assertEqual([m['address'] for m in req_dict],
+                         [m.address for m in provider_members])
+
+    def test_create_batch_members_duplicate(self):
+        member = {'address': '192.0.2.1', 'protocol_port': 80}
+
+        body = {self.root_tag_list: [member, member]}
+        path = self.MEMBERS_PATH.format(pool_id=self.pool_id)
+        self.put(path, body, status=409)
+        returned_members = self.get(path).json.get(self.root_tag_list)
+        self.assertEqual([], returned_members)
+
     def test_create_batch_members_with_invalid_address(self):
         # 169.254.169.254 is the default invalid member address
         member5 = {'address': '169.254.169.254',
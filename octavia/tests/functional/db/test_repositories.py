@@ -21,6 +21,9 @@ from oslo_config import cfg
 from oslo_config import fixture as oslo_fixture
 from oslo_db import exception as db_exception
 from oslo_utils import uuidutils
+from sqlalchemy.dialects import mysql
+from sqlalchemy.dialects import postgresql
+from sqlalchemy import event
 from sqlalchemy.orm import defer
 from sqlalchemy.orm import exc as sa_exception
 
@@ -2797,6 +2800,92 @@ class MemberRepositoryTest(BaseRepositoryTest):
         self.assertEqual(constants.OFFLINE, new_member1.operating_status)
         self.assertEqual(constants.OFFLINE, new_member2.operating_status)
 
+    def test_create_members(self):
+        members = [
+            {'project_id': self.FAKE_UUID_2, 'pool_id': self.pool.id,
+             'ip_address': ip_address, 'protocol_port': 80,
+             'operating_status': constants.NO_MONITOR,
+             'provisioning_status': constants.PENDING_CREATE,
+             'enabled': True, 'backup': False, 'tags': tags}
+            for ip_address, tags in (('192.0.2.1', ['test_tag']),
+                                     ('192.0.2.2', None))]
+        members[1]['id'] = self.FAKE_UUID_3
+        created_members = self.member_repo.create_members(self.session,
+                                                          members)
+        self.assertEqual(2, len(created_members))
+        self.assertEqual('192.0.2.1', created_members[0].ip_address)
+        self.assertTrue(uuidutils.is_uuid_like(created_members[0].id))
+        self.assertEqual(['test_tag'], created_members[0].tags)
+        self.assertIsNotNone(created_members[0].created_at)
+        self.assertEqual(self.FAKE_UUID_3, created_members[1].id)
+        self.assertEqual([], created_members[1].tags)
+        for created_member in created_members:
+            new_member = self.member_repo.get(self.session,
+                                              id=created_member.id)
+            self.assertEqual(created_member.ip_address,
+                             new_member.ip_address)
+            self.assertEqual(constants.PENDING_CREATE,
+                             new_member.provisioning_status)
+            self.assertEqual(created_member.tags, new_member.tags)
+
+    def test_update_members(self):
+        member1 = self.create_member(self.FAKE_UUID_1, self.FAKE_UUID_2,
+                                     self.pool.id, "192.0.2.1")
+        member2 = self.create_member(self.FAKE_UUID_3, self.FAKE_UUID_2,
+                                     self.pool.id, "192.0.2.2")
+        self.member_repo.update(self.session, member2.id, tags=['old_tag'])
+        self.member_repo.update_members(self.session, [
+            {'id': member1.id, 'weight': 5, 'tags': ['new_tag'],
+             'provisioning_status': constants.PENDING_UPDATE},
+            {'id': member2.id, 'name': 'member2',
+             'provisioning_status': constants.PENDING_UPDATE}])
+        self.session.expire_all()
+        new_member1 = self.member_repo.get(self.session, id=member1.id)
+        new_member2 = self.member_repo.get(self.session, id=member2.id)
+        self.assertEqual(5, new_member1.weight)
+        self.assertEqual(['new_tag'], new_member1.tags)
+        self.assertEqual(constants.PENDING_UPDATE,
+                         new_member1.provisioning_status)
+        self.assertEqual('member2', new_member2.name)
+        self.assertEqual(['old_tag'], new_member2.tags)
+        self.assertEqual(constants.PENDING_UPDATE,
+                         new_member2.provisioning_status)
+
+    def test_update_provisioning_status(self):
+        member1 = self.create_member(self.FAKE_UUID_1, self.FAKE_UUID_2,
+                                     self.pool.id, "192.0.2.1")
+        member2 = self.create_member(self.FAKE_UUID_3, self.FAKE_UUID_2,
+                                     self.pool.id, "192.0.2.2")
+        self.member_repo.update_provisioning_status(
+            self.session, [member1.id], constants.PENDING_DELETE)
+        self.session.expire_all()
+        new_member1 = self.member_repo.get(self.session, id=member1.id)
+        new_member2 = self.member_repo.get(self.session, id=member2.id)
+        self.assertEqual(constants.PENDING_DELETE,
+                         new_member1.provisioning_status)
+        self.assertEqual(constants.ACTIVE, new_member2.provisioning_status)
+
+    def test_update_batch(self):
+        member1 = self.create_member(self.FAKE_UUID_1, self.FAKE_UUID_2,
+                                     self.pool.id, "192.0.2.1")
+        member2 = self.create_member(self.FAKE_UUID_3, self.FAKE_UUID_2,
+                                     self.pool.id, "192.0.2.2")
+        member3 = self.create_member(self.FAKE_UUID_4, self.FAKE_UUID_2,
+                                     self.pool.id, "192.0.2.3")
+        updated = self.member_repo.update_batch(
+            self.session, [member1.id, member2.id, self.FAKE_UUID_5],
+            provisioning_status=constants.ERROR,
+            operating_status=constants.OFFLINE)
+        self.assertEqual(2, updated)
+        self.session.expire_all()
+        for member in (member1, member2):
+            new_member = self.member_repo.get(self.session, id=member.id)
+            self.assertEqual(constants.ERROR, new_member.provisioning_status)
+            self.assertEqual(constants.OFFLINE, new_member.operating_status)
+        new_member3 = self.member_repo.get(self.session, id=member3.id)
+        self.assertEqual(constants.ACTIVE, new_member3.provisioning_status)
+        self.assertEqual(constants.ONLINE, new_member3.operating_status)
+
 
 class SessionPersistenceRepositoryTest(BaseRepositoryTest):
 
@@ -3375,6 +3464,346 @@ class ListenerStatisticsRepositoryTest(BaseRepositoryTest):
         self.assertEqual(total_conns, obj.total_connections)
         self.assertEqual(request_errors, obj.request_errors)
 
+    def test_replace_batch(self):
+        self.create_listener_stats(self.listener.id, self.amphora.id)
+        amphora_id = uuidutils.generate_uuid()
+        stats_1 = data_models.ListenerStatistics(
+            listener_id=self.listener.id, amphora_id=self.amphora.id,
+            bytes_in=10, bytes_out=20, active_connections=3,
+            total_connections=40, request_errors=5)
+        stats_2 = data_models.ListenerStatistics(
+            listener_id=self.listener.id, amphora_id=amphora_id,
+            bytes_in=1, bytes_out=2, active_connections=3,
+            total_connections=4, request_errors=5)
+        stats_3 = data_models.ListenerStatistics(
+            listener_id=self.listener.id, amphora_id=amphora_id,
+            bytes_in=6, bytes_out=7, active_connections=8,
+            total_connections=9, request_errors=10)
+
+        self.listener_stats_repo.replace_batch(self.session, [])
+        self.listener_stats_repo.replace_batch(
+            self.session, [stats_1, stats_2, stats_3])
+
+        obj = self.listener_stats_repo.get(
+            self.session, listener_id=self.listener.id,
+            amphora_id=self.amphora.id)
+        self.assertEqual(stats_1.get_stats(), obj.get_stats())
+        # The last stats of a listener and amphora win
+        obj = self.listener_stats_repo.get(
+            self.session, listener_id=self.listener.id,
+            amphora_id=amphora_id)
+        self.assertEqual(stats_3.get_stats(), obj.get_stats())
+
+    def test_increment_batch(self):
+        self.create_listener_stats(self.listener.id, self.amphora.id)
+        amphora_id = uuidutils.generate_uuid()
+        delta_1 = data_models.ListenerStatistics(
+            listener_id=self.listener.id, amphora_id=self.amphora.id,
+            bytes_in=10, bytes_out=20, active_connections=3,
+            total_connections=40, request_errors=5)
+        delta_2 = data_models.ListenerStatistics(
+            listener_id=self.listener.id, amphora_id=amphora_id,
+            bytes_in=1, bytes_out=2, active_connections=3,
+            total_connections=4, request_errors=5)
+        delta_3 = data_models.ListenerStatistics(
+            listener_id=self.listener.id, amphora_id=amphora_id,
+            bytes_in=6, bytes_out=7, active_connections=8,
+            total_connections=9, request_errors=10)
+        # Uses listener_id as amphora_id if not passed
+        delta_4 = data_models.ListenerStatistics(
+            listener_id=self.listener.id, bytes_in=1, bytes_out=1,
+            active_connections=1, total_connections=1, request_errors=1)
+
+        self.listener_stats_repo.increment_batch(self.session, [])
+        self.listener_stats_repo.increment_batch(
+            self.session, [delta_1, delta_2, delta_3, delta_4])
+
+        obj = self.listener_stats_repo.get(
+            self.session, listener_id=self.listener.id,
+            amphora_id=self.amphora.id)
+        self.assertEqual({'bytes_in': 11, 'bytes_out': 21,
+                          'active_connections': 3, 'total_connections': 41,
+                          'request_errors': 6}, obj.get_stats())
+        obj = self.listener_stats_repo.get(
+            self.session, listener_id=self.listener.id,
+            amphora_id=amphora_id)
+        self.assertEqual({'bytes_in': 7, 'bytes_out': 9,
+                          'active_connections': 8, 'total_connections': 13,
+                          'request_errors': 15}, obj.get_stats())
+        obj = self.listener_stats_repo.get(
+            self.session, listener_id=self.listener.id,
+            amphora_id=self.listener.id)
+        self.assertEqual(delta_4.get_stats(), obj.get_stats())
+
+    def _get_upsert_statement(self, dialect, increment):
+        session = mock.MagicMock()
+        session.get_bind.return_value.dialect.name = dialect.name
+        delta_stats = data_models.ListenerStatistics(
+            listener_id=self.listener.id, amphora_id=self.amphora.id,
+            bytes_in=1, bytes_out=2, active_connections=3,
+            total_connections=4, request_errors=5)
+        if increment:
+            self.listener_stats_repo.increment_batch(session, [delta_stats])
+        else:
+            self.listener_stats_repo.replace_batch(session, [delta_stats])
+        session.execute.assert_called_once()
+        return str(session.execute.call_args[0][0].compile(dialect=dialect))
+
+    def test_upsert_batch_mysql(self):
+        dialect = mysql.dialect()
+        stmt = self._get_upsert_statement(dialect, increment=True)
+        self.assertIn('ON DUPLICATE KEY UPDATE', stmt)
+        self.assertIn('bytes_in = (listener_statistics.bytes_in + '
+                      'VALUES(bytes_in))', stmt)
+        self.assertIn('active_connections = VALUES(active_connections)',
+                      stmt)
+        stmt = self._get_upsert_statement(dialect, increment=False)
+        self.assertIn('bytes_in = VALUES(bytes_in)', stmt)
+
+    def test_upsert_batch_sorted(self):
+        session = mock.MagicMock()
+        session.get_bind.return_value.dialect.name = 'mysql'
+        listener_ids = sorted(uuidutils.generate_uuid() for _ in range(3))
+        delta_stats = [
+            data_models.ListenerStatistics(
+                listener_id=listener_id, amphora_id=amphora_id, bytes_in=1)
+            for listener_id in reversed(listener_ids)
+            for amphora_id in ('amp2', 'amp1')]
+        self.listener_stats_repo.increment_batch(session, delta_stats)
+        stmt = session.execute.call_args[0][0]
+        params = stmt.compile(dialect=mysql.dialect()).params
+        # The rows are inserted in the order of the unique key
+        keys = [(params['listener_id_m{}'.format(i)],
+                 params['amphora_id_m{}'.format(i)])
+                for i in range(len(delta_stats))]
+        self.assertEqual(sorted(keys), keys)
+        self.assertEqual(6, len(keys))
+
+    def test_upsert_batch_postgresql(self):
+        dialect = postgresql.dialect()
+        stmt = self._get_upsert_statement(dialect, increment=True)
+        self.assertIn('ON CONFLICT (listener_id, amphora_id) DO UPDATE', stmt)
+        self.assertIn('bytes_in = (listener_statistics.bytes_in + '
+                      'excluded.bytes_in)', stmt)
+        self.assertIn('active_connections = excluded.active_connections',
+                      stmt)
+        stmt = self._get_upsert_statement(dialect, increment=False)
+        self.assertIn('bytes_in = excluded.bytes_in', stmt)
+
+    def _create_lb_listener_stats(self, listener_port, stats_by_amp):
+        listener = self.listener_repo.create(
+            self.session, id=uuidutils.generate_uuid(),
+            project_id=self.FAKE_UUID_2, load_balancer_id=self.lb.id,
+            protocol=constants.PROTOCOL_HTTP, protocol_port=listener_port,
+            provisioning_status=constants.ACTIVE,
+            operating_status=constants.ONLINE, enabled=True)
+        for amphora_id, value in stats_by_amp:
+            self.listener_stats_repo.create(
+                self.session, listener_id=listener.id,
+                amphora_id=amphora_id or listener.id, bytes_in=value,
+                bytes_out=value * 2, active_connections=value,
+                total_connections=value * 3, request_errors=value * 4)
+        return listener
+
+    def test_get_aggregated_stats(self):
+        allocated_amp = self.amphora_repo.create(
+            self.session, id=uuidutils.generate_uuid(),
+            load_balancer_id=self.lb.id, compute_id=self.FAKE_UUID_3,
+            status=constants.AMPHORA_ALLOCATED, vrrp_ip=self.FAKE_IP,
+            lb_network_ip=self.FAKE_IP)
+        deleted_amp_id = uuidutils.generate_uuid()
+        # The active connections of self.amphora (not ALLOCATED) and of
+        # the deleted amphora are not counted
+        listener1 = self._create_lb_listener_stats(
+            80, [(allocated_amp.id, 1), (self.amphora.id, 10),
+                 (deleted_amp_id, 100)])
+        # Statistics from a provider driver
+        listener2 = self._create_lb_listener_stats(81, [(None, 1000)])
+        # No statistics
+        listener3 = self._create_lb_listener_stats(82, [])
+
+        listeners_stats = self.listener_stats_repo.get_listeners_stats(
+            self.session, [listener1.id, listener2.id, listener3.id])
+        self.assertEqual({listener1.id, listener2.id},
+                         set(listeners_stats))
+        self.assertEqual(
+            {'bytes_in': 111, 'bytes_out': 222, 'active_connections': 1,
+             'total_connections': 333, 'request_errors': 444},
+            listeners_stats[listener1.id].get_stats())
+        self.assertEqual(
+            {'bytes_in': 1000, 'bytes_out': 2000, 'active_connections': 1000,
+             'total_connections': 3000, 'request_errors': 4000},
+            listeners_stats[listener2.id].get_stats())
+        self.assertEqual(listener1.id,
+                         listeners_stats[listener1.id].listener_id)
+        self.assertEqual({}, self.listener_stats_repo.get_listeners_stats(
+            self.session, []))
+
+        other_lb_id = uuidutils.generate_uuid()
+        lbs_stats = self.listener_stats_repo.get_loadbalancers_stats(
+            self.session, [self.lb.id, other_lb_id])
+        self.assertEqual({self.lb.id, other_lb_id}, set(lbs_stats))
+        lb_stats = lbs_stats[self.lb.id]
+        self.assertEqual(
+            {'bytes_in': 1111, 'bytes_out': 2222, 'active_connections': 1001,
+             'total_connections': 3333, 'request_errors': 4444},
+            lb_stats.get_stats())
+        self.assertEqual(
+            {listener1.id: listeners_stats[listener1.id].get_stats(),
+             listener2.id: listeners_stats[listener2.id].get_stats(),
+             listener3.id: {'bytes_in': 0, 'bytes_out': 0,
+                            'active_connections': 0, 'total_connections': 0,
+                            'request_errors': 0}},
+            {ls.listener_id: ls.get_stats() for ls in lb_stats.listeners})
+        self.assertEqual({'bytes_in': 0, 'bytes_out': 0,
+                          'active_connections': 0, 'total_connections': 0,
+                          'request_errors': 0},
+                         lbs_stats[other_lb_id].get_stats())
+        self.assertEqual([], lbs_stats[other_lb_id].listeners)
+
+    def test_get_deltas(self):
+        amphora2_id = uuidutils.generate_uuid()
+        self.listener_stats_repo.create(
+            self.session, listener_id=self.listener.id,
+            amphora_id=self.amphora.id, bytes_in=100, bytes_out=200,
+            active_connections=5, total_connections=10, request_errors=4)
+        stats = [
+            data_models.ListenerStatistics(
+                listener_id=self.listener.id, amphora_id=self.amphora.id,
+                bytes_in=150, bytes_out=50, active_connections=3,
+                total_connections=10, request_errors=6),
+            # No statistics stored yet
+            data_models.ListenerStatistics(
+                listener_id=self.listener.id, amphora_id=amphora2_id,
+                bytes_in=7, bytes_out=8, active_connections=1,
+                total_connections=9, request_errors=0),
+            # Reported again in the same batch
+            data_models.ListenerStatistics(
+                listener_id=self.listener.id, amphora_id=self.amphora.id,
+                bytes_in=160, bytes_out=60, active_connections=2,
+                total_connections=11, request_errors=6)]
+
+        deltas = self.listener_stats_repo.get_deltas(self.session, stats)
+
+        self.assertEqual(
+            [(self.listener.id, self.amphora.id),
+             (self.listener.id, amphora2_id),
+             (self.listener.id, self.amphora.id)],
+            [(delta.listener_id, delta.amphora_id) for delta in deltas])
+        # bytes_out was reset
+        self.assertEqual(
+            {'bytes_in': 50, 'bytes_out': 50, 'active_connections': 3,
+             'total_connections': 0, 'request_errors': 2},
+            deltas[0].get_stats())
+        self.assertEqual(stats[1].get_stats(), deltas[1].get_stats())
+        self.assertEqual(
+            {'bytes_in': 10, 'bytes_out': 10, 'active_connections': 2,
+             'total_connections': 1, 'request_errors': 0},
+            deltas[2].get_stats())
+        self.assertEqual([], self.listener_stats_repo.get_deltas(
+            self.session, []))
+
+
+class ListenerStatisticsHistoryRepositoryTest(BaseRepositoryTest):
+
+    def setUp(self):
+        super().setUp()
+        self.history_repo = repo.ListenerStatisticsHistoryRepository()
+        self.listener_id = uuidutils.generate_uuid()
+
+    def _add(self, timestamp, value, active_connections):
+        self.history_repo.add_batch(
+            self.session, [data_models.ListenerStatistics(
+                listener_id=self.listener_id, bytes_in=value,
+                bytes_out=value * 2, active_connections=active_connections,
+                total_connections=value * 3, request_errors=value * 4)],
+            timestamp)
+
+    def test_get_interval_start(self):
+        timestamp = datetime.datetime(2020, 1, 2, 3, 4, 5, 6)
+        self.assertEqual(
+            datetime.datetime(2020, 1, 2, 3, 4),
+            self.history_repo.get_interval_start(timestamp, 60))
+        self.assertEqual(
+            datetime.datetime(2020, 1, 2, 3),
+            self.history_repo.get_interval_start(timestamp, 3600))
+        self.assertEqual(
+            datetime.datetime(2020, 1, 2),
+            self.history_repo.get_interval_start(timestamp, 86400))
+
+    def test_add_batch(self):
+        self._add(datetime.datetime(2020, 1, 2, 3, 4, 5), 1, 10)
+        self._add(datetime.datetime(2020, 1, 2, 3, 4, 55), 2, 5)
+        self._add(datetime.datetime(2020, 1, 2, 3, 5, 5), 4, 20)
+        self.history_repo.add_batch(self.session, [],
+                                    datetime.datetime(2020, 1, 2, 3, 5, 5))
+
+        start = datetime.datetime(2020, 1, 1)
+        end = datetime.datetime(2020, 1, 3)
+        minutes = self.history_repo.get_history(
+            self.session, self.listener_id, 60, start, end)
+        self.assertEqual(
+            [datetime.datetime(2020, 1, 2, 3, 4),
+             datetime.datetime(2020, 1, 2, 3, 5)],
+            [minute.timestamp for minute in minutes])
+        self.assertIsInstance(minutes[0],
+                              data_models.ListenerStatisticsHistory)
+        self.assertEqual(60, minutes[0].resolution)
+        self.assertEqual(
+            {'bytes_in': 3, 'bytes_out': 6, 'active_connections': 10,
+             'total_connections': 9, 'request_errors': 12},
+            minutes[0].get_stats())
+        self.assertEqual(
+            {'bytes_in': 4, 'bytes_out': 8, 'active_connections': 20,
+             'total_connections': 12, 'request_errors': 16},
+            minutes[1].get_stats())
+        self.assertEqual(0.05, minutes[0].bytes_in_rate)
+
+        for resolution, timestamp in (
+                (3600, datetime.datetime(2020, 1, 2, 3)),
+                (86400, datetime.datetime(2020, 1, 2))):
+            history = self.history_repo.get_history(
+                self.session, self.listener_id, resolution, start, end)
+            self.assertEqual(1, len(history))
+            self.assertEqual(timestamp, history[0].timestamp)
+            self.assertEqual(
+                {'bytes_in': 7, 'bytes_out': 14, 'active_connections': 20,
+                 'total_connections': 21, 'request_errors': 28},
+                history[0].get_stats())
+
+    def test_get_history_window(self):
+        for minute in range(5):
+            self._add(datetime.datetime(2020, 1, 2, 3, minute), 1, 1)
+        history = self.history_repo.get_history(
+            self.session, self.listener_id, 60,
+            datetime.datetime(2020, 1, 2, 3, 1),
+            datetime.datetime(2020, 1, 2, 3, 3))
+        self.assertEqual(
+            [datetime.datetime(2020, 1, 2, 3, minute)
+             for minute in range(1, 4)],
+            [interval.timestamp for interval in history])
+        self.assertEqual([], self.history_repo.get_history(
+            self.session, uuidutils.generate_uuid(), 60,
+            datetime.datetime(2020, 1, 1), datetime.datetime(2020, 1, 3)))
+
+    def test_delete_expired(self):
+        self._add(datetime.datetime(2020, 1, 1, 23, 59), 1, 1)
+        self._add(datetime.datetime(2020, 1, 2, 0, 1), 1, 1)
+
+        self.assertEqual(1, self.history_repo.delete_expired(
+            self.session, 60, datetime.datetime(2020, 1, 2)))
+        self.assertEqual(0, self.history_repo.delete_expired(
+            self.session, 60, datetime.datetime(2020, 1, 2)))
+        self.assertEqual(
+            [datetime.datetime(2020, 1, 2, 0, 1)],
+            [interval.timestamp for interval in self.history_repo.get_history(
+                self.session, self.listener_id, 60,
+                datetime.datetime(2020, 1, 1), datetime.datetime(2020, 1, 3))])
+        # The other resolutions are untouched
+        self.assertEqual(2, len(self.history_repo.get_history(
+            self.session, self.listener_id, 86400,
+            datetime.datetime(2020, 1, 1), datetime.datetime(2020, 1, 3))))
+
 
 class HealthMonitorRepositoryTest(BaseRepositoryTest):
 
@@ -3465,6 +3894,116 @@ class LoadBalancerRepositoryTest(BaseRepositoryTest):
         self.assertIsInstance(new_lb, data_models.LoadBalancer)
         self.assertEqual(lb, new_lb)
 
+    def _create_lb_graph(self, listener_count, member_count):
+        lb = self.create_loadbalancer(uuidutils.generate_uuid())
+        self.vip_repo.create(self.session, load_balancer_id=lb.id,
+                             ip_address=self.FAKE_IP)
+        self.amphora_repo.create(self.session, id=uuidutils.generate_uuid(),
+                                 load_balancer_id=lb.id,
+                                 compute_id=self.FAKE_UUID_3,
+                                 status=constants.AMPHORA_ALLOCATED)
+        for port in range(listener_count):
+            pool = self.pool_repo.create(
+                self.session, id=uuidutils.generate_uuid(),
+                project_id=self.FAKE_UUID_2, load_balancer_id=lb.id,
+                protocol=constants.PROTOCOL_HTTP,
+                lb_algorithm=constants.LB_ALGORITHM_ROUND_ROBIN,
+                provisioning_status=constants.ACTIVE,
+                operating_status=constants.ONLINE, enabled=True)
+            self.hm_repo.create(
+                self.session, id=uuidutils.generate_uuid(), pool_id=pool.id,
+                type=constants.HEALTH_MONITOR_HTTP, delay=1, timeout=1,
+                fall_threshold=1, rise_threshold=1,
+                provisioning_status=constants.ACTIVE,
+                operating_status=constants.ONLINE, enabled=True)
+            for member_port in range(member_count):
+                self.member_repo.create(
+                    self.session, id=uuidutils.generate_uuid(),
+                    project_id=self.FAKE_UUID_2, pool_id=pool.id,
+                    ip_address=self.FAKE_IP, protocol_port=member_port + 1,
+                    provisioning_status=constants.ACTIVE,
+                    operating_status=constants.ONLINE, enabled=True,
+                    backup=False)
+            listener = self.listener_repo.create(
+                self.session, id=uuidutils.generate_uuid(),
+                project_id=self.FAKE_UUID_2, load_balancer_id=lb.id,
+                default_pool_id=pool.id, protocol=constants.PROTOCOL_HTTP,
+                protocol_port=port + 1,
+                provisioning_status=constants.ACTIVE,
+                operating_status=constants.ONLINE, enabled=True)
+            l7policy = self.l7policy_repo.create(
+                self.session, id=uuidutils.generate_uuid(),
+                listener_id=listener.id, redirect_pool_id=pool.id,
+                action=constants.L7POLICY_ACTION_REDIRECT_TO_POOL,
+                provisioning_status=constants.ACTIVE,
+                operating_status=constants.ONLINE, enabled=True)
+            self.l7rule_repo.create(
+                self.session, id=uuidutils.generate_uuid(),
+                l7policy_id=l7policy.id, type=constants.L7RULE_TYPE_PATH,
+                compare_type=constants.L7RULE_COMPARE_TYPE_STARTS_WITH,
+                value='/api', provisioning_status=constants.ACTIVE,
+                operating_status=constants.ONLINE, enabled=True)
+        self.session.expunge_all()
+        return lb
+
+    def _count_get_queries(self, lb_id, **kwargs):
+        statements = []
+
+        def count_statement(*args):
+            statements.append(args[2])
+
+        engine = self.session.get_bind()
+        event.listen(engine, 'before_cursor_execute', count_statement)
+        try:
+            lb = self.lb_repo.get(self.session, id=lb_id, **kwargs)
+        finally:
+            event.remove(engine, 'before_cursor_execute', count_statement)
+            self.session.expunge_all()
+        return lb, len(statements)
+
+    def test_get_graph(self):
+        lb = self._create_lb_graph(listener_count=2, member_count=3)
+        lazy_lb, lazy_count = self._count_get_queries(lb.id,
+                                                      query_options=())
+        eager_lb, eager_count = self._count_get_queries(lb.id)
+        self.assertEqual(lazy_lb, eager_lb)
+        self.assertEqual(2, len(eager_lb.listeners))
+        self.assertEqual(3, len(eager_lb.pools[0].members))
+        self.assertIsNotNone(eager_lb.pools[0].health_monitor)
+        self.assertEqual(1, len(eager_lb.listeners[0].l7policies[0].l7rules))
+        self.assertIs(eager_lb, eager_lb.listeners[0].load_balancer)
+        self.assertLess(eager_count, lazy_count)
+
+    def test_get_graph_fixed_query_count(self):
+        small_lb = self._create_lb_graph(listener_count=1, member_count=1)
+        large_lb = self._create_lb_graph(listener_count=5, member_count=10)
+        _, small_count = self._count_get_queries(small_lb.id)
+        _, large_count = self._count_get_queries(large_lb.id)
+        self.assertEqual(small_count, large_count)
+
+    def test_get_all_API_list_fields(self):
+        lb = self.create_loadbalancer(self.FAKE_UUID_1)
+        self.vip_repo.create(self.session, load_balancer_id=lb.id,
+                             ip_address=self.FAKE_IP)
+        self.session.expunge_all()
+
+        lb_list, _ = self.lb_repo.get_all_API_list(self.session,
+                                                   fields=['id'])
+        self.assertEqual(1, len(lb_list))
+        self.assertIsNone(lb_list[0].vip)
+        self.assertEqual([], lb_list[0].tags)
+        self.session.expunge_all()
+
+        lb_list, _ = self.lb_repo.get_all_API_list(
+            self.session, fields=['id', 'vip_address', 'tags'])
+        self.assertEqual(self.FAKE_IP, lb_list[0].vip.ip_address)
+        self.assertEqual(['test_tag'], lb_list[0].tags)
+        self.session.expunge_all()
+
+        lb_list, _ = self.lb_repo.get_all_API_list(self.session)
+        self.assertEqual(self.FAKE_IP, lb_list[0].vip.ip_address)
+        self.assertEqual(['test_tag'], lb_list[0].tags)
+
     def test_get_all(self):
         lb_one = self.create_loadbalancer(self.FAKE_UUID_1)
         lb_two = self.create_loadbalancer(self.FAKE_UUID_3)
@@ -3725,6 +4264,95 @@ class LoadBalancerRepositoryTest(BaseRepositoryTest):
         lb = self.lb_repo.get(self.session, id=lb_id)
         self.assertEqual(constants.PENDING_UPDATE, lb.provisioning_status)
 
+    def test_set_children_provisioning_status(self):
+        lb = self.create_loadbalancer(
+            self.FAKE_UUID_1, provisioning_status=constants.PENDING_UPDATE)
+        other_lb = self.create_loadbalancer(self.FAKE_UUID_3)
+        pools = {}
+        for name, lb_id in (('default', lb.id), ('redirect', lb.id),
+                            ('unused', lb.id), ('other', other_lb.id)):
+            pools[name] = self.pool_repo.create(
+                self.session, id=uuidutils.generate_uuid(),
+                project_id=self.FAKE_UUID_2, load_balancer_id=lb_id,
+                protocol=constants.PROTOCOL_HTTP,
+                lb_algorithm=constants.LB_ALGORITHM_ROUND_ROBIN,
+                provisioning_status=constants.PENDING_CREATE,
+                operating_status=constants.ONLINE, enabled=True)
+            self.hm_repo.create(
+                self.session, pool_id=pools[name].id,
+                type=constants.HEALTH_MONITOR_HTTP, delay=1, timeout=1,
+                fall_threshold=1, rise_threshold=1, enabled=True,
+                provisioning_status=constants.PENDING_CREATE,
+                operating_status=constants.ONLINE)
+            for port in (80, 81):
+                self.member_repo.create(
+                    self.session, id=uuidutils.generate_uuid(),
+                    project_id=self.FAKE_UUID_2, pool_id=pools[name].id,
+                    ip_address="192.0.2.1", protocol_port=port, enabled=True,
+                    provisioning_status=constants.PENDING_CREATE,
+                    operating_status=constants.ONLINE, backup=False)
+        listeners = []
+        for port, lb_id, pool_id in ((80, lb.id, pools['default'].id),
+                                     (81, lb.id, None),
+                                     (82, other_lb.id, pools['other'].id)):
+            listeners.append(self.listener_repo.create(
+                self.session, id=uuidutils.generate_uuid(),
+                project_id=self.FAKE_UUID_2, load_balancer_id=lb_id,
+                default_pool_id=pool_id, protocol=constants.PROTOCOL_HTTP,
+                protocol_port=port, connection_limit=1,
+                provisioning_status=constants.PENDING_CREATE,
+                operating_status=constants.ONLINE, enabled=True))
+        l7policy = self.l7policy_repo.create(
+            self.session, id=uuidutils.generate_uuid(),
+            listener_id=listeners[1].id, position=1,
+            action=constants.L7POLICY_ACTION_REDIRECT_TO_POOL,
+            redirect_pool_id=pools['redirect'].id,
+            provisioning_status=constants.PENDING_CREATE,
+            operating_status=constants.ONLINE, enabled=True)
+        l7rule = self.l7rule_repo.create(
+            self.session, id=uuidutils.generate_uuid(),
+            l7policy_id=l7policy.id, type=constants.L7RULE_TYPE_PATH,
+            compare_type=constants.L7RULE_COMPARE_TYPE_STARTS_WITH,
+            value="/api", provisioning_status=constants.PENDING_CREATE,
+            operating_status=constants.ONLINE, enabled=True)
+
+        self.lb_repo.set_children_provisioning_status(
+            self.session, lb.id, constants.ACTIVE)
+
+        # The load balancer itself is not updated
+        self.assertEqual(
+            constants.PENDING_UPDATE,
+            self.lb_repo.get(self.session, id=lb.id).provisioning_status)
+        for listener, status in zip(listeners, (constants.ACTIVE,
+                                                constants.ACTIVE,
+                                                constants.PENDING_CREATE)):
+            self.assertEqual(status, self.listener_repo.get(
+                self.session, id=listener.id).provisioning_status)
+        self.assertEqual(constants.ACTIVE, self.l7policy_repo.get(
+            self.session, id=l7policy.id).provisioning_status)
+        self.assertEqual(constants.ACTIVE, self.l7rule_repo.get(
+            self.session, id=l7rule.id).provisioning_status)
+        # Pools that are not used by a listener of the load balancer are
+        # not updated
+        for name, status in (('default', constants.ACTIVE),
+                             ('redirect', constants.ACTIVE),
+                             ('unused', constants.PENDING_CREATE),
+                             ('other', constants.PENDING_CREATE)):
+            pool = self.pool_repo.get(self.session, id=pools[name].id)
+            self.assertEqual(status, pool.provisioning_status)
+            self.assertEqual(status,
+                             pool.health_monitor.provisioning_status)
+            for member in pool.members:
+                self.assertEqual(status, member.provisioning_status)
+
+    def test_set_children_provisioning_status_no_children(self):
+        lb = self.create_loadbalancer(self.FAKE_UUID_1)
+        self.lb_repo.set_children_provisioning_status(
+            self.session, lb.id, constants.ERROR)
+        self.assertEqual(
+            constants.ACTIVE,
+            self.lb_repo.get(self.session, id=lb.id).provisioning_status)
+
     def test_get_all_deleted_expiring_load_balancer(self):
         exp_age = datetime.timedelta(seconds=self.FAKE_EXP_AGE)
         updated_at = datetime.datetime.utcnow() - exp_age
@@ -4112,6 +4740,80 @@ class AmphoraRepositoryTest(BaseRepositoryTest):
                                                         self.FAKE_UUID_1)
         self.assertEqual(lb_ref, lb)
 
+    def test_get_lbs_for_health_update(self):
+        amphora1 = self.create_amphora(self.FAKE_UUID_1)
+        amphora2 = self.create_amphora(self.FAKE_UUID_3)
+        amphora3 = self.create_amphora(self.FAKE_UUID_4)
+        self.amphora_repo.associate(self.session, self.lb.id, amphora1.id)
+        self.amphora_repo.associate(self.session, self.lb.id, amphora2.id)
+        lb2 = self.lb_repo.create(
+            self.session, id=self.FAKE_UUID_5, project_id=self.FAKE_UUID_2,
+            name="lb_name2", description="lb_description2",
+            provisioning_status=constants.PENDING_UPDATE,
+            operating_status=constants.OFFLINE, enabled=False)
+        self.amphora_repo.associate(self.session, lb2.id, amphora3.id)
+
+        self.assertEqual(
+            {}, self.amphora_repo.get_lbs_for_health_update(self.session, []))
+
+        pool = self.pool_repo.create(
+            self.session, id=self.FAKE_UUID_6, project_id=self.FAKE_UUID_2,
+            name="pool_test", description="pool_description",
+            protocol=constants.PROTOCOL_HTTP, load_balancer_id=self.lb.id,
+            lb_algorithm=constants.LB_ALGORITHM_ROUND_ROBIN,
+            provisioning_status=constants.ACTIVE,
+            operating_status=constants.ONLINE, enabled=True)
+        listener = self.listener_repo.create(
+            self.session, id=self.FAKE_UUID_7, project_id=self.FAKE_UUID_2,
+            name="listener_name", description="listener_description",
+            protocol=constants.PROTOCOL_HTTP, protocol_port=80,
+            connection_limit=1, operating_status=constants.ONLINE,
+            load_balancer_id=self.lb.id, provisioning_status=constants.ACTIVE,
+            enabled=True, peer_port=1025, default_pool_id=pool.id)
+        member1 = self.member_repo.create(
+            self.session, id=uuidutils.generate_uuid(),
+            project_id=self.FAKE_UUID_2, pool_id=pool.id,
+            ip_address="192.0.2.1", protocol_port=80, enabled=True,
+            provisioning_status=constants.ACTIVE,
+            operating_status=constants.ONLINE, backup=False)
+        member2 = self.member_repo.create(
+            self.session, id=uuidutils.generate_uuid(),
+            project_id=self.FAKE_UUID_2, pool_id=pool.id,
+            ip_address="192.0.2.21", protocol_port=80, enabled=True,
+            provisioning_status=constants.ACTIVE,
+            operating_status=constants.OFFLINE, backup=False)
+
+        lb_ref = {'enabled': True, 'id': self.lb.id,
+                  'operating_status': constants.ONLINE,
+                  'provisioning_status': constants.ACTIVE,
+                  'listeners': {
+                      listener.id: {'operating_status': constants.ONLINE,
+                                    'protocol': constants.PROTOCOL_HTTP,
+                                    'enabled': 1}},
+                  'pools': {
+                      pool.id: {
+                          'operating_status': constants.ONLINE,
+                          'members': {
+                              member1.id: {
+                                  'operating_status': constants.ONLINE},
+                              member2.id: {
+                                  'operating_status': constants.OFFLINE}}}}}
+        lb2_ref = {'enabled': False, 'id': lb2.id,
+                   'operating_status': constants.OFFLINE,
+                   'provisioning_status': constants.PENDING_UPDATE}
+
+        lbs = self.amphora_repo.get_lbs_for_health_update(
+            self.session, [amphora1.id, amphora2.id, amphora3.id,
+                           uuidutils.generate_uuid()])
+        self.assertEqual({amphora1.id: lb_ref, amphora2.id: lb_ref,
+                          amphora3.id: lb2_ref}, lbs)
+
+        # The bulk version must return the same details as the single one
+        for amphora_id, lb in lbs.items():
+            self.assertEqual(
+                self.amphora_repo.get_lb_for_health_update(self.session,
+                                                           amphora_id), lb)
+
     def test_and_set_status_for_delete(self):
         # Normal path
         amphora = self.create_amphora(self.FAKE_UUID_1,
@@ -4174,6 +4876,23 @@ class AmphoraHealthRepositoryTest(BaseRepositoryTest):
         self.assertEqual(amphora_id, obj.amphora_id)
         self.assertEqual(now, obj.last_update)
 
+    def test_replace_batch(self):
+        amphora_health = self.create_amphora_health(self.amphora.id)
+        amphora_id = uuidutils.generate_uuid()
+        now = datetime.datetime.utcnow()
+
+        self.amphora_health_repo.replace_batch(self.session, [])
+        self.amphora_health_repo.replace_batch(
+            self.session, [amphora_health.amphora_id, amphora_id],
+            last_update=now)
+
+        for amp_id in (amphora_health.amphora_id, amphora_id):
+            obj = self.amphora_health_repo.get(self.session,
+                                               amphora_id=amp_id)
+            self.assertIsNotNone(obj)
+            self.assertEqual(now, obj.last_update)
+            self.assertFalse(obj.busy)
+
     def test_get(self):
         amphora_health = self.create_amphora_health(self.amphora.id)
         new_amphora_health = self.amphora_health_repo.get(
@@ -31,6 +31,8 @@ class HAProxyCompatTestCase(base.TestCase):
             "    log /run/rsyslog/octavia/log local1 notice\n"
             "    stats socket /var/lib/octavia/sample_loadbalancer_id_1.sock"
             " mode 0666 level user\n"
+            "    stats socket /var/lib/octavia/sample_loadbalancer_id_1-admin"
+            ".sock mode 0600 level admin\n"
             "    server-state-file /var/lib/octavia/sample_loadbalancer_id_1"
             "/servers-state\n"
             "    maxconn {maxconn}\n\n"
@@ -11,12 +11,15 @@
 #    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
+import io
 import subprocess
 from unittest import mock
 
 from oslo_config import cfg
 from oslo_config import fixture as oslo_fixture
+from oslo_utils.secretutils import md5
 from oslo_utils import uuidutils
+import webob
 
 from octavia.amphorae.backends.agent.api_server import loadbalancer
 from octavia.amphorae.backends.agent.api_server import util as agent_util
@@ -56,6 +59,214 @@ class ListenerTestCase(base.TestCase):
             consts.OFFLINE,
             self.test_loadbalancer._check_haproxy_status(LISTENER_ID1))
 
+    @mock.patch('octavia.amphorae.backends.agent.api_server.util.'
+                'is_config_applied')
+    @mock.patch('octavia.amphorae.backends.agent.api_server.util.'
+                'set_config_applied')
+    @mock.patch('octavia.amphorae.backends.utils.haproxy_query.HAProxyQuery')
+    @mock.patch('octavia.amphorae.backends.agent.api_server.util.'
+                'get_server_runtime_changes')
+    @mock.patch('octavia.amphorae.backends.agent.api_server.loadbalancer.'
+                'Loadbalancer._check_haproxy_status')
+    @mock.patch('octavia.amphorae.backends.agent.api_server.loadbalancer.'
+                'Loadbalancer.upload_haproxy_config')
+    @mock.patch('os.path.exists')
+    def test_apply_haproxy_config(self, mock_path_exists, mock_upload,
+                                  mock_check_status, mock_get_changes,
+                                  mock_haproxy_query, mock_set_applied,
+                                  mock_is_applied):
+        amphora_id = uuidutils.generate_uuid()
+        upload_response = webob.Response(json={'message': 'OK'}, status=202)
+        upload_response.headers['ETag'] = 'fake_md5'
+        mock_upload.return_value = upload_response
+        mock_path_exists.return_value = True
+        mock_check_status.return_value = consts.ACTIVE
+        changes = [('pool:listener', 'member1', 'weight', '5'),
+                   ('pool:listener', 'member2', 'state', 'maint')]
+        mock_get_changes.return_value = changes
+        mock_query = mock_haproxy_query.return_value
+        mock_is_applied.return_value = True
+
+        # Happy path - applied through the runtime API
+        with mock.patch('builtins.open',
+                        mock.mock_open(read_data='config')):
+            result = self.test_loadbalancer.apply_haproxy_config(
+                amphora_id, LB_ID1)
+
+        mock_upload.assert_called_once_with(amphora_id, LB_ID1)
+        mock_is_applied.assert_called_once_with(
+            agent_util.config_path(LB_ID1), b'config')
+        mock_get_changes.assert_called_once_with('config', 'config')
+        mock_haproxy_query.assert_called_once_with(
+            agent_util.haproxy_admin_sock_path(LB_ID1))
+        mock_query.set_server.assert_has_calls(
+            [mock.call(*change) for change in changes])
+        self.assertEqual(202, result.status_code)
+        self.assertEqual({'message': 'OK', 'reload_required': False},
+                         result.json)
+        self.assertEqual('fake_md5', result.headers['ETag'])
+        mock_set_applied.assert_called_once_with(
+            agent_util.config_path(LB_ID1),
+            md5(b'config', usedforsecurity=False).hexdigest())
+
+        # Runtime API failure
+        mock_set_applied.reset_mock()
+        mock_query.set_server.side_effect = Exception('boom')
+        with mock.patch('builtins.open',
+                        mock.mock_open(read_data='config')):
+            result = self.test_loadbalancer.apply_haproxy_config(
+                amphora_id, LB_ID1)
+        self.assertTrue(result.json['reload_required'])
+        mock_set_applied.assert_not_called()
+
+        # Changes the runtime API cannot apply
+        mock_query.reset_mock()
+        mock_get_changes.return_value = None
+        with mock.patch('builtins.open',
+                        mock.mock_open(read_data='config')):
+            result = self.test_loadbalancer.apply_haproxy_config(
+                amphora_id, LB_ID1)
+        mock_query.set_server.assert_not_called()
+        self.assertTrue(result.json['reload_required'])
+
+        # Unchanged configuration, the certificates may have changed
+        mock_set_applied.reset_mock()
+        mock_get_changes.return_value = []
+        with mock.patch('builtins.open',
+                        mock.mock_open(read_data='config')):
+            result = self.test_loadbalancer.apply_haproxy_config(
+                amphora_id, LB_ID1)
+        mock_query.set_server.assert_not_called()
+        self.assertTrue(result.json['reload_required'])
+        mock_set_applied.assert_not_called()
+
+        # HAProxy is not running the stored configuration
+        mock_get_changes.reset_mock()
+        mock_get_changes.return_value = changes
+        mock_is_applied.return_value = False
+        with mock.patch('builtins.open',
+                        mock.mock_open(read_data='config')):
+            result = self.test_loadbalancer.apply_haproxy_config(
+                amphora_id, LB_ID1)
+        mock_get_changes.assert_not_called()
+        mock_query.set_server.assert_not_called()
+        self.assertTrue(result.json['reload_required'])
+        mock_set_applied.assert_not_called()
+        mock_is_applied.return_value = True
+
+        # HAProxy is not running
+        mock_get_changes.reset_mock()
+        mock_check_status.return_value = consts.OFFLINE
+        with mock.patch('builtins.open',
+                        mock.mock_open(read_data='config')):
+            result = self.test_loadbalancer.apply_haproxy_config(
+                amphora_id, LB_ID1)
+        mock_get_changes.assert_not_called()
+        self.assertTrue(result.json['reload_required'])
+
+        # No previous configuration
+        mock_check_status.return_value = consts.ACTIVE
+        mock_path_exists.return_value = False
+        result = self.test_loadbalancer.apply_haproxy_config(
+            amphora_id, LB_ID1)
+        mock_get_changes.assert_not_called()
+        self.assertTrue(result.json['reload_required'])
+
+        # Invalid configuration
+        mock_path_exists.return_value = True
+        mock_upload.return_value = webob.Response(
+            json={'message': 'Invalid request'}, status=400)
+        with mock.patch('builtins.open',
+                        mock.mock_open(read_data='config')):
+            result = self.test_loadbalancer.apply_haproxy_config(
+                amphora_id, LB_ID1)
+        self.assertEqual(400, result.status_code)
+        mock_get_changes.assert_not_called()
+
+        # The configuration is already in use
+        unchanged_response = webob.Response(
+            json={'message': 'OK', 'reload_required': False}, status=202)
+        unchanged_response.headers['ETag'] = 'fake_md5'
+        mock_upload.return_value = unchanged_response
+        with mock.patch('builtins.open',
+                        mock.mock_open(read_data='config')):
+            result = self.test_loadbalancer.apply_haproxy_config(
+                amphora_id, LB_ID1)
+        self.assertIs(unchanged_response, result)
+        mock_get_changes.assert_not_called()
+
+    @mock.patch('octavia.amphorae.backends.agent.api_server.util.'
+                'is_config_applied')
+    @mock.patch('octavia.amphorae.backends.agent.api_server.'
+                'haproxy_compatibility.process_cfg_for_version_compat')
+    @mock.patch('octavia.amphorae.backends.agent.api_server.loadbalancer.'
+                'Loadbalancer._check_haproxy_status')
+    @mock.patch('os.path.exists', return_value=True)
+    @mock.patch('os.fdopen')
+    @mock.patch('subprocess.check_output')
+    def test_upload_haproxy_config_unchanged(
+            self, mock_check_output, mock_fdopen, mock_path_exists,
+            mock_check_status, mock_compat, mock_is_applied):
+        amphora_id = uuidutils.generate_uuid()
+        config = b'global\n    daemon\n'
+        mock_compat.side_effect = lambda cfg: cfg
+        mock_is_applied.return_value = True
+        mock_check_status.return_value = consts.ACTIVE
+
+        with mock.patch.object(loadbalancer, 'flask') as mock_flask:
+            mock_flask.request.stream = io.BytesIO(config)
+            result = self.test_loadbalancer.upload_haproxy_config(
+                amphora_id, LB_ID1)
+
+        mock_is_applied.assert_called_once_with(
+            agent_util.config_path(LB_ID1), config)
+        mock_check_status.assert_called_once_with(LB_ID1)
+        mock_fdopen.assert_not_called()
+        mock_check_output.assert_not_called()
+        self.assertEqual(202, result.status_code)
+        self.assertEqual({'message': 'OK', 'reload_required': False},
+                         result.json)
+        self.assertEqual(md5(config, usedforsecurity=False).hexdigest(),
+                         result.headers['ETag'])
+
+    @mock.patch('octavia.amphorae.backends.agent.api_server.util.'
+                'send_vip_advertisements')
+    @mock.patch('octavia.amphorae.backends.agent.api_server.util.'
+                'clear_config_applied')
+    @mock.patch('octavia.amphorae.backends.agent.api_server.util.'
+                'set_config_applied')
+    @mock.patch('octavia.amphorae.backends.agent.api_server.util.'
+                'get_config_md5')
+    @mock.patch('octavia.amphorae.backends.agent.api_server.loadbalancer.'
+                'Loadbalancer._check_haproxy_status')
+    @mock.patch('octavia.amphorae.backends.agent.api_server.loadbalancer.'
+                'Loadbalancer._check_lb_exists')
+    @mock.patch('subprocess.check_output')
+    @mock.patch('octavia.amphorae.backends.utils.haproxy_query.HAProxyQuery')
+    def test_start_stop_lb_applied_config(
+            self, mock_haproxy_query, mock_check_output, mock_lb_exists,
+            mock_check_status, mock_get_md5, mock_set_applied,
+            mock_clear_applied, mock_send_advertisements):
+        mock_check_status.return_value = consts.ACTIVE
+        mock_get_md5.return_value = 'fake_md5'
+        config_file = agent_util.config_path(LB_ID1)
+
+        self.test_loadbalancer.start_stop_lb(LB_ID1, consts.AMP_ACTION_RELOAD)
+        mock_set_applied.assert_called_once_with(config_file, 'fake_md5')
+        mock_clear_applied.assert_not_called()
+
+        # Failed reload
+        mock_set_applied.reset_mock()
+        mock_check_output.side_effect = subprocess.CalledProcessError(
+            output=b'bogus', returncode=-2, cmd='sit')
+        self.test_loadbalancer.start_stop_lb(LB_ID1, consts.AMP_ACTION_RELOAD)
+        mock_set_applied.assert_not_called()
+
+        mock_check_output.side_effect = None
+        self.test_loadbalancer.start_stop_lb(LB_ID1, consts.AMP_ACTION_STOP)
+        mock_set_applied.assert_not_called()
+        mock_clear_applied.assert_called_once_with(config_file)
+
     @mock.patch('octavia.amphorae.backends.agent.api_server.loadbalancer.'
                 'Loadbalancer._check_haproxy_status')
     @mock.patch('octavia.amphorae.backends.agent.api_server.util.'
@@ -15,6 +15,7 @@ import os
 import subprocess
 from unittest import mock
 
+import fixtures
 from oslo_config import cfg
 from oslo_config import fixture as oslo_fixture
 from oslo_utils import uuidutils
@@ -406,3 +407,80 @@ class TestUtil(base.TestCase):
         util.send_vip_advertisements(LB_ID1)
         mock_get_int_name.assert_not_called()
         mock_send_advert.assert_not_called()
+
+    def test_get_server_runtime_changes(self):
+        old_config = (
+            "global\n"
+            "    daemon\n\n"
+            "backend pool1:listener1\n"
+            "    mode http\n"
+            "    server member1 192.0.2.10:80 weight 13 check inter 30s\n"
+            "    server member2 192.0.2.11:80 weight 13 disabled check "
+            "inter 30s\n")
+
+        # No change
+        self.assertEqual(
+            [], util.get_server_runtime_changes(old_config, old_config))
+
+        # Weight and admin state changes
+        new_config = old_config.replace(
+            'member1 192.0.2.10:80 weight 13 check',
+            'member1 192.0.2.10:80 weight 5 disabled check').replace(
+            'weight 13 disabled', 'weight 13')
+        self.assertEqual(
+            [('pool1:listener1', 'member1', 'weight', '5'),
+             ('pool1:listener1', 'member1', 'state', 'maint'),
+             ('pool1:listener1', 'member2', 'state', 'ready')],
+            util.get_server_runtime_changes(old_config, new_config))
+
+        # Changes the runtime API cannot apply
+        for new_config in (
+                old_config.replace('192.0.2.10', '192.0.2.20'),
+                old_config.replace('inter 30s', 'inter 10s'),
+                old_config.replace('mode http', 'mode tcp'),
+                old_config + "    server member3 192.0.2.12:80 weight 1\n",
+                old_config.replace(
+                    "    server member2 192.0.2.11:80 weight 13 disabled "
+                    "check inter 30s\n", "")):
+            self.assertIsNone(
+                util.get_server_runtime_changes(old_config, new_config))
+
+        # A server line outside of a backend
+        self.assertIsNone(util.get_server_runtime_changes(
+            "frontend listener1\n    server member1 192.0.2.10:80 weight 1\n",
+            "frontend listener1\n    server member1 192.0.2.10:80 weight 2\n"))
+
+    def test_config_applied(self):
+        config_dir = self.useFixture(fixtures.TempDir()).path
+        config_file = os.path.join(config_dir, 'haproxy.cfg')
+        config = b'global\n    daemon\n'
+        with open(config_file, 'wb') as f:
+            f.write(config)
+
+        # Never started
+        self.assertFalse(util.is_config_applied(config_file, config))
+        config_md5 = util.get_config_md5(config_file)
+        self.assertIsNone(util.get_config_md5(config_file + '.missing'))
+
+        util.set_config_applied(config_file, config_md5)
+        self.assertTrue(util.is_config_applied(config_file, config))
+        self.assertFalse(util.is_config_applied(config_file, b'global\n'))
+
+        # Uploaded but not loaded yet
+        with open(config_file, 'wb') as f:
+            f.write(b'global\n')
+        self.assertFalse(util.is_config_applied(config_file, b'global\n'))
+        self.assertFalse(util.is_config_applied(config_file, config))
+
+        with open(config_file, 'wb') as f:
+            f.write(config)
+        self.assertTrue(util.is_config_applied(config_file, config))
+        util.clear_config_applied(config_file)
+        self.assertFalse(util.is_config_applied(config_file, config))
+        # Already cleared
+        util.clear_config_applied(config_file)
+
+        # Nothing is recorded without a configuration file
+        util.set_config_applied(config_file, None)
+        self.assertFalse(os.path.exists(
+            util.applied_config_md5_path(config_file)))
@@ -76,7 +76,9 @@ class AgentJinjaTestCase(base.TestCase):
                            '[health_manager]\n'
                            'controller_ip_port_list = 192.0.2.10:5555\n'
                            'heartbeat_interval = 10\n'
-                           'heartbeat_key = TEST\n\n'
+                           'heartbeat_key = TEST\n'
+                           'compact_heartbeats = False\n'
+                           'heartbeat_full_state_interval = 0\n\n'
                            '[amphora_agent]\n'
                            'agent_server_ca = '
                            '/etc/octavia/certs/client_ca.pem\n'
@@ -118,7 +120,9 @@ class AgentJinjaTestCase(base.TestCase):
                            '[health_manager]\n'
                            'controller_ip_port_list = 192.0.2.10:5555\n'
                            'heartbeat_interval = 10\n'
-                           'heartbeat_key = TEST\n\n'
+                           'heartbeat_key = TEST\n'
+                           'compact_heartbeats = False\n'
+                           'heartbeat_full_state_interval = 0\n\n'
                            '[amphora_agent]\n'
                            'agent_server_ca = '
                            '/etc/octavia/certs/client_ca.pem\n'
@@ -162,7 +166,9 @@ class AgentJinjaTestCase(base.TestCase):
                            '[health_manager]\n'
                            'controller_ip_port_list = 192.0.2.10:5555\n'
                            'heartbeat_interval = 10\n'
-                           'heartbeat_key = TEST\n\n'
+                           'heartbeat_key = TEST\n'
+                           'compact_heartbeats = False\n'
+                           'heartbeat_full_state_interval = 0\n\n'
                            '[amphora_agent]\n'
                            'agent_server_ca = '
                            '/etc/octavia/certs/client_ca.pem\n'
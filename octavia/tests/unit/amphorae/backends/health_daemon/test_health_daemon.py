@@ -22,6 +22,7 @@ from oslo_utils import uuidutils
 import simplejson
 
 from octavia.amphorae.backends.health_daemon import health_daemon
+from octavia.amphorae.backends.health_daemon import status_message
 from octavia.common import constants
 from octavia.tests.common import utils as test_utils
 import octavia.tests.unit.base as base
@@ -378,6 +379,100 @@ class TestHealthDaemon(base.TestCase):
         self.assertEqual(0, mock_get_stats.call_count)
         self.assertEqual(0, mock_fdopen().read.call_count)
 
+    @mock.patch('time.monotonic')
+    def test_set_pools_delta(self, mock_monotonic):
+        conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        conf.config(group="health_manager", heartbeat_full_state_interval=60)
+        self.addCleanup(setattr, health_daemon, 'FULL_POOLS', None)
+        health_daemon.FULL_POOLS = None
+
+        def get_msg(pool_status, member_status, member_count=2):
+            members = {'member-id-{}'.format(i): member_status
+                       for i in range(member_count)}
+            members['member-id-0'] = constants.UP
+            return {'pools': {'pool-id-1': {'status': pool_status,
+                                            'members': members}}}
+
+        # The first message is complete
+        mock_monotonic.return_value = 100
+        msg = get_msg(constants.UP, constants.UP)
+        pools = msg['pools']
+        health_daemon.set_pools_delta(msg)
+        self.assertEqual(pools, msg['pools'])
+        self.assertEqual(status_message.get_pools_digest(pools),
+                         msg['digest'])
+        self.assertNotIn('delta', msg)
+
+        # No change
+        mock_monotonic.return_value = 110
+        msg = get_msg(constants.UP, constants.UP)
+        health_daemon.set_pools_delta(msg)
+        self.assertEqual({}, msg['pools'])
+        self.assertEqual(status_message.get_pools_digest(pools),
+                         msg['digest'])
+        self.assertTrue(msg['delta'])
+
+        # Only the changed members are sent
+        msg = get_msg(constants.UP, constants.DOWN)
+        digest = status_message.get_pools_digest(msg['pools'])
+        health_daemon.set_pools_delta(msg)
+        self.assertEqual(
+            {'pool-id-1': {'status': constants.UP,
+                           'members': {'member-id-1': constants.DOWN}}},
+            msg['pools'])
+        self.assertEqual(digest, msg['digest'])
+        self.assertTrue(msg['delta'])
+
+        # A new member requires complete statuses
+        msg = get_msg(constants.UP, constants.DOWN, member_count=3)
+        pools = msg['pools']
+        health_daemon.set_pools_delta(msg)
+        self.assertEqual(pools, msg['pools'])
+        self.assertNotIn('delta', msg)
+
+        # So does the end of the interval
+        mock_monotonic.return_value = 169
+        msg = get_msg(constants.UP, constants.DOWN, member_count=3)
+        health_daemon.set_pools_delta(msg)
+        self.assertEqual({}, msg['pools'])
+        mock_monotonic.return_value = 171
+        msg = get_msg(constants.UP, constants.DOWN, member_count=3)
+        pools = msg['pools']
+        health_daemon.set_pools_delta(msg)
+        self.assertEqual(pools, msg['pools'])
+        self.assertNotIn('delta', msg)
+
+    @mock.patch('octavia.amphorae.backends.agent.api_server.'
+                'util.is_lb_running')
+    @mock.patch('octavia.amphorae.backends.health_daemon.'
+                'health_daemon.get_stats')
+    @mock.patch('octavia.amphorae.backends.health_daemon.'
+                'health_daemon.list_sock_stat_files')
+    def test_build_stats_message_compact(self, mock_list_files,
+                                         mock_get_stats, mock_is_running):
+        conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        conf.config(group="health_manager", compact_heartbeats=True)
+        health_daemon.COUNTERS = None
+        health_daemon.COUNTERS_FILE = None
+        lb1_stats_socket = '/var/lib/octavia/{0}/haproxy.sock'.format(LB_ID1)
+        mock_list_files.return_value = {LB_ID1: lb1_stats_socket}
+
+        mock_is_running.return_value = True
+        mock_get_stats.return_value = SAMPLE_STATS, SAMPLE_POOL_STATUS
+
+        with mock.patch('os.open'), mock.patch.object(
+                os, 'fdopen', self.mock_open) as mock_fdopen:
+            mock_fdopen().read.return_value = simplejson.dumps({
+                LISTENER_ID1: {'bin': 1, 'bout': 2},
+            })
+            msg = health_daemon.build_stats_message()
+
+        self.assertEqual(dict(SAMPLE_STATS_MSG,
+                              ver=status_message.COMPACT_MSG_VER), msg)
+        envelope = status_message.wrap_envelope(msg, 'samplekey1')
+        self.assertEqual(msg, status_message.unwrap_envelope(envelope,
+                                                             'samplekey1'))
+
     @mock.patch("octavia.amphorae.backends.utils.keepalivedlvs_query."
                 "get_lvs_listener_pool_status")
     @mock.patch("octavia.amphorae.backends.utils.keepalivedlvs_query."
@@ -54,3 +54,84 @@ class TestEnvelope(base.TestCase):
         args = (envelope, 'samplekey?')
         self.assertRaises(exceptions.InvalidHMACException,
                           status_message.unwrap_envelope, *args)
+
+
+class TestCompactEncoding(base.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.listener_id = str(uuid.uuid4())
+        self.pool_id = str(uuid.uuid4())
+        self.member_id1 = str(uuid.uuid4())
+        self.member_id2 = str(uuid.uuid4())
+        self.msg = {
+            'id': str(uuid.uuid4()),
+            'seq': 300,
+            'listeners': {
+                self.listener_id: {
+                    'status': 'OPEN',
+                    'stats': {'tx': 2 ** 40, 'rx': 1234, 'conns': 0,
+                              'totconns': 127, 'ereq': 128}}},
+            'pools': {
+                '{}:{}'.format(self.pool_id, self.listener_id): {
+                    'status': 'UP',
+                    'members': {self.member_id1: 'no check',
+                                self.member_id2: 'UP 1/3'}},
+                self.pool_id: {
+                    'status': 'DOWN',
+                    'members': {}}},
+            'ver': status_message.COMPACT_MSG_VER}
+
+    def test_round_trip(self):
+        payload = status_message.encode_compact_obj(self.msg)
+        self.assertEqual(status_message.COMPACT_MAGIC, payload[0])
+        self.assertEqual(self.msg, status_message.decode_obj(payload))
+        self.assertLess(len(payload),
+                        len(status_message.encode_obj(self.msg)))
+
+    def test_round_trip_pools_delta(self):
+        self.msg['digest'] = status_message.get_pools_digest(
+            self.msg['pools'])
+        self.msg['delta'] = True
+        payload = status_message.encode_compact_obj(self.msg)
+        self.assertEqual(self.msg, status_message.decode_obj(payload))
+
+    def test_get_pools_digest(self):
+        digest = status_message.get_pools_digest(self.msg['pools'])
+        self.assertEqual(status_message.POOLS_DIGEST_LEN * 2, len(digest))
+        reordered = dict(reversed(list(self.msg['pools'].items())))
+        self.assertEqual(digest, status_message.get_pools_digest(reordered))
+        self.msg['pools'][self.pool_id]['status'] = 'UP'
+        self.assertNotEqual(digest,
+                            status_message.get_pools_digest(self.msg['pools']))
+
+    def test_wrap_envelope(self):
+        envelope = status_message.wrap_envelope(self.msg, 'samplekey1')
+        self.assertEqual(status_message.COMPACT_MAGIC, envelope[0])
+        obj = status_message.unwrap_envelope(envelope, 'samplekey1')
+        self.assertEqual(self.msg, obj)
+        self.assertRaises(exceptions.InvalidHMACException,
+                          status_message.unwrap_envelope, envelope,
+                          'samplekey?')
+
+    def test_wrap_envelope_json_fallback(self):
+        self.msg['listeners']['not-a-uuid'] = (
+            self.msg['listeners'].pop(self.listener_id))
+        envelope = status_message.wrap_envelope(self.msg, 'samplekey1')
+        obj = status_message.unwrap_envelope(envelope, 'samplekey1')
+        self.assertEqual(status_message.COMPACT_MSG_VER - 1, obj['ver'])
+        self.assertEqual(self.msg['listeners'], obj['listeners'])
+        self.assertEqual(status_message.COMPACT_MSG_VER, self.msg['ver'])
+
+    def test_encode_compact_obj_invalid(self):
+        self.msg['id'] = self.msg['id'].upper()
+        self.assertRaises(ValueError, status_message.encode_compact_obj,
+                          self.msg)
+        self.msg['id'] = str(uuid.uuid4())
+        self.msg['listeners'][self.listener_id]['stats']['conns'] = -1
+        self.assertRaises(ValueError, status_message.encode_compact_obj,
+                          self.msg)
+
+    def test_decode_compact_obj_trailing_data(self):
+        payload = status_message.encode_compact_obj(self.msg)
+        self.assertRaises(ValueError, status_message.decode_obj,
+                          payload + b'\x00')
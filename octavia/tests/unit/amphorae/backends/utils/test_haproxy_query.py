@@ -144,6 +144,21 @@ class QueryTestCase(base.TestCase):
             self.q.show_info()
         )
 
+    def test_set_server(self):
+        query_mock = mock.Mock()
+        query_mock.side_effect = ['', 'No such server.']
+        self.q._query = query_mock
+
+        self.q.set_server('pool:listener', 'member', 'weight', 5)
+        query_mock.assert_called_once_with(
+            'set server pool:listener/member weight 5')
+
+        self.assertRaisesRegex(Exception,
+                               "HAProxy 'set server pool:listener/bogus "
+                               "state maint' query failed: No such server.",
+                               self.q.set_server,
+                               'pool:listener', 'bogus', 'state', 'maint')
+
     def test_save_state(self):
         filename = 'state_file'
 
@@ -246,9 +246,9 @@ class TestHaproxyAmphoraLoadBalancerDriverTest(base.TestCase):
             self.amp, self.sl.id, timeout_dict=None)
         secret_calls = [
             mock.call(self.sl, self.sl.client_ca_tls_certificate_id, self.amp,
-                      self.sl.id),
+                      self.sl.id, cert_cache=mock.ANY, cert_manifest=None),
             mock.call(self.sl, self.sl.client_crl_container_id, self.amp,
-                      self.sl.id)
+                      self.sl.id, cert_cache=mock.ANY, cert_manifest=None)
         ]
         mock_secret.assert_has_calls(secret_calls)
 
@@ -357,7 +357,8 @@ class TestHaproxyAmphoraLoadBalancerDriverTest(base.TestCase):
             fake_context, sample_listener.client_ca_tls_certificate_id)
         mock_upload_cert.assert_called_once_with(
             self.amp, sample_listener.id, pem=fake_secret,
-            md5sum=ref_md5, name=ref_name)
+            md5sum=ref_md5, name=ref_name, cert_cache=None,
+            cert_manifest=None)
         self.assertEqual(ref_name, result)
 
     @mock.patch('octavia.amphorae.drivers.haproxy.rest_api_driver.'
@@ -379,9 +380,11 @@ class TestHaproxyAmphoraLoadBalancerDriverTest(base.TestCase):
 
         pool_certs_calls = [
             mock.call(sample_listener, sample_listener.default_pool,
-                      self.amp, sample_listener.id),
+                      self.amp, sample_listener.id,
+                      cert_cache=None, cert_manifest=None),
             mock.call(sample_listener, sample_listener.pools[1],
-                      self.amp, sample_listener.id)
+                      self.amp, sample_listener.id,
+                      cert_cache=None, cert_manifest=None)
         ]
 
         mock_pool_cert.assert_has_calls(pool_certs_calls, any_order=True)
@@ -430,15 +433,18 @@ class TestHaproxyAmphoraLoadBalancerDriverTest(base.TestCase):
         secret_calls = [
             mock.call(sample_listener,
                       sample_listener.default_pool.ca_tls_certificate_id,
-                      self.amp, sample_listener.id),
+                      self.amp, sample_listener.id,
+                      cert_cache=None, cert_manifest=None),
             mock.call(sample_listener,
                       sample_listener.default_pool.crl_container_id,
-                      self.amp, sample_listener.id)]
+                      self.amp, sample_listener.id,
+                      cert_cache=None, cert_manifest=None)]
 
         mock_build_pem.assert_called_once_with(pool_cert)
         mock_upload_cert.assert_called_once_with(
             self.amp, sample_listener.id, pem=fake_pem,
-            md5sum=ref_md5, name=ref_name)
+            md5sum=ref_md5, name=ref_name, cert_cache=None,
+            cert_manifest=None)
         mock_secret.assert_has_calls(secret_calls)
         self.assertEqual(ref_result, result)
 
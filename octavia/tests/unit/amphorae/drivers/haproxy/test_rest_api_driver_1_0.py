@@ -13,6 +13,7 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 import hashlib
+import threading
 from unittest import mock
 
 from oslo_config import cfg
@@ -27,6 +28,7 @@ from octavia.amphorae.drivers.haproxy import exceptions as exc
 from octavia.amphorae.drivers.haproxy import rest_api_driver as driver
 from octavia.common import constants
 from octavia.common import data_models
+from octavia.common import exceptions
 from octavia.common import utils as octavia_utils
 from octavia.db import models
 from octavia.network import data_models as network_models
@@ -159,6 +161,97 @@ class TestHaproxyAmphoraLoadBalancerDriverTest(base.TestCase):
         self.driver.clients[API_VERSION].upload_config.assert_not_called()
         self.driver.clients[API_VERSION].reload_listener.assert_not_called()
 
+    @mock.patch('octavia.amphorae.drivers.haproxy.rest_api_driver.'
+                'HaproxyAmphoraLoadBalancerDriver._process_secret')
+    @mock.patch('octavia.common.tls_utils.cert_parser.load_certificates_data')
+    def test_update_amphora_listeners_unchanged(self, mock_load_cert,
+                                                mock_secret):
+        mock_amphora = mock.MagicMock()
+        mock_amphora.id = 'mock_amphora_id'
+        mock_amphora.api_version = API_VERSION
+        mock_secret.return_value = 'filename.pem'
+        mock_load_cert.return_value = {
+            'tls_cert': self.sl.default_tls_container, 'sni_certs': [],
+            'client_ca_cert': None}
+        self.driver.jinja_combo.build_config.return_value = 'the_config'
+        client = self.driver.clients[API_VERSION]
+        client.upload_config.return_value = False
+
+        self.driver.update_amphora_listeners(self.lb,
+                                             mock_amphora, self.timeout_dict)
+        client.upload_config.assert_called_once_with(
+            mock_amphora, self.lb.id, 'the_config',
+            timeout_dict=self.timeout_dict)
+        client.reload_listener.assert_not_called()
+
+        # UDP listener
+        self.driver.lvs_jinja.build_config.return_value = 'the_lvs_config'
+        client.upload_udp_config.return_value = False
+        self.driver.update_amphora_listeners(self.lb_udp,
+                                             mock_amphora, self.timeout_dict)
+        client.upload_udp_config.assert_called_once_with(
+            mock_amphora, self.lb_udp.listeners[0].id, 'the_lvs_config',
+            timeout_dict=self.timeout_dict)
+        client.reload_listener.assert_not_called()
+
+    @mock.patch('octavia.amphorae.drivers.haproxy.rest_api_driver.'
+                'HaproxyAmphoraLoadBalancerDriver._process_secret')
+    @mock.patch('octavia.common.tls_utils.cert_parser.load_certificates_data')
+    def test_update_amphora_listeners_runtime_api(self, mock_load_cert,
+                                                  mock_secret):
+        conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        conf.config(group="haproxy_amphora", runtime_api_updates=True)
+        mock_amphora = mock.MagicMock()
+        mock_amphora.id = 'mock_amphora_id'
+        mock_amphora.api_version = API_VERSION
+        mock_secret.return_value = 'filename.pem'
+        mock_load_cert.return_value = {
+            'tls_cert': self.sl.default_tls_container, 'sni_certs': [],
+            'client_ca_cert': None}
+        self.driver.jinja_combo.build_config.return_value = 'the_config'
+        client = self.driver.clients[API_VERSION]
+
+        # Applied through the runtime API
+        client.apply_config.return_value = False
+        self.driver.update_amphora_listeners(self.lb,
+                                             mock_amphora, self.timeout_dict)
+        client.apply_config.assert_called_once_with(
+            mock_amphora, self.lb.id, 'the_config',
+            timeout_dict=self.timeout_dict)
+        client.upload_config.assert_not_called()
+        client.reload_listener.assert_not_called()
+
+        # The changes require a reload
+        client.apply_config.reset_mock()
+        client.apply_config.return_value = True
+        self.driver.update_amphora_listeners(self.lb,
+                                             mock_amphora, self.timeout_dict)
+        client.upload_config.assert_not_called()
+        client.reload_listener.assert_called_once_with(
+            mock_amphora, self.lb.id, timeout_dict=self.timeout_dict)
+
+        # The amphora agent does not support the runtime API
+        client.reload_listener.reset_mock()
+        client.apply_config.side_effect = exc.NotFound
+        self.driver.update_amphora_listeners(self.lb,
+                                             mock_amphora, self.timeout_dict)
+        client.upload_config.assert_called_once_with(
+            mock_amphora, self.lb.id, 'the_config',
+            timeout_dict=self.timeout_dict)
+        client.reload_listener.assert_called_once_with(
+            mock_amphora, self.lb.id, timeout_dict=self.timeout_dict)
+
+        # The runtime API is disabled
+        client.apply_config.reset_mock()
+        client.upload_config.reset_mock()
+        conf.config(group="haproxy_amphora", runtime_api_updates=False)
+        self.driver.update_amphora_listeners(self.lb,
+                                             mock_amphora, self.timeout_dict)
+        client.apply_config.assert_not_called()
+        client.upload_config.assert_called_once_with(
+            mock_amphora, self.lb.id, 'the_config',
+            timeout_dict=self.timeout_dict)
+
     @mock.patch('octavia.db.api.get_session')
     @mock.patch('octavia.db.repositories.ListenerRepository.update')
     @mock.patch('octavia.common.tls_utils.cert_parser.load_certificates_data')
@@ -193,6 +286,9 @@ class TestHaproxyAmphoraLoadBalancerDriverTest(base.TestCase):
         mock_load_crt.side_effect = [{
             'tls_cert': self.sl.default_tls_container, 'sni_certs': sconts},
             {'tls_cert': None, 'sni_certs': []}]
+        # The amphora agent does not support certificate synchronization
+        self.driver.clients[API_VERSION].sync_cert_pems.side_effect = (
+            exc.NotFound)
         self.driver.clients[API_VERSION].get_cert_md5sum.side_effect = [
             exc.NotFound, 'Fake_MD5', 'aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa',
             'CA_CERT_MD5']
@@ -247,12 +343,164 @@ class TestHaproxyAmphoraLoadBalancerDriverTest(base.TestCase):
             self.amp, self.lb.id, timeout_dict=None)
         secret_calls = [
             mock.call(self.sl, self.sl.client_ca_tls_certificate_id, self.amp,
-                      self.lb.id),
+                      self.lb.id, cert_cache=mock.ANY,
+                      cert_manifest=mock.ANY),
             mock.call(self.sl, self.sl.client_crl_container_id, self.amp,
-                      self.lb.id)
+                      self.lb.id, cert_cache=mock.ANY,
+                      cert_manifest=mock.ANY)
         ]
         mock_secret.assert_has_calls(secret_calls)
 
+    @mock.patch('octavia.amphorae.drivers.haproxy.rest_api_driver.'
+                'HaproxyAmphoraLoadBalancerDriver._process_secret')
+    @mock.patch('octavia.common.tls_utils.cert_parser.load_certificates_data')
+    @mock.patch('octavia.common.tls_utils.cert_parser.get_host_names')
+    def test_update_sync_certs(self, mock_cert, mock_load_crt, mock_secret):
+        mock_cert.return_value = {'cn': sample_certs.X509_CERT_CN}
+        mock_secret.side_effect = ['filename.pem', 'crl-filename.pem']
+        sconts = []
+        for sni_container in self.sl.sni_containers:
+            sconts.append(sni_container.tls_container)
+        mock_load_crt.side_effect = [{
+            'tls_cert': self.sl.default_tls_container, 'sni_certs': sconts},
+            {'tls_cert': None, 'sni_certs': []}]
+        self.driver.jinja_combo.build_config.side_effect = ['fake_config']
+        client = self.driver.clients[API_VERSION]
+
+        self.driver.update(self.lb)
+
+        # All of the certificates are synchronized in one go
+        client.sync_cert_pems.assert_called_once_with(
+            self.amp, self.lb.id, mock.ANY, timeout_dict=None)
+        manifest = client.sync_cert_pems.call_args[0][2]
+        fp1 = b'\n'.join([sample_certs.X509_CERT,
+                          sample_certs.X509_CERT_KEY,
+                          sample_certs.X509_IMDS]) + b'\n'
+        name = self.sl.default_tls_container.id + '.pem'
+        self.assertEqual((fp1, mock.ANY), manifest[name])
+        self.assertIn(sconts[0].id + '.pem', manifest)
+        self.assertIn(sconts[1].id + '.pem', manifest)
+        client.get_cert_md5sum.assert_not_called()
+        client.upload_cert_pem.assert_not_called()
+        client.upload_config.assert_called_once_with(
+            self.amp, self.lb.id, 'fake_config', timeout_dict=None)
+
+    def test_sync_certs(self):
+        cert_cache = driver.CertificateCache()
+        client = self.driver.clients[API_VERSION]
+        manifest = {'cert1.pem': (b'pem1', 'md5_1'),
+                    'cert2.pem': (b'pem2', 'md5_2')}
+
+        self.driver._sync_certs(self.amp, self.lb.id, manifest,
+                                cert_cache=cert_cache)
+        client.sync_cert_pems.assert_called_once_with(
+            self.amp, self.lb.id, manifest, timeout_dict=None)
+        self.assertTrue(cert_cache.is_uploaded(self.amp, self.lb.id,
+                                               'cert1.pem', 'md5_1'))
+        self.assertTrue(cert_cache.is_uploaded(self.amp, self.lb.id,
+                                               'cert2.pem', 'md5_2'))
+
+        # The certificates are already synchronized by this operation
+        self.driver._sync_certs(self.amp, self.lb.id, manifest,
+                                cert_cache=cert_cache)
+        client.sync_cert_pems.assert_called_once()
+
+    @mock.patch('octavia.db.api.get_session')
+    @mock.patch('octavia.db.repositories.ListenerRepository.update')
+    @mock.patch('octavia.amphorae.drivers.haproxy.rest_api_driver.'
+                'HaproxyAmphoraLoadBalancerDriver._process_secret')
+    @mock.patch('octavia.common.tls_utils.cert_parser.load_certificates_data')
+    @mock.patch('octavia.common.tls_utils.cert_parser.get_host_names')
+    def test_update_sync_certs_error(self, mock_cert, mock_load_crt,
+                                     mock_secret, mock_list_update,
+                                     mock_get_session):
+        mock_cert.return_value = {'cn': sample_certs.X509_CERT_CN}
+        mock_secret.side_effect = ['filename.pem', 'crl-filename.pem']
+        mock_load_crt.side_effect = [{
+            'tls_cert': self.sl.default_tls_container, 'sni_certs': []},
+            {'tls_cert': None, 'sni_certs': []}]
+        mock_get_session.return_value = 'fake_session'
+        client = self.driver.clients[API_VERSION]
+        client.sync_cert_pems.side_effect = exc.InternalServerError
+        client.get_cert_md5sum.side_effect = exc.NotFound
+        client.upload_cert_pem.side_effect = exc.InternalServerError
+
+        self.driver.update(self.lb)
+
+        # The certificates are uploaded for each listener, the listener
+        # whose certificates failed is skipped
+        client.sync_cert_pems.assert_called_once()
+        client.upload_cert_pem.assert_called_once_with(
+            self.amp, self.lb.id,
+            self.sl.default_tls_container.id + '.pem', mock.ANY)
+        mock_list_update.assert_called_once_with(
+            'fake_session', self.sl.id,
+            provisioning_status=constants.ERROR,
+            operating_status=constants.ERROR)
+        self.driver.jinja_combo.build_config.assert_not_called()
+        client.delete_listener.assert_called_once_with(self.amp, self.lb.id)
+
+    @mock.patch('octavia.amphorae.drivers.haproxy.rest_api_driver.'
+                'HaproxyAmphoraLoadBalancerDriver._set_listener_error')
+    def test_sync_listener_certs(self, mock_set_error):
+        client = self.driver.clients[API_VERSION]
+        listener1 = mock.MagicMock(id='listener1')
+        listener2 = mock.MagicMock(id='listener2')
+        listener3 = mock.MagicMock(id='listener3')
+        listener_manifests = {'listener1': {'cert1.pem': (b'pem1', 'md5_1')},
+                              'listener2': {'cert2.pem': (b'pem2', 'md5_2')},
+                              'listener3': {}}
+        listeners = [listener1, listener2, listener3]
+
+        self.assertEqual(listeners, self.driver._sync_listener_certs(
+            self.amp, self.lb.id, listeners, listener_manifests))
+        client.sync_cert_pems.assert_called_once_with(
+            self.amp, self.lb.id,
+            {'cert1.pem': (b'pem1', 'md5_1'),
+             'cert2.pem': (b'pem2', 'md5_2')}, timeout_dict=None)
+
+        # The certificates of the listeners are uploaded one by one
+        client.sync_cert_pems.side_effect = exc.InternalServerError
+        client.get_cert_md5sum.return_value = None
+        client.upload_cert_pem.side_effect = [None,
+                                              exc.InternalServerError]
+        self.assertEqual([listener1, listener3],
+                         self.driver._sync_listener_certs(
+                             self.amp, self.lb.id, listeners,
+                             listener_manifests))
+        client.upload_cert_pem.assert_has_calls(
+            [mock.call(self.amp, self.lb.id, 'cert1.pem', b'pem1'),
+             mock.call(self.amp, self.lb.id, 'cert2.pem', b'pem2')])
+        mock_set_error.assert_called_once_with(listener2)
+
+    def test_sync_certs_empty_manifest(self):
+        cert_cache = driver.CertificateCache()
+        client = self.driver.clients[API_VERSION]
+
+        # The certificates of the removed TLS listeners are deleted
+        self.driver._sync_certs(self.amp, self.lb.id, {},
+                                cert_cache=cert_cache)
+        client.sync_cert_pems.assert_called_once_with(
+            self.amp, self.lb.id, {}, timeout_dict=None)
+
+        # Older amphora agents have nothing to upload
+        client.sync_cert_pems.side_effect = exc.NotFound
+        self.driver._sync_certs(self.amp, self.lb.id, {})
+        client.get_cert_md5sum.assert_not_called()
+        client.upload_cert_pem.assert_not_called()
+
+    def test_sync_certs_not_supported(self):
+        client = self.driver.clients[API_VERSION]
+        client.sync_cert_pems.side_effect = exc.NotFound
+        client.get_cert_md5sum.side_effect = ['md5_1', 'other_md5']
+        manifest = {'cert1.pem': (b'pem1', 'md5_1'),
+                    'cert2.pem': (b'pem2', 'md5_2')}
+
+        self.driver._sync_certs(self.amp, self.lb.id, manifest)
+        self.assertEqual(2, client.get_cert_md5sum.call_count)
+        client.upload_cert_pem.assert_called_once_with(
+            self.amp, self.lb.id, 'cert2.pem', b'pem2')
+
     def test_udp_update(self):
         self.driver.lvs_jinja.build_config.side_effect = ['fake_udp_config']
 
@@ -358,7 +606,8 @@ class TestHaproxyAmphoraLoadBalancerDriverTest(base.TestCase):
             fake_context, sample_listener.client_ca_tls_certificate_id)
         mock_upload_cert.assert_called_once_with(
             self.amp, sample_listener.id, pem=fake_secret,
-            md5sum=ref_md5, name=ref_name)
+            md5sum=ref_md5, name=ref_name, cert_cache=None,
+            cert_manifest=None)
         self.assertEqual(ref_name, result)
 
     @mock.patch('octavia.amphorae.drivers.haproxy.rest_api_driver.'
@@ -380,9 +629,11 @@ class TestHaproxyAmphoraLoadBalancerDriverTest(base.TestCase):
 
         pool_certs_calls = [
             mock.call(sample_listener, sample_listener.default_pool,
-                      self.amp, sample_listener.load_balancer.id),
+                      self.amp, sample_listener.load_balancer.id,
+                      cert_cache=None, cert_manifest=None),
             mock.call(sample_listener, sample_listener.pools[1],
-                      self.amp, sample_listener.load_balancer.id)
+                      self.amp, sample_listener.load_balancer.id,
+                      cert_cache=None, cert_manifest=None)
         ]
 
         mock_pool_cert.assert_has_calls(pool_certs_calls, any_order=True)
@@ -432,15 +683,18 @@ class TestHaproxyAmphoraLoadBalancerDriverTest(base.TestCase):
         secret_calls = [
             mock.call(sample_listener,
                       sample_listener.default_pool.ca_tls_certificate_id,
-                      self.amp, sample_listener.load_balancer.id),
+                      self.amp, sample_listener.load_balancer.id,
+                      cert_cache=None, cert_manifest=None),
             mock.call(sample_listener,
                       sample_listener.default_pool.crl_container_id,
-                      self.amp, sample_listener.load_balancer.id)]
+                      self.amp, sample_listener.load_balancer.id,
+                      cert_cache=None, cert_manifest=None)]
 
         mock_build_pem.assert_called_once_with(pool_cert)
         mock_upload_cert.assert_called_once_with(
             self.amp, sample_listener.load_balancer.id, pem=fake_pem,
-            md5sum=ref_md5, name=ref_name)
+            md5sum=ref_md5, name=ref_name, cert_cache=None,
+            cert_manifest=None)
         mock_secret.assert_has_calls(secret_calls)
         self.assertEqual(ref_result, result)
 
@@ -500,6 +754,105 @@ class TestHaproxyAmphoraLoadBalancerDriverTest(base.TestCase):
             API_VERSION].reload_listener.assert_called_once_with(
             amp1, loadbalancer.id, timeout_dict)
 
+    def test_run_on_amphorae(self):
+        conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        amp1 = mock.MagicMock()
+        amp2 = mock.MagicMock()
+        amp3 = mock.MagicMock()
+        amp3.status = constants.DELETED
+        func = mock.Mock()
+
+        for concurrency in (1, 2):
+            conf.config(group="haproxy_amphora",
+                        amphora_update_concurrency=concurrency)
+            func.reset_mock()
+            self.driver._run_on_amphorae(func, [amp1, amp2, amp3])
+            func.assert_has_calls([mock.call(amp1), mock.call(amp2)],
+                                  any_order=True)
+            self.assertEqual(2, func.call_count)
+
+    def test_run_on_amphorae_errors(self):
+        conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        amp1 = mock.MagicMock()
+        amp2 = mock.MagicMock()
+        amp3 = mock.MagicMock()
+        func = mock.Mock()
+        func.side_effect = [None, driver_except.TimeOutException,
+                            exc.InternalServerError]
+
+        # Serially, the first failure stops the update
+        conf.config(group="haproxy_amphora", amphora_update_concurrency=1)
+        self.assertRaises(driver_except.TimeOutException,
+                          self.driver._run_on_amphorae, func,
+                          [amp1, amp2, amp3])
+        self.assertEqual(2, func.call_count)
+
+        # Concurrently, all of the amphorae are updated, then the error of
+        # the first failed amphora is raised
+        conf.config(group="haproxy_amphora", amphora_update_concurrency=3)
+        errors = {amp1: None, amp2: exc.InternalServerError,
+                  amp3: driver_except.TimeOutException}
+
+        def update(amp):
+            if errors[amp]:
+                raise errors[amp]
+
+        func = mock.Mock(side_effect=update)
+        self.assertRaises(exc.InternalServerError,
+                          self.driver._run_on_amphorae, func,
+                          [amp1, amp2, amp3])
+        self.assertEqual(3, func.call_count)
+
+    @mock.patch('octavia.amphorae.drivers.haproxy.rest_api_driver.'
+                'HaproxyAmphoraLoadBalancerDriver.update_amphora_listeners')
+    def test_update_concurrent(self, mock_update_amp):
+        conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        conf.config(group="haproxy_amphora", amphora_update_concurrency=2)
+        amp1 = mock.MagicMock()
+        amp2 = mock.MagicMock()
+        loadbalancer = mock.MagicMock()
+        loadbalancer.amphorae = [amp1, amp2]
+
+        self.driver.update(loadbalancer)
+
+        mock_update_amp.assert_has_calls(
+            [mock.call(loadbalancer, amp1, cert_cache=mock.ANY),
+             mock.call(loadbalancer, amp2, cert_cache=mock.ANY)],
+            any_order=True)
+        # The amphorae share the certificate cache of the update
+        cert_caches = {id(call[1]['cert_cache'])
+                       for call in mock_update_amp.call_args_list}
+        self.assertEqual(1, len(cert_caches))
+
+    def test_upload_cert_cache(self):
+        cert_cache = driver.CertificateCache()
+        amp2 = mock.MagicMock()
+        amp2.id = 'amp2'
+        amp2.api_version = API_VERSION
+        client = self.driver.clients[API_VERSION]
+        client.get_cert_md5sum.side_effect = ['other_md5', 'the_md5',
+                                              'the_md5']
+
+        for _ in range(2):
+            self.driver._upload_cert(self.amp, self.lb.id, b'pem', 'the_md5',
+                                     'cert.pem', cert_cache=cert_cache)
+        client.get_cert_md5sum.assert_called_once_with(
+            self.amp, self.lb.id, 'cert.pem', ignore=(404,))
+        client.upload_cert_pem.assert_called_once_with(
+            self.amp, self.lb.id, 'cert.pem', b'pem')
+
+        # The file is checked again on another amphora
+        for _ in range(2):
+            self.driver._upload_cert(amp2, self.lb.id, b'pem', 'the_md5',
+                                     'cert.pem', cert_cache=cert_cache)
+        self.assertEqual(2, client.get_cert_md5sum.call_count)
+        client.upload_cert_pem.assert_called_once()
+
+        # Without a cache the file is always checked
+        self.driver._upload_cert(amp2, self.lb.id, b'pem', 'the_md5',
+                                 'cert.pem')
+        self.assertEqual(3, client.get_cert_md5sum.call_count)
+
     def test_start_with_amphora(self):
         # Execute driver method
         amp = mock.MagicMock()
@@ -805,6 +1158,88 @@ class TestHaproxyAmphoraLoadBalancerDriverTest(base.TestCase):
             self.amp, octavia_utils.b('test'), timeout_dict=None)
 
 
+class TestCertificateCache(base.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cert_cache = driver.CertificateCache()
+        self.cert_manager = mock.MagicMock()
+        self.listener = sample_configs_combined.sample_listener_tuple(
+            tls=True, sni=True, client_ca_cert=True)
+
+    @mock.patch('octavia.common.tls_utils.cert_parser.load_certificates_data')
+    def test_get_certificates_data(self, mock_load_certs):
+        mock_load_certs.return_value = {'tls_cert': 'cert', 'sni_certs': []}
+
+        for _ in range(2):
+            self.assertEqual(
+                mock_load_certs.return_value,
+                self.cert_cache.get_certificates_data(self.cert_manager,
+                                                      self.listener))
+        mock_load_certs.assert_called_once_with(self.cert_manager,
+                                                self.listener)
+
+        # The certificates are retrieved again after a failure
+        mock_load_certs.reset_mock()
+        pool = mock.MagicMock()
+        mock_load_certs.side_effect = [
+            exceptions.CertificateRetrievalException(ref='ref'),
+            {'tls_cert': 'pool cert'}]
+        self.assertRaises(exceptions.CertificateRetrievalException,
+                          self.cert_cache.get_certificates_data,
+                          self.cert_manager, pool)
+        self.assertEqual({'tls_cert': 'pool cert'},
+                         self.cert_cache.get_certificates_data(
+                             self.cert_manager, pool))
+        self.assertEqual(2, mock_load_certs.call_count)
+
+    @mock.patch('octavia.common.tls_utils.cert_parser.build_pem')
+    def test_get_pem(self, mock_build_pem):
+        tls_cert = data_models.TLSContainer(id='cert_id')
+        mock_build_pem.return_value = b'fake pem'
+        ref_md5 = md5(b'fake pem', usedforsecurity=False).hexdigest()  # nosec
+
+        for _ in range(2):
+            self.assertEqual((b'fake pem', ref_md5),
+                             self.cert_cache.get_pem(tls_cert))
+        mock_build_pem.assert_called_once_with(tls_cert)
+
+    def test_get_secret(self):
+        fake_secret = 'fake secret'
+        self.cert_manager.get_secret.return_value = fake_secret
+        ref_md5 = md5(b'fake secret', usedforsecurity=False).hexdigest()
+        ref_name = '{id}.pem'.format(
+            id=hashlib.sha1(b'fake secret').hexdigest())  # nosec
+
+        for _ in range(2):
+            self.assertEqual(
+                (b'fake secret', ref_md5, ref_name),
+                self.cert_cache.get_secret(
+                    self.cert_manager, self.listener,
+                    self.listener.client_ca_tls_certificate_id))
+        self.cert_manager.get_secret.assert_called_once_with(
+            mock.ANY, self.listener.client_ca_tls_certificate_id)
+
+
+class TestCustomHostNameCheckingAdapter(base.TestCase):
+
+    def test_uuid_per_thread(self):
+        adapter = driver.CustomHostNameCheckingAdapter()
+        adapter.uuid = 'amp-1'
+        thread_uuids = []
+
+        def set_uuid():
+            thread_uuids.append(adapter.uuid)
+            adapter.uuid = 'amp-2'
+            thread_uuids.append(adapter.uuid)
+
+        thread = threading.Thread(target=set_uuid)
+        thread.start()
+        thread.join()
+        self.assertEqual([None, 'amp-2'], thread_uuids)
+        self.assertEqual('amp-1', adapter.uuid)
+
+
 class TestAmphoraAPIClientTest(base.TestCase):
 
     def setUp(self):
@@ -1069,6 +1504,73 @@ class TestAmphoraAPIClientTest(base.TestCase):
                                     "some_file")
         self.assertTrue(m.called)
 
+    @requests_mock.mock()
+    def test_sync_cert_pems(self, m):
+        certs = {'cert1.pem': (b'pem1', 'md5_1'),
+                 'cert2.pem': (b'pem2', 'md5_2')}
+        m.post("{base}/loadbalancer/{loadbalancer_id}/certificates/"
+               "manifest".format(base=self.base_url_ver,
+                                 loadbalancer_id=FAKE_UUID_1),
+               json={'stale': ['cert2.pem']})
+        m.put("{base}/loadbalancer/{loadbalancer_id}/certificates".format(
+            base=self.base_url_ver, loadbalancer_id=FAKE_UUID_1),
+            json={'message': 'OK'})
+        self.assertEqual(['cert2.pem'],
+                         self.driver.sync_cert_pems(self.amp, FAKE_UUID_1,
+                                                    certs))
+        self.assertEqual(2, m.call_count)
+        self.assertEqual(
+            {'certificates': {'cert1.pem': 'md5_1', 'cert2.pem': 'md5_2'}},
+            m.request_history[0].json())
+        self.assertIn(b'pem2', m.request_history[1].body)
+        self.assertNotIn(b'pem1', m.request_history[1].body)
+
+    @requests_mock.mock()
+    def test_sync_cert_pems_up_to_date(self, m):
+        certs = {'cert1.pem': (b'pem1', 'md5_1')}
+        m.post("{base}/loadbalancer/{loadbalancer_id}/certificates/"
+               "manifest".format(base=self.base_url_ver,
+                                 loadbalancer_id=FAKE_UUID_1),
+               json={'stale': []})
+        self.assertEqual([], self.driver.sync_cert_pems(self.amp, FAKE_UUID_1,
+                                                        certs))
+        self.assertEqual(1, m.call_count)
+
+    @requests_mock.mock()
+    def test_sync_cert_pems_not_supported(self, m):
+        m.post("{base}/loadbalancer/{loadbalancer_id}/certificates/"
+               "manifest".format(base=self.base_url_ver,
+                                 loadbalancer_id=FAKE_UUID_1),
+               status_code=404)
+        self.assertRaises(exc.NotFound, self.driver.sync_cert_pems,
+                          self.amp, FAKE_UUID_1,
+                          {'cert1.pem': (b'pem1', 'md5_1')})
+        # The 404 is not retried
+        self.assertEqual(1, m.call_count)
+
+    @requests_mock.mock()
+    def test_sync_cert_pems_method_not_allowed(self, m):
+        # Older amphora agents route the manifest path to the certificate
+        # file endpoints
+        m.post("{base}/loadbalancer/{loadbalancer_id}/certificates/"
+               "manifest".format(base=self.base_url_ver,
+                                 loadbalancer_id=FAKE_UUID_1),
+               status_code=405)
+        self.assertRaises(exc.NotFound, self.driver.sync_cert_pems,
+                          self.amp, FAKE_UUID_1,
+                          {'cert1.pem': (b'pem1', 'md5_1')})
+        self.assertEqual(1, m.call_count)
+
+    @requests_mock.mock()
+    def test_sync_cert_pems_invalid(self, m):
+        m.post("{base}/loadbalancer/{loadbalancer_id}/certificates/"
+               "manifest".format(base=self.base_url_ver,
+                                 loadbalancer_id=FAKE_UUID_1),
+               status_code=400)
+        self.assertRaises(exc.InvalidRequest, self.driver.sync_cert_pems,
+                          self.amp, FAKE_UUID_1,
+                          {'cert1.pem': (b'pem1', 'md5_1')})
+
     @requests_mock.mock()
     def test_upload_invalid_cert_pem(self, m):
         m.put("{base}/loadbalancer/{loadbalancer_id}/certificates/"
@@ -1262,6 +1764,66 @@ class TestAmphoraAPIClientTest(base.TestCase):
                                   config)
         self.assertTrue(m.called)
 
+    @requests_mock.mock()
+    def test_upload_config_unchanged(self, m):
+        config = {"name": "fake_config"}
+        m.put(
+            "{base}/loadbalancer/{"
+            "amphora_id}/{loadbalancer_id}/haproxy".format(
+                amphora_id=self.amp.id, base=self.base_url_ver,
+                loadbalancer_id=FAKE_UUID_1),
+            status_code=202,
+            json={'message': 'OK', 'reload_required': False})
+        self.assertFalse(self.driver.upload_config(self.amp, FAKE_UUID_1,
+                                                   config))
+        m.put(
+            "{base}/loadbalancer/{"
+            "amphora_id}/{loadbalancer_id}/haproxy".format(
+                amphora_id=self.amp.id, base=self.base_url_ver,
+                loadbalancer_id=FAKE_UUID_1),
+            status_code=202,
+            json={'message': 'OK'})
+        self.assertTrue(self.driver.upload_config(self.amp, FAKE_UUID_1,
+                                                  config))
+
+    @requests_mock.mock()
+    def test_apply_config(self, m):
+        config = {"name": "fake_config"}
+        m.put(
+            "{base}/loadbalancer/{"
+            "amphora_id}/{loadbalancer_id}/haproxy/runtime".format(
+                amphora_id=self.amp.id, base=self.base_url_ver,
+                loadbalancer_id=FAKE_UUID_1),
+            status_code=202,
+            json={'message': 'OK', 'reload_required': False})
+        self.assertFalse(self.driver.apply_config(self.amp, FAKE_UUID_1,
+                                                  config))
+        self.assertTrue(m.called)
+
+    @requests_mock.mock()
+    def test_apply_config_not_supported(self, m):
+        config = {"name": "fake_config"}
+        m.put(
+            "{base}/loadbalancer/{"
+            "amphora_id}/{loadbalancer_id}/haproxy/runtime".format(
+                amphora_id=self.amp.id, base=self.base_url_ver,
+                loadbalancer_id=FAKE_UUID_1),
+            status_code=404)
+        self.assertRaises(exc.NotFound, self.driver.apply_config,
+                          self.amp, FAKE_UUID_1, config)
+
+    @requests_mock.mock()
+    def test_apply_invalid_config(self, m):
+        config = '{"name": "bad_config"}'
+        m.put(
+            "{base}/loadbalancer/{"
+            "amphora_id}/{loadbalancer_id}/haproxy/runtime".format(
+                amphora_id=self.amp.id, base=self.base_url_ver,
+                loadbalancer_id=FAKE_UUID_1),
+            status_code=400)
+        self.assertRaises(exc.InvalidRequest, self.driver.apply_config,
+                          self.amp, FAKE_UUID_1, config)
+
     @requests_mock.mock()
     def test_upload_invalid_config(self, m):
         config = '{"name": "bad_config"}'
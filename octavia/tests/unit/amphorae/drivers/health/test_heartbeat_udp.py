@@ -23,6 +23,7 @@ from oslo_config import fixture as oslo_fixture
 from oslo_utils import uuidutils
 import sqlalchemy
 
+from octavia.amphorae.backends.health_daemon import status_message
 from octavia.amphorae.drivers.health import heartbeat_udp
 from octavia.common import constants
 from octavia.common import data_models
@@ -57,7 +58,7 @@ class TestHeartbeatUDP(base.TestCase):
 
     def setUp(self):
         super().setUp()
-        self.conf = oslo_fixture.Config(cfg.CONF)
+        self.conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
         self.conf.config(group="health_manager", heartbeat_key=KEY)
         self.conf.config(group="health_manager", bind_ip=IP)
         self.conf.config(group="health_manager", bind_port=PORT)
@@ -199,6 +200,20 @@ class TestHeartbeatUDP(base.TestCase):
         mock_getaddrinfo.return_value = [FAKE_ADDRINFO, FAKE_ADDRINFO]
         getter.update(KEY, IP, PORT)
 
+    @mock.patch('socket.getaddrinfo')
+    @mock.patch('socket.socket')
+    def test_update_reuse_port(self, mock_socket, mock_getaddrinfo):
+        self.conf.config(group="health_manager", reuse_port=True)
+        socket_mock = mock.MagicMock()
+        mock_socket.return_value = socket_mock
+        mock_getaddrinfo.return_value = [FAKE_ADDRINFO]
+
+        heartbeat_udp.UDPStatusGetter()
+
+        socket_mock.setsockopt.assert_called_once_with(
+            socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        socket_mock.bind.assert_called_once_with((IP, PORT))
+
     @mock.patch('socket.getaddrinfo')
     @mock.patch('socket.socket')
     def test_dorecv(self, mock_socket, mock_getaddrinfo):
@@ -293,6 +308,305 @@ class TestHeartbeatUDP(base.TestCase):
         getter.check()
         self.assertFalse(mock_submit.called)
 
+    @mock.patch('socket.getaddrinfo')
+    @mock.patch('socket.socket')
+    def test_check_batch(self, mock_socket, mock_getaddrinfo):
+        self.conf.config(group="health_manager", health_update_batch_size=2)
+        self.conf.config(group="health_manager",
+                         health_update_batch_window=60)
+        socket_mock = mock.MagicMock()
+        mock_socket.return_value = socket_mock
+        mock_getaddrinfo.return_value = [range(1, 6)]
+        mock_dorecv = mock.Mock()
+        mock_health_executor = mock.Mock()
+        mock_stats_executor = mock.Mock()
+        mock_health_updater = mock.Mock()
+
+        getter = heartbeat_udp.UDPStatusGetter()
+        socket_mock.settimeout.assert_called_once_with(1)
+        getter.dorecv = mock_dorecv
+        health_1 = dict(id=FAKE_ID, seq=2)
+        health_2 = dict(id=FAKE_ID, seq=1)
+        health_3 = dict(id=FAKE_ID, seq=3)
+        health_4 = dict(id=2, seq=1)
+        mock_dorecv.side_effect = [(health_1, 2), (health_2, 2),
+                                   (health_3, 3), (health_4, 4)]
+        getter.health_executor = mock_health_executor
+        getter.stats_executor = mock_stats_executor
+        getter.health_updater = mock_health_updater
+
+        # Heartbeats from the same amphora are coalesced, older ones dropped
+        getter.check()
+        getter.check()
+        getter.check()
+        mock_health_executor.submit.assert_not_called()
+        self.assertEqual({FAKE_ID: (health_3, 3)}, getter.health_batch)
+
+        # The batch is full
+        getter.check()
+        mock_health_executor.submit.assert_called_once_with(
+            getter.health_updater.update_health_batch,
+            [(health_3, 3), (health_4, 4)])
+        self.assertEqual({}, getter.health_batch)
+
+        # Stats are not coalesced
+        mock_stats_executor.submit.assert_has_calls(
+            [mock.call(heartbeat_udp.update_stats, health_1),
+             mock.call(heartbeat_udp.update_stats, health_2),
+             mock.call(heartbeat_udp.update_stats, health_3),
+             mock.call(heartbeat_udp.update_stats, health_4)])
+
+    @mock.patch('socket.getaddrinfo')
+    @mock.patch('socket.socket')
+    def test_check_batch_window(self, mock_socket, mock_getaddrinfo):
+        self.conf.config(group="health_manager", health_update_batch_size=10)
+        self.conf.config(group="health_manager",
+                         health_update_batch_window=0.1)
+        socket_mock = mock.MagicMock()
+        mock_socket.return_value = socket_mock
+        mock_getaddrinfo.return_value = [range(1, 6)]
+        mock_dorecv = mock.Mock()
+        mock_health_executor = mock.Mock()
+
+        getter = heartbeat_udp.UDPStatusGetter()
+        socket_mock.settimeout.assert_called_once_with(0.1)
+        getter.dorecv = mock_dorecv
+        health = dict(id=FAKE_ID)
+        mock_dorecv.side_effect = [(health, 2), socket.timeout]
+        getter.health_executor = mock_health_executor
+        getter.stats_executor = mock.Mock()
+        getter.health_updater = mock.Mock()
+
+        getter.check()
+        mock_health_executor.submit.assert_not_called()
+
+        # The batch window has expired
+        getter.health_batch_start -= 1
+        getter.check()
+        mock_health_executor.submit.assert_called_once_with(
+            getter.health_updater.update_health_batch, [(health, 2)])
+
+    @mock.patch('socket.getaddrinfo')
+    @mock.patch('socket.socket')
+    def test_flush_health_batch(self, mock_socket, mock_getaddrinfo):
+        mock_getaddrinfo.return_value = [range(1, 6)]
+        mock_health_executor = mock.Mock()
+
+        getter = heartbeat_udp.UDPStatusGetter()
+        getter.health_executor = mock_health_executor
+        getter.health_updater = mock.Mock()
+
+        getter.flush_health_batch()
+        mock_health_executor.submit.assert_not_called()
+
+        getter.health_batch = {FAKE_ID: (dict(id=FAKE_ID), 2)}
+        getter.health_batch_start = time.time()
+        getter.flush_health_batch()
+        mock_health_executor.submit.assert_called_once_with(
+            getter.health_updater.update_health_batch,
+            [(dict(id=FAKE_ID), 2)])
+        self.assertEqual({}, getter.health_batch)
+        self.assertIsNone(getter.health_batch_start)
+
+    @mock.patch('socket.getaddrinfo')
+    @mock.patch('socket.socket')
+    def test_merge_pools_delta(self, mock_socket, mock_getaddrinfo):
+        mock_getaddrinfo.return_value = [range(1, 6)]
+        getter = heartbeat_udp.UDPStatusGetter()
+        full_pools = {
+            'pool-id-1': {'status': constants.UP,
+                          'members': {'member-id-1': constants.UP,
+                                      'member-id-2': constants.UP}},
+            'pool-id-2': {'status': constants.UP,
+                          'members': {'member-id-3': constants.UP}}}
+        pools_delta = {
+            'pool-id-1': {'status': constants.UP,
+                          'members': {'member-id-2': constants.DOWN}}}
+
+        # No complete heartbeat received yet, the delta is left untouched
+        health = dict(id=FAKE_ID, pools=pools_delta, delta=True, digest='1')
+        getter._merge_pools_delta(health)
+        self.assertEqual(pools_delta, health['pools'])
+        self.assertTrue(health['delta'])
+
+        health = dict(id=FAKE_ID, pools=full_pools, digest='1')
+        getter._merge_pools_delta(health)
+        self.assertEqual(full_pools, health['pools'])
+
+        health = dict(id=FAKE_ID, pools=pools_delta, delta=True, digest='1')
+        getter._merge_pools_delta(health)
+        self.assertEqual(
+            {'pool-id-1': {'status': constants.UP,
+                           'members': {'member-id-1': constants.UP,
+                                       'member-id-2': constants.DOWN}},
+             'pool-id-2': {'status': constants.UP,
+                           'members': {'member-id-3': constants.UP}}},
+            health['pools'])
+        self.assertNotIn('delta', health)
+        # The complete pool statuses are left untouched
+        self.assertEqual(constants.UP,
+                         full_pools['pool-id-1']['members']['member-id-2'])
+
+        # Amphorae that stopped reporting are forgotten
+        getter.full_pools_next_purge = 0
+        getter.full_pools[FAKE_ID] = (full_pools, time.time() - 3600)
+        health = dict(id=FAKE_ID, pools=pools_delta, delta=True, digest='1')
+        getter._merge_pools_delta(health)
+        self.assertEqual(pools_delta, health['pools'])
+
+    @mock.patch('octavia.amphorae.drivers.health.heartbeat_udp.'
+                'EventLoopUDPStatusGetter')
+    @mock.patch('octavia.amphorae.drivers.health.heartbeat_udp.'
+                'UDPStatusGetter')
+    def test_get_status_getter(self, mock_getter, mock_event_loop_getter):
+        self.assertEqual(mock_getter.return_value,
+                         heartbeat_udp.get_status_getter())
+        self.conf.config(group="health_manager",
+                         heartbeat_receiver='event_loop')
+        self.assertEqual(mock_event_loop_getter.return_value,
+                         heartbeat_udp.get_status_getter())
+
+
+@mock.patch('selectors.DefaultSelector')
+@mock.patch('socket.getaddrinfo')
+@mock.patch('socket.socket')
+class TestEventLoopHeartbeatUDP(base.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        self.conf.config(group="health_manager", heartbeat_key=KEY)
+        self.conf.config(group="health_manager", bind_ip=IP)
+        self.conf.config(group="health_manager", bind_port=PORT)
+        self.conf.config(group="health_manager", sock_rlimit=0)
+        self.conf.config(group="health_manager",
+                         heartbeat_receiver='event_loop')
+        # key = 'TEST' msg = {"testkey": "TEST"}
+        sample_msg = ('78daab562a492d2ec94ead54b252500a710d0e5'
+                      '1aa050041b506245806e5c1971e79951818394e'
+                      'a6e71ad989ff950945f9573f4ab6f83e25db8ed7')
+        self.bin_msg = binascii.unhexlify(sample_msg)
+
+    def test_update(self, mock_socket, mock_getaddrinfo, mock_selector):
+        socket_mock = mock.MagicMock()
+        mock_socket.return_value = socket_mock
+        mock_getaddrinfo.return_value = [FAKE_ADDRINFO]
+        selector_mock = mock_selector.return_value
+
+        getter = heartbeat_udp.EventLoopUDPStatusGetter()
+
+        socket_mock.setblocking.assert_called_once_with(False)
+        selector_mock.register.assert_called_once_with(
+            socket_mock, heartbeat_udp.selectors.EVENT_READ)
+
+        new_socket_mock = mock.MagicMock()
+        mock_socket.return_value = new_socket_mock
+        getter.update(KEY, IP, PORT)
+        selector_mock.unregister.assert_called_once_with(socket_mock)
+        socket_mock.close.assert_called_once_with()
+        selector_mock.register.assert_called_with(
+            new_socket_mock, heartbeat_udp.selectors.EVENT_READ)
+
+    def test_dorecv(self, mock_socket, mock_getaddrinfo, mock_selector):
+        socket_mock = mock.MagicMock()
+        mock_socket.return_value = socket_mock
+        mock_getaddrinfo.return_value = [range(1, 6)]
+        socket_mock.recvfrom.side_effect = [
+            (self.bin_msg, ('192.0.2.1', 2)),
+            (b'bogus', ('192.0.2.2', 2)),
+            (self.bin_msg, ('192.0.2.3', 2)),
+            BlockingIOError]
+
+        getter = heartbeat_udp.EventLoopUDPStatusGetter()
+        heartbeats = getter.dorecv()
+
+        self.assertEqual(4, socket_mock.recvfrom.call_count)
+        self.assertEqual(['192.0.2.1', '192.0.2.3'],
+                         [srcaddr for _, srcaddr in heartbeats])
+        for obj, _ in heartbeats:
+            self.assertIsNotNone(obj.pop('recv_time'))
+            self.assertEqual({"testkey": "TEST"}, obj)
+
+    def test_dorecv_batch_size(self, mock_socket, mock_getaddrinfo,
+                               mock_selector):
+        self.conf.config(group="health_manager",
+                         heartbeat_receive_batch_size=2)
+        socket_mock = mock.MagicMock()
+        mock_socket.return_value = socket_mock
+        mock_getaddrinfo.return_value = [range(1, 6)]
+        socket_mock.recvfrom.return_value = (self.bin_msg, ('192.0.2.1', 2))
+
+        getter = heartbeat_udp.EventLoopUDPStatusGetter()
+
+        self.assertEqual(2, len(getter.dorecv()))
+        self.assertEqual(2, socket_mock.recvfrom.call_count)
+
+    def test_check(self, mock_socket, mock_getaddrinfo, mock_selector):
+        mock_getaddrinfo.return_value = [range(1, 6)]
+        selector_mock = mock_selector.return_value
+        mock_dorecv = mock.Mock()
+        mock_health_executor = mock.Mock()
+        mock_stats_executor = mock.Mock()
+
+        getter = heartbeat_udp.EventLoopUDPStatusGetter()
+        getter.dorecv = mock_dorecv
+        getter.health_executor = mock_health_executor
+        getter.stats_executor = mock_stats_executor
+        getter.health_updater = mock.Mock()
+
+        # Nothing to read
+        selector_mock.select.return_value = []
+        getter.check()
+        selector_mock.select.assert_called_once_with(1)
+        mock_dorecv.assert_not_called()
+
+        selector_mock.select.return_value = [mock.Mock()]
+        mock_dorecv.return_value = [(dict(id=FAKE_ID), 2),
+                                    (dict(id=2), 3)]
+        getter.check()
+        mock_health_executor.submit.assert_has_calls(
+            [mock.call(getter.health_updater.update_health,
+                       dict(id=FAKE_ID), 2),
+             mock.call(getter.health_updater.update_health, dict(id=2), 3)])
+        mock_stats_executor.submit.assert_has_calls(
+            [mock.call(heartbeat_udp.update_stats, dict(id=FAKE_ID)),
+             mock.call(heartbeat_udp.update_stats, dict(id=2))])
+
+    def test_check_batch(self, mock_socket, mock_getaddrinfo, mock_selector):
+        self.conf.config(group="health_manager", health_update_batch_size=2)
+        self.conf.config(group="health_manager",
+                         health_update_batch_window=0.5)
+        mock_getaddrinfo.return_value = [range(1, 6)]
+        selector_mock = mock_selector.return_value
+        mock_health_executor = mock.Mock()
+
+        getter = heartbeat_udp.EventLoopUDPStatusGetter()
+        getter.dorecv = mock.Mock(return_value=[(dict(id=FAKE_ID), 2),
+                                                (dict(id=2), 3)])
+        getter.health_executor = mock_health_executor
+        getter.stats_executor = mock.Mock()
+        getter.health_updater = mock.Mock()
+        selector_mock.select.return_value = [mock.Mock()]
+
+        getter.check()
+        selector_mock.select.assert_called_once_with(0.5)
+        mock_health_executor.submit.assert_called_once_with(
+            getter.health_updater.update_health_batch,
+            [(dict(id=FAKE_ID), 2), (dict(id=2), 3)])
+
+    def test_check_exception(self, mock_socket, mock_getaddrinfo,
+                             mock_selector):
+        mock_getaddrinfo.return_value = [range(1, 6)]
+        selector_mock = mock_selector.return_value
+        selector_mock.select.side_effect = Exception('boom')
+        mock_health_executor = mock.Mock()
+
+        getter = heartbeat_udp.EventLoopUDPStatusGetter()
+        getter.health_executor = mock_health_executor
+
+        getter.check()
+        mock_health_executor.submit.assert_not_called()
+
 
 class TestUpdateHealthDb(base.TestCase):
     FAKE_UUID_1 = uuidutils.generate_uuid()
@@ -306,6 +620,12 @@ class TestUpdateHealthDb(base.TestCase):
         self.session_mock = mock.MagicMock()
         self.mock_session.return_value = self.session_mock
 
+        self.conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        cache_patch = mock.patch.object(heartbeat_udp, 'STATUS_CACHE',
+                                        heartbeat_udp.OperatingStatusCache())
+        cache_patch.start()
+        self.addCleanup(cache_patch.stop)
+
         self.hm = heartbeat_udp.UpdateHealthDb()
         self.amphora_repo = mock.MagicMock()
         self.amphora_health_repo = mock.MagicMock()
@@ -560,6 +880,251 @@ class TestUpdateHealthDb(base.TestCase):
         self.hm.update_health(health, '192.0.2.1')
         self.assertTrue(not self.amphora_health_repo.replace.called)
 
+    def test_update_health_batch(self):
+        amphora_id_2 = uuidutils.generate_uuid()
+        amphora_id_3 = uuidutils.generate_uuid()
+        health = {
+            "id": self.FAKE_UUID_1,
+            "ver": 1,
+            "listeners": {
+                "listener-id-1": {"status": constants.OPEN, "pools": {
+                    "pool-id-1": {"status": constants.UP,
+                                  "members": {"member-id-1": constants.UP}
+                                  }
+                }
+                }
+            },
+            "recv_time": time.time()
+        }
+        # Reports the wrong number of listeners
+        health_2 = {
+            "id": amphora_id_2,
+            "ver": 1,
+            "listeners": {},
+            "recv_time": time.time()
+        }
+        # Stale heartbeat
+        health_3 = {
+            "id": amphora_id_3,
+            "ver": 1,
+            "listeners": {},
+            "recv_time": time.time() - 3600
+        }
+
+        lb_ref = self._make_fake_lb_health_dict()
+        self.amphora_repo.get_lbs_for_health_update.return_value = {
+            self.FAKE_UUID_1: lb_ref, amphora_id_2: lb_ref,
+            amphora_id_3: self._make_fake_lb_health_dict(listener=False)}
+
+        self.hm.update_health_batch([(health, '192.0.2.1'),
+                                     (health_2, '192.0.2.2'),
+                                     (health_3, '192.0.2.3')])
+
+        self.amphora_repo.get_lbs_for_health_update.assert_called_once_with(
+            self.session_mock, [self.FAKE_UUID_1, amphora_id_2, amphora_id_3])
+        self.amphora_repo.get_lb_for_health_update.assert_not_called()
+        self.amphora_health_repo.replace.assert_not_called()
+        self.amphora_health_repo.replace_batch.assert_called_once_with(
+            self.session_mock, [self.FAKE_UUID_1], last_update=mock.ANY)
+        self.session_mock.commit.assert_called_once()
+
+        # Statuses are updated for amphorae with unexpected listener counts
+        # too, but not for stale heartbeats
+        self.listener_repo.update.assert_has_calls(
+            [mock.call(self.session_mock, 'listener-id-1',
+                       operating_status=constants.ONLINE),
+             mock.call(self.session_mock, 'listener-id-1',
+                       operating_status=constants.ERROR)])
+        self.member_repo.update.assert_any_call(
+            self.session_mock, 'member-id-1',
+            operating_status=constants.ONLINE)
+        self.assertEqual(2, self.loadbalancer_repo.update.call_count)
+
+    def test_update_health_status_cache(self):
+        self.conf.config(group="health_manager",
+                         operating_status_cache_ttl=60)
+        health = {
+            "id": self.FAKE_UUID_1,
+            "ver": 2,
+            "seq": 1,
+            "listeners": {
+                "listener-id-1": {"status": constants.OPEN,
+                                  "stats": {"conns": 1}}},
+            "pools": {
+                "pool-id-1:listener-id-1": {
+                    "status": constants.UP,
+                    "members": {"member-id-1": constants.UP}}},
+            "recv_time": time.time()
+        }
+        lb_ref = self._make_fake_lb_health_dict()
+        self.amphora_repo.get_lb_for_health_update.return_value = lb_ref
+
+        self.hm.update_health(health, '192.0.2.1')
+        self.amphora_repo.get_lb_for_health_update.assert_called_once()
+        self.assertEqual(1, self.amphora_health_repo.replace.call_count)
+        self.assertTrue(self.member_repo.update.called)
+
+        # Same statuses, different stats: only the amphora health is updated
+        self.member_repo.update.reset_mock()
+        health['seq'] = 2
+        health['listeners']['listener-id-1']['stats'] = {"conns": 2}
+        self.hm.update_health(health, '192.0.2.1')
+        self.amphora_repo.get_lb_for_health_update.assert_called_once()
+        self.assertEqual(2, self.amphora_health_repo.replace.call_count)
+        self.assertFalse(self.member_repo.update.called)
+
+        # A stale heartbeat doesn't update the amphora health
+        health['seq'] = 3
+        health['recv_time'] = time.time() - 3600
+        self.hm.update_health(health, '192.0.2.1')
+        self.assertEqual(2, self.amphora_health_repo.replace.call_count)
+
+        # A status change goes through the DB again
+        health['seq'] = 4
+        health['recv_time'] = time.time()
+        health['pools']['pool-id-1:listener-id-1']['members'][
+            'member-id-1'] = constants.DOWN
+        self.hm.update_health(health, '192.0.2.1')
+        self.assertEqual(
+            2, self.amphora_repo.get_lb_for_health_update.call_count)
+        self.member_repo.update.assert_called_once_with(
+            self.session_mock, 'member-id-1',
+            operating_status=constants.ERROR)
+
+    def test_update_health_pools_digest(self):
+        pools = {
+            "pool-id-1:listener-id-1": {
+                "status": constants.UP,
+                "members": {"member-id-1": constants.UP}}}
+        health = {
+            "id": self.FAKE_UUID_1,
+            "ver": 3,
+            "seq": 1,
+            "listeners": {
+                "listener-id-1": {"status": constants.OPEN,
+                                  "stats": {"conns": 1}}},
+            "pools": pools,
+            "digest": status_message.get_pools_digest(pools),
+            "recv_time": time.time()
+        }
+        lb_ref = self._make_fake_lb_health_dict()
+        self.amphora_repo.get_lb_for_health_update.return_value = lb_ref
+
+        self.hm.update_health(health, '192.0.2.1')
+        self.listener_repo.update.assert_called_once()
+        self.member_repo.update.assert_called_once_with(
+            self.session_mock, 'member-id-1',
+            operating_status=constants.ONLINE)
+        self.pool_repo.update.assert_called_once()
+        self.loadbalancer_repo.update.assert_called_once()
+        self.assertEqual(1, self.amphora_health_repo.replace.call_count)
+
+        # Only the changes since a complete heartbeat that was not received
+        self.listener_repo.update.reset_mock()
+        self.member_repo.update.reset_mock()
+        self.pool_repo.update.reset_mock()
+        self.loadbalancer_repo.update.reset_mock()
+        health['seq'] = 2
+        health['pools'] = {}
+        health['delta'] = True
+        self.hm.update_health(health, '192.0.2.1')
+        self.listener_repo.update.assert_called_once()
+        self.member_repo.update.assert_not_called()
+        self.pool_repo.update.assert_not_called()
+        self.loadbalancer_repo.update.assert_not_called()
+        self.assertEqual(2, self.amphora_health_repo.replace.call_count)
+
+    def test_update_health_status_cache_disabled(self):
+        health = {
+            "id": self.FAKE_UUID_1,
+            "ver": 1,
+            "listeners": {},
+            "recv_time": time.time()
+        }
+        lb_ref = self._make_fake_lb_health_dict(listener=False, pool=False)
+        self.amphora_repo.get_lb_for_health_update.return_value = lb_ref
+
+        self.hm.update_health(health, '192.0.2.1')
+        self.hm.update_health(health, '192.0.2.1')
+        self.assertEqual(
+            2, self.amphora_repo.get_lb_for_health_update.call_count)
+
+    def test_update_health_status_cache_lb_pending(self):
+        self.conf.config(group="health_manager",
+                         operating_status_cache_ttl=60)
+        health = {
+            "id": self.FAKE_UUID_1,
+            "ver": 1,
+            "listeners": {},
+            "recv_time": time.time()
+        }
+        lb_ref = self._make_fake_lb_health_dict(
+            listener=False, pool=False,
+            lb_prov_status=constants.PENDING_UPDATE)
+        self.amphora_repo.get_lb_for_health_update.return_value = lb_ref
+
+        self.hm.update_health(health, '192.0.2.1')
+        self.hm.update_health(health, '192.0.2.1')
+        self.assertEqual(
+            2, self.amphora_repo.get_lb_for_health_update.call_count)
+
+    def test_update_health_batch_status_cache(self):
+        self.conf.config(group="health_manager",
+                         operating_status_cache_ttl=60)
+        amphora_id_2 = uuidutils.generate_uuid()
+        health = {
+            "id": self.FAKE_UUID_1,
+            "ver": 1,
+            "seq": 1,
+            "listeners": {},
+            "recv_time": time.time()
+        }
+        health_2 = dict(health, id=amphora_id_2)
+        lb_ref = self._make_fake_lb_health_dict(listener=False, pool=False)
+        self.amphora_repo.get_lbs_for_health_update.return_value = {
+            self.FAKE_UUID_1: lb_ref}
+
+        self.hm.update_health_batch([(health, '192.0.2.1')])
+        self.amphora_repo.get_lbs_for_health_update.assert_called_once_with(
+            self.session_mock, [self.FAKE_UUID_1])
+
+        self.amphora_repo.get_lbs_for_health_update.reset_mock()
+        self.amphora_repo.get_lbs_for_health_update.return_value = {
+            amphora_id_2: lb_ref}
+        self.amphora_health_repo.replace_batch.reset_mock()
+        health = dict(health, seq=2)
+        self.hm.update_health_batch([(health, '192.0.2.1'),
+                                     (health_2, '192.0.2.2')])
+        self.amphora_repo.get_lbs_for_health_update.assert_called_once_with(
+            self.session_mock, [amphora_id_2])
+        self.amphora_health_repo.replace_batch.assert_called_once_with(
+            self.session_mock, [self.FAKE_UUID_1, amphora_id_2],
+            last_update=mock.ANY)
+
+        # Everything is cached, the DB is not read
+        self.amphora_repo.get_lbs_for_health_update.reset_mock()
+        self.hm.update_health_batch([(dict(health, seq=3), '192.0.2.1'),
+                                     (dict(health_2, seq=2), '192.0.2.2')])
+        self.amphora_repo.get_lbs_for_health_update.assert_not_called()
+
+    def test_update_health_batch_replace_error(self):
+        health = {
+            "id": self.FAKE_UUID_1,
+            "ver": 1,
+            "listeners": {},
+            "recv_time": time.time()
+        }
+
+        self.session_mock.commit.side_effect = TestException('boom')
+        lb_ref = self._make_fake_lb_health_dict(listener=False)
+        self.amphora_repo.get_lbs_for_health_update.return_value = {
+            self.FAKE_UUID_1: lb_ref}
+
+        self.hm.update_health_batch([(health, '192.0.2.1')])
+        self.assertTrue(self.amphora_health_repo.replace_batch.called)
+        self.session_mock.rollback.assert_called_once()
+        self.loadbalancer_repo.update.assert_not_called()
+
     def test_update_health_listener_disabled(self):
         health = {
             "id": self.FAKE_UUID_1,
@@ -1599,3 +2164,95 @@ class TestUpdateHealthDb(base.TestCase):
             'fake_session', self.loadbalancer_repo, constants.LOADBALANCER,
             1, 'ONLINE', 'OFFLINE')
         self.assertTrue(self.loadbalancer_repo.update.called)
+
+
+class TestOperatingStatusCache(base.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        self.conf.config(group="health_manager",
+                         operating_status_cache_ttl=10)
+        self.cache = heartbeat_udp.OperatingStatusCache()
+
+    def test_get_signature(self):
+        health = {
+            "id": FAKE_ID,
+            "ver": 1,
+            "listeners": {
+                "listener-id-1": {
+                    "status": constants.OPEN,
+                    "stats": {"conns": 1},
+                    "pools": {
+                        "pool-id-1": {"status": constants.UP,
+                                      "members": {
+                                          "member-id-1": constants.UP}}}}},
+            "recv_time": 1
+        }
+        signature = self.cache.get_signature(health)
+
+        # Stats, sequence numbers and receive times are ignored
+        health['listeners']['listener-id-1']['stats'] = {"conns": 2}
+        health['recv_time'] = 2
+        health['seq'] = 10
+        self.assertEqual(signature, self.cache.get_signature(health))
+
+        health['listeners']['listener-id-1']['pools']['pool-id-1'][
+            'members']['member-id-1'] = constants.DOWN
+        self.assertNotEqual(signature, self.cache.get_signature(health))
+
+    @mock.patch('time.monotonic')
+    def test_match(self, mock_monotonic):
+        mock_monotonic.return_value = 100
+        self.assertFalse(self.cache.match(FAKE_ID, 'sig', 1))
+
+        self.cache.set(FAKE_ID, 'sig', 1)
+        self.assertFalse(self.cache.match(FAKE_ID, 'other-sig', 2))
+        self.assertTrue(self.cache.match(FAKE_ID, 'sig', 2))
+        self.assertTrue(self.cache.match(FAKE_ID, 'sig', 3))
+
+        # Only the next heartbeat is trusted
+        self.assertFalse(self.cache.match(FAKE_ID, 'sig', 3))
+        self.assertFalse(self.cache.match(FAKE_ID, 'sig', 5))
+        self.assertFalse(self.cache.match(FAKE_ID, 'sig', None))
+
+        # Expired
+        self.cache.set(FAKE_ID, 'sig', 5)
+        mock_monotonic.return_value = 110
+        self.assertFalse(self.cache.match(FAKE_ID, 'sig', 6))
+        self.assertFalse(self.cache.match(FAKE_ID, 'sig', 6))
+
+    def test_match_other_process(self):
+        # The heartbeats of an amphora are handled by two processes
+        cache_a = self.cache
+        cache_b = heartbeat_udp.OperatingStatusCache()
+
+        cache_a.set(FAKE_ID, 'member-up', 1)
+        self.assertFalse(cache_b.match(FAKE_ID, 'member-down', 2))
+        cache_b.set(FAKE_ID, 'member-down', 2)
+
+        # The member is UP again, process B wrote DOWN in the meantime
+        self.assertFalse(cache_a.match(FAKE_ID, 'member-up', 3))
+        cache_a.set(FAKE_ID, 'member-up', 3)
+        self.assertFalse(cache_b.match(FAKE_ID, 'member-down', 4))
+        self.assertTrue(cache_a.match(FAKE_ID, 'member-up', 4))
+
+    @mock.patch('time.monotonic')
+    def test_set_purges_expired_entries(self, mock_monotonic):
+        mock_monotonic.return_value = 100
+        self.cache.set(1, 'sig', 1)
+        mock_monotonic.return_value = 105
+        self.cache.set(2, 'sig', 1)
+        mock_monotonic.return_value = 111
+        self.cache.set(3, 'sig', 1)
+        self.assertFalse(self.cache.match(1, 'sig', 2))
+        self.assertTrue(self.cache.match(2, 'sig', 2))
+        self.assertTrue(self.cache.match(3, 'sig', 2))
+        self.assertEqual(2, len(self.cache._entries))
+
+    def test_invalidate(self):
+        self.cache.set(FAKE_ID, 'sig', 1)
+        self.cache.invalidate(FAKE_ID)
+        self.assertFalse(self.cache.match(FAKE_ID, 'sig', 2))
+        # Invalidating a missing entry is fine
+        self.cache.invalidate(FAKE_ID)
@@ -12,6 +12,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import datetime
 from unittest import mock
 
 from oslo_config import cfg
@@ -243,3 +244,120 @@ class TestPaginationHelper(base.TestCase):
                 path=request_mock.path,
                 limit=params['limit'],
                 marker=member1.id))
+
+    @mock.patch('octavia.api.common.pagination.request')
+    def test_keyset_markers(self, request_mock):
+        request_mock.path = "/lbaas/v2/pools/1/members"
+        request_mock.path_url = "http://localhost" + request_mock.path
+        conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        conf.config(group='api_settings', pagination_keyset_markers=True)
+        member1 = models.Member()
+        member1.id = uuidutils.generate_uuid()
+        member1.created_at = datetime.datetime(2021, 1, 2, 3, 4, 5, 6)
+        query_mock = mock.MagicMock()
+        (query_mock.order_by().order_by().limit().all.
+         return_value) = [member1]
+
+        helper = pagination.PaginationHelper({'limit': 1})
+        _, links = helper.apply(query_mock, models.Member)
+        self.assertEqual(['created_at', 'id'], helper._keyset_keys)
+        self.assertEqual("next", links[0].rel)
+        marker = links[0].href.split('marker=')[1]
+        self.assertFalse(uuidutils.is_uuid_like(marker))
+
+        query_mock = mock.MagicMock()
+        (query_mock.order_by().order_by().filter().limit().all.
+         return_value) = [member1]
+        helper = pagination.PaginationHelper({'limit': 1, 'marker': marker})
+        helper.apply(query_mock, models.Member)
+        query_mock.session.query.assert_not_called()
+        self.assertEqual([member1.created_at, member1.id],
+                         helper._decode_keyset_marker(models.Member))
+
+    @mock.patch('octavia.api.common.pagination.request')
+    def test_keyset_markers_filter(self, request_mock):
+        conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        conf.config(group='api_settings', pagination_keyset_markers=True)
+        member1 = models.Member()
+        member1.id = uuidutils.generate_uuid()
+        member1.created_at = datetime.datetime(2021, 1, 2, 3, 4, 5)
+        helper = pagination.PaginationHelper({})
+        helper._keyset_keys = ['created_at', 'id']
+        marker = helper._encode_keyset_marker(member1)
+
+        # The columns are compared as is, so the index can be used
+        query_mock = mock.MagicMock()
+        helper = pagination.PaginationHelper({'marker': marker})
+        helper.apply(query_mock, models.Member)
+        criteria = query_mock.order_by().order_by().filter.call_args[0][0]
+        self.assertEqual(
+            'member.created_at >= :created_at_1 AND '
+            '(member.created_at > :created_at_2 OR '
+            'member.created_at = :created_at_3 AND member.id > :id_1)',
+            str(criteria))
+
+        query_mock = mock.MagicMock()
+        helper = pagination.PaginationHelper({'marker': marker,
+                                              'page_reverse': 'True'})
+        helper.apply(query_mock, models.Member)
+        criteria = query_mock.order_by().order_by().filter.call_args[0][0]
+        self.assertEqual(
+            'member.created_at <= :created_at_1 AND '
+            '(member.created_at < :created_at_2 OR '
+            'member.created_at = :created_at_3 AND member.id < :id_1)',
+            str(criteria))
+
+        # The NULL values of the other columns are still replaced
+        self.assertIn('CASE', str(helper._get_marker_attr(models.Member.name,
+                                                          True)))
+        self.assertIn('CASE', str(helper._get_marker_attr(
+            models.Member.created_at, False)))
+
+    def test_keyset_markers_disabled(self):
+        helper = pagination.PaginationHelper({})
+        self.assertIsNone(helper._get_keyset_keys(models.Member))
+
+    def test_keyset_markers_not_indexed(self):
+        conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        conf.config(group='api_settings', pagination_keyset_markers=True)
+        helper = pagination.PaginationHelper(
+            {'sort': 'name:asc,id:asc'})
+        self.assertIsNone(helper._get_keyset_keys(models.Member))
+
+        # Nested keys are not columns of the model table
+        helper = pagination.PaginationHelper(
+            {'sort': 'vip_address:asc,id:asc'})
+        self.assertIsNone(helper._get_keyset_keys(models.LoadBalancer))
+
+        # Without the ID, the sort keys may not be unique
+        helper = pagination.PaginationHelper({'sort': 'created_at:asc'})
+        self.assertIsNone(helper._get_keyset_keys(models.Member))
+
+        helper = pagination.PaginationHelper(
+            {'sort': 'pool_id:asc,id:asc'})
+        self.assertEqual(['pool_id', 'id'],
+                         helper._get_keyset_keys(models.Member))
+
+    def test_keyset_markers_invalid(self):
+        conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        conf.config(group='api_settings', pagination_keyset_markers=True)
+        member1 = models.Member()
+        member1.id = uuidutils.generate_uuid()
+        member1.created_at = datetime.datetime(2021, 1, 2, 3, 4, 5)
+        helper = pagination.PaginationHelper(
+            {'sort': 'created_at:asc,id:asc'})
+        helper._keyset_keys = helper._get_keyset_keys(models.Member)
+        marker = helper._encode_keyset_marker(member1)
+
+        helper = pagination.PaginationHelper({'marker': 'not-a-marker'})
+        helper._keyset_keys = ['created_at', 'id']
+        self.assertRaises(exceptions.InvalidMarker,
+                          helper._decode_keyset_marker, models.Member)
+
+        # The marker was not generated for these sort keys
+        helper = pagination.PaginationHelper(
+            {'marker': marker, 'sort': 'id:asc,created_at:asc'})
+        helper._keyset_keys = helper._get_keyset_keys(models.Member)
+        self.assertEqual(['id', 'created_at'], helper._keyset_keys)
+        self.assertRaises(exceptions.InvalidMarker,
+                          helper._decode_keyset_marker, models.Member)
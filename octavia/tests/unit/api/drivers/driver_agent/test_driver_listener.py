@@ -12,11 +12,13 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 import errno
+import io
 import socket
 import time
 from unittest import mock
 
 from oslo_config import cfg
+from oslo_config import fixture as oslo_fixture
 from oslo_serialization import jsonutils
 
 from octavia.api.drivers.driver_agent import driver_listener
@@ -37,256 +39,219 @@ class TestDriverListener(base.TestCase):
                 break
             time.sleep(.1)
 
-    @mock.patch('octavia.api.drivers.driver_agent.driver_listener.memoryview')
-    def test_recv(self, mock_memoryview):
-        # TEST_STRING len() is 15
-        TEST_STRING = '{"test": "msg"}'
-        ref_object = jsonutils.loads(TEST_STRING)
-
-        mock_recv_socket = mock.MagicMock()
-        mock_recv = mock.MagicMock()
-        mock_recv.side_effect = [b'1', b'5', b'\n']
-        mock_recv_socket.recv = mock_recv
-        mock_recv_socket.recv_into.return_value = 15
-        mock_mv_buffer = mock.MagicMock()
-        mock_tobytes = mock.MagicMock()
-        mock_tobytes.return_value = TEST_STRING
-        mock_mv_buffer.tobytes = mock_tobytes
-        mock_memoryview.return_value = mock_mv_buffer
-
-        result = driver_listener._recv(mock_recv_socket)
-
-        self.assertEqual(ref_object, result)
-        calls = [mock.call(1), mock.call(1), mock.call(1)]
-        mock_recv.assert_has_calls(calls)
-        mock_memoryview.assert_called_once_with(bytearray(15))
-        mock_recv_socket.recv_into.assert_called_once_with(mock_mv_buffer[0:],
-                                                           15)
+    def _frame(self, obj):
+        json_data = jsonutils.dump_as_bytes(obj)
+        return '{}\n'.format(len(json_data)).encode('utf-8') + json_data
+
+    def _mock_request(self, *messages):
+        mock_request = mock.MagicMock()
+        mock_request.makefile.return_value = io.BufferedReader(
+            io.BytesIO(b''.join(self._frame(msg) for msg in messages)))
+        return mock_request
+
+    def _mock_server(self):
+        mock_server = mock.MagicMock()
+        mock_server.updater_pool = driver_listener._DriverUpdaterPool()
+        return mock_server
+
+    def test_recv(self):
+        TEST_OBJECT = {"test": "msg"}
+        recv_file = io.BufferedReader(io.BytesIO(
+            self._frame(TEST_OBJECT) + self._frame([1, 2])))
+
+        self.assertEqual(TEST_OBJECT, driver_listener._recv(recv_file))
+        self.assertEqual([1, 2], driver_listener._recv(recv_file))
+        # The peer closed the connection
+        self.assertIsNone(driver_listener._recv(recv_file))
+
+    def test_recv_truncated(self):
+        recv_file = io.BufferedReader(io.BytesIO(b'15\n{"test"'))
+        self.assertRaises(EOFError, driver_listener._recv, recv_file)
+
+        recv_file = io.BufferedReader(io.BytesIO(b'1' * 64))
+        self.assertRaises(ValueError, driver_listener._recv, recv_file)
 
     @mock.patch('octavia.api.drivers.driver_agent.driver_updater.'
                 'DriverUpdater')
-    @mock.patch('octavia.api.drivers.driver_agent.driver_listener._recv')
-    def test_StatusRequestHandler_handle(self, mock_recv, mock_driverupdater):
+    def test_DriverUpdaterPool(self, mock_driverupdater):
+        mock_driverupdater.side_effect = [mock.MagicMock(), mock.MagicMock()]
+        pool = driver_listener._DriverUpdaterPool()
+
+        with pool.get() as updater1:
+            with pool.get() as updater2:
+                self.assertIsNot(updater1, updater2)
+        updater1.db_session.expunge_all.assert_called_once_with()
+        with pool.get() as updater3:
+            self.assertIs(updater1, updater3)
+        self.assertEqual(2, mock_driverupdater.call_count)
+
+        # A failed updater is not reused
+        try:
+            with pool.get() as updater4:
+                raise Exception('boom')
+        except Exception:
+            pass
+        with pool.get() as updater5:
+            self.assertIsNot(updater4, updater5)
+
+    @mock.patch('octavia.api.drivers.driver_agent.driver_updater.'
+                'DriverUpdater')
+    def test_StatusRequestHandler_handle(self, mock_driverupdater):
         TEST_OBJECT = {"test": "msg"}
-        mock_recv.return_value = 'bogus'
-        mock_updater = mock.MagicMock()
-        mock_update_loadbalancer_status = mock.MagicMock()
-        mock_update_loadbalancer_status.return_value = TEST_OBJECT
-        mock_updater.update_loadbalancer_status = (
-            mock_update_loadbalancer_status)
-        mock_driverupdater.return_value = mock_updater
-        mock_request = mock.MagicMock()
-        mock_send = mock.MagicMock()
-        mock_sendall = mock.MagicMock()
-        mock_request.send = mock_send
-        mock_request.sendall = mock_sendall
+        mock_updater = mock_driverupdater.return_value
+        mock_updater.update_loadbalancer_status.return_value = TEST_OBJECT
+        mock_request = self._mock_request('status1', 'status2')
 
-        StatusRequestHandler = driver_listener.StatusRequestHandler(
-            mock_request, 'bogus', 'bogus')
-        StatusRequestHandler.handle()
+        driver_listener.StatusRequestHandler(
+            mock_request, 'bogus', self._mock_server())
 
-        mock_recv.assert_called_with(mock_request)
-        mock_update_loadbalancer_status.assert_called_with('bogus')
-        mock_send.assert_called_with(b'15\n')
-        mock_sendall.assert_called_with(
-            jsonutils.dumps(TEST_OBJECT).encode('utf-8'))
+        # Both requests were served on the same connection and updater
+        mock_driverupdater.assert_called_once_with()
+        mock_updater.update_loadbalancer_status.assert_has_calls(
+            [mock.call('status1'), mock.call('status2')])
+        mock_request.sendall.assert_has_calls(
+            [mock.call(self._frame(TEST_OBJECT))] * 2)
 
     @mock.patch('octavia.api.drivers.driver_agent.driver_updater.'
                 'DriverUpdater')
     @mock.patch('octavia.api.drivers.driver_agent.driver_listener._recv')
     def test_StatusRequestHandler_handle_recv_timeout(self, mock_recv,
                                                       mock_driverupdater):
-        TEST_OBJECT = {"test": "msg"}
         mock_recv.side_effect = socket.timeout
-        mock_updater = mock.MagicMock()
-        mock_update_loadbalancer_status = mock.MagicMock()
-        mock_update_loadbalancer_status.return_value = TEST_OBJECT
-        mock_updater.update_loadbalancer_status = (
-            mock_update_loadbalancer_status)
-        mock_driverupdater.return_value = mock_updater
         mock_request = mock.MagicMock()
 
-        StatusRequestHandler = driver_listener.StatusRequestHandler(
-            mock_request, 'bogus', 'bogus')
-        StatusRequestHandler.handle()
+        driver_listener.StatusRequestHandler(
+            mock_request, 'bogus', self._mock_server())
 
-        mock_recv.assert_called_with(mock_request)
-        mock_update_loadbalancer_status.assert_not_called()
+        mock_recv.assert_called_once_with(mock_request.makefile.return_value)
+        (mock_driverupdater.return_value.update_loadbalancer_status.
+            assert_not_called())
+        mock_request.sendall.assert_not_called()
 
     @mock.patch('octavia.api.drivers.driver_agent.driver_updater.'
                 'DriverUpdater')
-    @mock.patch('octavia.api.drivers.driver_agent.driver_listener._recv')
-    def test_StatusRequestHandler_handle_send_timeout(self, mock_recv,
+    def test_StatusRequestHandler_handle_send_timeout(self,
                                                       mock_driverupdater):
         TEST_OBJECT = {"test": "msg"}
-        mock_recv.return_value = 'bogus'
-        mock_updater = mock.MagicMock()
-        mock_update_loadbalancer_status = mock.MagicMock()
-        mock_update_loadbalancer_status.return_value = TEST_OBJECT
-        mock_updater.update_loadbalancer_status = (
-            mock_update_loadbalancer_status)
-        mock_driverupdater.return_value = mock_updater
-        mock_request = mock.MagicMock()
-        mock_send = mock.MagicMock()
-        mock_send.side_effect = socket.timeout
-        mock_sendall = mock.MagicMock()
-        mock_request.send = mock_send
-        mock_request.sendall = mock_sendall
+        mock_updater = mock_driverupdater.return_value
+        mock_updater.update_loadbalancer_status.return_value = TEST_OBJECT
+        mock_request = self._mock_request('status1', 'status2')
+        mock_request.sendall.side_effect = socket.timeout
 
-        StatusRequestHandler = driver_listener.StatusRequestHandler(
-            mock_request, 'bogus', 'bogus')
-        StatusRequestHandler.handle()
+        driver_listener.StatusRequestHandler(
+            mock_request, 'bogus', self._mock_server())
 
-        mock_recv.assert_called_with(mock_request)
-        mock_update_loadbalancer_status.assert_called_with('bogus')
-        mock_send.assert_called_with(b'15\n')
-        mock_sendall.assert_not_called()
+        # The connection is dropped after the failed send
+        mock_updater.update_loadbalancer_status.assert_called_once_with(
+            'status1')
+        mock_request.sendall.assert_called_once_with(
+            self._frame(TEST_OBJECT))
 
     @mock.patch('octavia.api.drivers.driver_agent.driver_updater.'
                 'DriverUpdater')
-    @mock.patch('octavia.api.drivers.driver_agent.driver_listener._recv')
-    def test_StatsRequestHandler_handle(self, mock_recv, mock_driverupdater):
+    def test_StatsRequestHandler_handle(self, mock_driverupdater):
         TEST_OBJECT = {"test": "msg"}
-        mock_recv.return_value = 'bogus'
-        mock_updater = mock.MagicMock()
-        mock_update_listener_stats = mock.MagicMock()
-        mock_update_listener_stats.return_value = TEST_OBJECT
-        mock_updater.update_listener_statistics = (mock_update_listener_stats)
-        mock_driverupdater.return_value = mock_updater
-        mock_request = mock.MagicMock()
-        mock_send = mock.MagicMock()
-        mock_sendall = mock.MagicMock()
-        mock_request.send = mock_send
-        mock_request.sendall = mock_sendall
+        mock_updater = mock_driverupdater.return_value
+        mock_updater.update_listener_statistics.return_value = TEST_OBJECT
+        mock_request = self._mock_request('stats1', 'stats2')
 
-        StatsRequestHandler = driver_listener.StatsRequestHandler(
-            mock_request, 'bogus', 'bogus')
-        StatsRequestHandler.handle()
+        driver_listener.StatsRequestHandler(
+            mock_request, 'bogus', self._mock_server())
 
-        mock_recv.assert_called_with(mock_request)
-        mock_update_listener_stats.assert_called_with('bogus')
-        mock_send.assert_called_with(b'15\n')
-        mock_sendall.assert_called_with(jsonutils.dump_as_bytes(TEST_OBJECT))
+        mock_driverupdater.assert_called_once_with()
+        mock_updater.update_listener_statistics.assert_has_calls(
+            [mock.call('stats1'), mock.call('stats2')])
+        mock_request.sendall.assert_has_calls(
+            [mock.call(self._frame(TEST_OBJECT))] * 2)
 
     @mock.patch('octavia.api.drivers.driver_agent.driver_updater.'
                 'DriverUpdater')
     @mock.patch('octavia.api.drivers.driver_agent.driver_listener._recv')
     def test_StatsRequestHandler_handle_recv_timeout(self, mock_recv,
                                                      mock_driverupdater):
-        TEST_OBJECT = {"test": "msg"}
         mock_recv.side_effect = socket.timeout
-        mock_updater = mock.MagicMock()
-        mock_update_listener_stats = mock.MagicMock()
-        mock_update_listener_stats.return_value = TEST_OBJECT
-        mock_updater.update_listener_statistics = (mock_update_listener_stats)
-        mock_driverupdater.return_value = mock_updater
         mock_request = mock.MagicMock()
 
-        StatsRequestHandler = driver_listener.StatsRequestHandler(
-            mock_request, 'bogus', 'bogus')
-        StatsRequestHandler.handle()
+        driver_listener.StatsRequestHandler(
+            mock_request, 'bogus', self._mock_server())
 
-        mock_recv.assert_called_with(mock_request)
-        mock_update_listener_stats.assert_not_called()
-
-    @mock.patch('octavia.api.drivers.driver_agent.driver_updater.'
-                'DriverUpdater')
-    @mock.patch('octavia.api.drivers.driver_agent.driver_listener._recv')
-    def test_StatsRequestHandler_handle_send_timeout(self, mock_recv,
-                                                     mock_driverupdater):
-        TEST_OBJECT = {"test": "msg"}
-        mock_recv.return_value = 'bogus'
-        mock_updater = mock.MagicMock()
-        mock_update_listener_stats = mock.MagicMock()
-        mock_update_listener_stats.return_value = TEST_OBJECT
-        mock_updater.update_listener_statistics = (mock_update_listener_stats)
-        mock_driverupdater.return_value = mock_updater
-        mock_request = mock.MagicMock()
-        mock_send = mock.MagicMock()
-        mock_send.side_effect = socket.timeout
-        mock_sendall = mock.MagicMock()
-        mock_request.send = mock_send
-        mock_request.sendall = mock_sendall
-
-        StatsRequestHandler = driver_listener.StatsRequestHandler(
-            mock_request, 'bogus', 'bogus')
-        StatsRequestHandler.handle()
-
-        mock_recv.assert_called_with(mock_request)
-        mock_update_listener_stats.assert_called_with('bogus')
-        mock_send.assert_called_with(b'15\n')
-        mock_sendall.assert_not_called()
+        mock_recv.assert_called_once_with(mock_request.makefile.return_value)
+        (mock_driverupdater.return_value.update_listener_statistics.
+            assert_not_called())
+        mock_request.sendall.assert_not_called()
 
     @mock.patch('octavia.api.drivers.driver_agent.driver_get.'
                 'process_get')
-    @mock.patch('octavia.api.drivers.driver_agent.driver_listener._recv')
-    def test_GetRequestHandler_handle(self, mock_recv, mock_process_get):
+    def test_GetRequestHandler_handle(self, mock_process_get):
         TEST_OBJECT = {"test": "msg"}
-
-        mock_recv.return_value = 'bogus'
-
         mock_process_get.return_value = TEST_OBJECT
-        mock_request = mock.MagicMock()
-        mock_send = mock.MagicMock()
-        mock_sendall = mock.MagicMock()
-        mock_request.send = mock_send
-        mock_request.sendall = mock_sendall
+        mock_request = self._mock_request('get1', 'get2')
 
-        GetRequestHandler = driver_listener.GetRequestHandler(
-            mock_request, 'bogus', 'bogus')
-        GetRequestHandler.handle()
+        driver_listener.GetRequestHandler(
+            mock_request, 'bogus', self._mock_server())
 
-        mock_recv.assert_called_with(mock_request)
-        mock_process_get.assert_called_with('bogus')
-
-        mock_send.assert_called_with(b'15\n')
-        mock_sendall.assert_called_with(jsonutils.dump_as_bytes(TEST_OBJECT))
+        mock_process_get.assert_has_calls(
+            [mock.call('get1'), mock.call('get2')])
+        mock_request.sendall.assert_has_calls(
+            [mock.call(self._frame(TEST_OBJECT))] * 2)
 
     @mock.patch('octavia.api.drivers.driver_agent.driver_get.'
                 'process_get')
     @mock.patch('octavia.api.drivers.driver_agent.driver_listener._recv')
     def test_GetRequestHandler_handle_recv_timeout(self, mock_recv,
                                                    mock_process_get):
-        TEST_OBJECT = {"test": "msg"}
-
         mock_recv.side_effect = socket.timeout
-
-        mock_process_get.return_value = TEST_OBJECT
         mock_request = mock.MagicMock()
 
-        GetRequestHandler = driver_listener.GetRequestHandler(
-            mock_request, 'bogus', 'bogus')
-        GetRequestHandler.handle()
+        driver_listener.GetRequestHandler(
+            mock_request, 'bogus', self._mock_server())
 
-        mock_recv.assert_called_with(mock_request)
         mock_process_get.assert_not_called()
+        mock_request.sendall.assert_not_called()
 
     @mock.patch('octavia.api.drivers.driver_agent.driver_get.'
                 'process_get')
-    @mock.patch('octavia.api.drivers.driver_agent.driver_listener._recv')
-    def test_GetRequestHandler_handle_send_timeout(self, mock_recv,
-                                                   mock_process_get):
+    def test_GetRequestHandler_handle_send_timeout(self, mock_process_get):
         TEST_OBJECT = {"test": "msg"}
+        mock_process_get.return_value = TEST_OBJECT
+        mock_request = self._mock_request('get1', 'get2')
+        mock_request.sendall.side_effect = socket.timeout
 
-        mock_recv.return_value = 'bogus'
+        driver_listener.GetRequestHandler(
+            mock_request, 'bogus', self._mock_server())
 
-        mock_process_get.return_value = TEST_OBJECT
-        mock_request = mock.MagicMock()
-        mock_send = mock.MagicMock()
-        mock_send.side_effect = socket.timeout
-        mock_sendall = mock.MagicMock()
-        mock_request.send = mock_send
-        mock_request.sendall = mock_sendall
+        mock_process_get.assert_called_once_with('get1')
+
+    def test_FramedRequestHandler_idle_timeout(self):
+        self.conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        self.conf.config(group='driver_agent', connection_idle_timeout=7)
+        mock_request = self._mock_request()
 
-        GetRequestHandler = driver_listener.GetRequestHandler(
-            mock_request, 'bogus', 'bogus')
-        GetRequestHandler.handle()
+        driver_listener.GetRequestHandler(
+            mock_request, 'bogus', self._mock_server())
 
-        mock_recv.assert_called_with(mock_request)
-        mock_process_get.assert_called_with('bogus')
+        mock_request.settimeout.assert_called_once_with(7)
 
-        mock_send.assert_called_with(b'15\n')
-        mock_sendall.assert_not_called()
+    @mock.patch('octavia.api.drivers.driver_agent.driver_listener.'
+                'ThreadingUDSServer')
+    @mock.patch('octavia.api.drivers.driver_agent.driver_listener.'
+                'ForkingUDSServer')
+    def test_create_server(self, mock_forking_server, mock_threading_server):
+        self.conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+
+        server = driver_listener._create_server(
+            'fake_path', driver_listener.GetRequestHandler, 5)
+        self.assertIs(mock_forking_server.return_value, server)
+        self.assertEqual(5, server.max_children)
+        self.assertIsInstance(server.updater_pool,
+                              driver_listener._DriverUpdaterPool)
+
+        self.conf.config(group='driver_agent', server_mode='threading')
+        server = driver_listener._create_server(
+            'fake_path', driver_listener.GetRequestHandler, 5)
+        mock_threading_server.assert_called_once_with(
+            'fake_path', driver_listener.GetRequestHandler)
+        self.assertIs(mock_threading_server.return_value, server)
 
     @mock.patch('os.remove')
     def test_cleanup_socket_file(self, mock_remove):
@@ -11,6 +11,7 @@
 #    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
+import collections
 import copy
 from unittest import mock
 from unittest.mock import call
@@ -95,146 +96,179 @@ class TestDriverUpdater(base.TestCase):
         self.driver_updater._check_for_lb_vip_deallocate(mock_repo, 'bogus_id')
         mock_net_drvr.deallocate_vip.assert_not_called()
 
+    def test_group_status_records(self):
+        records = [
+            {"id": 1, lib_consts.PROVISIONING_STATUS: lib_consts.ACTIVE,
+             lib_consts.OPERATING_STATUS: lib_consts.ONLINE},
+            {"id": 2, lib_consts.PROVISIONING_STATUS: lib_consts.ACTIVE},
+            {"id": 3, lib_consts.OPERATING_STATUS: lib_consts.ONLINE},
+            {"id": 4, lib_consts.PROVISIONING_STATUS: lib_consts.ACTIVE,
+             lib_consts.OPERATING_STATUS: lib_consts.ONLINE},
+            {"id": 5, lib_consts.PROVISIONING_STATUS: lib_consts.DELETED},
+            {"id": 6}]
+
+        deleted_ids, status_groups = (
+            self.driver_updater._group_status_records('FakeName', records))
+
+        expected_status_groups = {
+            (lib_consts.ACTIVE, lib_consts.ONLINE): [1, 4],
+            (lib_consts.ACTIVE, None): [2],
+            (None, lib_consts.ONLINE): [3],
+            (lib_consts.DELETED, None): [5]}
+        self.assertEqual([5], deleted_ids)
+        self.assertEqual(expected_status_groups, status_groups)
+
+        # Test with no ID record
+        self.assertRaises(driver_exceptions.UpdateStatusError,
+                          self.driver_updater._group_status_records,
+                          'FakeName', [{"fake": "data"}])
+
+    def test_get_quota_decrements(self):
+        mock_session = mock.MagicMock()
+        mock_query = mock_session.query.return_value.filter.return_value
+        mock_query.__iter__.return_value = [
+            (1, 'project1', lib_consts.ACTIVE),
+            (2, 'project2', lib_consts.ERROR),
+            (3, 'project1', lib_consts.PENDING_DELETE),
+            (4, 'project1', lib_consts.DELETED)]
+        quota_decrements = collections.Counter()
+
+        missing_ids = self.driver_updater._get_quota_decrements(
+            mock_session, self.mock_lb_repo, 'FakeName', [1, 2, 3, 4, 5],
+            quota_decrements)
+
+        self.assertEqual({5}, missing_ids)
+        self.assertEqual(
+            {('project1', 'FakeName', self.lb_data_model): 2,
+             ('project2', 'FakeName', self.lb_data_model): 1},
+            quota_decrements)
+
+    @mock.patch('octavia.api.drivers.driver_agent.driver_updater.'
+                'DriverUpdater._get_quota_decrements')
     @mock.patch('octavia.db.repositories.Repositories.decrement_quota')
     @mock.patch('octavia.db.api.get_session')
-    def test_decrement_quota(self, mock_get_session, mock_dec_quota):
+    def test_apply_status_updates(self, mock_get_session, mock_dec_quota,
+                                  mock_get_quota_decrements):
         mock_session = mock.MagicMock()
         mock_get_session.return_value = mock_session
-        mock_dec_quota.side_effect = [mock.DEFAULT,
-                                      exceptions.OctaviaException('Boom')]
-
-        self.driver_updater._decrement_quota(self.mock_lb_repo,
-                                             'FakeName', self.lb_id)
-        mock_dec_quota.assert_called_once_with(
-            mock_session, self.mock_lb_repo.model_class.__data_model__,
-            self.lb_project_id)
+
+        def get_quota_decrements(session, repo, object_name, record_ids,
+                                 quota_decrements):
+            quota_decrements[('project2', object_name, 'FakeModel')] += 1
+            quota_decrements[('project1', object_name, 'FakeModel')] += 2
+            return {3}
+
+        mock_get_quota_decrements.side_effect = get_quota_decrements
+        member_groups = {
+            (lib_consts.ACTIVE, lib_consts.ONLINE): [4, 5],
+            (lib_consts.DELETED, None): [1, 2, 3]}
+        lb_groups = {(lib_consts.DELETED, lib_consts.OFFLINE): [6, 7]}
+        updates = [
+            (lib_consts.MEMBERS, self.mock_member_repo, True, [1, 2, 3],
+             member_groups),
+            (lib_consts.LOADBALANCERS, self.mock_lb_repo, False, [6, 7],
+             lb_groups)]
+
+        self.driver_updater._apply_status_updates(updates)
+
+        mock_get_session.assert_called_once_with(autocommit=False)
+        # One locked update per project and resource type
+        mock_dec_quota.assert_has_calls([
+            call(mock_session, 'FakeModel', 'project1', quantity=2),
+            call(mock_session, 'FakeModel', 'project1', quantity=2),
+            call(mock_session, 'FakeModel', 'project2', quantity=1),
+            call(mock_session, 'FakeModel', 'project2', quantity=1)])
+        # The missing member is neither deleted nor updated
+        self.mock_member_repo.delete.assert_has_calls(
+            [call(mock_session, id=1), call(mock_session, id=2)])
+        self.assertEqual(2, self.mock_member_repo.delete.call_count)
+        self.mock_member_repo.update_batch.assert_called_once_with(
+            mock_session, [4, 5], provisioning_status=lib_consts.ACTIVE,
+            operating_status=lib_consts.ONLINE)
+        # Load balancers are only marked DELETED
+        self.mock_lb_repo.delete.assert_not_called()
+        self.mock_lb_repo.update_batch.assert_called_once_with(
+            mock_session, [6, 7], provisioning_status=lib_consts.DELETED,
+            operating_status=lib_consts.OFFLINE)
         mock_session.commit.assert_called_once()
         mock_session.rollback.assert_not_called()
 
-        # Test exception path
+        # Test a failed update
+        mock_session.reset_mock()
         mock_dec_quota.reset_mock()
+        self.mock_member_repo.update_batch.side_effect = Exception('boom')
+        result = self.assertRaises(
+            driver_exceptions.UpdateStatusError,
+            self.driver_updater._apply_status_updates, updates)
+        self.assertEqual(lib_consts.MEMBERS, result.status_object)
+        self.assertIsNone(result.status_object_id)
+        mock_session.commit.assert_not_called()
+        mock_session.rollback.assert_called_once()
+
+        # Test a failed delete
         mock_session.reset_mock()
-        self.assertRaises(exceptions.OctaviaException,
-                          self.driver_updater._decrement_quota,
-                          self.mock_lb_repo, 'FakeName', self.lb_id)
-        mock_dec_quota.assert_called_once_with(
-            mock_session, self.mock_lb_repo.model_class.__data_model__,
-            self.lb_project_id)
+        self.mock_member_repo.delete.side_effect = [mock.DEFAULT,
+                                                    Exception('boom')]
+        result = self.assertRaises(
+            driver_exceptions.UpdateStatusError,
+            self.driver_updater._apply_status_updates, updates)
+        self.assertEqual(2, result.status_object_id)
         mock_session.commit.assert_not_called()
         mock_session.rollback.assert_called_once()
 
-        # Test already deleted path
-        mock_dec_quota.reset_mock()
+        # Test a failed quota decrement
         mock_session.reset_mock()
-        # Create a local mock LB and LB_repo for this test
-        mock_lb = mock.MagicMock()
-        mock_lb.id = self.lb_id
-        mock_lb.provisioning_status = lib_consts.DELETED
-        mock_lb_repo = mock.MagicMock()
-        mock_lb_repo.model_class.__data_model__ = self.lb_data_model
-        mock_lb_repo.get.return_value = mock_lb
-        self.driver_updater._decrement_quota(mock_lb_repo,
-                                             'FakeName', self.lb_id)
-        mock_dec_quota.assert_not_called()
+        mock_dec_quota.side_effect = exceptions.OctaviaException('Boom')
+        self.assertRaises(driver_exceptions.UpdateStatusError,
+                          self.driver_updater._apply_status_updates, updates)
         mock_session.commit.assert_not_called()
         mock_session.rollback.assert_called_once()
 
-    @mock.patch('octavia.api.drivers.driver_agent.driver_updater.'
-                'DriverUpdater._decrement_quota')
-    @mock.patch('octavia.api.drivers.driver_agent.driver_updater.'
-                'DriverUpdater._check_for_lb_vip_deallocate')
-    def test_process_status_update(self, mock_deallocate,
-                                   mock_decrement_quota):
-        mock_repo = mock.MagicMock()
-        list_dict = {"id": 2,
-                     lib_consts.PROVISIONING_STATUS: lib_consts.ACTIVE,
-                     lib_consts.OPERATING_STATUS: lib_consts.ONLINE}
-        list_prov_dict = {"id": 2,
-                          lib_consts.PROVISIONING_STATUS: lib_consts.ACTIVE}
-        list_oper_dict = {"id": 2,
-                          lib_consts.OPERATING_STATUS: lib_consts.ONLINE}
-        list_deleted_dict = {
-            "id": 2, lib_consts.PROVISIONING_STATUS: lib_consts.DELETED,
-            lib_consts.OPERATING_STATUS: lib_consts.ONLINE}
-
-        # Test with full record
-        self.driver_updater._process_status_update(mock_repo, 'FakeName',
-                                                   list_dict)
-        mock_repo.update.assert_called_once_with(
-            self.mock_session, 2, provisioning_status=lib_consts.ACTIVE,
-            operating_status=lib_consts.ONLINE)
-        mock_repo.delete.assert_not_called()
-
-        # Test with only provisioning status record
-        mock_repo.reset_mock()
-        self.driver_updater._process_status_update(mock_repo, 'FakeName',
-                                                   list_prov_dict)
-        mock_repo.update.assert_called_once_with(
-            self.mock_session, 2, provisioning_status=lib_consts.ACTIVE)
-        mock_repo.delete.assert_not_called()
-
-        # Test with only operating status record
-        mock_repo.reset_mock()
-        self.driver_updater._process_status_update(mock_repo, 'FakeName',
-                                                   list_oper_dict)
-        mock_repo.update.assert_called_once_with(
-            self.mock_session, 2, operating_status=lib_consts.ONLINE)
-        mock_repo.delete.assert_not_called()
-
-        # Test with deleted but delete_record False
-        mock_repo.reset_mock()
-        self.driver_updater._process_status_update(mock_repo, 'FakeName',
-                                                   list_deleted_dict)
-        mock_repo.update.assert_called_once_with(
-            self.mock_session, 2, provisioning_status=lib_consts.DELETED,
-            operating_status=lib_consts.ONLINE)
-        mock_repo.delete.assert_not_called()
-        mock_decrement_quota.assert_called_once_with(mock_repo, 'FakeName', 2)
-
-        # Test with an empty update
-        mock_repo.reset_mock()
-        self.driver_updater._process_status_update(mock_repo, 'FakeName',
-                                                   {"id": 2})
-        mock_repo.update.assert_not_called()
-        mock_repo.delete.assert_not_called()
-
-        # Test with deleted and delete_record True
-        mock_decrement_quota.reset_mock()
-        mock_repo.reset_mock()
-        self.driver_updater._process_status_update(
-            mock_repo, 'FakeName', list_deleted_dict, delete_record=True)
-        mock_repo.delete.assert_called_once_with(self.mock_session, id=2)
-        mock_repo.update.assert_not_called()
-        mock_decrement_quota.assert_called_once_with(mock_repo, 'FakeName', 2)
+    @mock.patch('octavia.db.api.get_session')
+    def test_apply_status_updates_not_found(self, mock_get_session):
+        mock_session = mock.MagicMock()
+        mock_get_session.return_value = mock_session
+        self.mock_list_repo.model_class.__data_model__ = (
+            data_models.Listener)
+        listener_groups = {
+            (lib_consts.ACTIVE, lib_consts.ONLINE): ['listener1',
+                                                     'listener2']}
+        updates = [(lib_consts.LISTENERS, self.mock_list_repo, True, [],
+                    listener_groups)]
+
+        self.mock_list_repo.update_batch.return_value = 2
+        self.driver_updater._apply_status_updates(updates)
+        mock_session.commit.assert_called_once()
 
-        # Test with LB Delete
-        mock_decrement_quota.reset_mock()
-        mock_repo.reset_mock()
-        self.driver_updater._process_status_update(
-            mock_repo, lib_consts.LOADBALANCERS, list_deleted_dict)
-        mock_deallocate.assert_called_once_with(mock_repo, 2)
-        mock_decrement_quota.assert_called_once_with(
-            mock_repo, lib_consts.LOADBALANCERS, 2)
-
-        # Test with an exception
-        mock_repo.reset_mock()
-        mock_repo.update.side_effect = Exception('boom')
-        self.assertRaises(driver_exceptions.UpdateStatusError,
-                          self.driver_updater._process_status_update,
-                          mock_repo, 'FakeName', list_dict)
+        # The listeners must exist
+        mock_session.reset_mock()
+        self.mock_list_repo.update_batch.return_value = 1
+        mock_session.query.return_value.filter.return_value = [
+            ('listener1',)]
+        result = self.assertRaises(
+            driver_exceptions.UpdateStatusError,
+            self.driver_updater._apply_status_updates, updates)
+        self.assertEqual(lib_consts.LISTENERS, result.status_object)
+        self.assertEqual('listener2', result.status_object_id)
+        mock_session.commit.assert_not_called()
+        mock_session.rollback.assert_called_once()
 
-        # Test with no ID record
-        mock_repo.reset_mock()
-        self.assertRaises(driver_exceptions.UpdateStatusError,
-                          self.driver_updater._process_status_update,
-                          mock_repo, 'FakeName', {"fake": "data"})
+        # Unknown members are ignored
+        mock_session.reset_mock()
+        self.mock_member_repo.update_batch.return_value = 1
+        updates = [(lib_consts.MEMBERS, self.mock_member_repo, True, [],
+                    listener_groups)]
+        self.driver_updater._apply_status_updates(updates)
+        mock_session.commit.assert_called_once()
 
     @mock.patch('octavia.api.drivers.driver_agent.driver_updater.'
-                'DriverUpdater._process_status_update')
-    def test_update_loadbalancer_status(self, mock_status_update):
-        mock_status_update.side_effect = [
-            mock.DEFAULT, mock.DEFAULT, mock.DEFAULT, mock.DEFAULT,
-            mock.DEFAULT, mock.DEFAULT, mock.DEFAULT,
+                'DriverUpdater._apply_status_updates')
+    @mock.patch('octavia.api.drivers.driver_agent.driver_updater.'
+                'DriverUpdater._check_for_lb_vip_deallocate')
+    def test_update_loadbalancer_status(self, mock_deallocate,
+                                        mock_apply_updates):
+        mock_apply_updates.side_effect = [
+            mock.DEFAULT,
             driver_exceptions.UpdateStatusError(
                 fault_string='boom', status_object='fruit',
                 status_object_id='1', status_record='grape'),
@@ -250,6 +284,8 @@ class TestDriverUpdater(base.TestCase):
         member_dict = {"id": 4,
                        lib_consts.PROVISIONING_STATUS: lib_consts.ACTIVE,
                        lib_consts.OPERATING_STATUS: lib_consts.ONLINE}
+        member2_dict = {"id": 8,
+                        lib_consts.PROVISIONING_STATUS: lib_consts.DELETED}
         hm_dict = {"id": 5, lib_consts.PROVISIONING_STATUS: lib_consts.ACTIVE,
                    lib_consts.OPERATING_STATUS: lib_consts.ONLINE}
         l7p_dict = {"id": 6, lib_consts.PROVISIONING_STATUS: lib_consts.ACTIVE,
@@ -259,35 +295,38 @@ class TestDriverUpdater(base.TestCase):
         status_dict = {lib_consts.LOADBALANCERS: [lb_dict],
                        lib_consts.LISTENERS: [list_dict],
                        lib_consts.POOLS: [pool_dict],
-                       lib_consts.MEMBERS: [member_dict],
+                       lib_consts.MEMBERS: [member_dict, member2_dict],
                        lib_consts.HEALTHMONITORS: [hm_dict],
                        lib_consts.L7POLICIES: [l7p_dict],
                        lib_consts.L7RULES: [l7r_dict]}
+        active_online = (lib_consts.ACTIVE, lib_consts.ONLINE)
 
         result = self.driver_updater.update_loadbalancer_status(
             copy.deepcopy(status_dict))
 
-        calls = [call(self.mock_member_repo, lib_consts.MEMBERS, member_dict,
-                      delete_record=True),
-                 call(self.mock_health_repo, lib_consts.HEALTHMONITORS,
-                      hm_dict, delete_record=True),
-                 call(self.mock_pool_repo, lib_consts.POOLS, pool_dict,
-                      delete_record=True),
-                 call(self.mock_l7r_repo, lib_consts.L7RULES, l7r_dict,
-                      delete_record=True),
-                 call(self.mock_l7p_repo, lib_consts.L7POLICIES, l7p_dict,
-                      delete_record=True),
-                 call(self.mock_list_repo, lib_consts.LISTENERS, list_dict,
-                      delete_record=True),
-                 call(self.mock_lb_repo, lib_consts.LOADBALANCERS,
-                      lb_dict)]
-        mock_status_update.assert_has_calls(calls)
+        # All of the object types are applied together, children first
+        mock_apply_updates.assert_called_once_with([
+            (lib_consts.MEMBERS, self.mock_member_repo, True, [8],
+             {active_online: [4], (lib_consts.DELETED, None): [8]}),
+            (lib_consts.HEALTHMONITORS, self.mock_health_repo, True, [],
+             {active_online: [5]}),
+            (lib_consts.POOLS, self.mock_pool_repo, True, [],
+             {active_online: [3]}),
+            (lib_consts.L7RULES, self.mock_l7r_repo, True, [],
+             {active_online: [7]}),
+            (lib_consts.L7POLICIES, self.mock_l7p_repo, True, [],
+             {active_online: [6]}),
+            (lib_consts.LISTENERS, self.mock_list_repo, True, [],
+             {active_online: [2]}),
+            (lib_consts.LOADBALANCERS, self.mock_lb_repo, False, [],
+             {active_online: [1]})])
+        mock_deallocate.assert_not_called()
         self.assertEqual(self.ref_ok_response, result)
 
         # Test empty status updates
-        mock_status_update.reset_mock()
+        mock_apply_updates.reset_mock()
         result = self.driver_updater.update_loadbalancer_status({})
-        mock_status_update.assert_not_called()
+        mock_apply_updates.assert_not_called()
         self.assertEqual(self.ref_ok_response, result)
 
         # Test UpdateStatusError case
@@ -307,6 +346,31 @@ class TestDriverUpdater(base.TestCase):
             lib_consts.STATUS_CODE: lib_consts.DRVR_STATUS_CODE_FAILED,
             lib_consts.FAULT_STRING: 'boom'}, result)
 
+        # Test with LB Delete
+        mock_apply_updates.reset_mock()
+        mock_apply_updates.side_effect = None
+        lb_deleted_dict = {
+            "id": 1, lib_consts.PROVISIONING_STATUS: lib_consts.DELETED}
+        result = self.driver_updater.update_loadbalancer_status(
+            {lib_consts.LOADBALANCERS: [lb_deleted_dict]})
+        mock_deallocate.assert_called_once_with(self.mock_lb_repo, 1)
+        mock_apply_updates.assert_called_once_with([
+            (lib_consts.LOADBALANCERS, self.mock_lb_repo, False, [1],
+             {(lib_consts.DELETED, None): [1]})])
+        self.assertEqual(self.ref_ok_response, result)
+
+        # Test a failed VIP deallocation
+        mock_apply_updates.reset_mock()
+        mock_deallocate.side_effect = Exception('boom')
+        result = self.driver_updater.update_loadbalancer_status(
+            {lib_consts.LOADBALANCERS: [lb_deleted_dict]})
+        mock_apply_updates.assert_not_called()
+        self.assertEqual({
+            lib_consts.STATUS_CODE: lib_consts.DRVR_STATUS_CODE_FAILED,
+            lib_consts.FAULT_STRING: 'boom',
+            lib_consts.STATUS_OBJECT: lib_consts.LOADBALANCERS,
+            lib_consts.STATUS_OBJECT_ID: 1}, result)
+
     @mock.patch('time.time')
     @mock.patch('octavia.statistics.stats_base.update_stats_via_driver')
     def test_update_listener_statistics(self, mock_stats_base, mock_time):
@@ -19,6 +19,7 @@ import oslo_messaging as messaging
 from oslo_messaging import conffixture as messaging_conffixture
 import testtools
 
+from octavia.certificates.manager import cached
 from octavia.common import clients
 from octavia.common import rpc
 
@@ -37,6 +38,7 @@ class TestCase(testtools.TestCase):
     def clean_caches(self):
         clients.NovaAuth.nova_client = None
         clients.NeutronAuth.neutron_client = None
+        cached.clear()
 
 
 class TestRpc(testtools.TestCase):
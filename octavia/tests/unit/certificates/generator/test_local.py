@@ -12,12 +12,15 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 import datetime
+from unittest import mock
 
 from cryptography import exceptions as crypto_exceptions
 from cryptography.hazmat import backends
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives import serialization
 from cryptography import x509
+from oslo_config import cfg
+from oslo_config import fixture as oslo_fixture
 
 import octavia.certificates.generator.local as local_cert_gen
 from octavia.tests.unit.certificates.generator import local_csr
@@ -181,3 +184,78 @@ class TestLocalGenerator(local_csr.BaseLocalCSRTestCase):
             password=cert_object.private_key_passphrase,
             backend=backends.default_backend())
         self.assertIsNotNone(key)
+
+    @mock.patch('octavia.certificates.generator.local.get_key_pool')
+    def test_generate_cert_key_pair_key_pool(self, mock_get_key_pool):
+        pool_key = local_cert_gen._new_private_key(512)
+        key_pool = mock_get_key_pool.return_value
+        key_pool.bit_length = 512
+        key_pool.get.side_effect = [pool_key, None]
+
+        for expected_key in (pool_key, None):
+            cert_object = self.cert_generator.generate_cert_key_pair(
+                cn='testCN',
+                validity=2 * 365 * 24 * 60 * 60,
+                bit_length=512,
+                ca_cert=self.ca_certificate,
+                ca_key=self.ca_private_key,
+                ca_key_pass=self.ca_private_key_passphrase
+            )
+            key = serialization.load_pem_private_key(
+                data=cert_object.private_key, password=None,
+                backend=backends.default_backend())
+            cert = x509.load_pem_x509_certificate(
+                data=cert_object.certificate,
+                backend=backends.default_backend())
+            self.assertEqual(key.public_key().public_numbers(),
+                             cert.public_key().public_numbers())
+            if expected_key:
+                self.assertEqual(expected_key.private_numbers(),
+                                 key.private_numbers())
+        self.assertEqual(2, key_pool.get.call_count)
+
+        # Keys of another length are not taken from the pool
+        key_pool.get.reset_mock()
+        key_pool.bit_length = 2048
+        self.cert_generator._generate_private_key(512)
+        key_pool.get.assert_not_called()
+
+    @mock.patch('octavia.certificates.generator.local._new_private_key')
+    def test_private_key_pool(self, mock_new_private_key):
+        mock_new_private_key.side_effect = [
+            mock.sentinel.key1, mock.sentinel.key2, Exception('boom')]
+
+        key_pool = local_cert_gen.PrivateKeyPool(2, bit_length=512)
+        # The thread stops after failing to generate the third key
+        key_pool._thread.join(10)
+
+        self.assertFalse(key_pool._thread.is_alive())
+        mock_new_private_key.assert_called_with(512)
+        self.assertEqual(mock.sentinel.key1, key_pool.get())
+        self.assertEqual(mock.sentinel.key2, key_pool.get())
+        self.assertIsNone(key_pool.get())
+
+    @mock.patch('os.getpid')
+    @mock.patch('octavia.certificates.generator.local.PrivateKeyPool')
+    def test_get_key_pool(self, mock_pool, mock_getpid):
+        conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        self.addCleanup(setattr, local_cert_gen, '_KEY_POOL', None)
+        local_cert_gen._KEY_POOL = None
+        mock_getpid.return_value = 1
+        mock_pool.return_value.pid = 1
+
+        conf.config(group='certificates', private_key_pool_size=0)
+        self.assertIsNone(local_cert_gen.get_key_pool())
+        mock_pool.assert_not_called()
+
+        conf.config(group='certificates', private_key_pool_size=5)
+        self.assertEqual(mock_pool.return_value,
+                         local_cert_gen.get_key_pool())
+        self.assertEqual(mock_pool.return_value,
+                         local_cert_gen.get_key_pool())
+        mock_pool.assert_called_once_with(5)
+
+        # A forked process creates its own pool
+        mock_getpid.return_value = 2
+        local_cert_gen.get_key_pool()
+        self.assertEqual(2, mock_pool.call_count)
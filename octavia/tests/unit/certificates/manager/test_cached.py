@@ -0,0 +1,162 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from unittest import mock
+
+from oslo_config import cfg
+from oslo_config import fixture as oslo_fixture
+
+from octavia.certificates.manager import cached
+from octavia.common import exceptions
+import octavia.tests.unit.base as base
+
+
+class TestCachedCertManager(base.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        self.conf.config(group='certificates', cert_cache_ttl=60)
+        self.cert_manager = mock.MagicMock()
+        self.cert_manager.get_secret.side_effect = (
+            lambda context, ref: 'secret of ' + ref)
+        self.cached_mgr = cached.CachedCertManager(self.cert_manager)
+        self.context = mock.MagicMock(project_id='project1')
+
+    def test_get_cert(self):
+        cert = self.cert_manager.get_cert.return_value
+        cert.get_certificate.return_value = b'cert'
+        cert.get_private_key.return_value = b'key'
+        cert.get_intermediates.return_value = [b'imd']
+        cert.get_private_key_passphrase.return_value = None
+
+        for _ in range(2):
+            result = self.cached_mgr.get_cert(self.context, 'ref1',
+                                              check_only=True)
+            self.assertEqual(b'cert', result.get_certificate())
+            self.assertEqual(b'key', result.get_private_key())
+            self.assertEqual([b'imd'], result.get_intermediates())
+            self.assertIsNone(result.get_private_key_passphrase())
+        self.cert_manager.get_cert.assert_called_once_with(
+            self.context, 'ref1', resource_ref=None, check_only=True,
+            service_name=None)
+
+        # Another project gets its own copy
+        other_context = mock.MagicMock(project_id='project2')
+        self.cached_mgr.get_cert(other_context, 'ref1', check_only=True)
+        self.assertEqual(2, self.cert_manager.get_cert.call_count)
+
+        # Registering a consumer always goes to the cert manager
+        self.cached_mgr.get_cert(self.context, 'ref1')
+        self.assertEqual(3, self.cert_manager.get_cert.call_count)
+
+    def test_get_cert_error(self):
+        self.cert_manager.get_cert.side_effect = [
+            exceptions.CertificateRetrievalException(ref='ref1'),
+            mock.MagicMock()]
+        self.assertRaises(exceptions.CertificateRetrievalException,
+                          self.cached_mgr.get_cert,
+                          self.context, 'ref1', check_only=True)
+        # Failures are not cached
+        self.cached_mgr.get_cert(self.context, 'ref1', check_only=True)
+        self.assertEqual(2, self.cert_manager.get_cert.call_count)
+
+    def test_get_secret(self):
+        for _ in range(2):
+            self.assertEqual(
+                'secret of ref1',
+                self.cached_mgr.get_secret(self.context, 'ref1'))
+        self.cert_manager.get_secret.assert_called_once_with(self.context,
+                                                             'ref1')
+
+    @mock.patch('time.monotonic')
+    def test_get_secret_expired(self, mock_monotonic):
+        mock_monotonic.return_value = 1000
+        self.cached_mgr.get_secret(self.context, 'ref1')
+        mock_monotonic.return_value = 1059
+        self.cached_mgr.get_secret(self.context, 'ref1')
+        self.assertEqual(1, self.cert_manager.get_secret.call_count)
+
+        mock_monotonic.return_value = 1061
+        self.cached_mgr.get_secret(self.context, 'ref1')
+        self.assertEqual(2, self.cert_manager.get_secret.call_count)
+
+    def test_get_secret_disabled(self):
+        self.conf.config(group='certificates', cert_cache_ttl=0)
+        for _ in range(2):
+            self.cached_mgr.get_secret(self.context, 'ref1')
+        self.assertEqual(2, self.cert_manager.get_secret.call_count)
+
+    def test_cache_size(self):
+        self.conf.config(group='certificates', cert_cache_size=2)
+        self.cached_mgr.get_secret(self.context, 'ref1')
+        self.cached_mgr.get_secret(self.context, 'ref2')
+        # ref1 is used again, ref2 is the least recently used
+        self.cached_mgr.get_secret(self.context, 'ref1')
+        self.cached_mgr.get_secret(self.context, 'ref3')
+        self.assertEqual(3, self.cert_manager.get_secret.call_count)
+
+        self.cached_mgr.get_secret(self.context, 'ref1')
+        self.assertEqual(3, self.cert_manager.get_secret.call_count)
+        self.cached_mgr.get_secret(self.context, 'ref2')
+        self.assertEqual(4, self.cert_manager.get_secret.call_count)
+
+    def test_invalidate(self):
+        other_context = mock.MagicMock(project_id='project2')
+        self.cached_mgr.get_secret(self.context, 'ref1')
+        self.cached_mgr.get_secret(other_context, 'ref1')
+        self.cached_mgr.get_secret(self.context, 'ref2')
+        self.assertEqual(3, self.cert_manager.get_secret.call_count)
+
+        # The cache is shared by the cert managers of the process
+        cached.invalidate(['ref1', None])
+        other_mgr = cached.CachedCertManager(self.cert_manager)
+        other_mgr.get_secret(self.context, 'ref2')
+        self.assertEqual(3, self.cert_manager.get_secret.call_count)
+        other_mgr.get_secret(self.context, 'ref1')
+        other_mgr.get_secret(other_context, 'ref1')
+        self.assertEqual(5, self.cert_manager.get_secret.call_count)
+
+    def test_invalidate_while_loading(self):
+        def _get_secret(context, ref):
+            cached.invalidate([ref])
+            return 'old secret'
+        self.cert_manager.get_secret.side_effect = _get_secret
+        self.cached_mgr.get_secret(self.context, 'ref1')
+
+        # The secret loaded before the invalidation is not kept
+        self.cert_manager.get_secret.side_effect = None
+        self.cert_manager.get_secret.return_value = 'new secret'
+        self.assertEqual('new secret',
+                         self.cached_mgr.get_secret(self.context, 'ref1'))
+
+    def test_delete_cert(self):
+        self.cached_mgr.get_secret(self.context, 'ref1')
+        self.cached_mgr.delete_cert(self.context, 'ref1', 'resource_ref',
+                                    service_name='Octavia')
+        self.cert_manager.delete_cert.assert_called_once_with(
+            self.context, 'ref1', 'resource_ref', service_name='Octavia')
+        self.cached_mgr.get_secret(self.context, 'ref1')
+        self.assertEqual(2, self.cert_manager.get_secret.call_count)
+
+    def test_passthrough(self):
+        self.cached_mgr.store_cert(self.context, b'cert', b'key',
+                                   intermediates=[b'imd'], name='name')
+        self.cert_manager.store_cert.assert_called_once_with(
+            self.context, b'cert', b'key', intermediates=[b'imd'],
+            private_key_passphrase=None, expiration=None, name='name')
+        self.cached_mgr.set_acls(self.context, 'ref1')
+        self.cert_manager.set_acls.assert_called_once_with(self.context,
+                                                           'ref1')
+        self.cached_mgr.unset_acls(self.context, 'ref1')
+        self.cert_manager.unset_acls.assert_called_once_with(self.context,
+                                                             'ref1')
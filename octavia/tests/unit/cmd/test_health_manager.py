@@ -37,6 +37,7 @@ class TestHealthManagerCMD(base.TestCase):
         health_manager.hm_listener(mock_event)
         mock_getter.assert_called_once()
         self.assertEqual(2, getter_mock.check.call_count)
+        getter_mock.flush_health_batch.assert_called_once_with()
 
     @mock.patch('multiprocessing.Event')
     @mock.patch('futurist.periodics.PeriodicWorker.start')
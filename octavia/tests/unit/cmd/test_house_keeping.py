@@ -40,6 +40,7 @@ class TestHouseKeepingCMD(base.TestCase):
 
         mock_DatabaseCleanup.assert_called_once_with()
         self.assertEqual(1, db_cleanup.delete_old_amphorae.call_count)
+        db_cleanup.cleanup_statistics_history.assert_called_once_with()
 
     @mock.patch('octavia.cmd.house_keeping.cert_rotate_thread_event')
     @mock.patch('octavia.controller.housekeeping.'
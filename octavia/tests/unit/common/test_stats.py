@@ -16,7 +16,6 @@ from unittest import mock
 
 from oslo_utils import uuidutils
 
-from octavia.common import constants
 from octavia.common import data_models
 from octavia.common import stats
 from octavia.tests.unit import base
@@ -30,66 +29,61 @@ class TestStatsMixin(base.TestCase):
 
         self.session = mock.MagicMock()
         self.listener_id = uuidutils.generate_uuid()
-        self.amphora_id = uuidutils.generate_uuid()
+        self.lb_id = uuidutils.generate_uuid()
 
         self.repo_listener_stats = mock.MagicMock()
         self.sm.listener_stats_repo = self.repo_listener_stats
 
         self.fake_stats = data_models.ListenerStatistics(
             listener_id=self.listener_id,
-            amphora_id=self.amphora_id,
             bytes_in=random.randrange(1000000000),
             bytes_out=random.randrange(1000000000),
             active_connections=random.randrange(1000000000),
             total_connections=random.randrange(1000000000),
             request_errors=random.randrange(1000000000))
 
-        self.sm.listener_stats_repo.get_all.return_value = ([self.fake_stats],
-                                                            None)
-
-        self.repo_amphora = mock.MagicMock()
-        self.sm.repo_amphora = self.repo_amphora
-
     def test_get_listener_stats(self):
-        fake_amp = mock.MagicMock()
-        fake_amp.status = constants.AMPHORA_ALLOCATED
-        self.sm.repo_amphora.get.return_value = fake_amp
+        self.repo_listener_stats.get_listeners_stats.return_value = {
+            self.listener_id: self.fake_stats}
 
         ls_stats = self.sm.get_listener_stats(
             self.session, self.listener_id)
-        self.repo_listener_stats.get_all.assert_called_once_with(
-            self.session, listener_id=self.listener_id)
-        self.repo_amphora.get.assert_called_once_with(
-            self.session, id=self.amphora_id)
-
-        self.assertEqual(self.fake_stats.bytes_in, ls_stats.bytes_in)
-        self.assertEqual(self.fake_stats.bytes_out, ls_stats.bytes_out)
-        self.assertEqual(
-            self.fake_stats.active_connections, ls_stats.active_connections)
-        self.assertEqual(
-            self.fake_stats.total_connections, ls_stats.total_connections)
-        self.assertEqual(
-            self.fake_stats.request_errors, ls_stats.request_errors)
-        self.assertEqual(self.listener_id, ls_stats.listener_id)
-        self.assertIsNone(ls_stats.amphora_id)
+        self.repo_listener_stats.get_listeners_stats.assert_called_once_with(
+            self.session, [self.listener_id])
+        self.assertIs(self.fake_stats, ls_stats)
 
-    def test_get_listener_stats_with_amphora_deleted(self):
-        fake_amp = mock.MagicMock()
-        fake_amp.status = constants.DELETED
-        self.sm.repo_amphora.get.return_value = fake_amp
+    def test_get_listener_stats_not_found(self):
+        self.repo_listener_stats.get_listeners_stats.return_value = {}
 
         ls_stats = self.sm.get_listener_stats(self.session, self.listener_id)
-        self.repo_listener_stats.get_all.assert_called_once_with(
-            self.session, listener_id=self.listener_id)
-        self.repo_amphora.get.assert_called_once_with(
-            self.session, id=self.amphora_id)
-
-        self.assertEqual(self.fake_stats.bytes_in, ls_stats.bytes_in)
-        self.assertEqual(self.fake_stats.bytes_out, ls_stats.bytes_out)
-        self.assertEqual(0, ls_stats.active_connections)
-        self.assertEqual(
-            self.fake_stats.total_connections, ls_stats.total_connections)
-        self.assertEqual(
-            self.fake_stats.request_errors, ls_stats.request_errors)
+
         self.assertEqual(self.listener_id, ls_stats.listener_id)
-        self.assertIsNone(ls_stats.amphora_id)
+        self.assertEqual({'bytes_in': 0, 'bytes_out': 0,
+                          'active_connections': 0, 'total_connections': 0,
+                          'request_errors': 0}, ls_stats.get_stats())
+
+    def test_get_loadbalancer_stats(self):
+        lb_stats = data_models.LoadBalancerStatistics(
+            listeners=[self.fake_stats], **self.fake_stats.get_stats())
+        self.repo_listener_stats.get_loadbalancers_stats.return_value = {
+            self.lb_id: lb_stats}
+
+        result = self.sm.get_loadbalancer_stats(self.session, self.lb_id)
+
+        get_stats = self.repo_listener_stats.get_loadbalancers_stats
+        get_stats.assert_called_once_with(self.session, [self.lb_id])
+        self.assertIs(lb_stats, result)
+
+    def test_get_loadbalancers_stats(self):
+        lb_id2 = uuidutils.generate_uuid()
+        all_stats = {self.lb_id: data_models.LoadBalancerStatistics(),
+                     lb_id2: data_models.LoadBalancerStatistics()}
+        self.repo_listener_stats.get_loadbalancers_stats.return_value = (
+            all_stats)
+
+        result = self.sm.get_loadbalancers_stats(self.session,
+                                                 [self.lb_id, lb_id2])
+
+        get_stats = self.repo_listener_stats.get_loadbalancers_stats
+        get_stats.assert_called_once_with(self.session, [self.lb_id, lb_id2])
+        self.assertEqual(all_stats, result)
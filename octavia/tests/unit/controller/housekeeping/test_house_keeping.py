@@ -152,6 +152,31 @@ class TestDatabaseCleanup(base.TestCase):
             else:
                 self.assertFalse(lb_repo.delete.called)
 
+    @mock.patch('octavia.db.api.get_session')
+    def test_cleanup_statistics_history(self, session):
+        self.CONF.config(group="house_keeping",
+                         stats_history_minute_retention=60,
+                         stats_history_hour_retention=3600,
+                         stats_history_day_retention=86400)
+        history_repo = mock.MagicMock()
+        history_repo.delete_expired.return_value = 1
+        self.dbclean.listener_stats_history_repo = history_repo
+
+        now = datetime.datetime.utcnow()
+        self.dbclean.cleanup_statistics_history()
+
+        self.assertEqual(3, history_repo.delete_expired.call_count)
+        for call, resolution in zip(
+                history_repo.delete_expired.call_args_list,
+                constants.STATS_HISTORY_RESOLUTIONS):
+            call_session, call_resolution, expiry = call[0]
+            self.assertEqual(session.return_value, call_session)
+            self.assertEqual(resolution, call_resolution)
+            self.assertLessEqual(
+                now - datetime.timedelta(seconds=resolution), expiry)
+            self.assertGreater(
+                now - datetime.timedelta(seconds=resolution - 10), expiry)
+
 
 class TestCertRotation(base.TestCase):
     def setUp(self):
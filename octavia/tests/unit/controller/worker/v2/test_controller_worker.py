@@ -455,6 +455,41 @@ class TestControllerWorker(base.TestCase):
         cw = controller_worker.ControllerWorker()
         cw.update_listener(listener_dict, LISTENER_UPDATE_DICT)
 
+    @mock.patch('octavia.certificates.manager.cached.invalidate')
+    def test_update_listener_cert_refs(self,
+                                       mock_invalidate,
+                                       mock_api_get_session,
+                                       mock_dyn_log_listener,
+                                       mock_taskflow_load,
+                                       mock_pool_repo_get,
+                                       mock_member_repo_get,
+                                       mock_l7rule_repo_get,
+                                       mock_l7policy_repo_get,
+                                       mock_listener_repo_get,
+                                       mock_lb_repo_get,
+                                       mock_health_mon_repo_get,
+                                       mock_amp_repo_get):
+        load_balancer_mock = mock.MagicMock()
+        load_balancer_mock.provisioning_status = constants.PENDING_UPDATE
+        load_balancer_mock.id = LB_ID
+        mock_lb_repo_get.return_value = load_balancer_mock
+
+        listener_dict = {constants.LISTENER_ID: LISTENER_ID,
+                         constants.LOADBALANCER_ID: LB_ID,
+                         constants.DEFAULT_TLS_CONTAINER_REF: 'old_ref',
+                         constants.SNI_CONTAINER_REFS: ['sni_ref'],
+                         constants.CLIENT_CA_TLS_CONTAINER_REF: 'ca_ref'}
+        cw = controller_worker.ControllerWorker()
+
+        # The certificate references are not updated
+        cw.update_listener(listener_dict, LISTENER_UPDATE_DICT)
+        mock_invalidate.assert_not_called()
+
+        cw.update_listener(listener_dict,
+                           {constants.DEFAULT_TLS_CONTAINER_REF: 'new_ref'})
+        mock_invalidate.assert_called_once_with(
+            ['new_ref', None, None, 'old_ref', 'ca_ref', None, 'sni_ref'])
+
     def test_create_load_balancer_single_no_anti_affinity(
             self, mock_api_get_session,
             mock_dyn_log_listener, mock_taskflow_load, mock_pool_repo_get,
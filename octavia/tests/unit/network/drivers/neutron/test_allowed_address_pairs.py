@@ -1030,80 +1030,26 @@ class TestAllowedAddressPairsDriver(base.TestCase):
         create_rule = self.driver.neutron_client.create_security_group_rule
         self.driver.update_vip(lb)
         delete_rule.assert_called_once_with('rule-22')
-        expected_create_rule_1 = {
-            'security_group_rule': {
-                'security_group_id': 'secgrp-1',
-                'direction': 'ingress',
-                'protocol': 'tcp',
-                'port_range_min': 1024,
-                'port_range_max': 1024,
-                'ethertype': 'IPv4',
-                'remote_ip_prefix': None
-            }
-        }
-        expected_create_rule_udp_peer = {
-            'security_group_rule': {
-                'security_group_id': 'secgrp-1',
-                'direction': 'ingress',
-                'protocol': 'tcp',
-                'port_range_min': 1026,
-                'port_range_max': 1026,
-                'ethertype': 'IPv4',
-                'remote_ip_prefix': None
-            }
-        }
-        expected_create_rule_2 = {
-            'security_group_rule': {
-                'security_group_id': 'secgrp-1',
-                'direction': 'ingress',
-                'protocol': 'tcp',
-                'port_range_min': 1025,
-                'port_range_max': 1025,
-                'ethertype': 'IPv4',
-                'remote_ip_prefix': None
-            }
-        }
-        expected_create_rule_3 = {
-            'security_group_rule': {
-                'security_group_id': 'secgrp-1',
-                'direction': 'ingress',
-                'protocol': 'tcp',
-                'port_range_min': 443,
-                'port_range_max': 443,
-                'ethertype': 'IPv4',
-                'remote_ip_prefix': '10.0.102.0/24'
-            }
-        }
-        expected_create_rule_4 = {
-            'security_group_rule': {
-                'security_group_id': 'secgrp-1',
-                'direction': 'ingress',
-                'protocol': 'tcp',
-                'port_range_min': 443,
-                'port_range_max': 443,
-                'ethertype': 'IPv4',
-                'remote_ip_prefix': '10.0.103.0/24'
-            }
-        }
-        expected_create_rule_udp = {
-            'security_group_rule': {
-                'security_group_id': 'secgrp-1',
-                'direction': 'ingress',
-                'protocol': 'udp',
-                'port_range_min': 50,
-                'port_range_max': 50,
-                'ethertype': 'IPv4',
-                'remote_ip_prefix': None
-            }
-        }
-
-        create_rule.assert_has_calls([mock.call(expected_create_rule_1),
-                                      mock.call(expected_create_rule_udp_peer),
-                                      mock.call(expected_create_rule_2),
-                                      mock.call(expected_create_rule_3),
-                                      mock.call(expected_create_rule_4),
-                                      mock.call(expected_create_rule_udp)],
-                                     any_order=True)
+        expected_rules = [
+            (1024, 'tcp', None),
+            (1026, 'tcp', None),
+            (1025, 'tcp', None),
+            (443, 'tcp', '10.0.102.0/24'),
+            (443, 'tcp', '10.0.103.0/24'),
+            (50, 'udp', None)]
+        # The missing rules are created with a single bulk request
+        create_rule.assert_called_once()
+        created_rules = create_rule.call_args[0][0]['security_group_rules']
+        self.assertCountEqual(
+            [{'security_group_id': 'secgrp-1',
+              'direction': 'ingress',
+              'protocol': protocol,
+              'port_range_min': port,
+              'port_range_max': port,
+              'ethertype': 'IPv4',
+              'remote_ip_prefix': cidr}
+             for port, protocol, cidr in expected_rules],
+            created_rules)
 
     def test_update_vip_when_protocol_and_peer_ports_overlap(self):
         lc_1 = data_models.ListenerCidr('l1', '0.0.0.0/0')
@@ -1131,9 +1077,11 @@ class TestAllowedAddressPairsDriver(base.TestCase):
         self.driver.update_vip(lb)
         delete_rule.assert_called_once_with('rule-22')
 
-        # Create SG rule calls should be 4, each for port 1024/1025/1026/443
+        # Create SG rules should be 4, each for port 1024/1025/1026/443
         # No duplicate SG creation for overlap port 1025
-        self.assertEqual(4, create_rule.call_count)
+        create_rule.assert_called_once()
+        self.assertEqual(4, len(
+            create_rule.call_args[0][0]['security_group_rules']))
 
     def test_update_vip_when_listener_deleted(self):
         listeners = [data_models.Listener(protocol_port=80,
@@ -1162,7 +1110,7 @@ class TestAllowedAddressPairsDriver(base.TestCase):
         create_rule = self.driver.neutron_client.create_security_group_rule
         self.driver.update_vip(lb)
         delete_rule.assert_has_calls(
-            [mock.call('rule-22'), mock.call('rule-udp-50')])
+            [mock.call('rule-22'), mock.call('rule-udp-50')], any_order=True)
         self.assertTrue(create_rule.called)
 
     def test_update_vip_when_no_listeners(self):
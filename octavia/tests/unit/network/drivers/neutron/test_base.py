@@ -153,6 +153,56 @@ class TestBaseNeutronNetworkDriver(base.TestCase):
         self.driver.neutron_client.create_security_group_rule.assert_has_calls(
             [mock.call(expected_sec_grp_rule_dict)])
 
+    def test__create_security_group_rules(self):
+        create_rule = self.driver.neutron_client.create_security_group_rule
+        rules = [
+            self.driver._build_security_group_rule(
+                t_constants.MOCK_SECURITY_GROUP_ID, 'tcp', port_min=port,
+                port_max=port, ethertype='IPv4', cidr='10.0.0.0/24')
+            for port in (80, 443)]
+        self.driver._create_security_group_rules(rules)
+        create_rule.assert_called_once_with({'security_group_rules': [
+            {'security_group_id': t_constants.MOCK_SECURITY_GROUP_ID,
+             'direction': 'ingress',
+             'protocol': 'tcp',
+             'port_range_min': port,
+             'port_range_max': port,
+             'ethertype': 'IPv4',
+             'remote_ip_prefix': '10.0.0.0/24'} for port in (80, 443)]})
+
+        create_rule.reset_mock()
+        self.driver._create_security_group_rules([])
+        create_rule.assert_not_called()
+
+    def test__delete_security_group_rules(self):
+        conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        delete_rule = self.driver.neutron_client.delete_security_group_rule
+        rule_ids = ['rule-1', 'rule-2', 'rule-3']
+
+        def fail_first_rule(rule_id):
+            if rule_id == 'rule-1':
+                raise neutron_client_exceptions.Conflict()
+
+        for concurrency in (1, 3):
+            conf.config(group='networking',
+                        security_group_rule_concurrency=concurrency)
+            delete_rule.reset_mock()
+            delete_rule.side_effect = [
+                None, neutron_client_exceptions.NotFound, None]
+            self.driver._delete_security_group_rules(rule_ids)
+            delete_rule.assert_has_calls(
+                [mock.call(rule_id) for rule_id in rule_ids], any_order=True)
+            self.assertEqual(3, delete_rule.call_count)
+
+            # All the rules are handled before the failure is raised
+            delete_rule.reset_mock()
+            delete_rule.side_effect = fail_first_rule
+            self.assertRaises(neutron_client_exceptions.Conflict,
+                              self.driver._delete_security_group_rules,
+                              rule_ids)
+            self.assertEqual(3 if concurrency > 1 else 1,
+                             delete_rule.call_count)
+
     def test__port_to_vip(self):
         lb = dmh.generate_load_balancer_tree()
         lb.vip.subnet_id = t_constants.MOCK_SUBNET_ID
@@ -0,0 +1,128 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from unittest import mock
+
+from oslo_config import cfg
+from oslo_config import fixture as oslo_fixture
+from oslo_utils import uuidutils
+
+from octavia.common import data_models
+from octavia.statistics.drivers import aggregator
+from octavia.tests.unit import base
+
+
+class TestStatsAggregator(base.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        self.conf.config(group="controller_worker",
+                         stats_aggregator_drivers=['stats_aggregator',
+                                                   'stats_db'])
+        self.amphora_id = uuidutils.generate_uuid()
+        self.listener_id = uuidutils.generate_uuid()
+
+        manager_patch = mock.patch('stevedore.named.NamedExtensionManager')
+        self.mock_manager = manager_patch.start()
+        self.addCleanup(manager_patch.stop)
+        self.mock_handlers = self.mock_manager.return_value
+        finalize_patch = mock.patch('multiprocessing.util.Finalize')
+        self.mock_finalize = finalize_patch.start()
+        self.addCleanup(finalize_patch.stop)
+        thread_patch = mock.patch('threading.Thread')
+        self.mock_thread = thread_patch.start()
+        self.addCleanup(thread_patch.stop)
+
+        self.aggregator = aggregator.StatsAggregator()
+
+    def _get_stats(self, value, listener_id=None):
+        return data_models.ListenerStatistics(
+            listener_id=listener_id or self.listener_id,
+            amphora_id=self.amphora_id, bytes_in=value, bytes_out=value,
+            active_connections=value, total_connections=value,
+            request_errors=value, received_time=value)
+
+    def test_init(self):
+        self.mock_manager.assert_called_once_with(
+            namespace='octavia.statistics.drivers', names=['stats_db'],
+            invoke_on_load=True, propagate_map_exceptions=False)
+        self.mock_finalize.assert_called_once_with(
+            self.aggregator, self.aggregator.stop, exitpriority=10)
+
+    def test_update_stats_deltas(self):
+        listener_id_2 = uuidutils.generate_uuid()
+        stats_1 = self._get_stats(1)
+        self.aggregator.update_stats([stats_1], deltas=True)
+        self.mock_thread.assert_called_once_with(
+            target=self.aggregator._flush_periodically, daemon=True)
+        self.mock_thread.return_value.start.assert_called_once_with()
+
+        self.aggregator.update_stats(
+            [self._get_stats(2), self._get_stats(4, listener_id_2)],
+            deltas=True)
+        self.aggregator.update_stats([self._get_stats(3)], deltas=True)
+        self.mock_thread.assert_called_once()
+        self.mock_handlers.map_method.assert_not_called()
+        # The stats passed to the driver are left untouched
+        self.assertEqual(1, stats_1.bytes_in)
+
+        self.aggregator.flush()
+        self.mock_handlers.map_method.assert_called_once_with(
+            'update_stats', mock.ANY, deltas=True)
+        flushed = {stats.listener_id: stats.to_dict() for stats in
+                   self.mock_handlers.map_method.call_args[0][1]}
+        self.assertEqual(
+            {self.listener_id: {
+                'listener_id': self.listener_id,
+                'amphora_id': self.amphora_id, 'bytes_in': 6,
+                'bytes_out': 6, 'active_connections': 3,
+                'total_connections': 6, 'request_errors': 6,
+                'received_time': 3},
+             listener_id_2: self._get_stats(4, listener_id_2).to_dict()},
+            flushed)
+
+        # Nothing left to flush
+        self.mock_handlers.map_method.reset_mock()
+        self.aggregator.flush()
+        self.mock_handlers.map_method.assert_not_called()
+
+    def test_update_stats_absolute(self):
+        self.aggregator.update_stats([self._get_stats(1)])
+        self.aggregator.update_stats([self._get_stats(2)])
+
+        self.aggregator.flush()
+        self.mock_handlers.map_method.assert_called_once_with(
+            'update_stats', mock.ANY, deltas=False)
+        flushed = self.mock_handlers.map_method.call_args[0][1]
+        self.assertEqual([self._get_stats(2).to_dict()],
+                         [stats.to_dict() for stats in flushed])
+
+    def test_flush_periodically(self):
+        self.conf.config(group="controller_worker",
+                         stats_aggregator_flush_interval=30)
+        self.aggregator.exit_event = mock.Mock()
+        self.aggregator.exit_event.wait.side_effect = [False, False, True]
+        self.aggregator.flush = mock.Mock()
+
+        self.aggregator._flush_periodically()
+
+        self.aggregator.exit_event.wait.assert_called_with(30)
+        self.assertEqual(2, self.aggregator.flush.call_count)
+
+    def test_stop(self):
+        self.aggregator.update_stats([self._get_stats(1)], deltas=True)
+
+        self.aggregator.stop()
+
+        self.assertTrue(self.aggregator.exit_event.is_set())
+        self.mock_handlers.map_method.assert_called_once_with(
+            'update_stats', mock.ANY, deltas=True)
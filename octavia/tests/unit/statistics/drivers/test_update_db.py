@@ -64,15 +64,11 @@ class TestStatsUpdateDb(base.TestCase):
         update_db.StatsUpdateDb().update_stats(
             [stats_1, stats_2], deltas=False)
 
-        mock_listener_stats_repo().replace.assert_has_calls([
-            mock.call(mock_get_session(), stats_1),
-            mock.call(mock_get_session(), stats_2)
-        ])
+        mock_listener_stats_repo().replace_batch.assert_called_once_with(
+            mock_get_session(), [stats_1, stats_2])
 
         update_db.StatsUpdateDb().update_stats(
             [stats_1, stats_2], deltas=True)
 
-        mock_listener_stats_repo().increment.assert_has_calls([
-            mock.call(mock_get_session(), stats_1),
-            mock.call(mock_get_session(), stats_2)
-        ])
+        mock_listener_stats_repo().increment_batch.assert_called_once_with(
+            mock_get_session(), [stats_1, stats_2])
@@ -0,0 +1,108 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import datetime
+from unittest import mock
+
+from oslo_utils import uuidutils
+
+from octavia.common import data_models
+from octavia.statistics.drivers import update_db_history
+from octavia.tests.unit import base
+
+
+class TestStatsUpdateDbHistory(base.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.amphora_id = uuidutils.generate_uuid()
+        self.listener_id = uuidutils.generate_uuid()
+        self.listener2_id = uuidutils.generate_uuid()
+        self.stats = [
+            data_models.ListenerStatistics(
+                listener_id=self.listener_id, amphora_id=self.amphora_id,
+                bytes_in=1, bytes_out=2, active_connections=3,
+                total_connections=4, request_errors=5),
+            data_models.ListenerStatistics(
+                listener_id=self.listener_id,
+                amphora_id=uuidutils.generate_uuid(),
+                bytes_in=10, bytes_out=20, active_connections=30,
+                total_connections=40, request_errors=50),
+            data_models.ListenerStatistics(
+                listener_id=self.listener2_id, amphora_id=self.amphora_id,
+                bytes_in=100, bytes_out=200, active_connections=300,
+                total_connections=400, request_errors=500)]
+
+    def _test_update_stats(self, deltas, mock_get_session,
+                           mock_listener_stats_repo, mock_history_repo):
+        listener_stats_repo = mock_listener_stats_repo.return_value
+        listener_stats_repo.get_deltas.return_value = self.stats
+        listener_stats_repo.get_listeners_stats.return_value = {
+            self.listener_id: data_models.ListenerStatistics(
+                listener_id=self.listener_id, active_connections=33)}
+
+        update_db_history.StatsUpdateDbHistory().update_stats(
+            self.stats, deltas=deltas)
+
+        session = mock_get_session.return_value
+        if deltas:
+            listener_stats_repo.get_deltas.assert_not_called()
+            listener_stats_repo.increment_batch.assert_called_once_with(
+                session, self.stats)
+        else:
+            listener_stats_repo.get_deltas.assert_called_once_with(
+                session, self.stats)
+            listener_stats_repo.replace_batch.assert_called_once_with(
+                session, self.stats)
+        listener_stats_repo.get_listeners_stats.assert_called_once_with(
+            session, [self.listener_id, self.listener2_id])
+
+        mock_history_repo.return_value.add_batch.assert_called_once_with(
+            session, mock.ANY, mock.ANY)
+        _, history, timestamp = (
+            mock_history_repo.return_value.add_batch.call_args[0])
+        self.assertIsInstance(timestamp, datetime.datetime)
+        self.assertEqual(
+            [(self.listener_id,
+              {'bytes_in': 11, 'bytes_out': 22, 'active_connections': 33,
+               'total_connections': 44, 'request_errors': 55}),
+             # Without stored statistics, no active connections
+             (self.listener2_id,
+              {'bytes_in': 100, 'bytes_out': 200, 'active_connections': 0,
+               'total_connections': 400, 'request_errors': 500})],
+            [(stats.listener_id, stats.get_stats()) for stats in history])
+
+    @mock.patch('octavia.db.repositories.ListenerStatisticsHistoryRepository')
+    @mock.patch('octavia.db.repositories.ListenerStatisticsRepository')
+    @mock.patch('octavia.db.api.get_session')
+    def test_update_stats_absolute(self, mock_get_session,
+                                   mock_listener_stats_repo,
+                                   mock_history_repo):
+        self._test_update_stats(False, mock_get_session,
+                                mock_listener_stats_repo, mock_history_repo)
+
+    @mock.patch('octavia.db.repositories.ListenerStatisticsHistoryRepository')
+    @mock.patch('octavia.db.repositories.ListenerStatisticsRepository')
+    @mock.patch('octavia.db.api.get_session')
+    def test_update_stats_deltas(self, mock_get_session,
+                                 mock_listener_stats_repo,
+                                 mock_history_repo):
+        self._test_update_stats(True, mock_get_session,
+                                mock_listener_stats_repo, mock_history_repo)
+
+    @mock.patch('octavia.db.repositories.ListenerStatisticsHistoryRepository')
+    @mock.patch('octavia.db.repositories.ListenerStatisticsRepository')
+    @mock.patch('octavia.db.api.get_session')
+    def test_update_stats_empty(self, mock_get_session,
+                                mock_listener_stats_repo, mock_history_repo):
+        update_db_history.StatsUpdateDbHistory().update_stats([])
+        mock_get_session.assert_not_called()
+        mock_history_repo.return_value.add_batch.assert_not_called()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+
+"""Compare the lazy and eager loading of a load balancer graph.
+
+For every combination of listener and member counts, this populates a
+database with a load balancer that has one pool per listener, with the
+requested number of members each, then times LoadBalancerRepository.get
+with the eager loading query options against the same call lazy loading
+every relationship, and reports the number of queries of both.
+
+By default an in-memory sqlite database is used. To evaluate the loading
+against a real database, point --connection to an empty database that was
+created with "octavia-db-manage upgrade head". The synthetic records are
+removed when the run completes.
+"""
+
+import argparse
+import sys
+import timeit
+
+from oslo_db.sqlalchemy import session as db_session
+from oslo_utils import uuidutils
+from sqlalchemy import event
+
+from octavia.common import constants
+from octavia.db import base_models
+from octavia.db import models
+from octavia.db import repositories
+
+
+def populate(session, listener_count, member_count):
+    project_id = uuidutils.generate_uuid()
+    lb_id = uuidutils.generate_uuid()
+    listeners = []
+    pools = []
+    members = []
+    for port in range(listener_count):
+        pool_id = uuidutils.generate_uuid()
+        pools.append({'id': pool_id, 'project_id': project_id,
+                      'load_balancer_id': lb_id,
+                      'protocol': constants.PROTOCOL_HTTP,
+                      'lb_algorithm': constants.LB_ALGORITHM_ROUND_ROBIN,
+                      'provisioning_status': constants.ACTIVE,
+                      'operating_status': constants.ONLINE,
+                      'enabled': True})
+        listeners.append({'id': uuidutils.generate_uuid(),
+                          'project_id': project_id,
+                          'load_balancer_id': lb_id,
+                          'default_pool_id': pool_id,
+                          'protocol': constants.PROTOCOL_HTTP,
+                          'protocol_port': port + 1,
+                          'provisioning_status': constants.ACTIVE,
+                          'operating_status': constants.ONLINE,
+                          'enabled': True})
+        for member_port in range(member_count):
+            members.append({'id': uuidutils.generate_uuid(),
+                            'project_id': project_id,
+                            'pool_id': pool_id,
+                            'ip_address': '192.0.2.1',
+                            'protocol_port': member_port + 1,
+                            'provisioning_status': constants.ACTIVE,
+                            'operating_status': constants.ONLINE,
+                            'enabled': True,
+                            'backup': False})
+
+    with session.begin():
+        session.bulk_insert_mappings(models.LoadBalancer, [{
+            'id': lb_id, 'project_id': project_id,
+            'provisioning_status': constants.ACTIVE,
+            'operating_status': constants.ONLINE,
+            'enabled': True}])
+        session.bulk_insert_mappings(models.Vip, [{
+            'load_balancer_id': lb_id, 'ip_address': '203.0.113.1'}])
+        session.bulk_insert_mappings(models.Amphora, [{
+            'id': uuidutils.generate_uuid(), 'load_balancer_id': lb_id,
+            'compute_id': uuidutils.generate_uuid(),
+            'status': constants.AMPHORA_ALLOCATED, 'cert_busy': False}])
+        session.bulk_insert_mappings(models.Pool, pools)
+        session.bulk_insert_mappings(models.Listener, listeners)
+        session.bulk_insert_mappings(models.Member, members)
+
+    return lb_id
+
+
+def cleanup(session, lb_id):
+    with session.begin():
+        pool_ids = [pool_id for (pool_id,) in session.query(
+            models.Pool.id).filter_by(load_balancer_id=lb_id)]
+        if pool_ids:
+            session.query(models.Member).filter(
+                models.Member.pool_id.in_(pool_ids)).delete(
+                    synchronize_session=False)
+        for model in (models.Listener, models.Pool, models.Amphora,
+                      models.Vip):
+            session.query(model).filter_by(load_balancer_id=lb_id).delete(
+                synchronize_session=False)
+        session.query(models.LoadBalancer).filter_by(id=lb_id).delete(
+            synchronize_session=False)
+
+
+def measure(facade, lb_repo, lb_id, rounds, **kwargs):
+    statements = []
+
+    def count_statement(*args):
+        statements.append(args[2])
+
+    def load():
+        # Use a new session every time, so nothing is loaded from the
+        # identity map of a previous round
+        lb_repo.get(facade.get_session(), id=lb_id, **kwargs)
+
+    engine = facade.get_engine()
+    event.listen(engine, 'before_cursor_execute', count_statement)
+    try:
+        load()
+    finally:
+        event.remove(engine, 'before_cursor_execute', count_statement)
+    return (min(timeit.repeat(load, number=1, repeat=rounds)),
+            len(statements))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        description='Compare the lazy and eager loading of a load balancer '
+                    'graph.')
+    arg_parser.add_argument('--connection', default='sqlite://',
+                            help='SQLAlchemy database connection URL')
+    arg_parser.add_argument('--listeners', type=int, nargs='+',
+                            default=[1, 10, 50],
+                            help='Numbers of listeners (and pools) per load '
+                                 'balancer to measure')
+    arg_parser.add_argument('--members', type=int, nargs='+',
+                            default=[1, 10, 100],
+                            help='Numbers of members per pool to measure')
+    arg_parser.add_argument('--rounds', type=int, default=3,
+                            help='Number of times each load is timed')
+    args = arg_parser.parse_args()
+
+    facade = db_session.EngineFacade(args.connection, autocommit=True)
+    if args.connection.startswith('sqlite'):
+        base_models.BASE.metadata.create_all(facade.get_engine())
+    session = facade.get_session()
+    lb_repo = repositories.LoadBalancerRepository()
+
+    print('{:>9} {:>8} {:>12} {:>8} {:>12} {:>8} {:>8}'.format(
+        'listeners', 'members', 'lazy (ms)', 'queries', 'eager (ms)',
+        'queries', 'speedup'))
+    for listener_count in args.listeners:
+        for member_count in args.members:
+            lb_id = populate(session, listener_count, member_count)
+            try:
+                lazy_time, lazy_queries = measure(
+                    facade, lb_repo, lb_id, args.rounds, query_options=())
+                eager_time, eager_queries = measure(
+                    facade, lb_repo, lb_id, args.rounds)
+            finally:
+                cleanup(session, lb_id)
+            print('{:>9} {:>8} {:>12.2f} {:>8} {:>12.2f} {:>8} '
+                  '{:>7.1f}x'.format(
+                      listener_count, member_count, lazy_time * 1000,
+                      lazy_queries, eager_time * 1000, eager_queries,
+                      lazy_time / eager_time))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+
+"""Compare the per-amphora and bulk health manager load balancer lookups.
+
+This populates a database with a synthetic fleet of load balancers, then
+times AmphoraRepository.get_lb_for_health_update, called once per amphora,
+against AmphoraRepository.get_lbs_for_health_update, called once per batch
+of amphorae, and checks that both return the same details.
+
+By default an in-memory sqlite database is used. To evaluate a query change
+against a real database, point --connection to an empty database that was
+created with "octavia-db-manage upgrade head". The synthetic records are
+removed when the run completes.
+"""
+
+import argparse
+import sys
+import timeit
+
+from oslo_db.sqlalchemy import session as db_session
+from oslo_utils import uuidutils
+
+from octavia.common import constants
+from octavia.db import base_models
+from octavia.db import models
+from octavia.db import repositories
+
+
+def populate(session, lb_count, listener_count, pool_count, member_count,
+             amphorae_per_lb):
+    project_id = uuidutils.generate_uuid()
+    lbs = []
+    amphorae = []
+    listeners = []
+    pools = []
+    members = []
+    for _ in range(lb_count):
+        lb_id = uuidutils.generate_uuid()
+        lbs.append({'id': lb_id, 'project_id': project_id,
+                    'provisioning_status': constants.ACTIVE,
+                    'operating_status': constants.ONLINE,
+                    'enabled': True})
+        for _ in range(amphorae_per_lb):
+            amphorae.append({'id': uuidutils.generate_uuid(),
+                             'load_balancer_id': lb_id,
+                             'compute_id': uuidutils.generate_uuid(),
+                             'status': constants.AMPHORA_ALLOCATED,
+                             'cert_busy': False})
+        for port in range(listener_count):
+            listeners.append({'id': uuidutils.generate_uuid(),
+                              'project_id': project_id,
+                              'load_balancer_id': lb_id,
+                              'protocol': constants.PROTOCOL_HTTP,
+                              'protocol_port': port + 1,
+                              'provisioning_status': constants.ACTIVE,
+                              'operating_status': constants.ONLINE,
+                              'enabled': True})
+        for _ in range(pool_count):
+            pool_id = uuidutils.generate_uuid()
+            pools.append({'id': pool_id, 'project_id': project_id,
+                          'load_balancer_id': lb_id,
+                          'protocol': constants.PROTOCOL_HTTP,
+                          'lb_algorithm':
+                              constants.LB_ALGORITHM_ROUND_ROBIN,
+                          'provisioning_status': constants.ACTIVE,
+                          'operating_status': constants.ONLINE,
+                          'enabled': True})
+            for port in range(member_count):
+                members.append({'id': uuidutils.generate_uuid(),
+                                'project_id': project_id,
+                                'pool_id': pool_id,
+                                'ip_address': '192.0.2.1',
+                                'protocol_port': port + 1,
+                                'provisioning_status': constants.ACTIVE,
+                                'operating_status': constants.ONLINE,
+                                'enabled': True,
+                                'backup': False})
+
+    with session.begin():
+        session.bulk_insert_mappings(models.LoadBalancer, lbs)
+        session.bulk_insert_mappings(models.Amphora, amphorae)
+        session.bulk_insert_mappings(models.Listener, listeners)
+        session.bulk_insert_mappings(models.Pool, pools)
+        session.bulk_insert_mappings(models.Member, members)
+
+    return [lb['id'] for lb in lbs], [amp['id'] for amp in amphorae]
+
+
+def cleanup(session, lb_ids):
+    with session.begin():
+        pool_ids = [pool_id for (pool_id,) in session.query(
+            models.Pool.id).filter(models.Pool.load_balancer_id.in_(lb_ids))]
+        for model, column, ids in (
+                (models.Member, models.Member.pool_id, pool_ids),
+                (models.Pool, models.Pool.load_balancer_id, lb_ids),
+                (models.Listener, models.Listener.load_balancer_id, lb_ids),
+                (models.Amphora, models.Amphora.load_balancer_id, lb_ids),
+                (models.LoadBalancer, models.LoadBalancer.id, lb_ids)):
+            if ids:
+                session.query(model).filter(column.in_(ids)).delete(
+                    synchronize_session=False)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        description='Compare the per-amphora and bulk health manager load '
+                    'balancer lookup queries.')
+    arg_parser.add_argument('--connection', default='sqlite://',
+                            help='SQLAlchemy database connection URL')
+    arg_parser.add_argument('--load-balancers', type=int, default=1000,
+                            help='Number of load balancers to create')
+    arg_parser.add_argument('--amphorae', type=int, default=2,
+                            help='Number of amphorae per load balancer')
+    arg_parser.add_argument('--listeners', type=int, default=2,
+                            help='Number of listeners per load balancer')
+    arg_parser.add_argument('--pools', type=int, default=2,
+                            help='Number of pools per load balancer')
+    arg_parser.add_argument('--members', type=int, default=10,
+                            help='Number of members per pool')
+    arg_parser.add_argument('--batch-size', type=int, default=100,
+                            help='Number of amphorae per bulk lookup')
+    arg_parser.add_argument('--rounds', type=int, default=3,
+                            help='Number of times each lookup is timed')
+    args = arg_parser.parse_args()
+
+    facade = db_session.EngineFacade(args.connection, autocommit=True)
+    if args.connection.startswith('sqlite'):
+        base_models.BASE.metadata.create_all(facade.get_engine())
+    session = facade.get_session()
+    amp_repo = repositories.AmphoraRepository()
+
+    lb_ids, amp_ids = populate(session, args.load_balancers, args.listeners,
+                               args.pools, args.members, args.amphorae)
+    batches = [amp_ids[i:i + args.batch_size]
+               for i in range(0, len(amp_ids), args.batch_size)]
+
+    try:
+        single = {amp_id: amp_repo.get_lb_for_health_update(session, amp_id)
+                  for amp_id in amp_ids}
+        bulk = {}
+        for batch in batches:
+            bulk.update(amp_repo.get_lbs_for_health_update(session, batch))
+        if single != bulk:
+            print('ERROR: The per-amphora and bulk lookups returned '
+                  'different load balancer details.')
+            return 1
+
+        def per_amphora():
+            for amp_id in amp_ids:
+                amp_repo.get_lb_for_health_update(session, amp_id)
+
+        def per_batch():
+            for batch in batches:
+                amp_repo.get_lbs_for_health_update(session, batch)
+
+        single_time = min(timeit.repeat(per_amphora, number=1,
+                                        repeat=args.rounds))
+        bulk_time = min(timeit.repeat(per_batch, number=1,
+                                      repeat=args.rounds))
+    finally:
+        cleanup(session, lb_ids)
+
+    print('Amphorae: {amps}, listeners/LB: {listeners}, pools/LB: {pools}, '
+          'members/pool: {members}, batch size: {batch}'.format(
+              amps=len(amp_ids), listeners=args.listeners,
+              pools=args.pools, members=args.members,
+              batch=args.batch_size))
+    print('get_lb_for_health_update:  {:8.3f}s ({:.3f}ms/amphora)'.format(
+        single_time, single_time * 1000 / len(amp_ids)))
+    print('get_lbs_for_health_update: {:8.3f}s ({:.3f}ms/amphora)'.format(
+        bulk_time, bulk_time * 1000 / len(amp_ids)))
+    print('Speedup: {:.1f}x'.format(single_time / bulk_time))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())